@@ -1,138 +1,185 @@
-from datetime import datetime, timedelta
-import calendar
+from datetime import datetime
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from moduls.MarketData.ExchangeCalendar import CALENDAR_CODES, calendar_code_for, calendar_for, get_calendar
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Oltre questo numero di giorni di mercato mancanti lo stato non distingue più
+MAX_MARKET_DAYS_DIFF = 10
+
 
 class SmartStatusPython:
     """Implementazione Python della logica SmartStatus per consistenza"""
-    
+
     def __init__(self):
-        pass
-    
-    def is_market_day(self, date):
-        """Verifica se una data è un giorno di mercato (Lun-Ven, esclude weekend)"""
-        day = date.weekday()  # 0=Lunedì, 6=Domenica
-        
-        # Sabato=5, Domenica=6
-        if day >= 5:
-            return False
-        
-        # Aggiungi festività se necessario
-        holidays = self.get_market_holidays(date.year)
-        date_str = date.strftime('%Y-%m-%d')
-        
-        if date_str in holidays:
-            return False
-        
-        return True
-    
-    def get_market_holidays(self, year):
-        """Ottiene le principali festività del mercato USA per un anno"""
-        return [
-            f"{year}-01-01",  # New Year's Day
-            f"{year}-07-04",  # Independence Day  
-            f"{year}-12-25",  # Christmas Day
-            # Aggiungi altre festività se necessario
-        ]
-    
-    def get_last_expected_market_day(self):
-        """Calcola l'ultimo giorno di mercato atteso"""
-        now = datetime.now()
-        current_hour = now.hour
-        
-        # Il mercato USA chiude alle 22:00 ora italiana (16:00 EST + 6 ore)
-        # Se è dopo le 22:00 e oggi è un giorno di mercato, i dati di oggi potrebbero essere disponibili
-        if current_hour >= 22 and self.is_market_day(now):
-            return now
-        
-        # Altrimenti cerca l'ultimo giorno di mercato precedente
-        check_date = now - timedelta(days=1)
-        
-        attempts = 0
-        while not self.is_market_day(check_date) and attempts < 10:
-            check_date -= timedelta(days=1)
-            attempts += 1
-        
-        return check_date
-    
-    def calculate_smart_status(self, last_data_date_str):
+        # Esiti per calendario, validi finché non cambia l'ultima sessione attesa:
+        # {codice: {'session': date, 'results': {data: esito}}}
+        self._batch_cache = {}
+        self._cache_lock = threading.Lock()
+
+    def is_market_day(self, date, exchange=None, ticker=None):
+        """Verifica se una data è una sessione di borsa (esclude weekend e festività della borsa)"""
+        return calendar_for(exchange, ticker).is_session(date)
+
+    def get_market_holidays(self, year, exchange=None, ticker=None):
+        """Festività infrasettimanali della borsa per un anno (YYYY-MM-DD)"""
+        return calendar_for(exchange, ticker).holidays(year)
+
+    def get_last_expected_market_day(self, exchange=None, ticker=None, now=None):
+        """
+        Calcola l'ultimo giorno di mercato atteso: oggi se la borsa ha già
+        chiuso (orario locale della borsa, chiusure anticipate comprese),
+        altrimenti la sessione precedente.
+        """
+        last_session = calendar_for(exchange, ticker).last_expected_session(now)
+        return datetime(last_session.year, last_session.month, last_session.day)
+
+    def calculate_smart_status(self, last_data_date_str, exchange=None, ticker=None, now=None):
         """
         Calcola lo status intelligente basato sull'ultimo dato disponibile
-        Replica ESATTAMENTE la logica JavaScript
+        Replica la logica JavaScript usando il calendario della borsa del ticker
         """
-        if not last_data_date_str or last_data_date_str == 'N/A':
-            return {
-                'needs_update': True,
-                'status_text': '❌ Nessun dato',
-                'tooltip': 'Nessun dato disponibile'
-            }
-        
-        try:
-            # Parsing flessibile della data (stesso del JS)
-            if '/' in last_data_date_str:
-                # Formato DD/MM/YYYY (italiano)
-                parts = last_data_date_str.split('/')
-                last_data_date = datetime(int(parts[2]), int(parts[1]), int(parts[0]))
-            elif '-' in last_data_date_str:
-                # Formato YYYY-MM-DD (ISO)
-                last_data_date = datetime.strptime(last_data_date_str, '%Y-%m-%d')
-            else:
-                raise ValueError('Formato data non riconosciuto')
-            
-            last_expected_day = self.get_last_expected_market_day()
-            
-            # Confronta solo le date (ignora l'ora)
-            last_data_date_only = last_data_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            last_expected_day_only = last_expected_day.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            diff_days = (last_expected_day_only - last_data_date_only).days
-            
-            # Calcola quanti giorni di mercato sono passati
-            market_days_diff = 0
-            check_date = last_data_date_only + timedelta(days=1)
-            
-            while check_date <= last_expected_day_only and market_days_diff < 10:
-                if self.is_market_day(check_date):
-                    market_days_diff += 1
-                check_date += timedelta(days=1)
-            
-            last_data_formatted = last_data_date.strftime('%d/%m/%Y')
-            last_expected_formatted = last_expected_day.strftime('%d/%m/%Y')
-            
-            if diff_days <= 0:
-                # Dati aggiornati
-                return {
-                    'needs_update': False,
-                    'status_text': '✅ Aggiornato',
-                    'tooltip': f'Ultimo dato: {last_data_formatted} (aggiornato)'
-                }
-            elif market_days_diff == 1:
-                # Manca 1 giorno di mercato
-                return {
-                    'needs_update': True,
-                    'status_text': '⏰ 1 giorno',
-                    'tooltip': f'Ultimo dato: {last_data_formatted}\nAtteso: {last_expected_formatted}'
-                }
-            elif market_days_diff <= 3:
-                # Mancano pochi giorni di mercato
-                return {
+        return self.calculate_smart_status_batch([last_data_date_str], [exchange], [ticker], now=now)[0]
+
+    def calculate_smart_status_batch(self, dates, exchanges=None, tickers=None, now=None):
+        """
+        Status di molti ticker in una volta.
+
+        L'ultima sessione attesa viene calcolata una volta per borsa e i giorni
+        di mercato mancanti con un'unica ricerca vettoriale sulle date distinte.
+        Gli esiti restano in cache finché l'ultima sessione attesa della borsa
+        non cambia (cioè fino alla prossima chiusura).
+
+        Args:
+            dates: ultime date disponibili (YYYY-MM-DD, DD/MM/YYYY, None o 'N/A')
+            exchanges: info.exchange per ticker (stessa lunghezza di dates, opzionale)
+            tickers: simboli per ticker (per il suffisso della borsa, opzionale)
+            now: istante di riferimento (default: adesso)
+
+        Returns:
+            list: un dizionario {'needs_update', 'status_text', 'tooltip'} per data
+        """
+        dates = list(dates)
+        exchanges = list(exchanges) if exchanges is not None else [None] * len(dates)
+        tickers = list(tickers) if tickers is not None else [None] * len(dates)
+
+        # Raggruppa per calendario: codice -> date distinte
+        codes = [calendar_code_for(exchange, ticker) for exchange, ticker in zip(exchanges, tickers)]
+        keys = [date_str if isinstance(date_str, str) else None for date_str in dates]
+        wanted = {}
+        for code, key in zip(codes, keys):
+            wanted.setdefault(code, set()).add(key)
+
+        resolved = {code: self._resolve_calendar(code, code_keys, now) for code, code_keys in wanted.items()}
+        return [dict(resolved[code][key]) for code, key in zip(codes, keys)]
+
+    def _resolve_calendar(self, code, keys, now):
+        """Esiti per le date di una borsa: dalla cache della sessione corrente o calcolati in blocco"""
+        calendar = get_calendar(code)
+        last_session = calendar.last_expected_session(now)
+
+        with self._cache_lock:
+            cached = self._batch_cache.get(code)
+            if cached is None or cached['session'] != last_session:
+                cached = self._batch_cache[code] = {'session': last_session, 'results': {}}
+            results = cached['results']
+            missing = [key for key in keys if key not in results]
+
+        if missing:
+            computed = self._evaluate(calendar, last_session, missing)
+            with self._cache_lock:
+                results.update(computed)
+        return {key: results[key] for key in keys}
+
+    def _evaluate(self, calendar, last_session, keys):
+        """Valuta in blocco le date distinte di una borsa rispetto all'ultima sessione attesa"""
+        results = {}
+        valid = [key for key in keys if key and key != 'N/A']
+        for key in keys:
+            if not key or key == 'N/A':
+                results[key] = {
                     'needs_update': True,
-                    'status_text': f'⏰ {market_days_diff} giorni',
-                    'tooltip': f'Ultimo dato: {last_data_formatted}\nAtteso: {last_expected_formatted}\n{market_days_diff} giorni di mercato mancanti'
+                    'status_text': '❌ Nessun dato',
+                    'tooltip': 'Nessun dato disponibile'
                 }
-            else:
-                # Molto in ritardo
-                return {
+        if not valid:
+            return results
+
+        # Parsing flessibile della data (stesso del JS): DD/MM/YYYY (italiano) o YYYY-MM-DD (ISO)
+        raw = pd.Series(valid, dtype=object)
+        italian = raw.str.contains('/', regex=False)
+        parsed = pd.to_datetime(raw.str.slice(0, 10).where(~italian), format='%Y-%m-%d', errors='coerce')
+        parsed = parsed.fillna(pd.to_datetime(raw.where(italian), format='%d/%m/%Y', errors='coerce'))
+
+        last_expected_day = datetime(last_session.year, last_session.month, last_session.day)
+        days = parsed.to_numpy(dtype='datetime64[D]')
+        ok = ~np.isnat(days)
+
+        diff_days = (np.datetime64(last_session, 'D') - days).astype('int64')
+        market_days_diff = np.zeros(len(days), dtype='int64')
+        # Giorni di mercato passati: ricerca binaria vettoriale sulle sessioni precalcolate
+        market_days_diff[ok] = np.minimum(calendar.count_sessions_between(days[ok], last_session), MAX_MARKET_DAYS_DIFF)
+
+        for i, key in enumerate(valid):
+            if not ok[i]:
+                logger.warning(f"Errore parsing data: {key}, errore: formato data non riconosciuto")
+                results[key] = {
                     'needs_update': True,
-                    'status_text': f'❌ {market_days_diff} giorni',
-                    'tooltip': f'Ultimo dato: {last_data_formatted}\nAtteso: {last_expected_formatted}\n{market_days_diff} giorni di mercato mancanti'
+                    'status_text': '⚠️ Errore data',
+                    'tooltip': f'Errore nel parsing della data: {key}'
                 }
-                
-        except Exception as error:
-            logger.warning(f"Errore parsing data: {last_data_date_str}, errore: {error}")
+                continue
+            results[key] = self._status_for(int(diff_days[i]), int(market_days_diff[i]),
+                                            parsed.iloc[i].to_pydatetime(), last_expected_day)
+        return results
+
+    def session_window(self, codes=None):
+        """
+        Ultima sessione attesa per ogni borsa (YYYY-MM-DD): cambia solo alle
+        chiusure, utile come chiave di cache/ETag per gli esiti di SmartStatus.
+        """
+        codes = codes or CALENDAR_CODES
+        return [f"{code}:{get_calendar(code).last_expected_session()}" for code in codes]
+
+    def _status_for(self, diff_days, market_days_diff, last_data_date, last_expected_day):
+        """Testo e tooltip dello stato dati i giorni di calendario e di mercato mancanti"""
+        last_data_formatted = last_data_date.strftime('%d/%m/%Y')
+        last_expected_formatted = last_expected_day.strftime('%d/%m/%Y')
+
+        if diff_days <= 0 or market_days_diff == 0:
+            # Dati aggiornati (anche se nel frattempo ci sono stati solo weekend o festività)
+            return {
+                'needs_update': False,
+                'status_text': '✅ Aggiornato',
+                'tooltip': f'Ultimo dato: {last_data_formatted} (aggiornato)'
+            }
+        elif market_days_diff == 1:
+            # Manca 1 giorno di mercato
+            return {
+                'needs_update': True,
+                'status_text': '⏰ 1 giorno',
+                'tooltip': f'Ultimo dato: {last_data_formatted}\nAtteso: {last_expected_formatted}'
+            }
+        elif market_days_diff <= 3:
+            # Mancano pochi giorni di mercato
+            return {
+                'needs_update': True,
+                'status_text': f'⏰ {market_days_diff} giorni',
+                'tooltip': f'Ultimo dato: {last_data_formatted}\nAtteso: {last_expected_formatted}\n{market_days_diff} giorni di mercato mancanti'
+            }
+        else:
+            # Molto in ritardo
             return {
                 'needs_update': True,
-                'status_text': '⚠️ Errore data',
-                'tooltip': f'Errore nel parsing della data: {last_data_date_str}'
+                'status_text': f'❌ {market_days_diff} giorni',
+                'tooltip': f'Ultimo dato: {last_data_formatted}\nAtteso: {last_expected_formatted}\n{market_days_diff} giorni di mercato mancanti'
             }
 
 # ✅ CREA istanza globale
-smart_status = SmartStatusPython()
\ No newline at end of file
+smart_status = SmartStatusPython()
@@ -9,54 +9,155 @@ Funzionalità:
 - Download storico completo
 - Due versioni per ticker: adjusted e notAdjusted
 - Aggiornamenti incrementali
+- Barre settimanali e mensili mantenute incrementalmente (vedi Rollups)
 - Gestione metadati
+- Importazione in streaming di liste ticker da CSV
 - Configurazione ticker
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 
-import requests
+from moduls.MarketData import Rollups, SegmentStore, TickerListImport
+from moduls.MarketData.ExchangeCalendar import calendar_for, exchange_from_meta
+from moduls.MarketData.MarketDataProvider import get_market_data_provider
+from moduls.MarketData.TickerInfoCache import TickerInfoCache
+from moduls.Core.EventBus import EventBus
+from moduls.Core.DataVersions import DataVersions
+from moduls.Core.FileLocks import LockManager
+from moduls.Core.AtomicFiles import atomic_write_json, atomic_write_many_json
+from moduls.Core.PerfMetrics import metrics, timed
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Variazione relativa del fattore di aggiustamento della barra di sovrapposizione
+# oltre la quale si considera avvenuto uno split o un dividendo
+ADJUSTMENT_TOLERANCE = 1e-6
+
+# Barre salvate riscaricate a ogni aggiornamento incrementale per intercettare
+# barre parziali e revisioni del provider
+OVERLAP_BARS = 5
+
+# Finestra (giorni) controllata di default dalla riparazione dei buchi
+GAP_LOOKBACK_DAYS = 365
+
+# Buchi separati da meno sessioni di così vengono scaricati con una sola richiesta
+GAP_MERGE_SESSIONS = 5
+
+# Download in parallelo accodati dopo un'importazione CSV
+DOWNLOAD_WORKERS = 4
+
+# Ticker scaricati con una sola chiamata provider.fetch_batch (limita la memoria
+# occupata dagli storici in attesa di essere salvati)
+DOWNLOAD_BATCH_SIZE = 50
+
+def _ffill_inplace(values):
+    """Forward-fill dei NaN su un array 1D, ritorna il numero di valori mancanti"""
+    missing = np.isnan(values)
+    count = int(missing.sum())
+    if count:
+        idx = np.where(missing, 0, np.arange(len(values)))
+        np.maximum.accumulate(idx, out=idx)
+        values[:] = values[idx]
+    return count
+
+
+def _frame_from_block(block, block_columns, order, other_values):
+    """
+    DataFrame che riusa il blocco 2D dei prezzi e le colonne esistenti senza copie.
+    Le colonne consecutive del blocco diventano una vista unica (block[i:j].T).
+    """
+    index = pd.RangeIndex(block.shape[1])
+    parts = []
+    run = []
+    
+    def flush_run():
+        if run:
+            rows = [block_columns.index(col) for col in run]
+            parts.append(pd.DataFrame(block[rows[0]:rows[-1] + 1].T, columns=list(run), index=index, copy=False))
+            run.clear()
+    
+    for col in order:
+        if col in block_columns:
+            if run and block_columns.index(col) != block_columns.index(run[-1]) + 1:
+                flush_run()
+            run.append(col)
+        else:
+            flush_run()
+            parts.append(pd.Series(other_values[col], index=index, name=col, copy=False).to_frame())
+    flush_run()
+    
+    return pd.concat(parts, axis=1)
+
+
 class TickerDataManager:
     """Gestore completo per dati ticker Yahoo Finance"""
     
-    def __init__(self, base_dir='resources'):
+    def __init__(self, base_dir='resources', provider=None, price_dtype=np.float64, versions=None):
         """
         Inizializza il manager
         
         Args:
             base_dir (str): Directory base per salvare i dati
+            provider (MarketDataProvider): Fonte dati di mercato
+                (default: provider da MARKET_DATA_PROVIDER, altrimenti Yahoo Finance)
+            price_dtype: dtype dei prezzi processati (np.float32 dimezza la memoria)
+            versions (DataVersions): versioni dei dati per le risposte condizionali
+                (condivise con TechnicalAnalysisManager nell'app)
         """
         self.base_dir = Path(base_dir)
         self.data_dir = self.base_dir / 'data' / 'daily'
         self.data_dir_not_adj = self.base_dir / 'data' / 'daily_notAdjusted'
+        # Barre settimanali/mensili: data/weekly, data/weekly_notAdjusted, data/monthly, ...
+        self.rollup_dirs = [Rollups.rollup_dir(folder, timeframe)
+                            for timeframe in Rollups.ROLLUP_TIMEFRAMES
+                            for folder in (self.data_dir, self.data_dir_not_adj)]
         self.config_file = self.base_dir / 'config' / 'tickers.json'
         self.meta_dir = self.base_dir / 'meta'
+        self.cache_dir = self.base_dir / 'cache'
+        self.price_dtype = np.dtype(price_dtype)
+        
+        # Fonte dati (Yahoo Finance, sintetica, ...)
+        self.provider = provider or get_market_data_provider()
+        
+        # Notifiche verso chi è in ascolto (es. canale SSE dell'app):
+        # 'ticker_updated' {ticker, result}, 'tickers_changed' {added, removed}
+        self.events = EventBus()
+        
+        # Versione dei prezzi per ticker e della configurazione, incrementate a ogni scrittura
+        self.versions = versions or DataVersions()
+        
+        # Lock per ticker e per la configurazione, validi anche tra processi
+        self.locks = LockManager(self.base_dir / 'locks')
+        
+        # Compattazione dei segmenti delta in background (un solo worker, creato al primo uso)
+        self._compactor = None
+        
+        # Download accodati in background (es. dopo un'importazione CSV, creati al primo uso)
+        self._downloader = None
+        self._downloads = []
+        
+        # Cache persistente delle info ticker (evita lookup di rete ripetuti)
+        # (le voci seminate da CSV sono completate in background e riportate nei metadati)
+        self.info_cache = TickerInfoCache(self.cache_dir / 'ticker_info.json', self._fetch_ticker_info,
+                                          on_refresh=self._on_ticker_info_refreshed)
         
         # Assicura che le directory esistano
         self._ensure_directories()
-        
-        # Setup sessione con headers personalizzati
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
     
     def _ensure_directories(self):
         """Crea le directory necessarie se non esistono"""
         directories = [
             self.data_dir,
             self.data_dir_not_adj,
+            *self.rollup_dirs,
             self.config_file.parent,
             self.meta_dir
         ]
@@ -113,33 +214,37 @@ class TickerDataManager:
     def save_ticker_config(self, config):
             """Salva la configurazione dei ticker con gestione errori"""
             try:
-                # Assicura che la directory esista
-                self.config_file.parent.mkdir(parents=True, exist_ok=True)
-                
                 config['last_updated'] = datetime.now().isoformat()
                 
-                # Scrivi in un file temporaneo prima
-                temp_file = self.config_file.with_suffix('.json.tmp')
-                
-                with open(temp_file, 'w') as f:
-                    json.dump(config, f, indent=2)
-                
-                # Sposta il file temporaneo su quello finale (operazione atomica)
-                temp_file.replace(self.config_file)
+                # File temporaneo univoco + rename atomico
+                with self.locks.config():
+                    atomic_write_json(self.config_file, config)
+                self.versions.bump_config()
                 
                 logger.info(f"Configurazione salvata con successo: {len(config.get('tickers', []))} ticker")
                 
             except Exception as e:
                 logger.error(f"Errore nel salvare configurazione: {e}")
-                # Rimuovi il file temporaneo se esiste
-                temp_file = self.config_file.with_suffix('.json.tmp')
-                if temp_file.exists():
-                    try:
-                        temp_file.unlink()
-                    except:
-                        pass
                 raise
     
+    def update_ticker_config(self, update):
+        """
+        Read-modify-write della configurazione sotto lock.
+        
+        Args:
+            update: funzione che modifica il dict di configurazione e ritorna
+                True se va salvato
+        
+        Returns:
+            il valore restituito da update
+        """
+        with self.locks.config():
+            config = self.load_ticker_config()
+            changed = update(config)
+            if changed:
+                self.save_ticker_config(config)
+            return changed
+    
     def load_ticker_meta(self, ticker):
         """Carica i metadati di un ticker con gestione errori migliorata"""
         meta_file = self.meta_dir / f"{ticker}.json"
@@ -174,179 +279,75 @@ class TickerDataManager:
         """Salva i metadati di un ticker con gestione errori"""
         meta_file = self.meta_dir / f"{ticker}.json"
         try:
-            # Assicura che la directory esista
-            self.meta_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Scrivi in un file temporaneo prima
-            temp_file = meta_file.with_suffix('.json.tmp')
-            
-            with open(temp_file, 'w') as f:
-                json.dump(meta_data, f, indent=2)
-            
-            # Sposta il file temporaneo su quello finale
-            temp_file.replace(meta_file)
+            # File temporaneo univoco + rename atomico
+            with self.locks.ticker(ticker):
+                atomic_write_json(meta_file, meta_data)
+            self.versions.bump_ticker(ticker)
             
             logger.debug(f"Metadati salvati per {ticker}")
             
         except Exception as e:
             logger.error(f"Errore nel salvare metadati per {ticker}: {e}")
-            # Rimuovi il file temporaneo se esiste
-            temp_file = meta_file.with_suffix('.json.tmp')
-            if temp_file.exists():
-                try:
-                    temp_file.unlink()
-                except:
-                    pass
             raise
     
     def get_ticker_info(self, ticker):
-        """Ottiene informazioni base su un ticker da Yahoo Finance"""
+        """Ottiene informazioni base su un ticker (dalla cache, altrimenti dal provider)"""
         try:
-            logger.info(f"Tentativo di ottenere info per {ticker}")
-            
-            # Non usare sessione personalizzata - yfinance gestisce la propria
-            stock = yf.Ticker(ticker)
-            
-            # Test rapido per verificare che il ticker esista
-            try:
-                test_data = stock.history(period="1d")
-                if test_data.empty:
-                    logger.warning(f"Nessun dato storico per {ticker} - ticker potrebbe non esistere")
-                    return None
-            except Exception as e:
-                logger.warning(f"Errore nel test dati storici per {ticker}: {e}")
-            
-            info = stock.info
-            logger.info(f"Info ottenute per {ticker}: {len(info)} campi")
-            
-            if not info or len(info) < 5:
-                logger.warning(f"Info insufficienti per {ticker}: {info}")
-                return None
-            
-            result = {
-                'symbol': ticker,
-                'name': info.get('longName') or info.get('shortName') or ticker,
-                'sector': info.get('sector', 'N/A'),
-                'industry': info.get('industry', 'N/A'),
-                'currency': info.get('currency', 'USD'),
-                'exchange': info.get('exchange', 'N/A'),
-                'country': info.get('country', 'N/A')
-            }
-            
-            logger.info(f"Info estratte per {ticker}: {result['name']}")
-            return result
-            
+            return self.info_cache.get(ticker)
         except Exception as e:
             logger.error(f"Errore nel recuperare info per {ticker}: {e}")
-            
-            # Metodo alternativo - solo download dati
-            try:
-                logger.info(f"Tentativo metodo alternativo per {ticker}")
-                test_download = yf.download(ticker, period="5d", progress=False, auto_adjust=False)
-                
-                if not test_download.empty:
-                    logger.info(f"Metodo alternativo funziona per {ticker}")
-                    return {
-                        'symbol': ticker,
-                        'name': f"{ticker} (verificato)",
-                        'sector': 'N/A',
-                        'industry': 'N/A',
-                        'currency': 'USD',
-                        'exchange': 'N/A',
-                        'country': 'N/A'
-                    }
-                else:
-                    return None
-                    
-            except Exception as e2:
-                logger.error(f"Metodo alternativo fallito per {ticker}: {e2}")
-                return None
+            return None
+    
+    def _fetch_ticker_info(self, ticker):
+        """Lookup diretto sul provider, usato dalla cache per voci mancanti o scadute"""
+        try:
+            return self.provider.fetch_info(ticker)
+        except Exception as e:
+            logger.error(f"Errore nel recuperare info per {ticker}: {e}")
+            return None
     
+    def _on_ticker_info_refreshed(self, ticker, info):
+        """Riporta nei metadati le info aggiornate in background dalla cache"""
+        # Sotto il lock del ticker: un primo download in corso salva i suoi
+        # metadati prima, e queste info li completano subito dopo
+        with self.locks.ticker(ticker):
+            meta = self.load_ticker_meta(ticker)
+            if not meta or meta.get('info') == info:
+                return
+            meta['info'] = info
+            self.save_ticker_meta(ticker, meta)
+    
+    @timed('download')
     def download_ticker_data(self, ticker, start_date=None, end_date=None):
-        """Scarica dati di un ticker da Yahoo Finance"""
+        """Scarica dati di un ticker dal provider dati configurato"""
         try:
-            logger.info(f"Download dati per {ticker}, periodo: {start_date} - {end_date}")
+            logger.info(f"Download dati per {ticker} ({self.provider.name}), periodo: {start_date} - {end_date}")
             
-            # Prova prima con yf.download (più affidabile)
-            # IMPORTANTE: auto_adjust=False per avere sia Close che Adj Close
-            try:
-                if start_date is None:
-                    logger.info(f"Download completo storico per {ticker}")
-                    data = yf.download(ticker, period="max", progress=False, auto_adjust=False)
-                else:
-                    logger.info(f"Download incrementale per {ticker} dal {start_date}")
-                    data = yf.download(ticker, start=start_date, end=end_date, progress=False, auto_adjust=False)
-                
-                if not data.empty:
-                    logger.info(f"yf.download funziona per {ticker}: {len(data)} record")
-                    # Reset index per avere Date come colonna
-                    data.reset_index(inplace=True)
-                    data['Date'] = data['Date'].dt.strftime('%Y-%m-%d')
-                    
-                    # IMPORTANTE: Gestisci MultiIndex nelle colonne
-                    if isinstance(data.columns, pd.MultiIndex):
-                        logger.info(f"Rilevato MultiIndex nelle colonne per {ticker}")
-                        # Appiattisci le colonne mantenendo solo il primo livello
-                        data.columns = [col[0] if col[0] != '' else col[1] for col in data.columns]
-                        logger.info(f"Colonne appiattite per {ticker}: {list(data.columns)}")
-                    
-                    # Log colonne disponibili per debug
-                    logger.info(f"Colonne disponibili per {ticker}: {list(data.columns)}")
-                    
-                    return data
-                else:
-                    logger.warning(f"yf.download non ha restituito dati per {ticker}")
-                    
-            except Exception as e:
-                logger.warning(f"yf.download fallito per {ticker}: {e}, provo metodo Ticker...")
-            
-            # Fallback al metodo Ticker
-            # Non usare sessione personalizzata - yfinance gestisce la propria
-            stock = yf.Ticker(ticker)
-            
-            if start_date is None:
-                start_date = "1900-01-01"
-                logger.info(f"Download storico completo per {ticker} dal {start_date}")
-            
-            if end_date is None:
-                end_date = datetime.now().strftime("%Y-%m-%d")
-                
-            logger.info(f"Usando Ticker.history per {ticker}: {start_date} - {end_date}")
-            
-            # auto_adjust=False per avere sia Close che Adj Close
-            data = stock.history(start=start_date, end=end_date, auto_adjust=False)
+            data = self.provider.fetch_history(ticker, start_date=start_date, end_date=end_date)
             
-            if data.empty:
+            if data is None or data.empty:
                 logger.warning(f"Nessun dato trovato per {ticker}")
+                metrics.increment('download_empty')
                 return None
-                
-            # Reset index per avere Date come colonna
-            data.reset_index(inplace=True)
-            data['Date'] = data['Date'].dt.strftime('%Y-%m-%d')
-            
-            # IMPORTANTE: Gestisci MultiIndex nelle colonne
-            if isinstance(data.columns, pd.MultiIndex):
-                logger.info(f"Rilevato MultiIndex nelle colonne per {ticker} (Ticker.history)")
-                # Appiattisci le colonne mantenendo solo il primo livello
-                data.columns = [col[0] if col[0] != '' else col[1] for col in data.columns]
-                logger.info(f"Colonne appiattite per {ticker}: {list(data.columns)}")
             
-            # Log colonne per debug
-            logger.info(f"Colonne Ticker.history per {ticker}: {list(data.columns)}")
-            
-            logger.info(f"Dati scaricati per {ticker}: {len(data)} record, dal {data['Date'].iloc[0]} al {data['Date'].iloc[-1]}")
             return data
             
         except Exception as e:
             logger.error(f"Errore completo nel download dati per {ticker}: {e}")
+            metrics.increment('download_errors')
             return None
     
+    @timed('process')
     def process_ticker_data(self, data, ticker):
         """
         Processa i dati del ticker creando due versioni:
         1. notAdjusted: prezzi originali
         2. adjusted: tutti i prezzi OHLC aggiustati usando il rapporto Adj Close/Close
         
+        Lavora su un unico blocco NumPy: il rapporto viene calcolato una volta e
+        i prezzi aggiustati sono scritti direttamente in un array preallocato.
+        La validazione (nulli, zeri, rapporti anomali) avviene nello stesso passaggio.
+        
         Args:
             data (DataFrame): Dati grezzi da Yahoo Finance
             ticker (str): Simbolo del ticker
@@ -355,131 +356,91 @@ class TickerDataManager:
             tuple: (data_not_adjusted, data_adjusted)
         """
         try:
-            logger.info(f"Processamento dati per {ticker}: {len(data)} record")
-            logger.info(f"Colonne disponibili: {list(data.columns)}")
-            
-            # Crea copia per versione non aggiustata
-            data_not_adjusted = data.copy()
-            
-            # Crea versione aggiustata
-            data_adjusted = data.copy()
-            
-            # Controlla se abbiamo la colonna Adj Close
-            # Prima verifica se abbiamo MultiIndex e gestiscilo
+            # Appiattisci eventuali colonne MultiIndex mantenendo solo il primo livello
             if isinstance(data.columns, pd.MultiIndex):
-                logger.info(f"Rilevato MultiIndex nelle colonne durante processamento per {ticker}")
-                # Appiattisci le colonne mantenendo solo il primo livello
                 data.columns = [col[0] if col[0] != '' else col[1] for col in data.columns]
-                logger.info(f"Colonne appiattite durante processamento: {list(data.columns)}")
             
-            # Aggiorna le copie dopo l'eventuale appiattimento
-            data_not_adjusted = data.copy()
-            data_adjusted = data.copy()
-            
-            if 'Adj Close' in data.columns:
-                logger.info(f"Trovata colonna 'Adj Close' per {ticker} - procedo con aggiustamento")
-                
-                # Verifica che non ci siano valori nulli in Close o Adj Close
-                close_nulls = data['Close'].isnull().sum()
-                adj_close_nulls = data['Adj Close'].isnull().sum()
-                
-                # Converti in scalare se necessario (gestisce casi MultiIndex residui)
-                if hasattr(close_nulls, 'iloc'):
-                    close_nulls = close_nulls.iloc[0] if len(close_nulls) > 0 else close_nulls
-                if hasattr(adj_close_nulls, 'iloc'):
-                    adj_close_nulls = adj_close_nulls.iloc[0] if len(adj_close_nulls) > 0 else adj_close_nulls
-                
-                logger.info(f"Valori nulli trovati in {ticker}: Close={close_nulls}, Adj Close={adj_close_nulls}")
-                
-                if close_nulls > 0:
-                    logger.warning(f"Trovati {close_nulls} valori nulli in Close per {ticker}")
-                    # Riempi valori nulli con il valore precedente (nuovo metodo pandas)
-                    data_adjusted['Close'] = data_adjusted['Close'].ffill()
-                    data_not_adjusted['Close'] = data_not_adjusted['Close'].ffill()
-                
-                if adj_close_nulls > 0:
-                    logger.warning(f"Trovati {adj_close_nulls} valori nulli in Adj Close per {ticker}")
-                    data_adjusted['Adj Close'] = data_adjusted['Adj Close'].ffill()
-                
-                # Evita divisione per zero
-                close_zero = (data_adjusted['Close'] == 0).sum()
-                
-                # Converti in scalare se necessario
-                if hasattr(close_zero, 'iloc'):
-                    close_zero = close_zero.iloc[0] if len(close_zero) > 0 else close_zero
-                
-                if close_zero > 0:
-                    logger.warning(f"Trovati {close_zero} valori zero in Close per {ticker}")
-                    # Sostituisci zero con un valore molto piccolo
-                    data_adjusted['Close'] = data_adjusted['Close'].replace(0, 0.0001)
-                
-                # Calcola il rapporto di aggiustamento
-                # rapporto = Adj Close / Close
-                adjustment_ratio = data_adjusted['Adj Close'] / data_adjusted['Close']
-                
-                # Controlla se ci sono rapporti anomali (probabilmente errori nei dati)
-                anomal_ratios = ((adjustment_ratio < 0.01) | (adjustment_ratio > 100)).sum()
-                
-                # Converti in scalare se necessario
-                if hasattr(anomal_ratios, 'iloc'):
-                    anomal_ratios = anomal_ratios.iloc[0] if len(anomal_ratios) > 0 else anomal_ratios
+            columns = list(data.columns)
+            n = len(data)
+            price_dtype = self.price_dtype
+            has_adj_close = 'Adj Close' in columns
+            price_columns = [col for col in columns if col in ('Open', 'High', 'Low', 'Close')]
+            close_row = price_columns.index('Close')
+            
+            # Blocco unico dei prezzi grezzi (float64 per il calcolo del rapporto)
+            raw = np.empty((len(price_columns), n), dtype=np.float64)
+            for i, col in enumerate(price_columns):
+                raw[i] = data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            close = raw[close_row]
+            
+            issues = {'close_nulls': _ffill_inplace(close)}
+            
+            # Prezzi aggiustati in un array preallocato: OHLC (nell'ordine originale) + Adj Close
+            adjusted = np.empty((len(price_columns) + 1, n), dtype=price_dtype)
+            adj_close = adjusted[-1]
+            
+            if has_adj_close:
+                # Il buffer del rapporto contiene prima Adj Close, poi Adj Close / Close
+                ratio = np.empty(n, dtype=np.float64)
+                ratio[:] = data['Adj Close'].to_numpy(dtype=np.float64, na_value=np.nan)
+                issues['adj_close_nulls'] = _ffill_inplace(ratio)
+                adj_close[:] = ratio
                 
-                if anomal_ratios > 0:
-                    logger.warning(f"Trovati {anomal_ratios} rapporti di aggiustamento anomali per {ticker}")
-                    # Limita i rapporti estremi
-                    adjustment_ratio = adjustment_ratio.clip(0.01, 100)
+                # Rapporto di aggiustamento = Adj Close / Close (evita divisione per zero)
+                zero_close = close == 0
+                issues['close_zero'] = int(zero_close.sum())
+                np.divide(ratio, np.where(zero_close, 0.0001, close), out=ratio)
                 
-                # Aggiusta tutti i prezzi OHLC usando il rapporto
-                price_columns = ['Open', 'High', 'Low']
-                for col in price_columns:
-                    if col in data_adjusted.columns:
-                        data_adjusted[col] = data_adjusted[col] * adjustment_ratio
-                
-                # Close diventa Adj Close
-                data_adjusted['Close'] = data_adjusted['Adj Close']
-                
-                logger.info(f"Aggiustamento completato per {ticker}")
+                # Limita i rapporti estremi (probabilmente errori nei dati)
+                issues['anomal_ratios'] = int(np.count_nonzero((ratio < 0.01) | (ratio > 100)))
+                np.clip(ratio, 0.01, 100, out=ratio)
                 
+                for i in range(len(price_columns)):
+                    if i != close_row:
+                        np.multiply(raw[i], ratio, out=adjusted[i], casting='same_kind')
             else:
-                logger.warning(f"Colonna 'Adj Close' NON trovata per {ticker}")
-                logger.info(f"Assumo che i prezzi siano già raw (non aggiustati)")
-                
-                # Se non c'è Adj Close, creiamo comunque due versioni
-                # La versione "adjusted" sarà identica alla "not adjusted"
-                # Aggiungiamo una colonna Adj Close fittizia uguale a Close
-                data_adjusted['Adj Close'] = data_adjusted['Close'].copy()
-                
-                logger.info(f"Creata colonna Adj Close fittizia per {ticker}")
-            
-            # Per la versione non aggiustata, rimuovi Adj Close per chiarezza
-            if 'Adj Close' in data_not_adjusted.columns:
-                data_not_adjusted = data_not_adjusted.drop(columns=['Adj Close'])
-            
-            # IMPORTANTE: NON arrotondare i prezzi per mantenere massima precisione
-            # I prezzi finanziari devono essere precisi per calcoli accurati
-            # Yahoo Finance fornisce già la precisione corretta
-            
-            # Gestisci Volume come intero se presente
-            if 'Volume' in data_adjusted.columns:
-                data_adjusted['Volume'] = data_adjusted['Volume'].astype('int64')
-            if 'Volume' in data_not_adjusted.columns:
-                data_not_adjusted['Volume'] = data_not_adjusted['Volume'].astype('int64')
-            
-            logger.info(f"Dati processati per {ticker}:")
-            logger.info(f"  - NotAdjusted: {len(data_not_adjusted)} record, colonne: {list(data_not_adjusted.columns)}")
-            logger.info(f"  - Adjusted: {len(data_adjusted)} record, colonne: {list(data_adjusted.columns)}")
-            
-            # Verifica finale: controllo coerenza dati
-            if len(data_not_adjusted) != len(data_adjusted):
-                logger.error(f"ERRORE: Numero record diverso tra versioni per {ticker}")
-                return None, None
-            
-            # Controlla che le date siano identiche
-            if not data_not_adjusted['Date'].equals(data_adjusted['Date']):
-                logger.error(f"ERRORE: Date non coerenti tra versioni per {ticker}")
-                return None, None
-            
-            logger.info(f"✅ Processamento completato con successo per {ticker}")
+                # Senza Adj Close la versione "adjusted" coincide con quella grezza
+                adjusted[:-1] = raw
+                adj_close[:] = close
+            
+            # Close aggiustato = Adj Close
+            adjusted[close_row] = adj_close
+            
+            # Volume come intero (un volume mancante invalida il ticker)
+            volume = None
+            if 'Volume' in columns:
+                volume_raw = data['Volume'].to_numpy(dtype=np.float64, na_value=np.nan)
+                issues['volume_nulls'] = int(np.isnan(volume_raw).sum())
+                if issues['volume_nulls'] > 0:
+                    logger.error(f"Trovati {issues['volume_nulls']} volumi mancanti per {ticker}")
+                    return None, None
+                volume = volume_raw.astype(np.int64)
+            
+            for name, count in issues.items():
+                if count > 0:
+                    logger.warning(f"{ticker}: {count} {name.replace('_', ' ')}")
+            
+            # IMPORTANTE: NON arrotondare i prezzi, con float64 si mantiene la precisione di Yahoo Finance
+            not_adjusted = raw if price_dtype == np.float64 else raw.astype(price_dtype)
+            del raw
+            
+            # Colonne non di prezzo (Date, Volume ed eventuali extra) invariate in entrambe le versioni
+            other_values = {}
+            for col in columns:
+                if col == 'Volume':
+                    other_values[col] = volume
+                elif col not in price_columns and col != 'Adj Close':
+                    other_values[col] = data[col].array
+            
+            adj_columns = price_columns + ['Adj Close']
+            adj_order = columns if has_adj_close else columns + ['Adj Close']
+            not_adj_order = [col for col in columns if col != 'Adj Close']
+            
+            data_not_adjusted = _frame_from_block(not_adjusted, price_columns, not_adj_order, other_values)
+            data_adjusted = _frame_from_block(adjusted, adj_columns, adj_order, other_values)
+            
+            logger.debug(f"Colonne {ticker}: notAdjusted {list(data_not_adjusted.columns)}, adjusted {list(data_adjusted.columns)}")
+            logger.info(f"✅ Processati {n} record per {ticker} ({'aggiustati' if has_adj_close else 'senza Adj Close'})")
             return data_not_adjusted, data_adjusted
             
         except Exception as e:
@@ -489,7 +450,8 @@ class TickerDataManager:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None, None
     
-    def save_ticker_files(self, ticker, data_not_adjusted, data_adjusted, is_append=False):
+    @timed('save')
+    def save_ticker_files(self, ticker, data_not_adjusted, data_adjusted, is_append=False, upsert=False):
         """
         Salva i due file per il ticker
         
@@ -498,42 +460,439 @@ class TickerDataManager:
             data_not_adjusted (DataFrame): Dati non aggiustati
             data_adjusted (DataFrame): Dati aggiustati
             is_append (bool): Se True, appende ai file esistenti
+            upsert (bool): Se True (con is_append) le righe possono anche sostituire
+                barre già salvate o riempire buchi nello storico
         """
         try:
             # Percorsi file
             file_not_adj = self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
             file_adj = self.data_dir / f"{ticker}.csv"
             
-            mode = 'a' if is_append else 'w'
-            header = not is_append
-            
-            # Salva versione non aggiustata
-            data_not_adjusted.to_csv(file_not_adj, mode=mode, header=header, index=False)
-            logger.info(f"Salvato {ticker}_notAdjusted.csv: {len(data_not_adjusted)} record ({'appeso' if is_append else 'nuovo'})")
+            # Download completo: il file viene riscritto come nuovo segmento base.
+            # Aggiornamento incrementale: le nuove righe diventano un segmento delta,
+            # senza riscrivere lo storico. Le scritture sono atomiche: i lettori
+            # (analisi, API) non vedono mai un CSV a metà
+            with self.locks.ticker(ticker):
+                for file_path, data in ((file_not_adj, data_not_adjusted), (file_adj, data_adjusted)):
+                    if is_append and upsert:
+                        SegmentStore.upsert_segment(file_path, data)
+                    elif is_append:
+                        SegmentStore.append_segment(file_path, data)
+                    else:
+                        SegmentStore.write_base(file_path, data)
+                    logger.info(f"Salvato {file_path.name}: {len(data)} record ({'appeso' if is_append else 'nuovo'})")
+                    self._update_rollups(file_path, data if is_append else None)
             
-            # Salva versione aggiustata
-            data_adjusted.to_csv(file_adj, mode=mode, header=header, index=False)
-            logger.info(f"Salvato {ticker}.csv: {len(data_adjusted)} record ({'appeso' if is_append else 'nuovo'})")
+            if is_append and SegmentStore.needs_compaction(file_adj):
+                self._schedule_compaction(ticker)
             
+            self.versions.bump_ticker(ticker)
             return True
             
         except Exception as e:
             logger.error(f"Errore nel salvataggio file per {ticker}: {e}")
             return False
     
-    def update_ticker_data(self, ticker):
-        """Aggiorna i dati di un ticker (download completo o incrementale)"""
+    def _update_rollups(self, file_path, new_data=None):
+        """
+        Aggiorna le barre settimanali e mensili del file (lock del ticker già preso).
+        
+        Con new_data vengono ricalcolati solo i periodi delle barre ricevute,
+        altrimenti i file sono ricostruiti. Un errore non blocca il salvataggio
+        del giornaliero: i rollup vengono eliminati e i lettori li ricalcolano
+        al volo finché il prossimo salvataggio non li ricostruisce.
+        """
+        try:
+            if new_data is None or new_data.empty:
+                Rollups.rebuild_rollups(file_path)
+            else:
+                Rollups.update_rollups(file_path, new_data['Date'].min(), len(new_data))
+        except Exception as e:
+            logger.error(f"Errore aggiornamento barre settimanali/mensili di {file_path.name}: {e}")
+            Rollups.remove_rollups(file_path)
+    
+    def _rollup_files(self, ticker):
+        return [Rollups.rollup_path(file_path, timeframe)
+                for timeframe in Rollups.ROLLUP_TIMEFRAMES
+                for file_path in (self.data_dir_not_adj / f"{ticker}_notAdjusted.csv", self.data_dir / f"{ticker}.csv")]
+    
+    def _schedule_compaction(self, ticker):
+        """Accoda la compattazione dei segmenti del ticker al worker in background"""
+        if self._compactor is None:
+            self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='segment-compaction')
+        return self._compactor.submit(self.compact_ticker, ticker)
+    
+    def compact_ticker(self, ticker):
+        """Unisce i segmenti delta dei due file del ticker nel segmento base"""
+        try:
+            with self.locks.ticker(ticker):
+                compacted = [SegmentStore.compact(file_path) for file_path in (
+                    self.data_dir_not_adj / f"{ticker}_notAdjusted.csv",
+                    self.data_dir / f"{ticker}.csv",
+                    *self._rollup_files(ticker)
+                )]
+            # Il contenuto logico non cambia: nessun bump di versione
+            return any(compacted)
+        except Exception as e:
+            logger.error(f"Errore nella compattazione di {ticker}: {e}")
+            return False
+    
+    def update_ticker_data(self, ticker, prefetched=None):
+        """
+        Aggiorna i dati di un ticker (download completo o incrementale) e notifica il risultato
+        
+        Args:
+            ticker (str): Simbolo del ticker
+            prefetched (tuple): (data iniziale, DataFrame) scaricati in blocco da
+                prefetch_ticker_data; usati solo se la data iniziale coincide ancora
+        """
+        # Il lock copre lettura metadati, download e scrittura: due aggiornamenti
+        # concorrenti dello stesso ticker non appendono due volte gli stessi giorni
+        with self.locks.ticker(ticker):
+            result = self._update_ticker_data(ticker, prefetched)
+        if result.get('corporate_action'):
+            self.events.emit('ticker_readjusted', {'ticker': ticker, 'action': result['corporate_action']})
+        self.events.emit('ticker_updated', {'ticker': ticker, 'result': result})
+        return result
+    
+    def _revised_bars(self, ticker, new_data_not_adj, new_data_adj, since):
+        """
+        Maschera delle barre riscaricate che differiscono da quelle salvate
+        (barra parziale del giorno, correzioni del provider).
+        """
+        revised = np.zeros(len(new_data_adj), dtype=bool)
+        stored_frames = []
+        for file_path, new_data in ((self.data_dir_not_adj / f"{ticker}_notAdjusted.csv", new_data_not_adj),
+                                    (self.data_dir / f"{ticker}.csv", new_data_adj)):
+            stored = SegmentStore.read_segments(file_path, tail=OVERLAP_BARS, float_precision='round_trip')
+            stored = stored[stored['Date'] >= since]
+            stored_frames.append((stored, new_data))
+        
+        for stored, new_data in stored_frames:
+            if stored.empty:
+                continue
+            positions = pd.Index(stored['Date']).get_indexer(new_data['Date'])
+            overlap = positions >= 0
+            if not overlap.any():
+                continue
+            for col in stored.columns:
+                if col == 'Date' or col not in new_data.columns:
+                    continue
+                old_values = stored[col].to_numpy(dtype=np.float64)[positions[overlap]]
+                new_values = new_data[col].to_numpy(dtype=np.float64)[overlap]
+                if col == 'Volume':
+                    changed = old_values != new_values
+                else:
+                    changed = ~np.isclose(new_values, old_values, rtol=ADJUSTMENT_TOLERANCE, atol=0, equal_nan=True)
+                revised[np.flatnonzero(overlap)[changed]] = True
+        
+        if revised.any():
+            logger.info(f"{ticker}: {int(revised.sum())} barre revisionate dal provider")
+        return revised
+    
+    def _expected_sessions(self, ticker, start_date, end_date, meta=None):
+        """Sessioni attese tra due date (incluse) come array di stringhe YYYY-MM-DD, dal calendario della borsa del ticker"""
+        calendar = calendar_for(exchange_from_meta(meta), ticker)
+        return calendar.session_strings(start_date, end_date)
+    
+    def find_gaps(self, ticker, since=None, meta=None):
+        """
+        Sessioni attese assenti dallo storico salvato.
+        
+        Le date già verificate come chiusure (il provider non ha restituito
+        dati in una riparazione precedente) non vengono più segnalate.
+        
+        Args:
+            ticker (str): Simbolo del ticker
+            since (str): controlla solo da questa data (default: tutto lo storico)
+            meta (dict): metadati già caricati
+            
+        Returns:
+            list: intervalli [{'start', 'end', 'sessions'}] ordinati per data
+        """
+        file_adj = self.data_dir / f"{ticker}.csv"
+        if not file_adj.exists():
+            return []
+        meta = meta if meta is not None else (self.load_ticker_meta(ticker) or {})
+        
+        stored = SegmentStore.read_segments(file_adj, usecols=['Date'])['Date'].str.slice(0, 10).to_numpy()
+        if len(stored) == 0:
+            return []
+        start = max(stored[0], since) if since else stored[0]
+        sessions = self._expected_sessions(ticker, start, stored[-1], meta)
+        
+        is_missing = ~np.isin(sessions, stored) & ~np.isin(sessions, meta.get('verified_closures', []))
+        missing = np.flatnonzero(is_missing)
+        if len(missing) == 0:
+            return []
+        
+        # Sessioni mancanti consecutive nello stesso intervallo
+        breaks = np.flatnonzero(np.diff(missing) > 1) + 1
+        return [
+            {'start': sessions[run[0]], 'end': sessions[run[-1]], 'sessions': len(run)}
+            for run in np.split(missing, breaks)
+        ]
+    
+    def repair_ticker_gaps(self, ticker, lookback_days=GAP_LOOKBACK_DAYS):
+        """
+        Scarica solo gli intervalli mancanti dello storico e li inserisce come segmento delta.
+        
+        Args:
+            ticker (str): Simbolo del ticker
+            lookback_days (int): giorni controllati a ritroso dall'ultima barra (None = tutto lo storico)
+            
+        Returns:
+            dict: esito con sessioni riempite, chiusure verificate e richieste effettuate
+        """
+        ticker = ticker.upper()
+        with self.locks.ticker(ticker):
+            result = self._repair_ticker_gaps(ticker, lookback_days)
+        if result['status'] == 'success' and result['filled']:
+            self.events.emit('ticker_updated', {'ticker': ticker, 'result': result})
+        return result
+    
+    def _repair_ticker_gaps(self, ticker, lookback_days):
+        meta = self.load_ticker_meta(ticker)
+        if meta is None:
+            return {'status': 'error', 'message': f'Nessun dato salvato per {ticker}'}
+        
+        since = None
+        if lookback_days is not None and meta.get('last_close_date'):
+            since = (pd.Timestamp(meta['last_close_date']) - pd.Timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+        gaps = self.find_gaps(ticker, since=since, meta=meta)
+        if not gaps:
+            return {'status': 'info', 'message': f'Nessun buco nello storico di {ticker}',
+                    'filled': 0, 'closures': 0, 'requests': 0}
+        
+        missing = set()
+        for gap in gaps:
+            missing.update(self._expected_sessions(ticker, gap['start'], gap['end'], meta))
+        
+        # Buchi vicini accorpati in un'unica richiesta
+        ranges = [[gaps[0]['start'], gaps[0]['end']]]
+        for gap in gaps[1:]:
+            if len(self._expected_sessions(ticker, ranges[-1][1], gap['start'], meta)) - 2 < GAP_MERGE_SESSIONS:
+                ranges[-1][1] = gap['end']
+            else:
+                ranges.append([gap['start'], gap['end']])
+        
+        frames_not_adj, frames_adj = [], []
+        for start, end in ranges:
+            end_exclusive = (pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+            raw = self.download_ticker_data(ticker, start_date=start, end_date=end_exclusive)
+            if raw is None or raw.empty:
+                continue
+            data_not_adj, data_adj = self.process_ticker_data(raw, ticker)
+            if data_adj is None:
+                continue
+            wanted = data_adj['Date'].isin(missing).to_numpy()
+            frames_not_adj.append(data_not_adj[wanted])
+            frames_adj.append(data_adj[wanted])
+        
+        filled = []
+        if frames_adj:
+            data_not_adj = pd.concat(frames_not_adj, ignore_index=True)
+            data_adj = pd.concat(frames_adj, ignore_index=True)
+            if not data_adj.empty:
+                if not self.save_ticker_files(ticker, data_not_adj, data_adj, is_append=True, upsert=True):
+                    return {'status': 'error', 'message': f'Errore salvataggio riparazione per {ticker}'}
+                filled = data_adj['Date'].tolist()
+        
+        # Sessioni attese che il provider non ha: festività o sospensioni, da non richiedere più
+        closures = sorted(missing.difference(filled))
+        meta['verified_closures'] = sorted(set(meta.get('verified_closures', [])).union(closures))
+        meta['total_records'] = meta.get('total_records', 0) + len(filled)
+        meta['last_repair'] = datetime.now().isoformat()
+        self.save_ticker_meta(ticker, meta)
+        
+        logger.info(f"{ticker}: riparati {len(filled)} giorni con {len(ranges)} richieste ({len(closures)} chiusure)")
+        return {
+            'status': 'success',
+            'message': f'Riempite {len(filled)} sessioni mancanti per {ticker} ({len(ranges)} richieste)',
+            'records': len(filled),
+            'filled': len(filled),
+            'closures': len(closures),
+            'requests': len(ranges)
+        }
+    
+    def detect_corporate_action(self, ticker, new_data_not_adj, new_data_adj):
+        """
+        Confronta le barre di sovrapposizione riscaricate con quelle salvate.
+        
+        Uno split cambia il Close grezzo di Yahoo (aggiustato solo per split),
+        un dividendo cambia il rapporto Adj Close / Close: in entrambi i casi
+        tutto lo storico salvato va riscalato dello stesso fattore. Il fattore è
+        la mediana sulle barre di sovrapposizione, così una singola barra
+        revisionata (es. parziale) non viene scambiata per un evento societario.
+        
+        Returns:
+            dict con detected_on, overlap, price_factor e adj_factor, None se nulla è cambiato
+        """
+        file_not_adj = self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
+        file_adj = self.data_dir / f"{ticker}.csv"
+        stored_not_adj = SegmentStore.read_segments(file_not_adj, tail=OVERLAP_BARS, float_precision='round_trip')
+        stored_adj = SegmentStore.read_segments(file_adj, tail=OVERLAP_BARS, float_precision='round_trip')
+        
+        positions = pd.Index(new_data_adj['Date']).get_indexer(stored_adj['Date'])
+        overlap = positions >= 0
+        if not overlap.any() or not stored_not_adj['Date'].equals(stored_adj['Date']):
+            logger.warning(f"{ticker}: nessuna barra di sovrapposizione, impossibile verificare split/dividendi")
+            return None
+        positions = positions[overlap]
+        
+        def median_factor(new_values, stored_values):
+            # Mediana "bassa": sempre un rapporto effettivamente osservato
+            factors = np.sort(new_values[positions] / stored_values[overlap])
+            return float(factors[(len(factors) - 1) // 2])
+        
+        price_factor = median_factor(new_data_not_adj['Close'].to_numpy(dtype=np.float64),
+                                     stored_not_adj['Close'].to_numpy(dtype=np.float64))
+        adj_factor = median_factor(new_data_adj['Adj Close'].to_numpy(dtype=np.float64),
+                                   stored_adj['Adj Close'].to_numpy(dtype=np.float64))
+        
+        if abs(price_factor - 1) <= ADJUSTMENT_TOLERANCE and abs(adj_factor - 1) <= ADJUSTMENT_TOLERANCE:
+            return None
+        
+        overlap_dates = stored_adj['Date'][overlap]
+        logger.info(f"{ticker}: rilevato split/dividendo (fattore prezzi {price_factor:.6f}, adjusted {adj_factor:.6f})")
+        return {
+            'detected_on': datetime.now().date().isoformat(),
+            'overlap': {'start': overlap_dates.iloc[0], 'end': overlap_dates.iloc[-1]},
+            'price_factor': price_factor,
+            'adj_factor': adj_factor
+        }
+    
+    def rescale_history(self, ticker, price_factor, adj_factor):
+        """
+        Riscala lo storico salvato in un unico passaggio vettoriale, senza riscaricarlo.
+        
+        I prezzi grezzi (e il volume) seguono il fattore di split; i prezzi adjusted
+        vengono ricalcolati dai grezzi con il nuovo rapporto Adj Close / Close, come
+        in process_ticker_data. Entrambi i file diventano un nuovo segmento base.
+        """
+        file_not_adj = self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
+        file_adj = self.data_dir / f"{ticker}.csv"
+        
+        with self.locks.ticker(ticker):
+            not_adj = SegmentStore.read_segments(file_not_adj, float_precision='round_trip')
+            adj_close = SegmentStore.read_segments(file_adj, usecols=['Date', 'Adj Close'], float_precision='round_trip')
+            if not not_adj['Date'].equals(adj_close['Date']):
+                raise ValueError(f"{ticker}: date dei file adjusted e notAdjusted non allineate")
+            
+            adj_columns = list(pd.read_csv(file_adj, nrows=0).columns)
+            price_columns = [col for col in not_adj.columns if col in ('Open', 'High', 'Low', 'Close')]
+            close_col = price_columns.index('Close')
+            
+            # Blocco (n, colonne) dei prezzi grezzi riscalati per lo split
+            raw = not_adj[price_columns].to_numpy(dtype=np.float64) * price_factor
+            
+            # Nuovo Adj Close e rapporto di aggiustamento rispetto ai grezzi
+            new_adj_close = adj_close['Adj Close'].to_numpy(dtype=np.float64) * adj_factor
+            close = raw[:, close_col]
+            ratio = new_adj_close / np.where(close == 0, 0.0001, close)
+            np.clip(ratio, 0.01, 100, out=ratio)
+            
+            adjusted = raw * ratio[:, None]
+            adjusted[:, close_col] = new_adj_close
+            
+            data_not_adj = not_adj.copy()
+            data_not_adj[price_columns] = raw.astype(self.price_dtype)
+            if 'Volume' in data_not_adj.columns and abs(price_factor - 1) > ADJUSTMENT_TOLERANCE:
+                data_not_adj['Volume'] = np.rint(data_not_adj['Volume'].to_numpy(dtype=np.float64) / price_factor).astype(np.int64)
+            
+            data_adj = data_not_adj.copy()
+            data_adj[price_columns] = adjusted.astype(self.price_dtype)
+            data_adj['Adj Close'] = new_adj_close.astype(self.price_dtype)
+            data_adj = data_adj[adj_columns]
+            
+            SegmentStore.write_base(file_not_adj, data_not_adj)
+            SegmentStore.write_base(file_adj, data_adj)
+            self._update_rollups(file_not_adj)
+            self._update_rollups(file_adj)
+        
+        self.versions.bump_ticker(ticker)
+        logger.info(f"{ticker}: riscalati {len(data_adj)} record storici")
+        return len(data_adj)
+    
+    def _download_plan(self, ticker, meta):
+        """
+        Tipo e data iniziale del prossimo download di un ticker, senza accessi di rete
+        
+        Returns:
+            tuple: ('full', None) per il primo download, ('incremental', data iniziale)
+            per l'aggiornamento incrementale, ('current', None) se già aggiornato
+        """
+        file_adj = self.data_dir / f"{ticker}.csv"
+        if meta is None or not file_adj.exists():
+            return 'full', None
+        
+        # Nessuna sessione chiusa dopo l'ultimo dato (weekend, festivi,
+        # borsa ancora aperta) vuol dire nessuna richiesta di rete
+        last_close_date = datetime.strptime(meta['last_close_date'], '%Y-%m-%d')
+        last_session = calendar_for(exchange_from_meta(meta), ticker).last_expected_session()
+        if last_close_date.date() >= last_session:
+            return 'current', None
+        
+        # Si riscaricano anche le ultime OVERLAP_BARS barre salvate, per
+        # intercettare split/dividendi, barre parziali e revisioni
+        file_adj_tail = SegmentStore.read_segments(file_adj, tail=OVERLAP_BARS, usecols=['Date'])
+        start_date = file_adj_tail['Date'].iloc[0] if not file_adj_tail.empty else meta['last_close_date']
+        return 'incremental', start_date
+    
+    @timed('download_batch')
+    def prefetch_ticker_data(self, tickers):
+        """
+        Scarica in blocco i dati dei ticker da aggiornare con provider.fetch_batch:
+        una chiamata per data iniziale (storico completo o stessa finestra incrementale)
+        
+        Returns:
+            dict: ticker -> (data iniziale, DataFrame o None), da passare a update_ticker_data
+        """
+        groups = {}
+        for ticker in tickers:
+            try:
+                mode, start_date = self._download_plan(ticker, self.load_ticker_meta(ticker))
+            except Exception as e:
+                logger.error(f"Errore nel pianificare il download di {ticker}: {e}")
+                continue
+            if mode != 'current':
+                groups.setdefault(start_date, []).append(ticker)
+        
+        prefetched = {}
+        for start_date, group in groups.items():
+            logger.info(f"Download batch di {len(group)} ticker ({self.provider.name}) dal {start_date or 'inizio'}")
+            try:
+                batch = self.provider.fetch_batch(group, start_date=start_date)
+            except Exception as e:
+                logger.error(f"Errore nel download batch di {len(group)} ticker: {e}")
+                metrics.increment('download_errors')
+                continue
+            for ticker in group:
+                prefetched[ticker] = (start_date, batch.get(ticker))
+        return prefetched
+    
+    def _download_or_prefetched(self, ticker, start_date, prefetched):
+        """Dati scaricati in blocco per la stessa data iniziale, altrimenti download singolo"""
+        if prefetched is not None and prefetched[0] == start_date:
+            data = prefetched[1]
+            if data is not None and not data.empty:
+                return data
+        return self.download_ticker_data(ticker, start_date=start_date)
+    
+    def _update_ticker_data(self, ticker, prefetched=None):
+        """Download completo o incrementale di un ticker"""
         try:
             file_adj = self.data_dir / f"{ticker}.csv"
             file_not_adj = self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
             meta = self.load_ticker_meta(ticker)
+            mode, start_date = self._download_plan(ticker, meta)
             
             # Se è la prima volta, scarica tutto lo storico
-            if meta is None or not file_adj.exists():
+            if mode == 'full':
                 logger.info(f"Primo download per {ticker}")
                 
                 # Scarica dati grezzi
-                raw_data = self.download_ticker_data(ticker)
+                raw_data = self._download_or_prefetched(ticker, None, prefetched)
                 if raw_data is None:
                     return {'status': 'error', 'message': f'Errore nel download di {ticker}'}
                 
@@ -570,19 +929,14 @@ class TickerDataManager:
                     'records': len(data_adj)
                 }
             
-            # Controllo se serve aggiornamento
-            last_close_date = datetime.strptime(meta['last_close_date'], '%Y-%m-%d')
-            today = datetime.now().date()
-            
-            if last_close_date.date() >= today:
+            if mode == 'current':
                 return {'status': 'info', 'message': f'{ticker} già aggiornato', 'records': 0}
             
-            # Aggiornamento incrementale
-            start_date = (last_close_date + timedelta(days=1)).strftime('%Y-%m-%d')
+            # Aggiornamento incrementale (dalla prima barra della sovrapposizione)
             logger.info(f"Aggiornamento incrementale per {ticker} dal {start_date}")
             
             # Scarica nuovi dati
-            new_raw_data = self.download_ticker_data(ticker, start_date=start_date)
+            new_raw_data = self._download_or_prefetched(ticker, start_date, prefetched)
             if new_raw_data is None or new_raw_data.empty:
                 return {'status': 'info', 'message': f'Nessun nuovo dato per {ticker}', 'records': 0}
             
@@ -591,21 +945,54 @@ class TickerDataManager:
             if new_data_not_adj is None or new_data_adj is None:
                 return {'status': 'error', 'message': f'Errore processamento nuovi dati per {ticker}'}
             
-            # Appendi ai file esistenti
-            if not self.save_ticker_files(ticker, new_data_not_adj, new_data_adj, is_append=True):
-                return {'status': 'error', 'message': f'Errore aggiornamento file per {ticker}'}
+            # Split/dividendo dall'ultimo aggiornamento: riscala lo storico salvato
+            corporate_action = self.detect_corporate_action(ticker, new_data_not_adj, new_data_adj)
+            if corporate_action:
+                self.rescale_history(ticker, corporate_action['price_factor'], corporate_action['adj_factor'])
+                meta.setdefault('corporate_actions', []).append(corporate_action)
+            
+            # Barre successive all'ultima salvata + barre della sovrapposizione cambiate
+            is_new = (new_data_adj['Date'] > meta['last_close_date']).to_numpy()
+            is_revised = self._revised_bars(ticker, new_data_not_adj, new_data_adj, start_date)
+            keep = is_new | is_revised
+            revised_dates = new_data_adj['Date'][is_revised].tolist()
+            new_data_not_adj = new_data_not_adj[keep].reset_index(drop=True)
+            new_data_adj = new_data_adj[keep].reset_index(drop=True)
+            new_records = int(is_new.sum())
+            
+            if not new_data_adj.empty:
+                # Appendi ai file esistenti (upsert se ci sono barre revisionate)
+                if not self.save_ticker_files(ticker, new_data_not_adj, new_data_adj, is_append=True,
+                                              upsert=bool(revised_dates)):
+                    return {'status': 'error', 'message': f'Errore aggiornamento file per {ticker}'}
+                meta['last_close_date'] = max(meta['last_close_date'], new_data_adj['Date'].iloc[-1])
+                meta['total_records'] += new_records
+            elif not corporate_action:
+                return {'status': 'info', 'message': f'Nessun nuovo dato per {ticker}', 'records': 0}
+            
+            # Sessioni mancanti nella finestra appena aggiornata (riparabili con repair_ticker_gaps)
+            gaps = self.find_gaps(ticker, since=start_date, meta=meta)
+            if gaps:
+                logger.warning(f"{ticker}: {sum(g['sessions'] for g in gaps)} sessioni mancanti dal {start_date}")
             
             # Aggiorna metadati
-            meta['last_close_date'] = new_data_adj['Date'].iloc[-1]
-            meta['total_records'] += len(new_data_adj)
             meta['last_updated'] = datetime.now().isoformat()
             self.save_ticker_meta(ticker, meta)
             
-            return {
+            result = {
                 'status': 'success',
-                'message': f'Aggiunti {len(new_data_adj)} nuovi record per {ticker} (2 versioni aggiornate)',
-                'records': len(new_data_adj)
+                'message': f'Aggiunti {new_records} nuovi record per {ticker} (2 versioni aggiornate)',
+                'records': new_records
             }
+            if revised_dates:
+                result['message'] += f" - {len(revised_dates)} barre revisionate"
+                result['revised'] = revised_dates
+            if gaps:
+                result['gaps'] = gaps
+            if corporate_action:
+                result['message'] += f" - storico riscalato per split/dividendo del {corporate_action['detected_on']}"
+                result['corporate_action'] = corporate_action
+            return result
             
         except Exception as e:
             logger.error(f"Errore nell'aggiornamento di {ticker}: {e}")
@@ -614,85 +1001,86 @@ class TickerDataManager:
     def get_ticker_status(self):
         """Ottiene lo stato di tutti i ticker configurati"""
         config = self.load_ticker_config()
-        status_list = []
+        return [self.get_single_ticker_status(ticker) for ticker in config['tickers']]
+    
+    def get_single_ticker_status(self, ticker):
+        """Ottiene lo stato di un singolo ticker (stesso formato di get_ticker_status)"""
+        meta = self.load_ticker_meta(ticker)
+        file_adj = self.data_dir / f"{ticker}.csv"
+        file_not_adj = self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
         
-        for ticker in config['tickers']:
-            meta = self.load_ticker_meta(ticker)
-            file_adj = self.data_dir / f"{ticker}.csv"
-            file_not_adj = self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
+        if meta:
+            # Calcola dimensioni file
+            adj_size = f"{SegmentStore.storage_size(file_adj) / 1024:.1f} KB"
+            not_adj_size = f"{SegmentStore.storage_size(file_not_adj) / 1024:.1f} KB"
+            
+            # Estrai info CSV se disponibili
+            csv_info = None
+            if 'csv_import' in meta:
+                csv_info = {
+                    'company': meta['csv_import'].get('company', ''),
+                    'sector': meta['csv_import'].get('sector', ''),
+                    'industry': meta['csv_import'].get('industry', ''),
+                    'imported_at': meta['csv_import'].get('imported_at', '')
+                }
             
-            if meta:
-                # Calcola dimensioni file
-                adj_size = f"{file_adj.stat().st_size / 1024:.1f} KB" if file_adj.exists() else "0 KB"
-                not_adj_size = f"{file_not_adj.stat().st_size / 1024:.1f} KB" if file_not_adj.exists() else "0 KB"
-                
-                # Estrai info CSV se disponibili
-                csv_info = None
-                if 'csv_import' in meta:
-                    csv_info = {
-                        'company': meta['csv_import'].get('company', ''),
-                        'sector': meta['csv_import'].get('sector', ''),
-                        'industry': meta['csv_import'].get('industry', ''),
-                        'imported_at': meta['csv_import'].get('imported_at', '')
-                    }
-                
-                # Calcola needs_update con gestione sicura di last_close_date
-                last_close_date = meta.get('last_close_date')
-                needs_update = True  # Default: assume che serve aggiornamento
-                
-                if last_close_date and isinstance(last_close_date, str):
-                    try:
-                        last_date = datetime.strptime(last_close_date, '%Y-%m-%d').date()
-                        needs_update = last_date < datetime.now().date()
-                    except (ValueError, TypeError) as e:
-                        logger.warning(f"Errore nel parsing della data per {ticker}: {last_close_date}, errore: {e}")
-                        needs_update = True
-                else:
-                    logger.debug(f"last_close_date mancante o non valido per {ticker}: {last_close_date}")
+            # Calcola needs_update con gestione sicura di last_close_date
+            last_close_date = meta.get('last_close_date')
+            needs_update = True  # Default: assume che serve aggiornamento
+            
+            if last_close_date and isinstance(last_close_date, str):
+                try:
+                    last_date = datetime.strptime(last_close_date, '%Y-%m-%d').date()
+                    needs_update = last_date < datetime.now().date()
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Errore nel parsing della data per {ticker}: {last_close_date}, errore: {e}")
                     needs_update = True
-                
-                status = {
-                    'ticker': ticker,
-                    'name': meta['info']['name'] if meta.get('info') else ticker,
-                    'last_close_date': last_close_date,
-                    'first_date': meta.get('first_date', None),
-                    'total_records': meta.get('total_records', 0),
-                    'files_exist': {
-                        'adjusted': file_adj.exists(),
-                        'not_adjusted': file_not_adj.exists()
-                    },
-                    'file_sizes': {
-                        'adjusted': adj_size,
-                        'not_adjusted': not_adj_size
-                    },
-                    'last_updated': meta.get('last_updated'),
-                    'needs_update': needs_update,
-                    'csv_info': csv_info
-                }
             else:
-                # Metadati non esistenti - ticker probabilmente appena aggiunto
-                status = {
-                    'ticker': ticker,
-                    'name': ticker,
-                    'last_close_date': None,
-                    'first_date': None,
-                    'total_records': 0,
-                    'files_exist': {
-                        'adjusted': file_adj.exists(),
-                        'not_adjusted': file_not_adj.exists()
-                    },
-                    'file_sizes': {
-                        'adjusted': f"{file_adj.stat().st_size / 1024:.1f} KB" if file_adj.exists() else "0 KB",
-                        'not_adjusted': f"{file_not_adj.stat().st_size / 1024:.1f} KB" if file_not_adj.exists() else "0 KB"
-                    },
-                    'last_updated': None,
-                    'needs_update': True,  # Sempre True se non ci sono metadati
-                    'csv_info': None
-                }
-            
-            status_list.append(status)
+                logger.debug(f"last_close_date mancante o non valido per {ticker}: {last_close_date}")
+                needs_update = True
+            
+            status = {
+                'ticker': ticker,
+                'name': meta['info']['name'] if meta.get('info') else ticker,
+                'exchange': exchange_from_meta(meta),
+                'last_close_date': last_close_date,
+                'first_date': meta.get('first_date', None),
+                'total_records': meta.get('total_records', 0),
+                'files_exist': {
+                    'adjusted': file_adj.exists(),
+                    'not_adjusted': file_not_adj.exists()
+                },
+                'file_sizes': {
+                    'adjusted': adj_size,
+                    'not_adjusted': not_adj_size
+                },
+                'last_updated': meta.get('last_updated'),
+                'needs_update': needs_update,
+                'csv_info': csv_info
+            }
+        else:
+            # Metadati non esistenti - ticker probabilmente appena aggiunto
+            status = {
+                'ticker': ticker,
+                'name': ticker,
+                'exchange': None,
+                'last_close_date': None,
+                'first_date': None,
+                'total_records': 0,
+                'files_exist': {
+                    'adjusted': file_adj.exists(),
+                    'not_adjusted': file_not_adj.exists()
+                },
+                'file_sizes': {
+                    'adjusted': f"{SegmentStore.storage_size(file_adj) / 1024:.1f} KB",
+                    'not_adjusted': f"{SegmentStore.storage_size(file_not_adj) / 1024:.1f} KB"
+                },
+                'last_updated': None,
+                'needs_update': True,  # Sempre True se non ci sono metadati
+                'csv_info': None
+            }
         
-        return status_list
+        return status
     
     def add_ticker(self, ticker):
         """Aggiunge un nuovo ticker alla configurazione"""
@@ -706,13 +1094,16 @@ class TickerDataManager:
         if ticker_info is None:
             return {'status': 'error', 'message': f'Ticker {ticker} non trovato su Yahoo Finance'}
         
-        config = self.load_ticker_config()
+        def append_ticker(config):
+            if ticker in config['tickers']:
+                return False
+            config['tickers'].append(ticker)
+            return True
         
-        if ticker in config['tickers']:
+        if not self.update_ticker_config(append_ticker):
             return {'status': 'warning', 'message': f'Ticker {ticker} già presente'}
         
-        config['tickers'].append(ticker)
-        self.save_ticker_config(config)
+        self.events.emit('tickers_changed', {'added': [ticker], 'removed': []})
         
         return {
             'status': 'success',
@@ -723,26 +1114,36 @@ class TickerDataManager:
     def remove_ticker(self, ticker):
         """Rimuove un ticker dalla configurazione e cancella i file"""
         ticker = ticker.upper()
-        config = self.load_ticker_config()
         
-        if ticker not in config['tickers']:
-            return {'status': 'error', 'message': f'Ticker {ticker} non trovato'}
+        def drop_ticker(config):
+            if ticker not in config['tickers']:
+                return False
+            config['tickers'].remove(ticker)
+            return True
         
-        config['tickers'].remove(ticker)
-        self.save_ticker_config(config)
+        if not self.update_ticker_config(drop_ticker):
+            return {'status': 'error', 'message': f'Ticker {ticker} non trovato'}
         
-        # Rimuovi file
-        files_to_remove = [
+        # Rimuovi file (i CSV prezzi insieme ai loro segmenti delta e alle barre settimanali/mensili)
+        price_files = [
             self.data_dir / f"{ticker}.csv",
-            self.data_dir_not_adj / f"{ticker}_notAdjusted.csv",
-            self.meta_dir / f"{ticker}.json"
+            self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
         ]
+        meta_file = self.meta_dir / f"{ticker}.json"
         
         files_removed = []
-        for file_path in files_to_remove:
-            if file_path.exists():
-                file_path.unlink()
-                files_removed.append(file_path.name)
+        with self.locks.ticker(ticker):
+            for file_path in price_files:
+                if file_path.exists():
+                    files_removed.append(file_path.name)
+                SegmentStore.remove(file_path)
+                Rollups.remove_rollups(file_path)
+            if meta_file.exists():
+                meta_file.unlink()
+                files_removed.append(meta_file.name)
+        
+        self.versions.bump_ticker(ticker)
+        self.events.emit('tickers_changed', {'added': [], 'removed': [ticker]})
         
         return {
             'status': 'success',
@@ -753,18 +1154,19 @@ class TickerDataManager:
     def test_connection(self):
         """Testa la connessione a Yahoo Finance"""
         try:
-            import requests
+            # Connessioni dal pool keep-alive del provider
+            transport = self.provider.transport
             
             # Test connessione internet
             try:
-                requests.get('https://www.google.com', timeout=5)
+                transport.get('https://www.google.com', timeout=5)
                 internet_ok = True
             except:
                 internet_ok = False
             
             # Test Yahoo Finance
             try:
-                requests.get('https://finance.yahoo.com', timeout=10)
+                transport.get('https://finance.yahoo.com', timeout=10)
                 yahoo_ok = True
             except:
                 yahoo_ok = False
@@ -773,6 +1175,8 @@ class TickerDataManager:
             yfinance_ok = False
             test_data = None
             try:
+                # Importato qui: yfinance costa ~0.3 s e serve solo a questo test
+                import yfinance as yf
                 data = yf.download("AAPL", period="1d", progress=False)
                 if not data.empty:
                     yfinance_ok = True
@@ -797,244 +1201,132 @@ class TickerDataManager:
                 'message': f'Errore nel test: {str(e)}'
             }
     
-    def process_csv_upload(self, file, download_data=False, replace_existing=False):
+    def process_csv_upload(self, file, download_data=False, replace_existing=False, dry_run=False,
+                           batch_size=TickerListImport.DEFAULT_BATCH_SIZE):
         """
         Processa un file CSV caricato con ticker e informazioni aziendali
         
+        Il file è letto in streaming e validato a blocchi (vedi TickerListImport);
+        i metadati di tutti i ticker importati sono salvati con una sola scrittura
+        transazionale e la configurazione con un solo salvataggio.
+        
         Args:
             file: File CSV caricato
-            download_data (bool): Se scaricare automaticamente i dati
-            replace_existing (bool): Se sostituire ticker esistenti
+            download_data (bool): Se accodare in background il download dei ticker senza dati
+            replace_existing (bool): Se sostituire le info dei ticker esistenti
+            dry_run (bool): Solo anteprima: valida e riporta le azioni senza scrivere nulla
+            batch_size (int): Righe validate per blocco
             
         Returns:
             dict: Risultato del processamento
         """
         try:
-            logger.info("Inizio processamento CSV upload")
-            
-            # Leggi il contenuto del file
-            file.seek(0)  # Assicurati di essere all'inizio del file
-            csv_content = file.read().decode('utf-8')
-            
-            if not csv_content.strip():
-                return {'status': 'error', 'message': 'File CSV vuoto'}
-            
-            lines = csv_content.split('\n')
-            lines = [line.strip() for line in lines if line.strip()]  # Rimuovi righe vuote
-            
-            if len(lines) < 2:
-                return {'status': 'error', 'message': 'File CSV troppo corto (meno di 2 righe)'}
-            
-            # Parse header
-            header_line = lines[0]
-            headers = [col.strip().strip('"') for col in header_line.split(',')]
-            
-            logger.info(f"Headers trovati: {headers}")
-            
-            # Verifica colonne richieste
-            required_columns = ['Ticker', 'Company', 'Sector', 'Industry']
-            missing_columns = [col for col in required_columns if col not in headers]
-            
-            if missing_columns:
-                return {
-                    'status': 'error', 
-                    'message': f'Colonne mancanti nel CSV: {", ".join(missing_columns)}'
-                }
-            
-            # Trova indici delle colonne
-            try:
-                ticker_idx = headers.index('Ticker')
-                company_idx = headers.index('Company')
-                sector_idx = headers.index('Sector')
-                industry_idx = headers.index('Industry')
-            except ValueError as e:
-                return {'status': 'error', 'message': f'Errore nell\'identificare le colonne: {str(e)}'}
-            
-            # Processa le righe di dati
-            data_lines = lines[1:]
-            
-            if not data_lines:
-                return {'status': 'error', 'message': 'Nessun dato trovato nel CSV'}
+            logger.info(f"Inizio processamento CSV upload{' (anteprima)' if dry_run else ''}")
             
-            logger.info(f"Processamento {len(data_lines)} ticker dal CSV")
-            
-            # Carica configurazione esistente con protezione
-            try:
-                config = self.load_ticker_config()
-                if config is None:
-                    config = {'tickers': [], 'last_updated': None}
-            except Exception as e:
-                logger.error(f"Errore caricamento configurazione: {e}")
-                config = {'tickers': [], 'last_updated': None}
-            
-            # Crea una copia di backup della configurazione
-            original_tickers = config['tickers'][:]
+            config = self.load_ticker_config() or {'tickers': [], 'last_updated': None}
+            existing = set(config.get('tickers', []))
             
             results = []
-            added_count = 0
-            updated_count = 0
+            metas = {}
+            csv_infos = {}
+            added, updated = [], []
             skipped_count = 0
             error_count = 0
+            total_rows = 0
+            seen = set()
+            imported_at = datetime.now().isoformat()
             
-            for line_num, line in enumerate(data_lines, 2):  # Start from line 2
-                try:
-                    # Parse CSV line manualmente per gestire virgole nei campi
-                    cells = []
-                    current_cell = ""
-                    in_quotes = False
+            try:
+                for columns, batch in TickerListImport.iter_row_batches(file, batch_size):
+                    total_rows += len(batch)
+                    rows, errors = TickerListImport.validate_batch(columns, batch, seen)
+                    results.extend(errors)
+                    error_count += sum(1 for error in errors if error['status'] == 'error')
+                    skipped_count += sum(1 for error in errors if error['status'] == 'warning')
                     
-                    for char in line:
-                        if char == '"':
-                            in_quotes = not in_quotes
-                        elif char == ',' and not in_quotes:
-                            cells.append(current_cell.strip().strip('"'))
-                            current_cell = ""
+                    for row in rows:
+                        ticker = row['ticker']
+                        if ticker in existing and not replace_existing:
+                            results.append({
+                                'ticker': ticker,
+                                'status': 'warning',
+                                'message': 'Ticker già presente (saltato)'
+                            })
+                            skipped_count += 1
+                            continue
+                        
+                        if ticker in existing:
+                            updated.append(ticker)
+                            action = 'da aggiornare' if dry_run else 'aggiornato'
                         else:
-                            current_cell += char
-                    
-                    # Aggiungi l'ultima cella
-                    cells.append(current_cell.strip().strip('"'))
-                    
-                    if len(cells) < len(required_columns):
-                        results.append({
-                            'ticker': f'Line {line_num}',
-                            'status': 'error',
-                            'message': f'Riga incompleta: {len(cells)} colonne invece di {len(required_columns)}'
-                        })
-                        error_count += 1
-                        continue
-                    
-                    ticker = cells[ticker_idx].upper().strip()
-                    company = cells[company_idx].strip()
-                    sector = cells[sector_idx].strip()
-                    industry = cells[industry_idx].strip()
-                    
-                    if not ticker:
-                        results.append({
-                            'ticker': f'Line {line_num}',
-                            'status': 'error',
-                            'message': 'Ticker vuoto'
-                        })
-                        error_count += 1
-                        continue
-                    
-                    # Crea info ticker dal CSV
-                    csv_ticker_info = {
-                        'symbol': ticker,
-                        'name': company or ticker,
-                        'sector': sector or 'N/A',
-                        'industry': industry or 'N/A',
-                        'currency': 'USD',
-                        'exchange': 'N/A',
-                        'country': 'N/A',
-                        'source': 'CSV'  # Indica che viene dal CSV
-                    }
-                    
-                    # Verifica se il ticker esiste già
-                    ticker_exists = ticker in config['tickers']
-                    
-                    if ticker_exists and not replace_existing:
+                            added.append(ticker)
+                            action = 'da aggiungere' if dry_run else 'aggiunto'
+                        
+                        if not dry_run:
+                            metas[ticker] = self._csv_ticker_meta(row, imported_at)
+                            csv_infos[ticker] = self._csv_ticker_info(row)
+                        
                         results.append({
                             'ticker': ticker,
-                            'status': 'warning',
-                            'message': 'Ticker già presente (saltato)'
+                            'status': 'success',
+                            'message': f"Ticker {action}: {row['company']}"
                         })
-                        skipped_count += 1
-                        continue
-                    
-                    # Aggiungi o aggiorna ticker
-                    if not ticker_exists:
-                        config['tickers'].append(ticker)
-                        added_count += 1
-                        action = 'aggiunto'
-                    else:
-                        updated_count += 1
-                        action = 'aggiornato'
-                    
-                    # Salva/aggiorna metadati con info CSV
-                    meta_data = {
-                        'ticker': ticker,
-                        'info': csv_ticker_info,
-                        'last_close_date': None,
-                        'first_date': None,
-                        'total_records': 0,
-                        'last_updated': datetime.now().isoformat(),
-                        'csv_import': {
-                            'imported_at': datetime.now().isoformat(),
-                            'company': company,
-                            'sector': sector,
-                            'industry': industry
-                        },
-                        'files': {
-                            'adjusted': str(self.data_dir / f"{ticker}.csv"),
-                            'not_adjusted': str(self.data_dir_not_adj / f"{ticker}_notAdjusted.csv")
-                        }
-                    }
-                    
-                    # Salva metadati
-                    try:
-                        self.save_ticker_meta(ticker, meta_data)
-                    except Exception as meta_error:
-                        logger.error(f"Errore salvando metadati per {ticker}: {meta_error}")
-                        # Non bloccare per errori metadati
-                    
-                    results.append({
-                        'ticker': ticker,
-                        'status': 'success',
-                        'message': f'Ticker {action}: {company}'
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Errore processamento riga {line_num}: {e}")
-                    results.append({
-                        'ticker': f'Line {line_num}',
-                        'status': 'error',
-                        'message': f'Errore: {str(e)}'
-                    })
-                    error_count += 1
+            except ValueError as e:
+                return {'status': 'error', 'message': str(e)}
+            except UnicodeDecodeError:
+                return {'status': 'error', 'message': 'Il file CSV non è in codifica UTF-8'}
             
-            # Salva configurazione aggiornata solo se non ci sono stati errori critici
-            try:
-                if added_count > 0 or updated_count > 0:
-                    self.save_ticker_config(config)
-                    logger.info(f"Configurazione salvata con successo")
-                else:
-                    logger.info("Nessuna modifica alla configurazione")
-            except Exception as save_error:
-                logger.error(f"Errore nel salvare configurazione: {save_error}")
-                # Ripristina la configurazione originale
-                config['tickers'] = original_tickers
-                return {
-                    'status': 'error',
-                    'message': f'Errore nel salvare la configurazione: {str(save_error)}'
-                }
+            if total_rows == 0:
+                return {'status': 'error', 'message': 'Nessun dato trovato nel CSV'}
+            
+            logger.info(f"Processamento {total_rows} righe dal CSV")
             
-            # Prepara risultato
             summary = {
-                'total_tickers': len(data_lines),
-                'added_tickers': added_count,
-                'updated_tickers': updated_count,
+                'total_tickers': total_rows,
+                'added_tickers': len(added),
+                'updated_tickers': len(updated),
                 'skipped_tickers': skipped_count,
                 'error_count': error_count
             }
             
-            logger.info(f"CSV processato: {added_count} aggiunti, {updated_count} aggiornati, {skipped_count} saltati, {error_count} errori")
+            if dry_run:
+                message = f"Anteprima CSV: {len(added)} ticker da aggiungere"
+            else:
+                try:
+                    self._commit_csv_import(metas, csv_infos, added)
+                except Exception as save_error:
+                    logger.error(f"Errore nel salvare l'importazione CSV: {save_error}")
+                    return {
+                        'status': 'error',
+                        'message': f'Errore nel salvare la configurazione: {str(save_error)}'
+                    }
+                message = f"CSV importato con successo: {len(added)} ticker aggiunti"
+            
+            logger.info(f"CSV {'analizzato' if dry_run else 'processato'}: {len(added)} aggiunti, {len(updated)} aggiornati, {skipped_count} saltati, {error_count} errori")
             
-            message = f"CSV importato con successo: {added_count} ticker aggiunti"
-            if updated_count > 0:
-                message += f", {updated_count} aggiornati"
+            if updated:
+                message += f", {len(updated)} {'da aggiornare' if dry_run else 'aggiornati'}"
             if skipped_count > 0:
                 message += f", {skipped_count} saltati"
             if error_count > 0:
                 message += f", {error_count} errori"
             
-            return {
+            result = {
                 'status': 'success',
                 'message': message,
                 'summary': summary,
-                'details': results
+                'details': results,
+                'dry_run': dry_run
             }
             
+            # Download accodati in background per i ticker ancora senza dati
+            if download_data and not dry_run:
+                to_download = [ticker for ticker, meta in metas.items() if not meta.get('last_close_date')]
+                self.queue_downloads(to_download)
+                result['queued_downloads'] = len(to_download)
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Errore processamento CSV: {e}")
             import traceback
@@ -1042,4 +1334,175 @@ class TickerDataManager:
             return {
                 'status': 'error',
                 'message': f'Errore processamento CSV: {str(e)}'
-            }
\ No newline at end of file
+            }
+    
+    @staticmethod
+    def _csv_ticker_info(row):
+        """
+        Info di un ticker note dal CSV: solo nome, settore e industria.
+        Exchange, valuta e paese arrivano dalla fonte dati al primo download
+        (servono a calendario di borsa e valuta mostrata).
+        """
+        ticker = row['ticker']
+        return {
+            'symbol': ticker,
+            'name': row['company'] or ticker,
+            'sector': row['sector'] or 'N/A',
+            'industry': row['industry'] or 'N/A',
+            'source': 'CSV'  # Indica che viene dal CSV
+        }
+    
+    def _csv_ticker_meta(self, row, imported_at):
+        """
+        Metadati di un ticker importato da CSV. Per un ticker già presente
+        vengono uniti a quelli su disco al salvataggio (vedi _merge_csv_meta).
+        """
+        ticker = row['ticker']
+        meta_data = {
+            'ticker': ticker,
+            'last_close_date': None,
+            'first_date': None,
+            'total_records': 0,
+            'files': {
+                'adjusted': str(self.data_dir / f"{ticker}.csv"),
+                'not_adjusted': str(self.data_dir_not_adj / f"{ticker}_notAdjusted.csv")
+            }
+        }
+        meta_data.update({
+            'info': self._csv_ticker_info(row),
+            'last_updated': imported_at,
+            'csv_import': {
+                'imported_at': imported_at,
+                'company': row['company'],
+                'sector': row['sector'],
+                'industry': row['industry']
+            }
+        })
+        return meta_data
+    
+    @staticmethod
+    def _merge_csv_meta(current, imported):
+        """
+        Metadati su disco di un ticker già presente con info e dati di
+        importazione del CSV: lo stato dei dati scaricati (last_close_date,
+        total_records, chiusure verificate...) e le info della fonte restano.
+        """
+        merged = dict(current)
+        merged['info'] = {**(current.get('info') or {}), **imported['info']}
+        merged['last_updated'] = imported['last_updated']
+        merged['csv_import'] = imported['csv_import']
+        return merged
+    
+    def _commit_csv_import(self, metas, csv_infos, added):
+        """Salva metadati, cache info e configurazione di un'importazione CSV"""
+        if not metas:
+            logger.info("Nessuna modifica alla configurazione")
+            return
+        
+        self.save_ticker_meta_bulk(metas, merge=self._merge_csv_meta)
+        
+        # Semina la cache info con i campi del CSV: il primo download li completa con la fonte dati
+        try:
+            self.info_cache.put_many(csv_infos, source='CSV', seed=True)
+        except Exception as cache_error:
+            logger.error(f"Errore aggiornando la cache info ticker: {cache_error}")
+        
+        # Unisci ai ticker correnti: nel frattempo altri possono averne aggiunti o rimossi
+        def merge_tickers(latest):
+            current = set(latest['tickers'])
+            latest['tickers'].extend(ticker for ticker in added if ticker not in current)
+            return True
+        
+        self.update_ticker_config(merge_tickers)
+        logger.info(f"Configurazione salvata con successo")
+        self.events.emit('tickers_changed', {'added': list(metas), 'removed': []})
+    
+    def save_ticker_meta_bulk(self, metas, merge=None):
+        """
+        Salva i metadati di molti ticker: quelli dei ticker nuovi con una sola
+        scrittura transazionale (temporanei sincronizzati, poi i rename), senza
+        un lock per ticker durante la scrittura dei temporanei.
+        
+        Ogni rename avviene sotto il lock del ticker dopo aver ricontrollato che
+        il file non esista ancora: i metadati creati nel frattempo da un altro
+        processo (es. un primo download o un altro upload) passano al
+        salvataggio con merge.
+        
+        I ticker con metadati già su disco sono salvati uno alla volta sotto
+        il lock del ticker: lettura, merge(correnti, nuovi) e scrittura nello
+        stesso lock, così un aggiornamento dati concorrente non viene perso.
+        
+        Args:
+            metas (dict): {ticker: metadati}, aggiornato con quelli salvati
+            merge: funzione (metadati su disco, nuovi) -> metadati da salvare
+                (default: i nuovi sostituiscono quelli su disco)
+        """
+        paths = {self.meta_dir / f"{ticker}.json": ticker for ticker in metas}
+        existing = [path for path in paths if path.exists()]
+        
+        def created_meanwhile(path):
+            if path.exists():
+                existing.append(path)
+                return True
+            return False
+        
+        new_paths = [path for path in paths if path not in existing]
+        written = atomic_write_many_json(
+            ((path, metas[paths[path]]) for path in new_paths),
+            lock_for=lambda path: self.locks.ticker(paths[path]),
+            skip=created_meanwhile
+        )
+        for path in existing:
+            ticker = paths[path]
+            with self.locks.ticker(ticker):
+                current = self.load_ticker_meta(ticker)
+                if merge is not None and current:
+                    metas[ticker] = merge(current, metas[ticker])
+                atomic_write_json(path, metas[ticker])
+            written += 1
+        
+        for ticker in metas:
+            self.versions.bump_ticker(ticker)
+        logger.info(f"Metadati salvati per {written} ticker")
+        return written
+    
+    def queue_downloads(self, tickers):
+        """
+        Accoda in background il download dei ticker (download completo per i nuovi)
+        
+        Returns:
+            list: future dei download, nell'ordine dei ticker
+        """
+        if not tickers:
+            return []
+        tickers = list(tickers)
+        if self._downloader is None:
+            self._downloader = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='ticker-download')
+        futures = []
+        for i in range(0, len(tickers), DOWNLOAD_BATCH_SIZE):
+            chunk = tickers[i:i + DOWNLOAD_BATCH_SIZE]
+            # Il download in blocco è accodato prima dei suoi ticker: il pool è FIFO,
+            # quindi parte sempre prima che i download singoli lo attendano
+            batch = self._downloader.submit(self.prefetch_ticker_data, chunk)
+            futures.extend(self._downloader.submit(self._queued_download, ticker, batch) for ticker in chunk)
+        self._downloads.extend(futures)
+        logger.info(f"📥 {len(tickers)} download accodati")
+        return futures
+    
+    def _queued_download(self, ticker, batch=None):
+        try:
+            prefetched = batch.result().get(ticker) if batch is not None else None
+            return self.update_ticker_data(ticker, prefetched=prefetched)
+        except Exception as e:
+            logger.error(f"Errore nel download accodato di {ticker}: {e}")
+            return {'status': 'error', 'message': f'Errore: {e}', 'records': 0}
+    
+    def pending_downloads(self):
+        """Numero di download accodati non ancora completati"""
+        self._downloads = [future for future in self._downloads if not future.done()]
+        return len(self._downloads)
+    
+    def wait_for_downloads(self, timeout=None):
+        """Attende il completamento dei download accodati"""
+        wait(list(self._downloads), timeout=timeout)
+        return self.pending_downloads() == 0
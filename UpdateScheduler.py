@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+UpdateScheduler.py
+
+Aggiornamento pianificato dei ticker.
+
+Prima di scaricare qualcosa lo scheduler chiede a SmartStatus quali ticker
+sono davvero indietro rispetto all'ultima sessione chiusa della loro borsa
+(festività e orari di chiusura per borsa): i ticker già aggiornati non
+costano nessuna richiesta di rete. Quelli da aggiornare vengono scaricati in
+blocchi con provider.fetch_batch (prefetch_ticker_data del manager) e poi
+elaborati e salvati da un pool di worker.
+
+Le esecuzioni possono partire a mano (run) o da una pianificazione in stile
+cron valutata da un thread in background (start/stop). Poiché il controllo
+dei ticker da aggiornare è locale, una pianificazione frequente è economica:
+nei weekend, nei festivi e prima della chiusura non parte nessun download.
+
+Con più worker (store = SharedState) la pianificazione attiva, l'espressione
+cron, il prossimo scatto e l'ultima esecuzione stanno nello stato condiviso:
+start/stop/status danno lo stesso risultato da qualunque worker. Il thread di
+pianificazione gira nel solo processo proprietario (SharedState.claim), che
+rilegge lo stato ogni poll_seconds; un'esecuzione completa tiene un lease
+condiviso, quindi due esecuzioni non si sovrappongono nemmeno tra processi.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from SmartStatus import SmartStatusPython
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+# Ticker per blocco di download (provider.fetch_batch)
+DEFAULT_BATCH_SIZE = 50
+# Ogni 15 minuti: se nessuna borsa ha chiuso una nuova sessione non si scarica nulla
+DEFAULT_SCHEDULE = '*/15 * * * *'
+# Intervallo (secondi) con cui il thread di pianificazione rilegge lo stato condiviso
+DEFAULT_POLL_SECONDS = 5.0
+
+
+class CronSchedule:
+    """
+    Sottoinsieme delle espressioni cron a 5 campi: minuto ora giorno mese
+    giorno-della-settimana, con '*', valori, intervalli 'a-b', liste 'a,b'
+    e passi '*/n' o 'a-b/n'. Domenica = 0 (o 7).
+    """
+
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+    def __init__(self, expression: str, tz=None):
+        parts = expression.split()
+        if len(parts) != len(self.FIELDS):
+            raise ValueError(f"Espressione cron non valida (servono 5 campi): {expression!r}")
+        self.expression = expression
+        self.tz = tz
+        self._values: Dict[str, Set[int]] = {}
+        for part, (name, low, high) in zip(parts, self.FIELDS):
+            self._values[name] = self._parse_field(part, low, high, expression)
+        if 7 in self._values['weekday']:
+            self._values['weekday'] = (self._values['weekday'] - {7}) | {0}
+        # Come in cron: se giorno del mese e della settimana sono entrambi ristretti basta uno dei due
+        self._day_restricted = parts[2] != '*'
+        self._weekday_restricted = parts[4] != '*'
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int, expression: str) -> Set[int]:
+        values = set()
+        for item in field.split(','):
+            span, _, step = item.partition('/')
+            if span == '*':
+                start, end = low, high
+            elif '-' in span:
+                start, end = (int(v) for v in span.split('-', 1))
+            else:
+                start = end = int(span)
+                if step:
+                    end = high
+            step = int(step) if step else 1
+            if not (low <= start <= end <= high) or step < 1:
+                raise ValueError(f"Campo cron fuori intervallo in {expression!r}: {item}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        if moment.month not in self._values['month']:
+            return False
+        day_ok = moment.day in self._values['day']
+        weekday_ok = (moment.weekday() + 1) % 7 in self._values['weekday']
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def matches(self, moment: datetime) -> bool:
+        return (self._day_matches(moment) and moment.hour in self._values['hour']
+                and moment.minute in self._values['minute'])
+
+    def next_after(self, moment: Optional[datetime] = None) -> datetime:
+        """Primo minuto successivo a moment che soddisfa l'espressione."""
+        moment = moment or datetime.now(self.tz)
+        if self.tz is not None:
+            moment = moment.astimezone(self.tz) if moment.tzinfo else moment.replace(tzinfo=self.tz)
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+
+        while candidate < limit:
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self._values['hour']:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self._values['minute']:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"L'espressione cron {self.expression!r} non scatta mai")
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+
+class UpdateScheduler:
+    """Aggiorna solo i ticker con una nuova sessione attesa, in parallelo e su pianificazione."""
+
+    def __init__(self, ticker_manager, smart_status: Optional[SmartStatusPython] = None,
+                 max_workers: int = DEFAULT_WORKERS, schedule: str = DEFAULT_SCHEDULE, tz=None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, store=None, name: str = 'update_scheduler',
+                 poll_seconds: float = DEFAULT_POLL_SECONDS):
+        """
+        Args:
+            ticker_manager: TickerDataManager usato per metadati e download
+            smart_status: valutatore SmartStatus (condiviso con l'app per riusarne la cache)
+            max_workers: ticker elaborati e salvati in parallelo
+            schedule: espressione cron della pianificazione automatica
+            tz: fuso orario in cui valutare l'espressione cron (default: locale)
+            batch_size: ticker scaricati con una sola chiamata provider.fetch_batch
+            store: stato condiviso tra processi (SharedState); None = solo questo processo
+            name: nome del compito e delle chiavi nello stato condiviso
+            poll_seconds: intervallo di rilettura dello stato condiviso nel thread di pianificazione
+        """
+        self.ticker_manager = ticker_manager
+        self.smart_status = smart_status or SmartStatusPython()
+        self.max_workers = max_workers
+        self.batch_size = max(1, batch_size)
+        self.schedule = CronSchedule(schedule, tz)
+        self.store = store
+        self.name = name
+        self.poll_seconds = poll_seconds
+
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.next_run: Optional[datetime] = None
+        # Stato della pianificazione e ultima esecuzione senza store
+        self._state: Dict = {}
+        self._last_run: Optional[Dict] = None
+
+    # ===== SELEZIONE =====
+
+    def due_tickers(self, tickers: Optional[Iterable[str]] = None, now: Optional[datetime] = None):
+        """
+        Divide i ticker tra da aggiornare e già aggiornati, senza accessi di rete.
+
+        Returns:
+            tuple: (lista dei ticker da aggiornare, lista dei ticker già aggiornati)
+        """
+        if tickers is None:
+            tickers = self.ticker_manager.load_ticker_config().get('tickers', [])
+        tickers = list(tickers)
+
+        dates, exchanges = [], []
+        for ticker in tickers:
+            meta = self.ticker_manager.load_ticker_meta(ticker) or {}
+            dates.append(meta.get('last_close_date'))
+            exchanges.append((meta.get('info') or {}).get('exchange'))
+
+        results = self.smart_status.calculate_smart_status_batch(dates, exchanges, tickers, now=now)
+        due = [ticker for ticker, result in zip(tickers, results) if result['needs_update']]
+        current = [ticker for ticker, result in zip(tickers, results) if not result['needs_update']]
+        return due, current
+
+    # ===== ESECUZIONE =====
+
+    def run(self, tickers: Optional[Iterable[str]] = None, force: bool = False,
+            now: Optional[datetime] = None, trigger: str = 'manual') -> Dict:
+        """
+        Aggiorna i ticker indietro (tutti con force=True) con il pool di worker.
+
+        Returns:
+            dict: esito con risultati per ticker e riepilogo; status 'info' se
+            un'altra esecuzione è già in corso
+        """
+        busy = {'status': 'info', 'message': 'Aggiornamento già in corso', 'results': []}
+        if not self._run_lock.acquire(blocking=False):
+            return busy
+        try:
+            token = self.store.acquire_lease(self._run_key) if self.store is not None else None
+            if self.store is not None and token is None:
+                return busy
+            try:
+                return self._run(tickers, force, now, trigger)
+            finally:
+                if token is not None:
+                    self.store.release_lease(self._run_key, token)
+        finally:
+            self._run_lock.release()
+
+    def _run(self, tickers, force, now, trigger):
+        started_at = datetime.now()
+        if tickers is None:
+            tickers = self.ticker_manager.load_ticker_config().get('tickers', [])
+        tickers = list(tickers)
+        if force:
+            due, current = tickers, []
+        else:
+            due, current = self.due_tickers(tickers, now=now)
+
+        results: Dict[str, Dict] = {
+            ticker: {'status': 'info', 'message': f'{ticker} già aggiornato', 'records': 0, 'skipped': True}
+            for ticker in current
+        }
+        if due:
+            logger.info(f"🔄 Aggiornamento di {len(due)} ticker ({len(current)} già aggiornati, trigger: {trigger})")
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(due)),
+                                    thread_name_prefix='ticker-update') as pool:
+                for i in range(0, len(due), self.batch_size):
+                    chunk = due[i:i + self.batch_size]
+                    prefetched = self._prefetch(chunk)
+                    futures = {pool.submit(self.ticker_manager.update_ticker_data, ticker,
+                                           prefetched=prefetched.get(ticker)): ticker
+                               for ticker in chunk}
+                    for future in as_completed(futures):
+                        ticker = futures[future]
+                        try:
+                            results[ticker] = future.result()
+                        except Exception as e:
+                            logger.error(f"Errore nell'aggiornamento pianificato di {ticker}: {e}")
+                            results[ticker] = {'status': 'error', 'message': f'Errore: {e}', 'records': 0}
+
+        ordered: List[Dict] = []
+        for ticker in tickers:
+            result = dict(results[ticker])
+            result['ticker'] = ticker
+            ordered.append(result)
+
+        summary = {
+            'total_tickers': len(tickers),
+            'due_tickers': len(due),
+            'skipped_tickers': len(current),
+            'updated_tickers': sum(1 for r in ordered if r['status'] == 'success' and r.get('records', 0) > 0),
+            'failed_tickers': sum(1 for r in ordered if r['status'] == 'error'),
+            'total_new_records': sum(r.get('records', 0) for r in ordered if r['status'] == 'success'),
+        }
+        self.last_run = {
+            'pid': os.getpid(),
+            'trigger': trigger,
+            'started_at': started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'summary': summary,
+        }
+        if due:
+            logger.info(f"✅ Aggiornamento completato: {summary['updated_tickers']} ticker aggiornati, "
+                        f"{summary['total_new_records']} nuovi record")
+        return {'status': 'success', 'results': ordered, 'summary': summary}
+
+    def _prefetch(self, tickers: List[str]) -> Dict:
+        """Download in blocco dei ticker; se fallisce ogni ticker scarica da sé."""
+        try:
+            return self.ticker_manager.prefetch_ticker_data(tickers)
+        except Exception as e:
+            logger.error(f"Errore nel download in blocco di {len(tickers)} ticker: {e}")
+            return {}
+
+    # ===== STATO CONDIVISO =====
+
+    @property
+    def _state_key(self) -> str:
+        return f'scheduler:{self.name}'
+
+    @property
+    def _run_key(self) -> str:
+        return f'{self.name}:run'
+
+    def _schedule_state(self) -> Dict:
+        """{enabled, schedule, next_run} della pianificazione (condivisi se c'è lo store)."""
+        if self.store is None:
+            return dict(self._state)
+        return self.store.get_setting(self._state_key, {})
+
+    def _update_state(self, **changes):
+        if self.store is None:
+            self._state.update(changes)
+        else:
+            self.store.update_setting(self._state_key, changes)
+
+    @property
+    def last_run(self) -> Optional[Dict]:
+        if self.store is None:
+            return self._last_run
+        return self.store.get_setting(f'{self._state_key}:last_run')
+
+    @last_run.setter
+    def last_run(self, value: Optional[Dict]):
+        if self.store is None:
+            self._last_run = value
+        else:
+            self.store.set_setting(f'{self._state_key}:last_run', value)
+
+    # ===== PIANIFICAZIONE =====
+
+    def start(self, schedule: Optional[str] = None):
+        """
+        Attiva la pianificazione cron (da qualunque worker). Il thread parte in
+        questo processo se nessun altro processo vivo ne è già proprietario.
+
+        Raises:
+            ValueError: espressione cron non valida
+        """
+        if schedule:
+            self.schedule = CronSchedule(schedule, self.schedule.tz)
+        self._update_state(enabled=True, schedule=self.schedule.expression)
+        self._ensure_loop()
+
+    def resume(self):
+        """Avvio del processo: riattiva la pianificazione salvo uno stop esplicito precedente."""
+        state = self._schedule_state()
+        if state.get('enabled') is False:
+            logger.info("⏱️ Scheduler aggiornamenti fermato in precedenza: non riattivato")
+            return
+        if state.get('schedule'):
+            self.schedule = CronSchedule(state['schedule'], self.schedule.tz)
+        self.start()
+
+    def _ensure_loop(self):
+        if self.is_running:
+            return
+        if self.store is not None and not self.store.claim(self.name):
+            # Il thread gira in un altro worker, che rilegge lo stato condiviso
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='update-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"⏱️ Scheduler aggiornamenti avviato ({self.schedule.expression})")
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Disattiva la pianificazione (da qualunque worker: il proprietario ferma il
+        suo thread entro poll_seconds). Un'esecuzione in corso viene completata.
+        """
+        self._update_state(enabled=False, next_run=None)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.next_run = None
+
+    @property
+    def is_running(self) -> bool:
+        """True se il thread di pianificazione gira in questo processo."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _loop(self):
+        next_run = None
+        try:
+            while not self._stop.is_set():
+                state = self._schedule_state()
+                if state.get('enabled') is False:
+                    if self.store is None:
+                        break
+                    self.store.release(self.name)
+                    # Riattivata da un altro worker mentre si liberava il compito: si riprende
+                    if not self._schedule_state().get('enabled') or not self.store.claim(self.name):
+                        break
+                    continue
+                if state.get('schedule') and state['schedule'] != self.schedule.expression:
+                    self.schedule = CronSchedule(state['schedule'], self.schedule.tz)
+                    next_run = None
+
+                if next_run is None:
+                    next_run = self.next_run = self.schedule.next_after()
+                    self._update_state(next_run=next_run.isoformat())
+
+                remaining = (next_run - datetime.now(next_run.tzinfo)).total_seconds()
+                if remaining > 0:
+                    self._stop.wait(min(remaining, self.poll_seconds))
+                    continue
+
+                next_run = None
+                try:
+                    self.run(trigger='schedule')
+                except Exception as e:
+                    logger.error(f"Errore nell'aggiornamento pianificato: {e}")
+        finally:
+            self.next_run = None
+            if self.store is not None:
+                self.store.release(self.name)
+
+    def status(self) -> Dict:
+        """Stato della pianificazione e dell'ultima esecuzione (uguale da ogni worker con lo store)."""
+        state = self._schedule_state()
+        if self.store is None:
+            running = self.is_running
+            in_progress = self._run_lock.locked()
+        else:
+            running = bool(state.get('enabled')) and self.store.owner(self.name) is not None
+            in_progress = self._run_lock.locked() or self.store.lease_holder(self._run_key) is not None
+        return {
+            'running': running,
+            'schedule': state.get('schedule') or self.schedule.expression,
+            'next_run': state.get('next_run') if running else None,
+            'in_progress': in_progress,
+            'max_workers': self.max_workers,
+            'last_run': self.last_run,
+        }
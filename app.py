@@ -1,38 +1,128 @@
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, Response, stream_with_context
 from datetime import datetime, timedelta
 import os
 import logging
+import threading
 import pandas as pd
 import numpy as np
-from pathlib import Path
 import calendar
 
 # Import moduli personalizzati
 from SmartStatus import SmartStatusPython
-from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import (
+    TechnicalAnalysisManager, ADJUSTED, DATA_SOURCES, data_source_name
+)
+from moduls.TechnicalAnalysis.ChartDownsampling import MAX_CHART_POINTS, DOWNSAMPLE_MODES
 from TickerDataManager import TickerDataManager
+from UpdateScheduler import UpdateScheduler, DEFAULT_SCHEDULE
+from moduls.Web.ServerSentEvents import SseBroker
+from moduls.Web.ConditionalRequests import conditional
+from moduls.Web.Compression import init_compression, compact_jsonify
+from moduls.Web.Instrumentation import init_instrumentation, perf_response
+from moduls.Core.PerfMetrics import metrics
+from moduls.Core.DataVersions import DataVersions
+from moduls.Core.LazyObject import LazyObject
+from moduls.Core.SharedState import SharedState, SharedDataVersions
+from moduls.Web.AppConfig import load_config
+from moduls.MarketData import SegmentStore
+from moduls.MarketData.Rollups import DAILY, TIMEFRAMES
+from moduls.MarketData.ExchangeCalendar import calendar_for, exchange_from_meta
 
 # ===== CONFIGURAZIONE APP =====
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-change-this'  # Cambia in produzione
-app.config['DEBUG'] = True
+
+# gzip/brotli negoziati via Accept-Encoding per le risposte oltre 1 KB
+init_compression(app)
+# Tempo di serializzazione JSON di ogni risposta (vedi /api/debug/perf)
+init_instrumentation(app)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ===== INIZIALIZZAZIONE MANAGER =====
-ticker_manager = TickerDataManager()
+# Servizi costruiti alla prima richiesta che li usa, secondo la configurazione
+# applicata da create_app: l'avvio di un worker non legge configurazione, cache
+# info e file di stato delle analisi
+
+def _create_shared_state():
+    return SharedState(app.config['SHARED_STATE_FILE'])
+
+def _create_data_versions():
+    # Con più worker gli ETag devono venire da contatori condivisi
+    if app.config['SHARED_VERSIONS']:
+        return SharedDataVersions(shared_state.get())
+    return DataVersions()
+
+def _create_ticker_manager():
+    manager = TickerDataManager(base_dir=app.config['DATA_DIR'], versions=data_versions.get())
+    manager.events.subscribe(on_ticker_event)
+    manager.events.subscribe(on_ticker_readjusted)
+    return manager
+
+def _create_technical_manager():
+    manager = TechnicalAnalysisManager(base_dir=app.config['DATA_DIR'],
+                                       compact_prices=app.config['COMPACT_PRICES'],
+                                       versions=data_versions.get())
+    manager.events.subscribe(on_analysis_event)
+    return manager
+
+def _create_event_broker():
+    # Con più worker gli eventi passano dallo stato condiviso: ogni worker li inoltra ai suoi client
+    store = shared_state.get() if app.config['SHARED_EVENTS'] else None
+    return SseBroker(store=store, max_clients=app.config['SSE_MAX_CLIENTS'])
+
+def _create_update_scheduler():
+    # Aggiornamenti solo dei ticker con una nuova sessione chiusa (manuali o pianificati);
+    # pianificazione, proprietario ed esecuzione in corso condivisi tra i worker
+    return UpdateScheduler(ticker_manager, smart_status,
+                           max_workers=app.config['UPDATE_WORKERS'],
+                           schedule=app.config['UPDATE_SCHEDULE'] or DEFAULT_SCHEDULE,
+                           store=shared_state.get())
+
+# Impostazioni, feed attività e versioni visti allo stesso modo da tutti i worker
+shared_state = LazyObject(_create_shared_state, 'SharedState')
+# Versioni dei dati: ETag delle API in sola lettura
+data_versions = LazyObject(_create_data_versions, 'DataVersions')
+ticker_manager = LazyObject(_create_ticker_manager, 'TickerDataManager')
+technical_manager = LazyObject(_create_technical_manager, 'TechnicalAnalysisManager')
+update_scheduler = LazyObject(_create_update_scheduler, 'UpdateScheduler')
 smart_status = SmartStatusPython()
-technical_manager = TechnicalAnalysisManager()
 
-# ===== DATI SAMPLE =====
-recent_activities = [
-    {'action': 'Nuovo utente registrato', 'time': '2 minuti fa', 'type': 'success'},
-    {'action': 'Ordine completato #1234', 'time': '5 minuti fa', 'type': 'info'},
-    {'action': 'Errore nel sistema pagamenti', 'time': '10 minuti fa', 'type': 'warning'},
-    {'action': 'Backup completato', 'time': '1 ora fa', 'type': 'success'}
-]
+# Canale Server-Sent Events verso dashboard e gestione dati
+event_broker = LazyObject(_create_event_broker, 'SseBroker')
+_dashboard_refresh_timer = None
+_dashboard_refresh_lock = threading.Lock()
+
+def create_app(config_name=None, **overrides):
+    """
+    Configura l'app con un profilo di AppConfig (default: APP_ENV o
+    development) e le eventuali sovrascritture, es.
+    create_app('production', DATA_DIR='/srv/data').
+
+    I servizi vengono ricostruiti con la nuova configurazione al primo
+    utilizzo: va chiamata prima di servire richieste.
+    """
+    config = load_config(config_name, **overrides)
+    app.config.update(config)
+    # Dettaglio per pattern delle analisi solo con ANALYSIS_DEBUG (spento in produzione)
+    logging.getLogger('moduls.TechnicalAnalysis').setLevel(
+        logging.DEBUG if app.config['ANALYSIS_DEBUG'] else logging.INFO)
+    for service in (shared_state, data_versions, ticker_manager, technical_manager, update_scheduler,
+                    event_broker):
+        service.reset()
+    logger.info(f"App configurata: profilo {config['APP_ENV']}, dati in {config['DATA_DIR']}")
+    return app
+
+def start_background_jobs():
+    """
+    Avvia la pianificazione automatica degli aggiornamenti se configurata
+    (e non fermata da /api/scheduler/stop), in un solo processo anche con più worker.
+    """
+    if app.config['UPDATE_SCHEDULE']:
+        update_scheduler.resume()
+
+create_app()
 
 # ===== FUNZIONI HELPER =====
 
@@ -40,15 +130,15 @@ def get_current_price(ticker):
     """Ottiene il prezzo corrente di un ticker per calcolare le distanze."""
     try:
         # Prova prima con dati adjusted
-        adjusted_file = Path(f'resources/data/daily/{ticker}.csv')
+        adjusted_file = ticker_manager.data_dir / f'{ticker}.csv'
         if adjusted_file.exists():
-            df = pd.read_csv(adjusted_file, parse_dates=['Date'])
+            df = SegmentStore.read_segments(adjusted_file, tail=1)
             return float(df.iloc[-1]['Close'])
         
         # Fallback con dati not adjusted
-        notadj_file = Path(f'resources/data/daily_notAdjusted/{ticker}_notAdjusted.csv')
+        notadj_file = ticker_manager.data_dir_not_adj / f'{ticker}_notAdjusted.csv'
         if notadj_file.exists():
-            df = pd.read_csv(notadj_file, parse_dates=['Date'])
+            df = SegmentStore.read_segments(notadj_file, tail=1)
             return float(df.iloc[-1]['Close'])
             
         return 0.0
@@ -57,6 +147,30 @@ def get_current_price(ticker):
         print(f"Errore ottenimento prezzo corrente per {ticker}: {e}")
         return 0.0
 
+def get_data_source_preference():
+    """Fonte dati scelta dall'utente (True = adjusted), la stessa in tutti i worker"""
+    return shared_state.get_setting('use_adjusted', True)
+
+def request_use_adjusted():
+    """Fonte dati della richiesta: ?source=adjusted|notAdjusted, altrimenti la preferenza dell'utente"""
+    source = request.args.get('source')
+    if source in DATA_SOURCES:
+        return source == ADJUSTED
+    return get_data_source_preference()
+
+def analysis_dependencies(*keys):
+    """Dipendenze di una risposta basata sulle analisi della fonte dati richiesta (vedi conditional)"""
+    use_adjusted = request_use_adjusted()
+    return [DataVersions.analysis_key(use_adjusted), *keys], [data_source_name(use_adjusted)]
+
+def smart_status_for(ticker_status):
+    """SmartStatus di tutte le righe di stato in un'unica valutazione per borsa"""
+    return smart_status.calculate_smart_status_batch(
+        [row.get('last_close_date') for row in ticker_status],
+        [row.get('exchange') for row in ticker_status],
+        [row.get('ticker') for row in ticker_status]
+    )
+
 def get_real_dashboard_stats():
     """Genera statistiche reali basate sui ticker configurati - CON SMART STATUS"""
     try:
@@ -71,7 +185,7 @@ def get_real_dashboard_stats():
         total_records = 0
         total_size_mb = 0
         
-        for ticker in ticker_status:
+        for ticker, smart_result in zip(ticker_status, smart_status_for(ticker_status)):
             # Conta record totali
             total_records += ticker.get('total_records', 0)
             
@@ -94,7 +208,6 @@ def get_real_dashboard_stats():
             
             # Usa SmartStatus invece di needs_update statico
             last_close_date = ticker.get('last_close_date')
-            smart_result = smart_status.calculate_smart_status(last_close_date)
             
             if smart_result['needs_update']:
                 pending_tickers += 1
@@ -126,35 +239,45 @@ def get_real_dashboard_stats():
             'total_size_mb': 0
         }
 
+def _elapsed_text(moment):
+    """Tempo trascorso in forma leggibile ('5 minuti fa', '2 ore fa', '3 giorni fa')"""
+    time_diff = datetime.now() - moment.replace(tzinfo=None)
+    if time_diff.days == 0:
+        if time_diff.seconds < 60:
+            return 'Adesso'
+        if time_diff.seconds < 3600:
+            return f"{time_diff.seconds // 60} minuti fa"
+        return f"{time_diff.seconds // 3600} ore fa"
+    return f"{time_diff.days} giorni fa"
+
 def get_recent_activities():
-    """Genera attività recenti basate sui metadati reali"""
+    """Attività recenti: eventi del feed condiviso, poi aggiornamenti dai metadati reali"""
     activities = []
     
     try:
+        # Eventi registrati da add_activity in qualsiasi worker
+        for activity in shared_state.recent_activities(10):
+            activities.append({
+                'action': activity['action'],
+                'time': _elapsed_text(activity['created_at']),
+                'type': activity['type']
+            })
+        
         # Leggi i file meta più recenti
         meta_files = list(ticker_manager.meta_dir.glob('*.json'))
         meta_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
         
-        for meta_file in meta_files[:10]:  # Ultimi 10
+        for meta_file in meta_files[:10 - len(activities)]:  # Fino a 10 in totale
             meta_data = ticker_manager.load_ticker_meta(meta_file.stem)
             if meta_data:
                 last_updated = meta_data.get('last_updated', '')
                 if last_updated:
                     try:
                         update_time = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                        time_diff = datetime.now() - update_time.replace(tzinfo=None)
-                        
-                        if time_diff.days == 0:
-                            if time_diff.seconds < 3600:
-                                time_str = f"{time_diff.seconds // 60} minuti fa"
-                            else:
-                                time_str = f"{time_diff.seconds // 3600} ore fa"
-                        else:
-                            time_str = f"{time_diff.days} giorni fa"
                         
                         activities.append({
                             'action': f'Ticker {meta_data["ticker"]} aggiornato - {meta_data.get("total_records", 0)} record',
-                            'time': time_str,
+                            'time': _elapsed_text(update_time),
                             'type': 'success'
                         })
                     except:
@@ -177,6 +300,77 @@ def get_recent_activities():
     
     return activities
 
+def add_activity(action, activity_type='info'):
+    """Aggiunge un'attività al feed condiviso tra i worker e aggiorna i client connessi"""
+    try:
+        shared_state.add_activity(action, activity_type)
+    except Exception as e:
+        logger.error(f"Errore salvataggio attività: {e}")
+    schedule_dashboard_refresh()
+
+# ===== EVENTI REAL-TIME (SSE) =====
+
+def schedule_dashboard_refresh(delay=1.0):
+    """Ricalcola statistiche e attività una sola volta per raffica di eventi"""
+    global _dashboard_refresh_timer
+    
+    if not event_broker.has_listeners:
+        return
+    
+    with _dashboard_refresh_lock:
+        if _dashboard_refresh_timer is not None:
+            return
+        _dashboard_refresh_timer = threading.Timer(delay, _publish_dashboard_refresh)
+        _dashboard_refresh_timer.daemon = True
+        _dashboard_refresh_timer.start()
+
+def _publish_dashboard_refresh():
+    global _dashboard_refresh_timer
+    
+    with _dashboard_refresh_lock:
+        _dashboard_refresh_timer = None
+    
+    event_broker.publish('stats', get_real_dashboard_stats())
+    event_broker.publish('activities', get_recent_activities())
+
+def render_ticker_row(status):
+    """HTML della riga ticker, identico a quello della tabella in data.html"""
+    with app.app_context():
+        return render_template('partials/ticker_row.html', ticker=status)
+
+def on_ticker_event(event_type, payload):
+    """Inoltra ai client SSE gli eventi di TickerDataManager con le righe già renderizzate"""
+    if not event_broker.has_listeners:
+        return
+    
+    if event_type == 'ticker_updated':
+        status = ticker_manager.get_single_ticker_status(payload['ticker'])
+        event_broker.publish('ticker_updated', {
+            'ticker': payload['ticker'],
+            'result': payload['result'],
+            'status': status,
+            'row_html': render_ticker_row(status)
+        })
+    elif event_type == 'tickers_changed':
+        rows = {ticker: render_ticker_row(ticker_manager.get_single_ticker_status(ticker))
+                for ticker in payload.get('added', [])}
+        event_broker.publish('tickers_changed', {
+            'added': payload.get('added', []),
+            'removed': payload.get('removed', []),
+            'rows': rows
+        })
+    
+    schedule_dashboard_refresh()
+
+def on_analysis_event(event_type, payload):
+    """Inoltra ai client SSE il completamento delle analisi tecniche"""
+    event_broker.publish(event_type, payload)
+
+def on_ticker_readjusted(event_type, payload):
+    """Storico riscalato per split/dividendo: le analisi del ticker vanno ricalcolate su entrambe le fonti"""
+    if event_type == 'ticker_readjusted':
+        technical_manager.invalidate_ticker(payload['ticker'])
+
 # ===== ROUTES PRINCIPALI =====
 
 @app.route('/')
@@ -244,7 +438,7 @@ def technical_analysis():
     """Pagina principale dell'analisi tecnica"""
     try:
         # Ottieni riassunto delle analisi
-        summary = technical_manager.get_analysis_summary()
+        summary = technical_manager.get_analysis_summary(use_adjusted=get_data_source_preference())
         
         # Carica ticker configurati
         config = ticker_manager.load_ticker_config()
@@ -279,6 +473,23 @@ def api_activities():
         logger.error(f"Errore API activities: {e}")
         return jsonify([]), 500
 
+@app.route('/api/events')
+def api_events():
+    """Canale Server-Sent Events: ticker aggiornati, analisi completate, statistiche"""
+    if event_broker.is_full:
+        # Ogni stream occupa un thread del worker: oltre il limite la pagina usa il ricaricamento periodico
+        response = jsonify({'status': 'error', 'message': 'Troppe connessioni al canale eventi'})
+        response.headers['Retry-After'] = '60'
+        return response, 503
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    # complete: ogni evento arriva su questa connessione, le pagine possono fare a meno del fallback
+    channel = {'complete': event_broker.shared or app.config['WEB_WORKERS'] == 1}
+    response = Response(stream_with_context(event_broker.stream(last_event_id, channel)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # ===== API ENDPOINTS TICKER =====
 
 @app.route('/api/tickers', methods=['GET'])
@@ -320,10 +531,15 @@ def api_remove_ticker(ticker):
         return jsonify(result)
 
 @app.route('/api/tickers/status')
+# needs_update dipende dalla data odierna, smart_status dall'ultima sessione chiusa di ogni borsa
+@conditional(data_versions, lambda: ([DataVersions.CONFIG, DataVersions.PRICES],
+                                     [datetime.now().date(), *smart_status.session_window()]))
 def api_ticker_status():
     """API per ottenere lo stato di tutti i ticker con gestione errori"""
     try:
         status = ticker_manager.get_ticker_status()
+        for row, smart_result in zip(status, smart_status_for(status)):
+            row['smart_status'] = smart_result
         return jsonify(status)
     except Exception as e:
         logger.error(f"Errore nel recuperare status ticker: {e}")
@@ -351,8 +567,8 @@ def api_ticker_details(ticker):
                 'not_adjusted': file_not_adj.exists()
             },
             'file_sizes': {
-                'adjusted': f"{file_adj.stat().st_size / 1024:.1f} KB" if file_adj.exists() else "0 KB",
-                'not_adjusted': f"{file_not_adj.stat().st_size / 1024:.1f} KB" if file_not_adj.exists() else "0 KB"
+                'adjusted': f"{SegmentStore.storage_size(file_adj) / 1024:.1f} KB",
+                'not_adjusted': f"{SegmentStore.storage_size(file_not_adj) / 1024:.1f} KB"
             },
             'needs_update': False
         })
@@ -374,6 +590,7 @@ def api_ticker_details(ticker):
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/api/ticker/<ticker>/data')
+@conditional(data_versions, lambda ticker: ([DataVersions.ticker_key(ticker)], None))
 def api_ticker_data(ticker):
     """API per ottenere gli ultimi dati storici di un ticker"""
     try:
@@ -392,11 +609,8 @@ def api_ticker_data(ticker):
         if not file_path.exists():
             return jsonify({'status': 'error', 'message': f'File dati per {ticker} non trovato'}), 404
         
-        # Leggi il CSV
-        df = pd.read_csv(file_path)
-        
-        # Prendi gli ultimi N record
-        df_recent = df.tail(limit)
+        # Leggi solo gli ultimi N record (i segmenti più vecchi restano su disco)
+        df_recent = SegmentStore.read_segments(file_path, tail=limit)
         
         # Converti in formato JSON amichevole
         records = []
@@ -419,7 +633,7 @@ def api_ticker_data(ticker):
         return jsonify({
             'ticker': ticker,
             'version': version,
-            'total_records': len(df),
+            'total_records': SegmentStore.row_count(file_path),
             'returned_records': len(records),
             'data': records
         })
@@ -443,57 +657,71 @@ def api_download_ticker(ticker):
     
     # Aggiungi all'activity feed
     if result['status'] == 'success':
-        recent_activities.insert(0, {
-            'action': f'Dati {ticker} aggiornati ({result["records"]} record, 2 versioni)',
-            'time': 'Adesso',
-            'type': 'success'
-        })
+        add_activity(f'Dati {ticker} aggiornati ({result["records"]} record, 2 versioni)', 'success')
     elif result['status'] == 'error':
-        recent_activities.insert(0, {
-            'action': f'Errore download {ticker}: {result["message"]}',
-            'time': 'Adesso',
-            'type': 'warning'
-        })
+        add_activity(f'Errore download {ticker}: {result["message"]}', 'warning')
+    
+    return jsonify(result)
+
+@app.route('/api/repair/<ticker>', methods=['POST'])
+def api_repair_ticker(ticker):
+    """API per riscaricare solo le sessioni mancanti nello storico di un ticker"""
+    ticker = ticker.upper()
+    config = ticker_manager.load_ticker_config()
+    
+    if ticker not in config['tickers']:
+        return jsonify({'status': 'error', 'message': f'Ticker {ticker} non configurato'}), 404
+    
+    # ?full=1 controlla tutto lo storico invece dell'ultimo anno
+    lookback_days = None if request.args.get('full') else request.args.get('lookback_days', 365, type=int)
+    result = ticker_manager.repair_ticker_gaps(ticker, lookback_days=lookback_days)
     
-    # Mantieni solo le ultime 10 attività
-    recent_activities[:] = recent_activities[:10]
+    if result['status'] == 'success' and result['filled']:
+        add_activity(f'Storico {ticker} riparato ({result["filled"]} sessioni mancanti)', 'success')
+    elif result['status'] == 'error':
+        add_activity(f'Errore riparazione {ticker}: {result["message"]}', 'warning')
     
     return jsonify(result)
 
 @app.route('/api/download/all')
 def api_download_all():
-    """API per scaricare/aggiornare tutti i ticker"""
-    config = ticker_manager.load_ticker_config()
-    results = []
+    """API per scaricare/aggiornare tutti i ticker (solo quelli con una nuova sessione, ?force=1 per tutti)"""
+    run = update_scheduler.run(force=request.args.get('force') == '1')
+    if run['status'] != 'success':
+        return jsonify(run), 409
     
-    for ticker in config['tickers']:
-        result = ticker_manager.update_ticker_data(ticker)
-        result['ticker'] = ticker
-        results.append(result)
-        
+    for result in run['results']:
         # Aggiungi attività significative
         if result['status'] == 'success' and result['records'] > 0:
-            recent_activities.insert(0, {
-                'action': f'Dati {ticker} aggiornati ({result["records"]} record, 2 versioni)',
-                'time': 'Adesso',
-                'type': 'success'
-            })
+            add_activity(f'Dati {result["ticker"]} aggiornati ({result["records"]} record, 2 versioni)', 'success')
     
-    # Mantieni solo le ultime 10 attività
-    recent_activities[:] = recent_activities[:10]
-    
-    success_count = sum(1 for r in results if r['status'] == 'success' and r['records'] > 0)
-    total_records = sum(r['records'] for r in results if r['status'] == 'success')
-    
-    return jsonify({
-        'status': 'success',
-        'results': results,
-        'summary': {
-            'total_tickers': len(config['tickers']),
-            'updated_tickers': success_count,
-            'total_new_records': total_records
-        }
-    })
+    return jsonify(run)
+
+@app.route('/api/scheduler')
+def api_scheduler_status():
+    """Stato dello scheduler degli aggiornamenti e ticker attualmente da aggiornare"""
+    due, current = update_scheduler.due_tickers()
+    status = update_scheduler.status()
+    status.update({'due_tickers': due, 'current_tickers': len(current)})
+    return jsonify(status)
+
+@app.route('/api/scheduler/<action>', methods=['POST'])
+def api_scheduler_action(action):
+    """
+    Avvia (start, opzionale 'schedule' cron nel body) o ferma (stop) la pianificazione.
+    Valgono per tutti i worker: il thread gira nel processo proprietario.
+    """
+    if action == 'start':
+        payload = request.get_json(silent=True) or {}
+        try:
+            update_scheduler.start(payload.get('schedule'))
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+    elif action == 'stop':
+        update_scheduler.stop(timeout=5)
+    else:
+        return jsonify({'status': 'error', 'message': f'Azione non valida: {action}'}), 404
+    return jsonify({'status': 'success', 'scheduler': update_scheduler.status()})
 
 @app.route('/api/test/connection')
 def api_test_connection():
@@ -522,11 +750,13 @@ def api_upload_csv():
         # Parametri aggiuntivi
         download_data = request.form.get('downloadData') == 'true'
         replace_existing = request.form.get('replaceExisting') == 'true'
+        # Anteprima: valida il file e riporta le azioni senza salvare nulla
+        dry_run = request.form.get('dryRun') == 'true'
         
-        logger.info(f"Inizio upload CSV: {file.filename}, download_data={download_data}, replace_existing={replace_existing}")
+        logger.info(f"Inizio upload CSV: {file.filename}, download_data={download_data}, replace_existing={replace_existing}, dry_run={dry_run}")
         
-        # Processa il CSV
-        result = ticker_manager.process_csv_upload(file, download_data, replace_existing)
+        # Processa il CSV (in streaming; i download sono accodati in background)
+        result = ticker_manager.process_csv_upload(file, download_data, replace_existing, dry_run=dry_run)
         
         logger.info(f"Risultato upload CSV: {result.get('status', 'unknown')}")
         
@@ -548,22 +778,33 @@ def api_run_technical_analysis():
     """API per eseguire l'analisi tecnica completa"""
     try:
         data = request.get_json() or {}
-        use_adjusted = data.get('use_adjusted', True)
+        # Fonte dati della richiesta ('adjusted', 'notAdjusted' o 'both' per calcolarle in
+        # parallelo), altrimenti quella scelta dall'utente (condivisa tra i worker)
+        data_source = data.get('data_source')
+        if data_source not in (*DATA_SOURCES, 'both'):
+            data_source = data_source_name(data.get('use_adjusted', get_data_source_preference()))
         analysis_type = data.get('analysis_type', 'both')  # 'sr', 'skorupinski', 'both'
+        timeframe = data.get('timeframe', DAILY)  # 'daily', 'weekly', 'monthly'
+        # Zone Skorupinski su più timeframe in un solo job (es. ['daily', 'weekly', 'monthly'])
+        timeframes = data.get('timeframes')
+        invalid = [tf for tf in (timeframes or [timeframe]) if tf not in TIMEFRAMES]
+        if invalid:
+            return jsonify({
+                'status': 'error',
+                'message': f"Timeframe non valido: {', '.join(map(str, invalid))} (ammessi: {', '.join(TIMEFRAMES)})"
+            }), 400
         
-        results = {}
-        
-        if analysis_type in ['sr', 'both']:
-            technical_manager.set_data_source(use_adjusted)
-            results['support_resistance'] = technical_manager.run_support_resistance_analysis()
-        
-        if analysis_type in ['skorupinski', 'both']:
-            technical_manager.set_data_source(use_adjusted)
-            results['skorupinski_zones'] = technical_manager.run_skorupinski_analysis()
+        if data_source == 'both':
+            results = technical_manager.run_analysis_all_sources(analysis_type, timeframe, timeframes)
+        else:
+            results = technical_manager.run_analysis(analysis_type, timeframe, timeframes,
+                                                     use_adjusted=data_source == ADJUSTED)
         
         return jsonify({
             'status': 'success',
             'message': 'Analisi tecnica completata',
+            'timeframe': timeframe,
+            'data_source': data_source,
             'results': results
         })
         
@@ -575,19 +816,21 @@ def api_run_technical_analysis():
         }), 500
 
 @app.route('/api/technical-analysis/summary')
+@conditional(data_versions, lambda: analysis_dependencies(DataVersions.CONFIG))
 def api_technical_analysis_summary():
-    """API per ottenere riassunto analisi tecnica"""
+    """API per ottenere riassunto analisi tecnica (?source=adjusted|notAdjusted)"""
+    source_manager = technical_manager.for_source(request_use_adjusted())
     try:
         # Usa technical_manager se disponibile
-        summary = technical_manager.get_analysis_summary()
+        summary = source_manager.get_analysis_summary()
         return jsonify(summary)
         
     except Exception as e:
         logger.error(f"Errore API summary analisi tecnica: {e}")
         
         # Fallback manuale
-        zones_dir = Path('resources/analysis/skorupinski_zones')
-        levels_dir = Path('resources/analysis/support_resistance')
+        zones_dir = source_manager.skorupinski_output_dir
+        levels_dir = source_manager.sr_output_dir
         
         summary = {
             'total_tickers': 0,
@@ -634,10 +877,11 @@ def api_technical_analysis_summary():
         return jsonify(summary)
 
 @app.route('/api/technical-analysis/zones')
+@conditional(data_versions, lambda: analysis_dependencies())
 def get_skorupinski_zones():
-    """API endpoint per ottenere tutte le zone Skorupinski"""
+    """API endpoint per ottenere tutte le zone Skorupinski (?source=adjusted|notAdjusted)"""
     try:
-        zones_dir = Path('resources/analysis/skorupinski_zones')
+        zones_dir = technical_manager.for_source(request_use_adjusted()).skorupinski_output_dir
         
         if not zones_dir.exists():
             return jsonify({
@@ -700,10 +944,12 @@ def get_skorupinski_zones():
         }), 500
 
 @app.route('/api/technical-analysis/levels')
+# La distanza dei livelli usa il prezzo corrente di ogni ticker
+@conditional(data_versions, lambda: analysis_dependencies(DataVersions.PRICES))
 def get_support_resistance_levels():
-    """API endpoint per ottenere tutti i livelli di supporto e resistenza"""
+    """API endpoint per ottenere tutti i livelli di supporto e resistenza (?source=adjusted|notAdjusted)"""
     try:
-        levels_dir = Path('resources/analysis/support_resistance')
+        levels_dir = technical_manager.for_source(request_use_adjusted()).sr_output_dir
         
         if not levels_dir.exists():
             return jsonify({
@@ -768,37 +1014,55 @@ def get_support_resistance_levels():
         }), 500
 
 @app.route('/api/technical-analysis/ticker/<ticker>')
+@conditional(data_versions, lambda ticker: analysis_dependencies())
 def api_technical_ticker_analysis(ticker):
     """API per ottenere analisi tecnica di un ticker specifico"""
     try:
         analysis_type = request.args.get('type', 'both')
-        data = technical_manager.get_ticker_analysis_data(ticker, analysis_type)
+        data = technical_manager.get_ticker_analysis_data(ticker, analysis_type, use_adjusted=request_use_adjusted())
         return jsonify(data)
     except Exception as e:
         logger.error(f"Errore API analisi ticker {ticker}: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/technical-analysis/chart/<ticker>')
+@conditional(data_versions, lambda ticker: analysis_dependencies(DataVersions.ticker_key(ticker)))
 def api_technical_chart_data(ticker):
-    """API per dati grafico con analisi tecnica"""
+    """API per dati grafico con analisi tecnica (?timeframe=daily/weekly/monthly)"""
     try:
         days = request.args.get('days', 100, type=int)
         include_analysis = request.args.get('include_analysis', 'true').lower() == 'true'
-        
-        data = technical_manager.get_ticker_chart_data(ticker, days, include_analysis)
+        timeframe = request.args.get('timeframe', DAILY)
+        invalid = invalid_timeframe_response(timeframe)
+        if invalid:
+            return invalid
+        
+        # ?format=columnar: array paralleli, date in giorni dal 1970-01-01, prezzi a 4 decimali
+        if request.args.get('format') == 'columnar':
+            data = technical_manager.get_ticker_chart_data(ticker, days, include_analysis, columnar=True,
+                                                           timeframe=timeframe, use_adjusted=request_use_adjusted())
+            return compact_jsonify(data)
+        
+        data = technical_manager.get_ticker_chart_data(ticker, days, include_analysis, timeframe=timeframe,
+                                                       use_adjusted=request_use_adjusted())
         return jsonify(data)
     except Exception as e:
         logger.error(f"Errore API chart data {ticker}: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/technical-analysis/set-data-source', methods=['POST'])
+@app.route('/api/technical-analysis/set-data-source', methods=['GET', 'POST'])
 def api_technical_set_data_source():
-    """API per cambiare fonte dati (adjusted vs notAdjusted)"""
+    """API per leggere o cambiare la fonte dati predefinita (adjusted vs notAdjusted)"""
     try:
+        if request.method == 'GET':
+            return jsonify({'status': 'success', 'use_adjusted': get_data_source_preference()})
+        
         data = request.get_json()
-        use_adjusted = data.get('use_adjusted', True)
+        use_adjusted = bool(data.get('use_adjusted', True))
         
-        technical_manager.set_data_source(use_adjusted)
+        # Preferenza nello stato condiviso: ogni richiesta senza ?source la legge e
+        # usa il manager di quella fonte dati (nessun manager viene modificato)
+        shared_state.set_setting('use_adjusted', use_adjusted)
         
         return jsonify({
             'status': 'success',
@@ -809,19 +1073,52 @@ def api_technical_set_data_source():
         logger.error(f"Errore API set data source: {e}")
         return jsonify({'error': str(e)}), 500
 
+def chart_sampling_args():
+    """max_points (0 = storico completo), mode ('ohlc'/'line') e timeframe delle barre ('daily'/'weekly'/'monthly')"""
+    return (request.args.get('max_points', MAX_CHART_POINTS, type=int), request.args.get('mode', 'ohlc'),
+            request.args.get('timeframe', DAILY))
+
+def invalid_timeframe_response(timeframe):
+    """Risposta 400 se il timeframe non è valido, altrimenti None"""
+    if timeframe not in TIMEFRAMES:
+        return jsonify({'error': f"Timeframe non valido: {timeframe}",
+                        'message': f"timeframe deve essere uno tra {', '.join(TIMEFRAMES)}"}), 400
+    return None
+
+def invalid_sampling_response(max_points, mode, timeframe):
+    """Risposta 400 se max_points, mode o timeframe non sono validi, altrimenti None"""
+    if max_points is not None and max_points < 0:
+        return jsonify({'error': f"max_points non valido: {max_points}",
+                        'message': "max_points deve essere 0 (storico completo) o positivo"}), 400
+    if mode not in DOWNSAMPLE_MODES:
+        return jsonify({'error': f"Modalità non valida: {mode}",
+                        'message': f"mode deve essere uno tra {', '.join(DOWNSAMPLE_MODES)}"}), 400
+    return invalid_timeframe_response(timeframe)
+
 @app.route('/api/technical-analysis/chart-plotly/<ticker>')
+@conditional(data_versions, lambda ticker: analysis_dependencies(DataVersions.ticker_key(ticker)))
 def api_technical_chart_plotly(ticker):
     """API per grafico Plotly"""
     try:
         days = request.args.get('days', 100, type=int)
         include_analysis = request.args.get('include_analysis', 'true').lower() == 'true'
+        max_points, mode, timeframe = chart_sampling_args()
+        invalid = invalid_sampling_response(max_points, mode, timeframe)
+        if invalid:
+            return invalid
         
         logger.info(f"Richiesta grafico Plotly per {ticker}, {days} giorni")
         
-        chart_data = technical_manager.generate_plotly_chart(ticker, days, include_analysis)
+        columnar = request.args.get('format') == 'columnar'
+        
+        chart_data = technical_manager.generate_plotly_chart(ticker, days, include_analysis, columnar=columnar,
+                                                             max_points=max_points, mode=mode, timeframe=timeframe,
+                                                             use_adjusted=request_use_adjusted())
         
         logger.info(f"Grafico Plotly generato per {ticker}: {chart_data['data_info']}")
         
+        if columnar:
+            return compact_jsonify(chart_data)
         return jsonify(chart_data)
         
     except Exception as e:
@@ -831,6 +1128,52 @@ def api_technical_chart_plotly(ticker):
             'message': f'Errore nella generazione del grafico per {ticker}'
         }), 500
 
+@app.route('/api/technical-analysis/chart-data/<ticker>')
+@conditional(data_versions, lambda ticker: analysis_dependencies(DataVersions.ticker_key(ticker)))
+def api_technical_chart_primitives(ticker):
+    """API per grafico disegnato lato client: colonne OHLCV + livelli e zone"""
+    try:
+        days = request.args.get('days', 100, type=int)
+        include_analysis = request.args.get('include_analysis', 'true').lower() == 'true'
+        max_points, mode, timeframe = chart_sampling_args()
+        invalid = invalid_sampling_response(max_points, mode, timeframe)
+        if invalid:
+            return invalid
+
+        return compact_jsonify(technical_manager.get_chart_primitives(ticker, days, include_analysis,
+                                                                      max_points=max_points, mode=mode,
+                                                                      timeframe=timeframe,
+                                                                      use_adjusted=request_use_adjusted()))
+
+    except Exception as e:
+        logger.error(f"Errore API chart data {ticker}: {e}")
+        return jsonify({
+            'error': str(e),
+            'message': f'Errore nel caricamento dei dati del grafico per {ticker}'
+        }), 500
+
+@app.route('/api/technical-analysis/chart-range/<ticker>')
+@conditional(data_versions, lambda ticker: ([DataVersions.ticker_key(ticker)],
+                                            [data_source_name(request_use_adjusted())]))
+def api_technical_chart_range(ticker):
+    """API per lo zoom del grafico: prezzi dell'intervallo visibile a piena risoluzione"""
+    try:
+        max_points, mode, timeframe = chart_sampling_args()
+        invalid = invalid_sampling_response(max_points, mode, timeframe)
+        if invalid:
+            return invalid
+
+        return compact_jsonify(technical_manager.get_chart_range(
+            ticker, request.args.get('start'), request.args.get('end'), max_points=max_points, mode=mode,
+            timeframe=timeframe, use_adjusted=request_use_adjusted()))
+
+    except Exception as e:
+        logger.error(f"Errore API chart range {ticker}: {e}")
+        return jsonify({
+            'error': str(e),
+            'message': f"Errore nel caricamento dell'intervallo del grafico per {ticker}"
+        }), 500
+
 # ===== API ENDPOINTS DEBUG =====
 
 @app.route('/api/debug/stats')
@@ -882,13 +1225,12 @@ def api_debug_smart_comparison():
             'ticker_details': []
         }
         
-        for ticker in ticker_status:
+        for ticker, smart_result in zip(ticker_status, smart_status_for(ticker_status)):
             ticker_name = ticker.get('ticker', 'N/A')
             last_close_date = ticker.get('last_close_date')
             static_needs_update = ticker.get('needs_update', True)
             
-            # Calcola con SmartStatus
-            smart_result = smart_status.calculate_smart_status(last_close_date)
+            # Calcolato con SmartStatus
             smart_needs_update = smart_result['needs_update']
             
             # Conta per metodo statico
@@ -928,13 +1270,17 @@ def api_debug_smart_status(ticker):
             return jsonify({'error': f'Ticker {ticker} non trovato'}), 404
         
         last_close_date = meta.get('last_close_date')
-        smart_result = smart_status.calculate_smart_status(last_close_date)
+        exchange = exchange_from_meta(meta)
+        exchange_calendar = calendar_for(exchange, ticker)
+        smart_result = smart_status.calculate_smart_status(last_close_date, exchange, ticker)
         
         return jsonify({
             'ticker': ticker,
+            'exchange': exchange,
+            'calendar': exchange_calendar.code,
             'last_close_date': last_close_date,
-            'last_expected_market_day': smart_status.get_last_expected_market_day().strftime('%Y-%m-%d'),
-            'is_today_market_day': smart_status.is_market_day(datetime.now()),
+            'last_expected_market_day': smart_status.get_last_expected_market_day(exchange, ticker).strftime('%Y-%m-%d'),
+            'is_today_market_day': smart_status.is_market_day(datetime.now(exchange_calendar.tz), exchange, ticker),
             'smart_status': smart_result
         })
         
@@ -942,6 +1288,23 @@ def api_debug_smart_status(ticker):
         logger.error(f"Errore debug smart status {ticker}: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/debug/perf')
+def api_debug_perf():
+    """
+    Tempi per fase (download, process, save, sr_scan, zone_scan, chart_build,
+    json_serialize) con percentili e contatori di questo worker.
+    ?format=prometheus per il formato testuale di Prometheus, ?reset=1 per
+    azzerare le metriche dopo la lettura.
+    """
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json', 'prometheus'):
+        return jsonify({'error': f'Formato non valido: {output_format} (ammessi: json, prometheus)'}), 400
+    response = perf_response(metrics, output_format)
+    if request.args.get('reset') == '1':
+        metrics.reset()
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 # ===== ERROR HANDLERS =====
 
 @app.errorhandler(404)
@@ -1000,4 +1363,10 @@ if __name__ == '__main__':
     
     # Il ticker_manager inizializza le sue directory automaticamente
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Pianificazione automatica degli aggiornamenti se richiesta (solo nel processo
+    # che serve le richieste, non nel processo padre del reloader)
+    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
+    
+    # In produzione: gunicorn -c gunicorn.conf.py wsgi:app
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
\ No newline at end of file
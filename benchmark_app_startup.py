@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'avvio dell'app: tempo di `import app` e memoria del processo
+in un interprete nuovo, più il costo del primo utilizzo dei manager.
+
+L'import deve restare entro STARTUP_BUDGET_SECONDS e non deve caricare le
+librerie pesanti (plotly, yfinance, requests), né costruire i manager, né
+toccare i file dei dati: tutto questo avviene alla prima richiesta.
+
+Uso:
+    python benchmark_app_startup.py [--runs 5] [--budget 1.5] [--importtime]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# Tempo massimo (secondi) di `import app` in un interprete già avviato
+STARTUP_BUDGET_SECONDS = 1.5
+
+# Moduli che l'import dell'app non deve caricare
+DEFERRED_MODULES = ('plotly', 'yfinance', 'requests', 'curl_cffi')
+
+# Eseguito in un interprete nuovo, con la directory di lavoro su una cartella vuota:
+# i manager (al primo utilizzo) scrivono lì le loro directory, non nel progetto
+_PROBE = """
+import json, os, resource, sys, time
+sys.path.insert(0, {project!r})
+start = time.perf_counter()
+import app
+import_seconds = time.perf_counter() - start
+import_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+result = {{
+    'import_seconds': import_seconds,
+    'import_rss_mb': import_rss_mb,
+    'loaded_deferred': sorted(m for m in {deferred!r} if m in sys.modules),
+    'managers_created': [name for name in ('ticker_manager', 'technical_manager', 'update_scheduler',
+                                           'shared_state', 'data_versions')
+                         if getattr(app, name).is_created],
+    'files_created': sorted(os.listdir('.')),
+}}
+if {first_use!r}:
+    start = time.perf_counter()
+    app.ticker_manager.load_ticker_config()
+    app.technical_manager.sr_manager
+    result['first_use_seconds'] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def probe_startup(first_use=False, workdir=None):
+    """Importa l'app in un interprete nuovo e ritorna le misure."""
+    code = _PROBE.format(project=str(PROJECT_DIR), deferred=DEFERRED_MODULES, first_use=first_use)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, MARKET_DATA_PROVIDER=os.environ.get('MARKET_DATA_PROVIDER', 'synthetic'))
+        output = subprocess.run([sys.executable, '-c', code], cwd=workdir or tmp, env=env,
+                                capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark(runs=5):
+    """Esegue più import a freddo e ritorna mediana, peggiore e dettagli dell'ultimo"""
+    probes = [probe_startup(first_use=True) for _ in range(runs)]
+    timings = sorted(p['import_seconds'] for p in probes)
+    return {
+        'runs': runs,
+        'median_seconds': timings[len(timings) // 2],
+        'max_seconds': timings[-1],
+        'rss_mb': max(p['import_rss_mb'] for p in probes),
+        'first_use_seconds': sorted(p['first_use_seconds'] for p in probes)[len(probes) // 2],
+        'loaded_deferred': probes[-1]['loaded_deferred'],
+        'managers_created': probes[-1]['managers_created'],
+        'files_created': probes[-1]['files_created'],
+    }
+
+
+def print_importtime(limit=15):
+    """Moduli più costosi secondo python -X importtime"""
+    with tempfile.TemporaryDirectory() as tmp:
+        stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                 f"import sys; sys.path.insert(0, {str(PROJECT_DIR)!r}); import app"],
+                                cwd=tmp, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                rows.append((int(cumulative), name.rstrip()))
+    print("🐢 Moduli più costosi (cumulativo):")
+    for cumulative, name in sorted(rows, reverse=True)[:limit]:
+        print(f"   {cumulative / 1000:8.1f} ms {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dell'avvio dell'app")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_SECONDS)
+    parser.add_argument('--importtime', action='store_true', help='mostra i moduli più costosi')
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmark avvio app ({args.runs} import a freddo, budget {args.budget:.2f}s)")
+    result = run_benchmark(runs=args.runs)
+    print(f"⏱️ import app: mediana {result['median_seconds']:.3f}s, peggiore {result['max_seconds']:.3f}s")
+    print(f"🧠 Memoria dopo l'import: {result['rss_mb']:.1f} MB")
+    print(f"🔧 Primo utilizzo dei manager: {result['first_use_seconds']:.3f}s")
+    print(f"📦 Librerie rinviate caricate all'import: {result['loaded_deferred'] or 'nessuna'}")
+    print(f"🏗️ Manager costruiti all'import: {result['managers_created'] or 'nessuno'}")
+    if args.importtime:
+        print_importtime()
+
+    ok = (result['median_seconds'] <= args.budget and not result['loaded_deferred']
+          and not result['managers_created'] and not result['files_created'])
+    print("✅ Avvio entro il budget" if ok else "❌ Avvio oltre il budget")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
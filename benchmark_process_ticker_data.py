@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark di TickerDataManager.process_ticker_data su uno storico sintetico.
+Misura tempo e picco di memoria (tracemalloc) del processamento.
+
+Uso:
+    python benchmark_process_ticker_data.py [--years 40] [--float32] [--runs 5]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from TickerDataManager import TickerDataManager
+
+
+def run_benchmark(years=40, float32=False, runs=5, ticker='AAPL'):
+    """Esegue il benchmark e ritorna tempo medio e picco di memoria"""
+    provider = SyntheticMarketDataProvider(seed=1, as_of='2024-12-31')
+    start_date = f"{2025 - years}-01-01"
+    raw = provider.fetch_history(ticker, start_date=start_date)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kwargs = {'price_dtype': np.float32} if float32 else {}
+        manager = TickerDataManager(base_dir=tmp, provider=provider, **kwargs)
+
+        raw_bytes = raw.memory_usage(deep=True).sum()
+
+        # Picco di memoria su una singola esecuzione
+        sample = raw.copy()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        data_not_adj, data_adj = manager.process_ticker_data(sample, ticker)
+        peak = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+
+        output_bytes = data_not_adj.memory_usage(deep=True).sum() + data_adj.memory_usage(deep=True).sum()
+
+        # Tempo medio
+        timings = []
+        for _ in range(runs):
+            sample = raw.copy()
+            t0 = time.perf_counter()
+            manager.process_ticker_data(sample, ticker)
+            timings.append(time.perf_counter() - t0)
+
+    return {
+        'records': len(raw),
+        'input_mb': raw_bytes / 1e6,
+        'output_mb': output_bytes / 1e6,
+        'peak_mb': peak / 1e6,
+        'avg_ms': 1000 * sum(timings) / len(timings)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark process_ticker_data')
+    parser.add_argument('--years', type=int, default=40)
+    parser.add_argument('--float32', action='store_true', help='prezzi in float32')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger('TickerDataManager').setLevel(logging.WARNING)
+
+    print(f"🚀 Benchmark process_ticker_data ({args.years} anni{', float32' if args.float32 else ''})")
+    result = run_benchmark(years=args.years, float32=args.float32, runs=args.runs)
+    print(f"📊 Record: {result['records']}")
+    print(f"📥 Input: {result['input_mb']:.2f} MB")
+    print(f"📤 Output (2 versioni): {result['output_mb']:.2f} MB")
+    print(f"🔝 Picco memoria: {result['peak_mb']:.2f} MB")
+    print(f"⏱️ Tempo medio: {result['avg_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Configurazione gunicorn del profilo di produzione.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Ogni worker è un processo con i suoi manager; lo stato che deve essere
+uguale per tutti (feed attività, fonte dati, versioni per gli ETag) sta in
+SharedState, compresi gli eventi SSE inoltrati ai client di ogni worker.
+Variabili d'ambiente: WEB_CONCURRENCY (worker, default 2 x CPU + 1),
+WEB_THREADS, SSE_MAX_CLIENTS, BIND, SECRET_KEY.
+
+Ogni connessione /api/events aperta (una per scheda del browser) occupa un
+thread del suo worker finché resta collegata: con W worker e T thread
+restano W x (T - SSE_MAX_CLIENTS) thread garantiti per le altre richieste.
+Un client oltre il limite riceve 503 e la pagina ricarica i dati a intervalli.
+"""
+
+import multiprocessing
+import os
+import secrets
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Thread per worker: le connessioni SSE (/api/events) restano aperte a lungo
+threads = int(os.environ.get('WEB_THREADS', '8'))
+# Connessioni SSE per worker: metà dei thread resta alle richieste normali
+sse_max_clients = int(os.environ.get('SSE_MAX_CLIENTS', max(1, threads // 2)))
+
+# Letti dall'app nei worker (vedi moduls/Web/AppConfig.py)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['SSE_MAX_CLIENTS'] = str(sse_max_clients)
+# Senza SECRET_KEY nell'ambiente: chiave generata nel master ed ereditata da
+# tutti i worker (le sessioni non sopravvivono al riavvio del server)
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+timeout = 120
+graceful_timeout = 30
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    # Lo scheduler degli aggiornamenti parte in un solo worker (vedi SharedState.claim)
+    from wsgi import start_background_jobs
+    start_background_jobs()
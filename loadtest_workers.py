@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Load test del profilo di produzione: throughput di gunicorn (wsgi:app) al
+variare del numero di worker, sugli stessi dati.
+
+Prepara una directory dati temporanea con ticker sintetici, avvia gunicorn
+con 1, 2, 4... worker sincroni (un thread ciascuno, così il numero di worker
+è l'unica fonte di parallelismo) e per ognuno invia per --seconds secondi
+richieste concorrenti a un mix di API in sola lettura, senza If-None-Match:
+ogni richiesta ricalcola la risposta. Le route sono CPU-bound, quindi il
+throughput cresce con i worker fino al numero di CPU della macchina.
+
+Richiede gunicorn (pip install gunicorn).
+
+Uso:
+    python loadtest_workers.py [--workers 1 2 4] [--seconds 10] [--concurrency 16] [--tickers 20]
+"""
+
+import argparse
+import http.client
+import importlib.util
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from TickerDataManager import TickerDataManager
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# Attesa massima (secondi) perché gunicorn risponda dopo l'avvio
+STARTUP_TIMEOUT_SECONDS = 30
+
+
+def seed_data(data_dir, tickers=20):
+    """Ticker sintetici con storico completo nella directory dati; ritorna i simboli."""
+    manager = TickerDataManager(base_dir=data_dir, provider=SyntheticMarketDataProvider(seed=11, as_of='2024-06-28'))
+    symbols = [f'LT{i:03d}' for i in range(tickers)]
+    for ticker in symbols:
+        manager.add_ticker(ticker)
+        manager.update_ticker_data(ticker)
+    return symbols
+
+
+def request_mix(symbols):
+    """API in sola lettura interrogate dal test, a rotazione."""
+    paths = ['/api/stats', '/api/tickers/status', '/api/activities']
+    for ticker in symbols[:5]:
+        paths.append(f'/api/technical-analysis/chart-data/{ticker}?days=250')
+        paths.append(f'/api/ticker/{ticker}/details')
+    return paths
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(port, path, timeout=30):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def start_server(workers, port, data_dir):
+    """Avvia gunicorn con `workers` processi sincroni e attende che risponda."""
+    env = dict(os.environ, APP_ENV='production', DATA_DIR=str(data_dir), SECRET_KEY='loadtest',
+               MARKET_DATA_PROVIDER='synthetic')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', '1',
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'wsgi:app'],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn terminato all'avvio (codice {process.returncode})")
+        try:
+            if _get(port, '/api/stats', timeout=5) == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"gunicorn non risponde dopo {STARTUP_TIMEOUT_SECONDS}s")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_load(port, paths, seconds=10.0, concurrency=16):
+    """
+    Richieste concorrenti per `seconds` secondi.
+
+    Returns:
+        dict: richieste, errori, richieste al secondo, latenze p50/p95 (ms)
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                ok = _get(port, path) == 200
+            except OSError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.monotonic() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / duration,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+    }
+
+
+def run_loadtest(worker_counts=(1, 2, 4), seconds=10.0, concurrency=16, tickers=20):
+    """Un run per ogni numero di worker sugli stessi dati; ritorna {worker: risultato}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🧪 Preparazione di {tickers} ticker sintetici...")
+        paths = request_mix(seed_data(tmp, tickers))
+
+        for workers in worker_counts:
+            port = _free_port()
+            process = start_server(workers, port, tmp)
+            try:
+                # Riscaldamento: cache dei manager costruite in ogni worker
+                run_load(port, paths, seconds=min(2.0, seconds), concurrency=concurrency)
+                results[workers] = run_load(port, paths, seconds=seconds, concurrency=concurrency)
+            finally:
+                stop_server(process)
+            result = results[workers]
+            print(f"   {workers} worker: {result['rps']:8.1f} req/s, p50 {result['p50_ms']:6.1f} ms, "
+                  f"p95 {result['p95_ms']:6.1f} ms, {result['errors']} errori")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput di gunicorn al variare dei worker')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--tickers', type=int, default=20)
+    args = parser.parse_args()
+
+    if importlib.util.find_spec('gunicorn') is None:
+        print("❌ gunicorn non installato (pip install gunicorn)")
+        return 2
+    # I log dei download sintetici coprirebbero i risultati
+    logging.disable(logging.INFO)
+
+    # CPU effettivamente assegnate al processo (container, taskset)
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    print(f"🚀 Load test wsgi:app: worker {args.workers}, {args.concurrency} client, "
+          f"{args.seconds:.0f}s per run, {cpus} CPU")
+    if max(args.workers) > cpus:
+        print(f"⚠️ Più worker che CPU: oltre {cpus} worker il throughput non può crescere")
+
+    results = run_loadtest(args.workers, args.seconds, args.concurrency, args.tickers)
+
+    baseline = results[args.workers[0]]['rps']
+    print("\n📊 Scalabilità rispetto al primo run:")
+    for workers, result in results.items():
+        print(f"   {workers} worker: x{result['rps'] / baseline:.2f}")
+    return 1 if any(result['errors'] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# ===== FILE: moduls/Core/AtomicFiles.py =====
+"""
+Scritture atomiche: il contenuto va in un file temporaneo univoco nella
+stessa directory (mkstemp), viene sincronizzato su disco e poi sostituisce
+il file finale con os.replace. Un lettore vede sempre la versione completa
+precedente o quella nuova, mai un file troncato, e due scrittori non
+condividono mai lo stesso file temporaneo.
+
+atomic_write_many_json salva molti file JSON come un'unica transazione:
+prima tutti i temporanei (ognuno sincronizzato con fdatasync), poi i rename,
+infine una sincronizzazione per directory. Se la scrittura di un temporaneo
+fallisce nessun file viene toccato.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterable, Iterator, Optional, Tuple, Union
+
+import pandas as pd
+
+PathLike = Union[str, Path]
+
+# fdatasync non sincronizza i metadati non necessari (es. mtime): dove c'è basta
+_datasync = getattr(os, 'fdatasync', os.fsync)
+
+
+def fsync_directory(directory: PathLike):
+    """Sincronizza su disco le voci di una directory (rename, nuovi file); no-op dove non supportato."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path: PathLike, mode: str = 'w', encoding: str = 'utf-8', copy_existing: bool = False) -> Iterator:
+    """
+    Apre un file temporaneo che al termine del blocco sostituisce `path`.
+
+    Args:
+        path: file di destinazione
+        mode: 'w' (testo) o 'wb'
+        copy_existing: se True il temporaneo parte da una copia del file
+            esistente (per appendere in modo atomico)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        if copy_existing and path.exists():
+            with open(path, 'rb') as src, os.fdopen(os.dup(fd), 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.lseek(fd, 0, os.SEEK_END)
+
+        kwargs = {} if 'b' in mode else {'encoding': encoding, 'newline': ''}
+        with os.fdopen(fd, mode.replace('w', 'a') if copy_existing else mode, **kwargs) as f:
+            fd = None
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+        # mkstemp crea il file con permessi 0600: mantieni quelli del file originale
+        if path.exists():
+            shutil.copymode(path, temp_name)
+        else:
+            os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
+
+
+def atomic_write_json(path: PathLike, data: Any, **dump_kwargs):
+    """Salva un oggetto JSON in modo atomico (default: indent=2)."""
+    dump_kwargs.setdefault('indent', 2)
+    with atomic_open(path) as f:
+        json.dump(data, f, **dump_kwargs)
+
+
+def atomic_write_many_json(items: Iterable[Tuple[PathLike, Any]],
+                           lock_for: Optional[Callable[[Path], ContextManager]] = None,
+                           skip: Optional[Callable[[Path], bool]] = None,
+                           **dump_kwargs) -> int:
+    """
+    Salva molti oggetti JSON in modo atomico come un'unica transazione.
+
+    Ogni temporaneo è sincronizzato con fdatasync (fsync dove non
+    disponibile) prima dei rename; le directory coinvolte sono sincronizzate
+    una volta sola dopo i rename, così i nuovi nomi sopravvivono a un crash.
+    Non si usa os.sync(): scriverebbe su disco tutte le pagine sporche di
+    tutti i filesystem della macchina.
+
+    Args:
+        items: coppie (file di destinazione, oggetto)
+        lock_for: funzione file -> lock da tenere durante il suo rename
+            (es. il lock del ticker per i metadati)
+        skip: funzione file -> True per lasciarlo com'è, chiamata sotto
+            lock_for subito prima del rename (es. file creato nel frattempo
+            da un altro scrittore)
+
+    Returns:
+        numero di file scritti (esclusi quelli saltati)
+    """
+    dump_kwargs.setdefault('indent', 2)
+    staged = []
+    try:
+        for path, data in items:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+            staged.append((path, temp_name))
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                json.dump(data, f, **dump_kwargs)
+                f.flush()
+                _datasync(f.fileno())
+
+        written = 0
+        for index, (path, temp_name) in enumerate(staged):
+            with lock_for(path) if lock_for is not None else nullcontext():
+                if skip is not None and skip(path):
+                    os.unlink(temp_name)
+                else:
+                    if path.exists():
+                        shutil.copymode(path, temp_name)
+                    else:
+                        os.chmod(temp_name, 0o644)
+                    os.replace(temp_name, path)
+                    written += 1
+            staged[index] = (path, None)
+    except BaseException:
+        for _, temp_name in staged:
+            if temp_name is not None and os.path.exists(temp_name):
+                os.unlink(temp_name)
+        raise
+
+    for directory in {path.parent for path, _ in staged}:
+        fsync_directory(directory)
+    return written
+
+
+def atomic_write_csv(path: PathLike, df: pd.DataFrame, append: bool = False, **csv_kwargs):
+    """
+    Salva un DataFrame come CSV in modo atomico.
+
+    Con append=True le righe vengono aggiunte a una copia del file esistente
+    (senza header), che poi sostituisce l'originale.
+    """
+    append = append and Path(path).exists()
+    csv_kwargs.setdefault('index', False)
+    with atomic_open(path, copy_existing=append) as f:
+        df.to_csv(f, header=not append, **csv_kwargs)
@@ -0,0 +1,98 @@
+# ===== FILE: moduls/Core/DataVersions.py =====
+"""
+Versioni dei dati usate per le richieste HTTP condizionali (ETag / Last-Modified).
+
+Ogni scrittura incrementa un contatore:
+- prezzi per ticker (CSV adjusted/notAdjusted e metadati)
+- configurazione ticker (aggiunta/rimozione)
+- analisi (ogni run di supporti/resistenze o zone Skorupinski), per fonte dati
+
+I contatori vivono in memoria; l'epoch casuale generata all'avvio entra in
+ogni ETag, quindi dopo un riavvio nessun ETag precedente può coincidere.
+Con più processi worker si usa SharedDataVersions (moduls/Core/SharedState),
+che tiene contatori ed epoch in un database condiviso.
+"""
+
+import hashlib
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_START = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class DataVersions:
+    """Contatori di versione thread-safe con istante dell'ultima modifica."""
+
+    PRICES = 'prices'
+    CONFIG = 'config'
+    ANALYSIS = 'analysis'
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        # Ultima modifica delle chiavi mai incrementate
+        self.start = _START
+        self._versions: Dict[str, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def ticker_key(ticker: str) -> str:
+        return f"{DataVersions.PRICES}:{ticker.upper()}"
+
+    def bump(self, key: str) -> int:
+        """Incrementa la versione di una chiave; ritorna la nuova versione."""
+        # Le date HTTP hanno risoluzione al secondo
+        return self._bump(key, datetime.now(timezone.utc).replace(microsecond=0))
+
+    def _bump(self, key: str, now: datetime) -> int:
+        with self._lock:
+            version = self._versions.get(key, (0, self.start))[0] + 1
+            self._versions[key] = (version, now)
+            return version
+
+    def _entries(self, keys: Iterable[str]) -> List[Tuple[str, int, datetime]]:
+        """(chiave, versione, ultima modifica) per ogni chiave."""
+        with self._lock:
+            return [(key, *self._versions.get(key, (0, self.start))) for key in keys]
+
+    def bump_ticker(self, ticker: str) -> int:
+        """Nuova versione dei prezzi di un ticker (e della versione aggregata dei prezzi)."""
+        self.bump(self.PRICES)
+        return self.bump(self.ticker_key(ticker))
+
+    def bump_config(self) -> int:
+        return self.bump(self.CONFIG)
+
+    @staticmethod
+    def analysis_key(use_adjusted: bool = True) -> str:
+        """Versione delle analisi di una fonte dati: adjusted e notAdjusted hanno cache indipendenti."""
+        return DataVersions.ANALYSIS if use_adjusted else f"{DataVersions.ANALYSIS}:notAdjusted"
+
+    def bump_analysis(self, use_adjusted: bool = True) -> int:
+        return self.bump(self.analysis_key(use_adjusted))
+
+    def get(self, key: str) -> int:
+        return self._entries([key])[0][1]
+
+    def ticker(self, ticker: str) -> int:
+        return self.get(self.ticker_key(ticker))
+
+    def validators(self, keys: Iterable[str], extra: Optional[Iterable] = None) -> Tuple[str, datetime]:
+        """
+        ETag forte e Last-Modified per una risposta che dipende dalle chiavi indicate.
+
+        Args:
+            keys: chiavi di versione da cui dipende la risposta
+            extra: altri valori che cambiano il contenuto (es. la data odierna)
+
+        Returns:
+            (etag senza virgolette, ultima modifica tra le chiavi)
+        """
+        entries = self._entries(keys)
+
+        parts = [self.epoch] + [f"{key}={version}" for key, version, _ in entries]
+        parts += [str(value) for value in (extra or [])]
+        etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:20]
+        last_modified = max((modified for _, _, modified in entries), default=self.start)
+        return etag, last_modified
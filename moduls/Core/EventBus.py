@@ -0,0 +1,49 @@
+# ===== FILE: moduls/Core/EventBus.py =====
+"""
+Pub/sub sincrono e thread-safe usato dai manager per notificare gli eventi
+(ticker aggiornati, analisi completate...) a chi è in ascolto, ad esempio
+il canale Server-Sent Events dell'app.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str, Dict[str, Any]], None]
+
+
+class EventBus:
+    """Registro di listener chiamati con (event_type, payload)."""
+
+    def __init__(self):
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Listener):
+        """Registra un listener; ritorna il listener per poterlo rimuovere."""
+        with self._lock:
+            self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener: Listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def emit(self, event_type: str, payload: Dict[str, Any] = None):
+        """Notifica tutti i listener; un errore in un listener non blocca gli altri."""
+        with self._lock:
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(event_type, payload or {})
+            except Exception as e:
+                logger.error(f"Errore nel listener per l'evento {event_type}: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._listeners)
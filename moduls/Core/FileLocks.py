@@ -0,0 +1,133 @@
+# ===== FILE: moduls/Core/FileLocks.py =====
+"""
+Lock per ticker e per file condivisi, validi tra thread e tra processi.
+
+Ogni lock è composto da:
+- un RLock di processo (i thread dello stesso processo si escludono a vicenda)
+- un lock esclusivo del sistema operativo su un file .lock (flock su POSIX,
+  msvcrt.locking su Windows), che esclude gli altri processi
+
+Il lock è rientrante per lo stesso thread: il lock su file viene preso solo
+all'acquisizione più esterna, perché flock su un secondo descrittore dello
+stesso processo andrebbe in deadlock.
+"""
+
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+def _lock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        # msvcrt.LK_LOCK ritenta per ~10 secondi: ripeti fino ad acquisizione
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def _unlock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class InterProcessLock:
+    """Lock esclusivo rientrante legato a un file .lock."""
+
+    def __init__(self, lock_file: Union[str, Path]):
+        self.lock_file = Path(lock_file)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                _lock_fd(fd)
+                self._fd = fd
+            except Exception:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock_fd(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# Un solo oggetto lock per file nel processo, condiviso da tutti i manager
+_registry: Dict[str, InterProcessLock] = {}
+_registry_lock = threading.Lock()
+
+
+def lock_for(lock_file: Union[str, Path]) -> InterProcessLock:
+    """Lock associato a un file .lock (sempre la stessa istanza per lo stesso percorso)."""
+    key = os.path.abspath(lock_file)
+    with _registry_lock:
+        lock = _registry.get(key)
+        if lock is None:
+            lock = _registry[key] = InterProcessLock(key)
+        return lock
+
+
+def file_lock(path: Union[str, Path]) -> InterProcessLock:
+    """Lock per un file condiviso (es. file di stato JSON): usa '<file>.lock' accanto."""
+    path = Path(path)
+    return lock_for(path.with_name(path.name + '.lock'))
+
+
+class LockManager:
+    """Lock con nome (per ticker, configurazione...) in una directory dedicata."""
+
+    def __init__(self, lock_dir: Union[str, Path]):
+        self.lock_dir = Path(lock_dir)
+
+    def lock(self, name: str) -> InterProcessLock:
+        safe_name = re.sub(r'[^A-Za-z0-9._-]', '_', name)
+        return lock_for(self.lock_dir / f"{safe_name}.lock")
+
+    def ticker(self, ticker: str) -> InterProcessLock:
+        """Lock per i file (CSV e metadati) di un ticker."""
+        return self.lock(f"ticker_{ticker.upper()}")
+
+    @contextmanager
+    def config(self) -> Iterator[InterProcessLock]:
+        """Lock per la configurazione dei ticker (tickers.json)."""
+        with self.lock('config') as lock:
+            yield lock
@@ -0,0 +1,66 @@
+# ===== FILE: moduls/Core/LazyObject.py =====
+"""
+Oggetti costruiti al primo utilizzo.
+
+L'app espone i manager come variabili di modulo (ticker_manager,
+technical_manager...): costruirli all'import significa leggere file di
+stato, configurazione e cache per ogni worker che si avvia, anche se non
+servirà mai una rotta che li usa. LazyObject mantiene lo stesso nome e la
+stessa interfaccia ma chiama la factory solo al primo accesso a un
+attributo, una volta sola anche con più thread.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class LazyObject:
+    """Proxy che costruisce l'oggetto reale al primo accesso a un attributo."""
+
+    def __init__(self, factory: Callable[[], Any], name: Optional[str] = None):
+        """
+        Args:
+            factory: funzione senza argomenti che costruisce l'oggetto
+            name: nome usato nei log (default: nome della factory)
+        """
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name or getattr(factory, '__name__', 'oggetto'))
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    @property
+    def is_created(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        """Oggetto reale (costruito ora se non esiste ancora)."""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    logger.debug(f"Costruzione di {self._name} al primo utilizzo")
+                    instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def reset(self):
+        """Dimentica l'oggetto costruito: il prossimo accesso chiama di nuovo la factory."""
+        with self._lock:
+            object.__setattr__(self, '_instance', None)
+
+    def __getattr__(self, name: str) -> Any:
+        # Chiamato solo per gli attributi che il proxy non ha: li prende dall'oggetto reale
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.get(), name, value)
+
+    def __repr__(self) -> str:
+        if self._instance is None:
+            return f"<LazyObject {self._name} (non ancora costruito)>"
+        return repr(self._instance)
@@ -0,0 +1,200 @@
+# ===== FILE: moduls/Core/PerfMetrics.py =====
+"""
+Strumentazione leggera dei percorsi caldi: timer e contatori per fase.
+
+Ogni fase (download, process, save, sr_scan, zone_scan, chart_build,
+json_serialize) registra numero di chiamate, tempo totale e massimo, e le
+ultime max_samples durate da cui si calcolano i percentili. Costo per
+chiamata: due letture di perf_counter e un append sotto lock. Le chiamate
+annidate della stessa fase nello stesso thread (es. get_chart_primitives
+che usa get_ticker_chart_data) contano una volta sola, con la durata
+della più esterna.
+
+I valori sono per processo: con più worker gunicorn ogni worker risponde
+con i propri (il pid è nello snapshot).
+
+    from moduls.Core.PerfMetrics import metrics, timed
+
+    @timed('download')
+    def download_ticker_data(...): ...
+
+    with metrics.timer('chart_build'):
+        ...
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Durate conservate per fase (finestra dei percentili)
+DEFAULT_MAX_SAMPLES = 1024
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+PROMETHEUS_PREFIX = 'tradingwebapp'
+
+
+class StageStats:
+    """Durate di una fase: contatori cumulativi e finestra delle ultime misure."""
+
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        """Percentili (nearest-rank) sulla finestra, in secondi."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] for q in QUANTILES}
+
+
+class PerfMetrics:
+    """Registro thread-safe di timer per fase e contatori."""
+
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        # Fasi in corso nel thread corrente (per non contare le chiamate annidate)
+        self._running = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages: Dict[str, StageStats] = {}
+            self._counters: Dict[str, float] = {}
+            self.since = datetime.now()
+
+    # ===== REGISTRAZIONE =====
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats(self.max_samples)
+            stats.add(seconds)
+
+    def increment(self, counter: str, amount: float = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def _enter(self, stage: str) -> bool:
+        """True se `stage` non è già in corso nel thread (la misura va registrata)."""
+        running = getattr(self._running, 'stages', None)
+        if running is None:
+            running = self._running.stages = set()
+        if stage in running:
+            return False
+        running.add(stage)
+        return True
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Misura il blocco (anche se solleva un'eccezione)."""
+        if not self._enter(stage):
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+            self._running.stages.discard(stage)
+
+    def timed(self, stage: str):
+        """Decoratore: misura ogni chiamata della funzione come `stage`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self._enter(stage):
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start)
+                    self._running.stages.discard(stage)
+            return wrapper
+        return decorator
+
+    # ===== LETTURA =====
+
+    def snapshot(self) -> Dict:
+        """
+        Stato corrente, durate in millisecondi:
+        {pid, since, stages: {fase: {count, total_ms, mean_ms, max_ms, p50_ms, ...}}, counters}
+        """
+        with self._lock:
+            stages = {name: (stats.count, stats.total, stats.max, stats.quantiles())
+                      for name, stats in self._stages.items()}
+            counters = dict(self._counters)
+
+        result = {}
+        for name, (count, total, maximum, quantiles) in sorted(stages.items()):
+            entry = {
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+                'max_ms': round(maximum * 1000, 3),
+            }
+            for q, value in quantiles.items():
+                entry[f'p{int(q * 100)}_ms'] = round(value * 1000, 3)
+            result[name] = entry
+        return {
+            'pid': os.getpid(),
+            'since': self.since.isoformat(timespec='seconds'),
+            'stages': result,
+            'counters': dict(sorted(counters.items())),
+        }
+
+    def prometheus_text(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Snapshot nel formato testuale di Prometheus (summary per le fasi, counter per i contatori)."""
+        with self._lock:
+            stages = {name: (stats.count, stats.total, stats.quantiles())
+                      for name, stats in self._stages.items()}
+            counters = dict(self._counters)
+
+        lines: List[str] = []
+        metric = f'{prefix}_stage_duration_seconds'
+        lines.append(f'# HELP {metric} Durata delle fasi strumentate (finestra delle ultime misure).')
+        lines.append(f'# TYPE {metric} summary')
+        for name, (count, total, quantiles) in sorted(stages.items()):
+            for q, value in quantiles.items():
+                lines.append(f'{metric}{{stage="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+
+        for name, value in sorted(counters.items()):
+            counter = f'{prefix}_{name}_total'
+            lines.append(f'# TYPE {counter} counter')
+            lines.append(f'{counter} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+# Registro del processo usato dai manager e dall'app
+metrics = PerfMetrics()
+
+
+def timed(stage: str):
+    """Decoratore sul registro del processo (vedi PerfMetrics.timed)."""
+    return metrics.timed(stage)
@@ -0,0 +1,337 @@
+# ===== FILE: moduls/Core/SharedState.py =====
+"""
+Stato condiviso tra i processi che servono l'app.
+
+Con più worker (gunicorn -w N) ogni processo ha la sua memoria: un feed
+attività in una lista di modulo o una preferenza salvata in un attributo
+divergono da worker a worker, e la risposta dipende da quale processo
+riceve la richiesta. SharedState tiene questi dati in un piccolo database
+SQLite locale (modalità WAL: letture concorrenti, una scrittura alla volta):
+- impostazioni chiave/valore (JSON), es. la fonte dati scelta dall'utente
+- feed delle attività recenti, limitato alle ultime max_activities voci
+- contatori di versione per gli ETag (vedi SharedDataVersions)
+- eventi per i client SSE, con id crescente condiviso: ogni worker li legge
+  e li inoltra ai propri client (vedi SseBroker)
+- proprietario di un compito da eseguire in un solo processo (scheduler)
+  e lease delle operazioni che non devono sovrapporsi tra worker
+
+Il file viene creato al primo utilizzo, non alla costruzione: importare
+l'app non scrive nulla su disco.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from moduls.Core.DataVersions import DataVersions
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Attività conservate nel database (la dashboard ne mostra 10)
+DEFAULT_MAX_ACTIVITIES = 50
+
+# Eventi SSE conservati per i worker in ritardo e la ripresa con Last-Event-ID
+DEFAULT_MAX_EVENTS = 200
+
+# Attesa massima (secondi) di un lock di scrittura tenuto da un altro processo
+BUSY_TIMEOUT_SECONDS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS activities (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    type TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    modified INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedState:
+    """Impostazioni, feed attività e versioni condivisi tra processi su SQLite."""
+
+    def __init__(self, db_file: Union[str, Path], max_activities: int = DEFAULT_MAX_ACTIVITIES,
+                 max_events: int = DEFAULT_MAX_EVENTS):
+        """
+        Args:
+            db_file: file SQLite (creato al primo utilizzo con la sua directory)
+            max_activities: attività conservate, le più vecchie vengono eliminate
+            max_events: eventi SSE conservati, i più vecchi vengono eliminati
+        """
+        self.db_file = Path(db_file)
+        self.max_activities = max_activities
+        self.max_events = max_events
+        # Una connessione per thread; dopo un fork il figlio ne apre di nuove
+        self._local = threading.local()
+
+    # ===== CONNESSIONE =====
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transazione di scrittura: BEGIN IMMEDIATE serializza gli scrittori dei vari processi."""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    # ===== IMPOSTAZIONI =====
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_setting(self, key: str, value: Any):
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(value), time.time()))
+
+    def update_setting(self, key: str, changes: Dict) -> Dict:
+        """Aggiorna alcune chiavi di un'impostazione dizionario in modo atomico; restituisce il nuovo valore."""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            value = json.loads(row[0]) if row else {}
+            value.update(changes)
+            conn.execute('INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(value), time.time()))
+            return value
+
+    def get_or_create_setting(self, key: str, factory) -> Any:
+        """Valore dell'impostazione; se manca lo crea con factory() (lo stesso per tutti i processi)."""
+        with self._transaction() as conn:
+            row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            if row:
+                return json.loads(row[0])
+            value = factory()
+            conn.execute('INSERT INTO settings (key, value, updated_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(value), time.time()))
+            return value
+
+    # ===== FEED ATTIVITÀ =====
+
+    def add_activity(self, action: str, activity_type: str = 'info'):
+        """Aggiunge un'attività al feed e scarta le più vecchie oltre max_activities."""
+        with self._transaction() as conn:
+            cursor = conn.execute('INSERT INTO activities (action, type, created_at) VALUES (?, ?, ?)',
+                                  (action, activity_type, time.time()))
+            conn.execute('DELETE FROM activities WHERE id <= ?', (cursor.lastrowid - self.max_activities,))
+
+    def recent_activities(self, limit: int = 10) -> List[Dict]:
+        """Attività più recenti per prime: {action, type, created_at (datetime locale)}."""
+        rows = self._connection().execute(
+            'SELECT action, type, created_at FROM activities ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        return [{'action': action, 'type': activity_type, 'created_at': datetime.fromtimestamp(created_at)}
+                for action, activity_type, created_at in rows]
+
+    # ===== EVENTI =====
+
+    def publish_event(self, event: str, data: Any) -> int:
+        """Registra un evento per i client SSE di tutti i worker; restituisce il suo id."""
+        with self._transaction() as conn:
+            cursor = conn.execute('INSERT INTO events (event, data, created_at) VALUES (?, ?, ?)',
+                                  (event, json.dumps(data, default=str), time.time()))
+            conn.execute('DELETE FROM events WHERE id <= ?', (cursor.lastrowid - self.max_events,))
+            return cursor.lastrowid
+
+    def events_since(self, event_id: int, limit: int = 100) -> List[Tuple[int, str, Any]]:
+        """Eventi con id maggiore di event_id, dal più vecchio: (id, evento, dati)."""
+        rows = self._connection().execute(
+            'SELECT id, event, data FROM events WHERE id > ? ORDER BY id LIMIT ?', (event_id, limit)).fetchall()
+        return [(row_id, event, json.loads(data)) for row_id, event, data in rows]
+
+    def last_event_id(self) -> int:
+        """Id dell'ultimo evento registrato (0 se nessuno)."""
+        return self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    # ===== VERSIONI =====
+
+    def bump_version(self, key: str, modified: int) -> int:
+        with self._transaction() as conn:
+            conn.execute('INSERT INTO versions (key, version, modified) VALUES (?, 1, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET version = version + 1, modified = excluded.modified',
+                         (key, modified))
+            return conn.execute('SELECT version FROM versions WHERE key = ?', (key,)).fetchone()[0]
+
+    def get_versions(self, keys: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """{chiave: (versione, istante ultima modifica in secondi epoch)} per le chiavi presenti."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        rows = self._connection().execute(
+            f'SELECT key, version, modified FROM versions WHERE key IN ({",".join("?" * len(keys))})',
+            keys).fetchall()
+        return {key: (version, modified) for key, version, modified in rows}
+
+    # ===== COMPITI A PROCESSO SINGOLO =====
+
+    def claim(self, name: str) -> bool:
+        """
+        Prova a diventare il processo proprietario del compito `name` (es.
+        lo scheduler degli aggiornamenti). Riesce se nessun processo vivo lo
+        possiede già; il proprietario che termina libera il compito.
+        """
+        key = f'owner:{name}'
+        pid = os.getpid()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            owner = json.loads(row[0]) if row else None
+            if owner is not None and owner != pid and _pid_alive(owner):
+                return False
+            conn.execute('INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(pid), time.time()))
+        logger.info(f"Processo {pid} proprietario di {name}")
+        return True
+
+    def release(self, name: str) -> bool:
+        """Rinuncia al compito `name` se il proprietario è questo processo."""
+        key = f'owner:{name}'
+        with self._transaction() as conn:
+            row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            if row is None or json.loads(row[0]) != os.getpid():
+                return False
+            conn.execute('DELETE FROM settings WHERE key = ?', (key,))
+        logger.info(f"Processo {os.getpid()} non è più proprietario di {name}")
+        return True
+
+    def owner(self, name: str) -> Optional[int]:
+        """Pid del processo vivo proprietario del compito `name`, None se nessuno."""
+        pid = self.get_setting(f'owner:{name}')
+        return pid if pid is not None and _pid_alive(pid) else None
+
+    # ===== LEASE =====
+
+    def acquire_lease(self, name: str) -> Optional[str]:
+        """
+        Prende il lease `name` (es. un aggiornamento completo in corso) se
+        nessun processo vivo lo tiene, anche questo stesso da un altro thread.
+
+        Returns:
+            token da passare a release_lease, None se il lease è già tenuto
+        """
+        key = f'lease:{name}'
+        with self._transaction() as conn:
+            row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            holder = json.loads(row[0]) if row else None
+            if holder is not None and _pid_alive(holder['pid']):
+                return None
+            token = uuid.uuid4().hex
+            conn.execute('INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)',
+                         (key, json.dumps({'pid': os.getpid(), 'token': token, 'acquired_at': time.time()}),
+                          time.time()))
+        return token
+
+    def release_lease(self, name: str, token: str) -> bool:
+        """Rilascia il lease se è ancora quello ottenuto con `token`."""
+        key = f'lease:{name}'
+        with self._transaction() as conn:
+            row = conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            if row is None or json.loads(row[0])['token'] != token:
+                return False
+            conn.execute('DELETE FROM settings WHERE key = ?', (key,))
+        return True
+
+    def lease_holder(self, name: str) -> Optional[Dict]:
+        """{pid, token, acquired_at} del lease `name` se tenuto da un processo vivo."""
+        holder = self.get_setting(f'lease:{name}')
+        return holder if holder is not None and _pid_alive(holder['pid']) else None
+
+
+class SharedDataVersions(DataVersions):
+    """
+    DataVersions con contatori ed epoch in SharedState: tutti i worker
+    producono lo stesso ETag per gli stessi dati, e una scrittura servita da
+    un worker invalida le copie in cache dei client serviti dagli altri.
+    """
+
+    def __init__(self, store: SharedState):
+        super().__init__()
+        self.store = store
+        self._shared = None
+
+    def _shared_epoch(self) -> Dict:
+        # Letta al primo ETag: la costruzione non apre il database
+        if self._shared is None:
+            self._shared = self.store.get_or_create_setting(
+                'versions_epoch', lambda: {'epoch': uuid.uuid4().hex[:12], 'created': int(time.time())})
+        return self._shared
+
+    # DataVersions.__init__ assegna epoch e start locali: valgono quelli condivisi
+    @property
+    def epoch(self) -> str:
+        return self._shared_epoch()['epoch']
+
+    @epoch.setter
+    def epoch(self, value):
+        pass
+
+    @property
+    def start(self) -> datetime:
+        return datetime.fromtimestamp(self._shared_epoch()['created'], timezone.utc)
+
+    @start.setter
+    def start(self, value):
+        pass
+
+    def _bump(self, key: str, now: datetime) -> int:
+        return self.store.bump_version(key, int(now.timestamp()))
+
+    def _entries(self, keys: Iterable[str]) -> List[Tuple[str, int, datetime]]:
+        keys = list(keys)
+        stored = self.store.get_versions(keys)
+        entries = []
+        for key in keys:
+            version, modified = stored.get(key, (0, None))
+            entries.append((key, version,
+                            self.start if modified is None else datetime.fromtimestamp(modified, timezone.utc)))
+        return entries
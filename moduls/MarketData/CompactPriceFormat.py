@@ -0,0 +1,178 @@
+# ===== FILE: moduls/MarketData/CompactPriceFormat.py =====
+"""
+Rappresentazione compatta (opzionale) dello storico prezzi in memoria.
+
+Formato standard: prezzi float64, date come stringhe/datetime64, volume int64.
+Formato compatto:
+- prezzi OHLC e Adj Close in float32
+- Date come int32 = giorni dal 1970-01-01
+- Volume in uint32 se rientra nel range, altrimenti int64
+
+Precisione dei prezzi float32: mantissa di 24 bit, quindi errore relativo
+di arrotondamento <= 2**-24 (circa 6e-8) per ogni valore. Su un prezzo di
+1.000 l'errore assoluto è < 0.0001, su 100.000 è < 0.01: ben sotto il tick
+minimo dei titoli azionari. Le date in int32 coprono +-5.8 milioni di anni,
+quindi la conversione è esatta.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from moduls.MarketData.SegmentStore import read_segments
+
+# Colonne di prezzo convertite in float32
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close']
+
+# Errore relativo massimo introdotto dalla conversione float64 -> float32
+FLOAT32_RELATIVE_ERROR = 2.0 ** -24
+
+# Decimali dei prezzi nel formato colonnare per il grafico (vedi columnar_price_data)
+COLUMNAR_DECIMALS = 4
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def dates_to_day_numbers(dates) -> np.ndarray:
+    """Converte date (stringhe YYYY-MM-DD o datetime) in giorni dal 1970-01-01 (int32)."""
+    days = pd.to_datetime(dates).to_numpy(dtype='datetime64[D]')
+    return (days - _EPOCH).astype(np.int32)
+
+
+def day_numbers_to_dates(day_numbers) -> pd.DatetimeIndex:
+    """Converte giorni dal 1970-01-01 in DatetimeIndex."""
+    days = np.asarray(day_numbers, dtype=np.int64)
+    return pd.DatetimeIndex(_EPOCH + days.astype('timedelta64[D]'))
+
+
+def format_dates(dates) -> list:
+    """Date come stringhe YYYY-MM-DD, qualunque sia la rappresentazione (int32, datetime, stringa)."""
+    values = dates.to_numpy() if hasattr(dates, 'to_numpy') else np.asarray(dates)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        values = _EPOCH + values.astype('timedelta64[D]')
+    return list(np.datetime_as_string(pd.to_datetime(values).to_numpy(dtype='datetime64[D]'), unit='D'))
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    """True se il DataFrame usa la rappresentazione compatta."""
+    return 'Date' in df.columns and pd.api.types.is_integer_dtype(df['Date'].dtype)
+
+
+def _volume_dtype(volume: np.ndarray):
+    if len(volume) == 0 or (volume.min() >= 0 and volume.max() <= np.iinfo(np.uint32).max):
+        return np.uint32
+    return np.int64
+
+
+def compact_price_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Ritorna una copia del DataFrame prezzi in formato compatto."""
+    compact = df.copy()
+
+    if 'Date' in compact.columns and not is_compact(compact):
+        compact['Date'] = dates_to_day_numbers(compact['Date'])
+
+    for col in PRICE_COLUMNS:
+        if col in compact.columns:
+            compact[col] = compact[col].astype(np.float32)
+
+    if 'Volume' in compact.columns and not compact['Volume'].isna().any():
+        volume = compact['Volume'].to_numpy(dtype=np.int64)
+        compact['Volume'] = volume.astype(_volume_dtype(volume))
+
+    return compact
+
+
+def expand_price_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Riporta un DataFrame compatto al formato standard (datetime64, float64, int64)."""
+    expanded = df.copy()
+
+    if is_compact(expanded):
+        expanded['Date'] = day_numbers_to_dates(expanded['Date'])
+
+    for col in PRICE_COLUMNS:
+        if col in expanded.columns:
+            expanded[col] = expanded[col].astype(np.float64)
+
+    if 'Volume' in expanded.columns and not expanded['Volume'].isna().any():
+        expanded['Volume'] = expanded['Volume'].astype(np.int64)
+
+    return expanded
+
+
+def read_price_csv(file_path: Union[str, Path], compact: bool = False, day_numbers: bool = None,
+                   tail: Optional[int] = None) -> pd.DataFrame:
+    """
+    Legge un CSV prezzi (adjusted o notAdjusted), compresi i segmenti delta.
+
+    Args:
+        file_path: percorso del CSV
+        compact: se True i prezzi sono letti direttamente in float32 e il volume ridotto
+        day_numbers: se True Date in int32 (giorni dal 1970-01-01), altrimenti datetime64.
+                     Default: uguale a compact
+        tail: se indicato, solo le ultime `tail` barre (i segmenti più vecchi non vengono letti)
+
+    Returns:
+        DataFrame ordinato per data
+    """
+    if day_numbers is None:
+        day_numbers = compact
+
+    dtype = {'Date': str}
+    if compact:
+        dtype.update({col: np.float32 for col in PRICE_COLUMNS})
+
+    df = read_segments(file_path, tail=tail, dtype=dtype)
+
+    if day_numbers:
+        df['Date'] = dates_to_day_numbers(df['Date'])
+    else:
+        df['Date'] = pd.to_datetime(df['Date'])
+
+    if compact and 'Volume' in df.columns and not df['Volume'].isna().any():
+        volume = df['Volume'].to_numpy(dtype=np.int64)
+        df['Volume'] = volume.astype(_volume_dtype(volume))
+
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable')
+
+    return df.reset_index(drop=True)
+
+
+def round_prices(values, decimals: Optional[int] = COLUMNAR_DECIMALS) -> list:
+    """Lista di prezzi arrotondati a `decimals` cifre, None al posto di NaN (non è JSON valido)."""
+    values = np.asarray(values, dtype=np.float64)
+    if decimals is not None:
+        values = np.round(values, decimals)
+    listed = values.tolist()
+    if np.isnan(values).any():
+        listed = [None if np.isnan(v) else v for v in listed]
+    return listed
+
+
+def columnar_price_data(df: pd.DataFrame, decimals: Optional[int] = COLUMNAR_DECIMALS) -> Dict[str, list]:
+    """
+    Prezzi come array paralleli per la trasmissione al browser.
+
+    Le chiavi date/open/high/low/close/volume/adj_close non vengono ripetute per
+    ogni barra; Date è in giorni dal 1970-01-01 e i prezzi sono arrotondati a
+    `decimals` cifre (None = precisione piena).
+
+    Returns:
+        {'date': [...], 'open': [...], ..., 'decimals': decimals}
+    """
+    dates = df['Date'].to_numpy()
+    if not pd.api.types.is_integer_dtype(dates.dtype):
+        dates = dates_to_day_numbers(dates)
+
+    columns = {'date': dates.astype(np.int64).tolist()}
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            columns[col.lower().replace(' ', '_')] = round_prices(df[col], decimals)
+
+    if 'Volume' in df.columns and not df['Volume'].isna().any():
+        columns['volume'] = df['Volume'].to_numpy(dtype=np.int64).tolist()
+
+    columns['decimals'] = decimals
+    return columns
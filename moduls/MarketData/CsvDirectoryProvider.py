@@ -0,0 +1,117 @@
+# ===== FILE: moduls/MarketData/CsvDirectoryProvider.py =====
+"""
+Provider che rilegge dati salvati su disco, per replay offline.
+
+Supporta due layout della directory:
+- CSV in formato Yahoo: {directory}/{TICKER}.csv con Date, OHLC, Adj Close, Volume
+- copia della cartella dati dell'app: {directory}/daily/{TICKER}.csv e
+  {directory}/daily_notAdjusted/{TICKER}_notAdjusted.csv
+
+Le info del ticker vengono lette da {directory}/meta/{TICKER}.json (formato
+metadati di TickerDataManager) se presente.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import pandas as pd
+
+from moduls.MarketData.MarketDataProvider import MarketDataProvider, HISTORY_COLUMNS
+from moduls.MarketData.SegmentStore import read_segments
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class CsvDirectoryProvider(MarketDataProvider):
+    """Provider che legge lo storico da una directory di CSV."""
+
+    name = 'csv'
+
+    def __init__(self, directory: Union[str, Path], max_workers: int = 4,
+                 requests_per_second: Optional[float] = None):
+        """
+        Parameters:
+            directory: directory con i CSV da rileggere
+            max_workers: letture parallele usate da fetch_batch
+            requests_per_second: limite di letture (None = illimitato)
+        """
+        super().__init__(max_workers=max_workers, requests_per_second=requests_per_second)
+        self.directory = Path(directory)
+
+    def fetch_history(self, ticker: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Legge lo storico e lo filtra sull'intervallo [start_date, end_date)."""
+        self.rate_limiter.acquire()
+        data = self._read_history(ticker)
+        if data is None:
+            logger.warning(f"Nessun CSV di replay per {ticker} in {self.directory}")
+            return None
+
+        if start_date:
+            data = data[data['Date'] >= start_date]
+        if end_date:
+            data = data[data['Date'] < end_date]
+
+        return data.reset_index(drop=True)
+
+    def fetch_info(self, ticker: str) -> Optional[Dict]:
+        """Info dai metadati salvati oppure info minime se esiste lo storico."""
+        meta_file = self.directory / 'meta' / f"{ticker}.json"
+        if meta_file.exists():
+            try:
+                with open(meta_file, 'r') as f:
+                    info = json.load(f).get('info')
+                if info:
+                    return info
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Metadati di replay non leggibili per {ticker}: {e}")
+
+        if self._find_files(ticker) == (None, None):
+            return None
+
+        return {
+            'symbol': ticker,
+            'name': ticker,
+            'sector': 'N/A',
+            'industry': 'N/A',
+            'currency': 'USD',
+            'exchange': 'N/A',
+            'country': 'N/A',
+            'source': 'CSV replay'
+        }
+
+    def _find_files(self, ticker: str):
+        """Ritorna (file principale, file notAdjusted) secondo il layout trovato."""
+        flat_file = self.directory / f"{ticker}.csv"
+        if flat_file.exists():
+            return flat_file, None
+
+        adjusted = self.directory / 'daily' / f"{ticker}.csv"
+        not_adjusted = self.directory / 'daily_notAdjusted' / f"{ticker}_notAdjusted.csv"
+        if adjusted.exists() and not_adjusted.exists():
+            return adjusted, not_adjusted
+
+        return None, None
+
+    def _read_history(self, ticker: str) -> Optional[pd.DataFrame]:
+        main_file, not_adjusted_file = self._find_files(ticker)
+        if main_file is None:
+            return None
+
+        if not_adjusted_file is None:
+            data = read_segments(main_file)
+            if 'Adj Close' not in data.columns:
+                data['Adj Close'] = data['Close']
+        else:
+            # Layout dell'app: prezzi grezzi dal notAdjusted, Adj Close dall'adjusted
+            data = read_segments(not_adjusted_file)
+            adjusted = read_segments(main_file, usecols=['Date', 'Close'])
+            data = data.merge(adjusted.rename(columns={'Close': 'Adj Close'}), on='Date', how='left')
+            data['Adj Close'] = data['Adj Close'].fillna(data['Close'])
+
+        data['Date'] = data['Date'].str.slice(0, 10)
+        data = data.drop_duplicates('Date', keep='last').sort_values('Date')
+        return data[[c for c in HISTORY_COLUMNS if c in data.columns]]
@@ -0,0 +1,358 @@
+# ===== FILE: moduls/MarketData/ExchangeCalendar.py =====
+"""
+Calendari di borsa precalcolati: NYSE/NASDAQ e Borsa Italiana.
+
+Per ogni borsa:
+- festività generate da regole (date fisse, n-esimo giorno della settimana,
+  Pasqua, festività osservate il venerdì/lunedì) più chiusure straordinarie
+- chiusure anticipate (NYSE: 13:00 il 3 luglio, il giorno dopo il
+  Ringraziamento e la vigilia di Natale)
+- orario di chiusura nel fuso della borsa
+
+Le sessioni di ogni borsa sono calcolate una sola volta e tenute come array
+ordinato di datetime64[D]: "ultima sessione attesa", "sessioni tra due date"
+e "è un giorno di borsa" sono ricerche binarie O(log n).
+
+La borsa di un ticker si ricava da info.exchange nei metadati (codici Yahoo,
+es. NMS, NYQ, MIL); in mancanza dal suffisso del simbolo (.MI = Borsa Italiana),
+altrimenti NYSE.
+"""
+
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = Exception
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DateLike = Union[str, date, datetime, np.datetime64]
+
+# Anni coperti dai calendari precalcolati (oltre l'ultimo anno si estende al volo)
+FIRST_YEAR = 1970
+YEARS_AHEAD = 2
+
+
+# ===== REGOLE DELLE FESTIVITÀ =====
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-esimo giorno della settimana del mese (n=-1 per l'ultimo)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Domenica di Pasqua (calendario gregoriano, algoritmo di Meeus/Jones/Butcher)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date, saturday_to_friday: bool = True) -> Optional[date]:
+    """Festività che cade nel weekend: venerdì prima (sabato) o lunedì dopo (domenica)."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1) if saturday_to_friday else None
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _nyse_holidays(year: int) -> List[date]:
+    holidays = [
+        # Capodanno: se cade di sabato non viene anticipato (sarebbe nell'anno precedente)
+        _observed(date(year, 1, 1), saturday_to_friday=False),
+        _nth_weekday(year, 2, 0, 3),                 # Presidents' Day
+        _easter(year) - timedelta(days=2),           # Good Friday
+        _nth_weekday(year, 5, 0, -1),                # Memorial Day
+        _observed(date(year, 7, 4)),                 # Independence Day
+        _nth_weekday(year, 9, 0, 1),                 # Labor Day
+        _nth_weekday(year, 11, 3, 4),                # Thanksgiving
+        _observed(date(year, 12, 25)),               # Christmas
+    ]
+    if year >= 1998:
+        holidays.append(_nth_weekday(year, 1, 0, 3))   # Martin Luther King Jr. Day
+    if year >= 2022:
+        holidays.append(_observed(date(year, 6, 19)))  # Juneteenth
+    return [d for d in holidays if d is not None]
+
+
+# Chiusure straordinarie NYSE (lutti nazionali, eventi eccezionali)
+NYSE_SPECIAL_CLOSURES = [
+    '1972-12-28', '1973-01-25', '1977-07-14', '1985-09-27', '1994-04-27',
+    '2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14', '2004-06-11',
+    '2007-01-02', '2012-10-29', '2012-10-30', '2018-12-05', '2025-01-09',
+]
+
+
+def _nyse_early_closes(year: int, holidays: Iterable[date]) -> List[date]:
+    holidays = set(holidays)
+    candidates = [
+        date(year, 7, 3),                                   # vigilia dell'Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),   # giorno dopo il Ringraziamento
+        date(year, 12, 24),                                 # vigilia di Natale
+    ]
+    return [d for d in candidates if d.weekday() < 5 and d not in holidays]
+
+
+def _borsa_italiana_holidays(year: int) -> List[date]:
+    easter = _easter(year)
+    return [
+        date(year, 1, 1),
+        easter - timedelta(days=2),    # Venerdì Santo
+        easter + timedelta(days=1),    # Lunedì dell'Angelo
+        date(year, 5, 1),
+        date(year, 8, 15),
+        date(year, 12, 24),
+        date(year, 12, 25),
+        date(year, 12, 26),
+        date(year, 12, 31),
+    ]
+
+
+# ===== CALENDARIO =====
+
+def _to_day(value: DateLike) -> np.datetime64:
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, str):
+        value = value[:10]
+    return np.datetime64(value, 'D')
+
+
+def _zone(name: str, fallback_hours: int) -> timezone:
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo(name)
+        except ZoneInfoNotFoundError:
+            pass
+    # Senza database dei fusi (es. Windows senza tzdata): offset fisso, ignora l'ora legale
+    logger.warning(f"Fuso orario {name} non disponibile, uso UTC{fallback_hours:+d}")
+    return timezone(timedelta(hours=fallback_hours))
+
+
+class ExchangeCalendar:
+    """Calendario di una borsa con sessioni precalcolate."""
+
+    def __init__(self, code: str, name: str, tz: timezone, close_time: time,
+                 holiday_rule: Callable[[int], List[date]],
+                 early_close_rule: Optional[Callable[[int, Iterable[date]], List[date]]] = None,
+                 early_close_time: Optional[time] = None,
+                 special_closures: Iterable[str] = (),
+                 first_year: int = FIRST_YEAR):
+        """
+        Args:
+            code: codice ISO della borsa (es. XNYS)
+            name: nome leggibile
+            tz: fuso orario della borsa
+            close_time: orario di chiusura regolare (ora locale della borsa)
+            holiday_rule: festività di un anno
+            early_close_rule: chiusure anticipate di un anno (dato l'elenco delle festività)
+            early_close_time: orario delle chiusure anticipate
+            special_closures: chiusure straordinarie (YYYY-MM-DD)
+            first_year: primo anno precalcolato
+        """
+        self.code = code
+        self.name = name
+        self.tz = tz
+        self.close_time = close_time
+        self.early_close_time = early_close_time
+        self._holiday_rule = holiday_rule
+        self._early_close_rule = early_close_rule
+        self._special_closures = np.array(sorted(special_closures), dtype='datetime64[D]')
+        self._first_year = first_year
+        self._last_year = None
+        self._lock = threading.Lock()
+        self._build(date.today().year + YEARS_AHEAD)
+
+    # ===== PRECALCOLO =====
+
+    def _build(self, last_year: int):
+        """Calcola festività, chiusure anticipate e sessioni fino a last_year incluso."""
+        holidays, early = [], []
+        for year in range(self._first_year, last_year + 1):
+            year_holidays = self._holiday_rule(year)
+            holidays.extend(year_holidays)
+            if self._early_close_rule:
+                early.extend(self._early_close_rule(year, year_holidays))
+
+        holidays = np.union1d(np.array(holidays, dtype='datetime64[D]'), self._special_closures)
+        days = np.arange(np.datetime64(f'{self._first_year}-01-01'), np.datetime64(f'{last_year + 1}-01-01'))
+        weekdays = (days.astype('int64') + 3) % 7  # 1970-01-01 era giovedì: 0 = lunedì
+
+        self._holidays = holidays
+        self._early_closes = np.setdiff1d(np.array(early, dtype='datetime64[D]'), holidays)
+        self._sessions = days[(weekdays < 5) & ~np.isin(days, holidays)]
+        self._last_year = last_year
+
+    def _ensure_year(self, day: np.datetime64):
+        year = int(str(day)[:4])
+        if year > self._last_year:
+            with self._lock:
+                if year > self._last_year:
+                    self._build(year + YEARS_AHEAD)
+
+    # ===== INTERROGAZIONI =====
+
+    def holidays(self, year: int) -> List[str]:
+        """Festività infrasettimanali e chiusure straordinarie di un anno (YYYY-MM-DD)."""
+        self._ensure_year(np.datetime64(f'{year}-12-31'))
+        lo, hi = np.datetime64(f'{year}-01-01'), np.datetime64(f'{year + 1}-01-01')
+        selected = self._holidays[(self._holidays >= lo) & (self._holidays < hi)]
+        return [str(d) for d in selected]
+
+    def is_session(self, day: DateLike) -> bool:
+        day = _to_day(day)
+        self._ensure_year(day)
+        i = np.searchsorted(self._sessions, day)
+        return bool(i < len(self._sessions) and self._sessions[i] == day)
+
+    def is_early_close(self, day: DateLike) -> bool:
+        day = _to_day(day)
+        self._ensure_year(day)
+        i = np.searchsorted(self._early_closes, day)
+        return bool(i < len(self._early_closes) and self._early_closes[i] == day)
+
+    def close_datetime(self, day: DateLike) -> datetime:
+        """Orario di chiusura della sessione (timezone-aware, fuso della borsa)."""
+        close = self.early_close_time if self.early_close_time and self.is_early_close(day) else self.close_time
+        return datetime.combine(_to_day(day).astype(date), close, tzinfo=self.tz)
+
+    def sessions(self, start: DateLike, end: DateLike) -> np.ndarray:
+        """Sessioni tra start ed end inclusi (datetime64[D])."""
+        start, end = _to_day(start), _to_day(end)
+        self._ensure_year(end)
+        lo = np.searchsorted(self._sessions, start, side='left')
+        hi = np.searchsorted(self._sessions, end, side='right')
+        return self._sessions[lo:hi]
+
+    def session_strings(self, start: DateLike, end: DateLike) -> np.ndarray:
+        """Sessioni tra start ed end inclusi come stringhe YYYY-MM-DD (array di str Python)."""
+        return np.datetime_as_string(self.sessions(start, end), unit='D').astype(object)
+
+    def sessions_between(self, after: DateLike, until: DateLike) -> int:
+        """Numero di sessioni in (after, until]."""
+        after, until = _to_day(after), _to_day(until)
+        self._ensure_year(until)
+        return max(int(np.searchsorted(self._sessions, until, side='right')
+                       - np.searchsorted(self._sessions, after, side='right')), 0)
+
+    def count_sessions_between(self, after: np.ndarray, until: DateLike) -> np.ndarray:
+        """Versione vettoriale di sessions_between per un array di date datetime64[D]."""
+        until = _to_day(until)
+        self._ensure_year(until)
+        after = np.asarray(after, dtype='datetime64[D]')
+        counts = np.searchsorted(self._sessions, until, side='right') - np.searchsorted(self._sessions, after, side='right')
+        return np.maximum(counts, 0)
+
+    def previous_session(self, day: DateLike) -> date:
+        """Ultima sessione strettamente precedente a day."""
+        i = np.searchsorted(self._sessions, _to_day(day), side='left')
+        return self._sessions[max(i - 1, 0)].astype(date)
+
+    def last_expected_session(self, now: Optional[datetime] = None) -> date:
+        """
+        Ultima sessione i cui dati giornalieri dovrebbero essere disponibili:
+        oggi se la borsa ha già chiuso, altrimenti la sessione precedente.
+
+        Args:
+            now: istante di riferimento (naive = ora locale della macchina)
+        """
+        now = now or datetime.now().astimezone()
+        if now.tzinfo is None:
+            now = now.astimezone()
+        local_now = now.astimezone(self.tz)
+        today = np.datetime64(local_now.date(), 'D')
+        self._ensure_year(today)
+
+        if self.is_session(today) and local_now >= self.close_datetime(today):
+            return local_now.date()
+        return self.previous_session(today)
+
+    def __repr__(self):
+        return f"ExchangeCalendar({self.code}, {len(self._sessions)} sessioni fino al {self._last_year})"
+
+
+# ===== REGISTRO =====
+
+NYSE = 'XNYS'
+BORSA_ITALIANA = 'XMIL'
+DEFAULT_CALENDAR = NYSE
+
+# Codici exchange di Yahoo Finance (info.exchange nei metadati) -> calendario
+EXCHANGE_CODES = {
+    # Stati Uniti: NYSE e NASDAQ condividono festività e orari
+    'NMS': NYSE, 'NGM': NYSE, 'NCM': NYSE, 'NAS': NYSE, 'NASDAQ': NYSE,
+    'NYQ': NYSE, 'NYSE': NYSE, 'ASE': NYSE, 'PCX': NYSE, 'BTS': NYSE, 'PNK': NYSE,
+    # Borsa Italiana
+    'MIL': BORSA_ITALIANA, 'BIT': BORSA_ITALIANA, 'MTA': BORSA_ITALIANA,
+}
+
+# Suffissi dei simboli Yahoo -> calendario (quando info.exchange manca)
+TICKER_SUFFIXES = {
+    '.MI': BORSA_ITALIANA,
+}
+
+_CALENDAR_FACTORIES = {
+    NYSE: lambda: ExchangeCalendar(
+        NYSE, 'NYSE / NASDAQ', _zone('America/New_York', -5), time(16, 0),
+        _nyse_holidays, _nyse_early_closes, time(13, 0), NYSE_SPECIAL_CLOSURES),
+    BORSA_ITALIANA: lambda: ExchangeCalendar(
+        BORSA_ITALIANA, 'Borsa Italiana', _zone('Europe/Rome', 1), time(17, 30),
+        _borsa_italiana_holidays),
+}
+
+# Calendari disponibili
+CALENDAR_CODES = tuple(_CALENDAR_FACTORIES)
+
+_calendars: Dict[str, ExchangeCalendar] = {}
+_calendars_lock = threading.Lock()
+
+
+def get_calendar(code: str = DEFAULT_CALENDAR) -> ExchangeCalendar:
+    """Calendario per codice ISO (costruito una volta e condiviso)."""
+    with _calendars_lock:
+        calendar = _calendars.get(code)
+        if calendar is None:
+            calendar = _calendars[code] = _CALENDAR_FACTORIES[code]()
+        return calendar
+
+
+def calendar_code_for(exchange: Optional[str] = None, ticker: Optional[str] = None) -> str:
+    """Codice del calendario da info.exchange o, in mancanza, dal suffisso del ticker."""
+    if exchange and exchange.upper() in EXCHANGE_CODES:
+        return EXCHANGE_CODES[exchange.upper()]
+    if ticker:
+        for suffix, code in TICKER_SUFFIXES.items():
+            if ticker.upper().endswith(suffix):
+                return code
+    return DEFAULT_CALENDAR
+
+
+def calendar_for(exchange: Optional[str] = None, ticker: Optional[str] = None) -> ExchangeCalendar:
+    """Calendario di un ticker (vedi calendar_code_for)."""
+    return get_calendar(calendar_code_for(exchange, ticker))
+
+
+def exchange_from_meta(meta: Optional[Dict]) -> Optional[str]:
+    """info.exchange dai metadati di TickerDataManager, None se assente o 'N/A'."""
+    exchange = ((meta or {}).get('info') or {}).get('exchange')
+    return exchange if exchange and exchange != 'N/A' else None
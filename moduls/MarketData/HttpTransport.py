@@ -0,0 +1,111 @@
+# ===== FILE: moduls/MarketData/HttpTransport.py =====
+"""
+Trasporto HTTP condiviso per i provider di dati di mercato.
+
+Una sola sessione con pool di connessioni keep-alive, retry con backoff
+e limite di richieste al secondo, riutilizzata da tutti i thread del provider.
+"""
+
+import time
+import threading
+import logging
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+
+class RateLimiter:
+    """
+    Limitatore token-bucket thread-safe.
+    Con requests_per_second=None non impone alcun limite.
+    """
+
+    def __init__(self, requests_per_second: Optional[float] = None, burst: int = 1):
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocca finché non è disponibile un token."""
+        if not self.requests_per_second:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.requests_per_second)
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.requests_per_second
+
+            time.sleep(wait)
+
+
+class HttpTransport:
+    """Sessione requests con pool di connessioni, keep-alive e rate limit."""
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 max_retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 timeout: float = 10.0,
+                 requests_per_second: Optional[float] = None,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        """
+        Parameters:
+            pool_size: connessioni mantenute aperte per host
+            max_retries: tentativi su errori di rete e risposte 429/5xx
+            backoff_factor: fattore di attesa esponenziale tra i tentativi
+            timeout: timeout di default per richiesta (secondi)
+            requests_per_second: limite di richieste (None = illimitato)
+            user_agent: User-Agent inviato con ogni richiesta
+        """
+        # requests importato alla creazione del trasporto (primo accesso alla rete),
+        # non all'import del provider
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(requests_per_second, burst=pool_size)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET', 'HEAD']
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Connection': 'keep-alive'
+        })
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        """GET rispettando il rate limit e il timeout di default."""
+        self.rate_limiter.acquire()
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        """Chiude tutte le connessioni del pool."""
+        self.session.close()
@@ -0,0 +1,149 @@
+# ===== FILE: moduls/MarketData/MarketDataProvider.py =====
+"""
+Interfaccia comune per le fonti di dati di mercato.
+
+Ogni provider restituisce i dati storici nello stesso formato usato da
+TickerDataManager (colonna Date come stringa YYYY-MM-DD, colonne OHLC,
+Adj Close e Volume) e le informazioni anagrafiche del ticker nel formato
+salvato nei metadati. I download multipli passano da fetch_batch, che
+rispetta la concorrenza e il rate limit configurati per il provider.
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from moduls.MarketData.HttpTransport import HttpTransport, RateLimiter
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Colonne standard restituite da fetch_history
+HISTORY_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+
+class MarketDataProvider:
+    """
+    Classe base per i provider di dati di mercato.
+    Le sottoclassi implementano fetch_history e fetch_info e chiamano
+    self.rate_limiter.acquire() prima di ogni richiesta verso la fonte.
+    """
+
+    name = 'base'
+
+    def __init__(self, max_workers: int = 4, requests_per_second: Optional[float] = None):
+        """
+        Parameters:
+            max_workers: download paralleli usati da fetch_batch
+            requests_per_second: limite di richieste verso la fonte (None = illimitato)
+        """
+        self.max_workers = max(1, max_workers)
+        self.requests_per_second = requests_per_second
+        self.rate_limiter = RateLimiter(requests_per_second, burst=self.max_workers)
+        self._transport = None
+
+    @property
+    def transport(self) -> HttpTransport:
+        """Trasporto HTTP con pool keep-alive, creato al primo utilizzo."""
+        if self._transport is None:
+            self._transport = HttpTransport(
+                pool_size=self.max_workers,
+                requests_per_second=self.requests_per_second
+            )
+        return self._transport
+
+    def fetch_history(self, ticker: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Scarica lo storico giornaliero di un ticker.
+
+        Args:
+            ticker: simbolo del ticker
+            start_date: data iniziale YYYY-MM-DD (None = storico completo)
+            end_date: data finale YYYY-MM-DD, esclusa (None = oggi)
+
+        Returns:
+            DataFrame con colonne HISTORY_COLUMNS oppure None se non disponibile
+        """
+        raise NotImplementedError
+
+    def fetch_info(self, ticker: str) -> Optional[Dict]:
+        """
+        Ottiene le informazioni anagrafiche di un ticker.
+
+        Returns:
+            Dict con symbol, name, sector, industry, currency, exchange, country
+            oppure None se il ticker non esiste; 'partial': True se sono solo
+            valori segnaposto (il ticker esiste ma le info non sono disponibili)
+        """
+        raise NotImplementedError
+
+    def fetch_batch(self, tickers: Iterable[str], start_date: Optional[str] = None,
+                    end_date: Optional[str] = None) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Scarica lo storico di più ticker in parallelo.
+
+        Returns:
+            Dict ticker -> DataFrame (None per i ticker non disponibili)
+        """
+        tickers = list(dict.fromkeys(tickers))
+
+        def fetch_one(ticker):
+            try:
+                return ticker, self.fetch_history(ticker, start_date=start_date, end_date=end_date)
+            except Exception as e:
+                logger.error(f"Errore nel download batch per {ticker}: {e}")
+                return ticker, None
+
+        if self.max_workers == 1 or len(tickers) <= 1:
+            return dict(fetch_one(t) for t in tickers)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(executor.map(fetch_one, tickers))
+
+    def close(self):
+        """Rilascia le connessioni aperte dal provider."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    @staticmethod
+    def _flatten_columns(data: pd.DataFrame) -> pd.DataFrame:
+        """Appiattisce eventuali colonne MultiIndex mantenendo il primo livello."""
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = [col[0] if col[0] != '' else col[1] for col in data.columns]
+        return data
+
+
+def get_market_data_provider(name: Optional[str] = None, **kwargs) -> MarketDataProvider:
+    """
+    Factory per ottenere un provider a partire dal nome.
+
+    Args:
+        name: 'yahoo' (default), 'synthetic' o 'csv'. Se None usa la variabile
+              d'ambiente MARKET_DATA_PROVIDER. Il provider 'csv' legge la
+              directory indicata da MARKET_DATA_CSV_DIR se non passata.
+        **kwargs: parametri passati al costruttore del provider
+
+    Returns:
+        Istanza di MarketDataProvider
+    """
+    name = (name or os.environ.get('MARKET_DATA_PROVIDER') or 'yahoo').lower()
+
+    if name == 'synthetic':
+        from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+        return SyntheticMarketDataProvider(**kwargs)
+
+    if name == 'csv':
+        from moduls.MarketData.CsvDirectoryProvider import CsvDirectoryProvider
+        kwargs.setdefault('directory', os.environ.get('MARKET_DATA_CSV_DIR', 'resources/replay'))
+        return CsvDirectoryProvider(**kwargs)
+
+    if name != 'yahoo':
+        logger.warning(f"Provider dati sconosciuto '{name}', uso Yahoo Finance")
+
+    from moduls.MarketData.YahooFinanceProvider import YahooFinanceProvider
+    return YahooFinanceProvider(**kwargs)
@@ -0,0 +1,254 @@
+# ===== FILE: moduls/MarketData/Rollups.py =====
+"""
+Barre settimanali e mensili salvate accanto a quelle giornaliere.
+
+Per ogni file prezzi giornaliero (data/daily/AAPL.csv,
+data/daily_notAdjusted/AAPL_notAdjusted.csv) TickerDataManager mantiene:
+- data/weekly/AAPL.csv, data/weekly_notAdjusted/AAPL_notAdjusted.csv
+- data/monthly/AAPL.csv, data/monthly_notAdjusted/AAPL_notAdjusted.csv
+
+Ogni barra aggrega le sessioni del periodo: Open della prima, High massimo,
+Low minimo, Close e Adj Close dell'ultima, Volume somma. Date è l'inizio del
+periodo (lunedì della settimana, primo giorno del mese) e resta stabile
+mentre il periodo si riempie; Last Date è l'ultima sessione inclusa.
+
+Aggiornamento incrementale: quando arrivano nuove barre giornaliere vengono
+ricalcolati solo i periodi a partire da quello della barra più vecchia
+ricevuta (di norma l'ultimo) e scritti come delta con upsert_segment, che
+sostituisce la versione precedente della barra del periodo in corso.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from moduls.MarketData import SegmentStore
+from moduls.MarketData.CompactPriceFormat import dates_to_day_numbers, format_dates, read_price_csv
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+DAILY = 'daily'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+
+TIMEFRAMES = (DAILY, WEEKLY, MONTHLY)
+ROLLUP_TIMEFRAMES = (WEEKLY, MONTHLY)
+
+# Sessioni massime per periodo: righe giornaliere in più da leggere per ricostruire il periodo in corso
+MAX_SESSIONS = {WEEKLY: 7, MONTHLY: 23}
+
+# Sessioni medie per periodo: conversione da giorni di storico a barre del timeframe
+SESSIONS_PER_BAR = {DAILY: 1, WEEKLY: 5, MONTHLY: 21}
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def validate_timeframe(timeframe: str) -> str:
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Timeframe non valido: {timeframe} (ammessi: {', '.join(TIMEFRAMES)})")
+    return timeframe
+
+
+def timeframe_suffix(timeframe: str) -> str:
+    """Suffisso dei file di analisi: '' per il giornaliero, '_weekly'/'_monthly' per gli altri."""
+    return '' if timeframe == DAILY else f'_{validate_timeframe(timeframe)}'
+
+
+def bars_for_days(days: int, timeframe: str) -> int:
+    """Barre del timeframe che coprono circa `days` sessioni giornaliere (0 = tutto lo storico)."""
+    if days <= 0:
+        return days
+    return -(-days // SESSIONS_PER_BAR[timeframe]) + (timeframe != DAILY)
+
+
+def period_keys(day_numbers, timeframe: str) -> np.ndarray:
+    """Chiave del periodo (settimana da lunedì o mese) per giorni dal 1970-01-01."""
+    days = np.asarray(day_numbers, dtype=np.int64)
+    if timeframe == WEEKLY:
+        # Il giorno 0 (1970-01-01) è un giovedì: +3 fa iniziare le settimane di lunedì
+        return (days + 3) // 7
+    if timeframe == MONTHLY:
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"Timeframe non aggregabile: {timeframe}")
+
+
+def period_start_days(keys, timeframe: str) -> np.ndarray:
+    """Primo giorno (giorni dal 1970-01-01) dei periodi con le chiavi indicate."""
+    keys = np.asarray(keys, dtype=np.int64)
+    if timeframe == WEEKLY:
+        return keys * 7 - 3
+    if timeframe == MONTHLY:
+        return (keys.astype('datetime64[M]').astype('datetime64[D]') - _EPOCH).astype(np.int64)
+    raise ValueError(f"Timeframe non aggregabile: {timeframe}")
+
+
+def group_starts(keys: np.ndarray) -> np.ndarray:
+    """Indici in cui inizia un nuovo gruppo di chiavi consecutive uguali."""
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def aggregate_bars(df: pd.DataFrame, starts: np.ndarray) -> pd.DataFrame:
+    """
+    Aggrega le barre in gruppi consecutivi che iniziano agli indici starts.
+
+    Date è quella della prima barra del gruppo; NaN ignorati in high/low.
+    """
+    ends = np.r_[starts[1:], len(df)] - 1
+    result = {'Date': df['Date'].to_numpy()[starts]}
+    for col in df.columns:
+        if col == 'Date':
+            continue
+        values = df[col].to_numpy()
+        if col == 'Open':
+            result[col] = values[starts]
+        elif col == 'High':
+            result[col] = np.fmax.reduceat(values, starts)
+        elif col == 'Low':
+            result[col] = np.fmin.reduceat(values, starts)
+        elif col == 'Volume' and not df[col].isna().any():
+            result[col] = np.add.reduceat(values, starts)
+        else:
+            # Close, Adj Close e ogni altra colonna: valore dell'ultima barra
+            result[col] = values[ends]
+    return pd.DataFrame(result, columns=df.columns)
+
+
+def _day_numbers(dates) -> np.ndarray:
+    values = dates.to_numpy() if hasattr(dates, 'to_numpy') else np.asarray(dates)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.astype(np.int64)
+    return dates_to_day_numbers(values).astype(np.int64)
+
+
+def rollup_frame(daily: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Barre del timeframe dalle barre giornaliere (ordinate per data).
+
+    Returns:
+        DataFrame con le colonne del giornaliero più Last Date; Date e Last Date
+        come stringhe YYYY-MM-DD
+    """
+    columns = list(daily.columns) + ['Last Date']
+    if daily.empty:
+        return pd.DataFrame(columns=columns)
+
+    days = _day_numbers(daily['Date'])
+    keys = period_keys(days, timeframe)
+    starts = group_starts(keys)
+
+    bars = aggregate_bars(daily, starts)
+    ends = np.r_[starts[1:], len(daily)] - 1
+    bars['Date'] = format_dates(period_start_days(keys[starts], timeframe))
+    bars['Last Date'] = format_dates(days[ends])
+    return bars[columns]
+
+
+def rollup_dir(daily_dir: PathLike, timeframe: str) -> Path:
+    """Cartella del timeframe (data/daily_notAdjusted -> data/weekly_notAdjusted)."""
+    daily_dir = Path(daily_dir)
+    return daily_dir.parent / daily_dir.name.replace(DAILY, timeframe, 1)
+
+
+def rollup_path(daily_path: PathLike, timeframe: str) -> Path:
+    """File del timeframe per un file giornaliero (data/daily/X.csv -> data/weekly/X.csv)."""
+    daily_path = Path(daily_path)
+    return rollup_dir(daily_path.parent, timeframe) / daily_path.name
+
+
+def rebuild_rollups(daily_path: PathLike, timeframes=ROLLUP_TIMEFRAMES) -> Dict[str, int]:
+    """
+    Ricostruisce da zero i file dei timeframe (download completo, storico riscalato).
+    Il chiamante deve tenere il lock del ticker.
+
+    Returns:
+        {timeframe: barre scritte}
+    """
+    daily = SegmentStore.read_segments(daily_path, float_precision='round_trip')
+    written = {}
+    for timeframe in timeframes:
+        target = rollup_path(daily_path, timeframe)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        bars = rollup_frame(daily, timeframe)
+        SegmentStore.write_base(target, bars)
+        written[timeframe] = len(bars)
+    return written
+
+
+def _read_daily_since(daily_path: Path, start_day: int, hint: int) -> pd.DataFrame:
+    """Barre giornaliere da start_day in poi: prima solo la coda, tutto lo storico se non basta."""
+    tail = SegmentStore.read_segments(daily_path, tail=hint, float_precision='round_trip')
+    if len(tail) < hint or (len(tail) and _day_numbers(tail['Date'])[0] <= start_day):
+        daily = tail
+    else:
+        daily = SegmentStore.read_segments(daily_path, float_precision='round_trip')
+    return daily[_day_numbers(daily['Date']) >= start_day].reset_index(drop=True)
+
+
+def update_rollups(daily_path: PathLike, since, new_rows: int,
+                   timeframes=ROLLUP_TIMEFRAMES) -> Dict[str, int]:
+    """
+    Aggiorna i file dei timeframe dopo l'aggiunta di barre giornaliere.
+
+    Ricalcola solo i periodi dal periodo di `since` (data più vecchia tra le
+    barre ricevute) in poi. Il chiamante deve tenere il lock del ticker.
+
+    Args:
+        daily_path: file giornaliero già aggiornato
+        since: data della barra più vecchia ricevuta
+        new_rows: barre ricevute (dimensiona la lettura della coda del giornaliero)
+
+    Returns:
+        {timeframe: barre riscritte}
+    """
+    daily_path = Path(daily_path)
+    since_day = int(_day_numbers([since])[0])
+    written = {}
+    for timeframe in timeframes:
+        target = rollup_path(daily_path, timeframe)
+        if not target.exists():
+            # File mai costruito (storico precedente ai rollup): ricostruzione completa
+            written.update(rebuild_rollups(daily_path, [timeframe]))
+            continue
+
+        start_day = int(period_start_days(period_keys([since_day], timeframe), timeframe)[0])
+        daily = _read_daily_since(daily_path, start_day, new_rows + MAX_SESSIONS[timeframe])
+        bars = rollup_frame(daily, timeframe)
+        if not bars.empty:
+            SegmentStore.upsert_segment(target, bars)
+        written[timeframe] = len(bars)
+    return written
+
+
+def remove_rollups(daily_path: PathLike):
+    for timeframe in ROLLUP_TIMEFRAMES:
+        SegmentStore.remove(rollup_path(daily_path, timeframe))
+
+
+def read_timeframe_csv(daily_path: PathLike, timeframe: str = DAILY, compact: bool = False,
+                       day_numbers: bool = None, tail: Optional[int] = None) -> pd.DataFrame:
+    """
+    Legge i prezzi di un timeframe (vedi read_price_csv).
+
+    Se il file del timeframe non esiste ancora (ticker scaricato prima dei
+    rollup) le barre sono calcolate al volo dal giornaliero, senza scriverle:
+    solo TickerDataManager, sotto il lock del ticker, scrive i rollup.
+    """
+    validate_timeframe(timeframe)
+    path = rollup_path(daily_path, timeframe)
+    if path.exists():
+        return read_price_csv(path, compact=compact, day_numbers=day_numbers, tail=tail)
+
+    daily = read_price_csv(daily_path, compact=compact, day_numbers=True)
+    bars = rollup_frame(daily, timeframe)
+    if tail is not None:
+        bars = bars.tail(tail).reset_index(drop=True)
+    if day_numbers is None:
+        day_numbers = compact
+    bars['Date'] = dates_to_day_numbers(bars['Date']) if day_numbers else pd.to_datetime(bars['Date'])
+    return bars
@@ -0,0 +1,436 @@
+# ===== FILE: moduls/MarketData/SegmentStore.py =====
+"""
+Storage a segmenti per i CSV dei prezzi.
+
+Per ogni file prezzi (es. data/daily/AAPL.csv):
+- il file stesso è il segmento base, immutabile fino alla compattazione
+- gli aggiornamenti incrementali diventano piccoli segmenti delta in
+  data/daily/AAPL.segments/000001.csv, 000002.csv, ...
+- data/daily/AAPL.segments/manifest.json elenca i delta con righe e
+  intervallo di date, più righe e dimensione del base
+
+Un delta può anche sostituire barre già salvate (revisioni del provider,
+barre parziali) o riempire buchi nello storico (upsert_segment): in lettura
+vince il segmento più recente. Nel manifest ogni delta registra quante righe
+sono nuove in coda (tail_rows) e quante sono date non ancora presenti
+(unique_rows), così conteggi e letture delle ultime barre restano esatti.
+
+Scrivere un aggiornamento costa O(righe nuove); leggere le ultime N barre
+apre solo i delta più recenti (e la coda del base, saltando le righe
+precedenti senza parsarle). La compattazione riscrive base + delta in un
+nuovo base e svuota il manifest.
+
+Il manifest registra anche l'identità del base (dimensione e inode): ogni
+riscrittura del base (write_base, compattazione) crea un file nuovo con
+os.replace, quindi un manifest che non corrisponde più al base descrive
+delta precedenti e viene ignorato. Riscrivere il base rende obsoleti i delta
+in un solo passo atomico, anche se il processo si interrompe prima di
+eliminarli o un lettore senza lock legge nel frattempo.
+
+Senza directory .segments il layout coincide con quello storico a file
+singolo, quindi i file esistenti restano leggibili senza migrazione.
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from moduls.Core.AtomicFiles import atomic_open, atomic_write_csv, atomic_write_json
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+SEGMENTS_SUFFIX = '.segments'
+MANIFEST_NAME = 'manifest.json'
+
+# Delta oltre i quali conviene compattare (circa un mese di aggiornamenti giornalieri)
+DEFAULT_MAX_SEGMENTS = 20
+
+# Tentativi di lettura se una compattazione concorrente rimuove un delta
+_READ_ATTEMPTS = 3
+
+
+def segments_dir(path: PathLike) -> Path:
+    """Directory dei segmenti delta di un file prezzi (AAPL.csv -> AAPL.segments)."""
+    path = Path(path)
+    return path.with_name(path.stem + SEGMENTS_SUFFIX)
+
+
+def load_manifest(path: PathLike) -> Optional[Dict]:
+    """Manifest dei segmenti, None se il file non ha delta."""
+    manifest_file = segments_dir(path) / MANIFEST_NAME
+    try:
+        with open(manifest_file, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        logger.error(f"Manifest segmenti non leggibile {manifest_file}: {e}")
+        raise
+
+
+def _save_manifest(path: PathLike, manifest: Dict):
+    manifest['updated_at'] = datetime.now().isoformat()
+    atomic_write_json(segments_dir(path) / MANIFEST_NAME, manifest)
+
+
+def _count_rows(path: Path) -> int:
+    with open(path, 'rb') as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def _last_date(path: Path) -> Optional[str]:
+    """Data dell'ultima riga di un CSV leggendo solo la coda del file."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - 4096, 0))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    if len(lines) < 2 and size <= 4096:
+        return None
+    return lines[-1].split(b',', 1)[0].decode()[:10]
+
+
+def _base_info(path: Path) -> Dict:
+    stat = path.stat()
+    return {'rows': _count_rows(path), 'bytes': stat.st_size, 'inode': stat.st_ino,
+            'last_date': _last_date(path)}
+
+
+def _new_manifest(path: Path, next_id: int = 1) -> Dict:
+    return {'base': _base_info(path), 'segments': [], 'next_id': next_id}
+
+
+def _matches_base(manifest: Optional[Dict], stat: os.stat_result) -> bool:
+    """True se il manifest descrive il base attuale (i manifest senza inode confrontano solo la dimensione)."""
+    base = (manifest or {}).get('base', {})
+    return base.get('bytes') == stat.st_size and base.get('inode', stat.st_ino) == stat.st_ino
+
+
+def _current_manifest(path: Path) -> Optional[Dict]:
+    """Manifest del base attuale, None se manca o se il base è stato riscritto dopo di esso."""
+    manifest = load_manifest(path)
+    if manifest is not None and not _matches_base(manifest, path.stat()):
+        logger.warning(f"{path.name}: manifest dei delta precedente al base attuale, delta ignorati")
+        return None
+    return manifest
+
+
+def _manifest_for_write(path: Path) -> Dict:
+    """Manifest su cui aggiungere un delta: uno nuovo se manca o è obsoleto (senza riusare i nomi dei delta)."""
+    manifest = load_manifest(path)
+    if manifest is None:
+        return _new_manifest(path)
+    if not _matches_base(manifest, path.stat()):
+        return _new_manifest(path, manifest.get('next_id', 1))
+    # Manifest scritto prima che si registrasse l'inode del base
+    manifest['base'].setdefault('inode', path.stat().st_ino)
+    return manifest
+
+
+def _last_stored_date(manifest: Dict) -> Optional[str]:
+    """Data più recente tra base e delta (un delta di riparazione può essere più vecchio)."""
+    dates = [manifest['base'].get('last_date')] + [segment['last_date'] for segment in manifest['segments']]
+    dates = [d for d in dates if d]
+    return max(dates) if dates else None
+
+
+def _tail_rows(segment: Dict) -> int:
+    return segment.get('tail_rows', segment['rows'])
+
+
+def _unique_rows(segment: Dict) -> int:
+    return segment.get('unique_rows', segment['rows'])
+
+
+def _base_rows(path: Path, manifest: Optional[Dict]) -> Optional[int]:
+    """Righe del base dal manifest, solo se il file non è cambiato nel frattempo."""
+    if manifest and _matches_base(manifest, path.stat()):
+        return manifest['base']['rows']
+    return None
+
+
+# ===== SCRITTURA =====
+
+def write_base(path: PathLike, df: pd.DataFrame):
+    """
+    Riscrive l'intero storico come segmento base, eliminando i delta.
+
+    Il rename del nuovo base rende subito obsoleto il manifest (vedi
+    _matches_base): i vecchi delta non vengono più letti anche se la
+    rimozione della directory non avviene.
+    """
+    path = Path(path)
+    atomic_write_csv(path, df)
+    seg_dir = segments_dir(path)
+    if seg_dir.exists():
+        shutil.rmtree(seg_dir)
+
+
+def append_segment(path: PathLike, df: pd.DataFrame) -> int:
+    """
+    Aggiunge nuove righe come segmento delta.
+
+    Le righe sono ordinate per data e quelle non successive all'ultima data
+    già salvata vengono scartate (nessuna sovrapposizione tra segmenti).
+    Il chiamante deve tenere il lock del ticker.
+
+    Returns:
+        righe effettivamente scritte
+    """
+    path = Path(path)
+    if not path.exists():
+        write_base(path, df)
+        return len(df)
+
+    manifest = _manifest_for_write(path)
+    last_date = _last_stored_date(manifest)
+
+    dates = df['Date'].astype(str).str.slice(0, 10)
+    new_rows = df[dates > last_date] if last_date else df
+    if len(new_rows) < len(df):
+        logger.warning(f"{path.name}: scartate {len(df) - len(new_rows)} righe già presenti (<= {last_date})")
+    if new_rows.empty:
+        return 0
+    if not new_rows['Date'].is_monotonic_increasing:
+        new_rows = new_rows.sort_values('Date', kind='stable')
+
+    _write_segment(path, manifest, new_rows)
+    return len(new_rows)
+
+
+def upsert_segment(path: PathLike, df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Scrive righe nuove o revisionate come segmento delta.
+
+    A differenza di append_segment non scarta le date già presenti: in lettura
+    la versione del segmento più recente sostituisce quella precedente. Serve per
+    le barre revisionate dal provider e per riempire buchi nello storico.
+    Il chiamante deve tenere il lock del ticker.
+
+    Returns:
+        {'appended': righe oltre l'ultima data, 'inserted': date mancanti riempite,
+         'replaced': barre esistenti sostituite}
+    """
+    path = Path(path)
+    if not path.exists():
+        write_base(path, df)
+        return {'appended': len(df), 'inserted': 0, 'replaced': 0}
+
+    df = df.drop_duplicates('Date', keep='last')
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable')
+    if df.empty:
+        return {'appended': 0, 'inserted': 0, 'replaced': 0}
+
+    manifest = _manifest_for_write(path)
+    last_date = _last_stored_date(manifest) or ''
+
+    dates = df['Date'].astype(str).str.slice(0, 10)
+    appended = int((dates > last_date).sum())
+    older = dates[dates <= last_date]
+    replaced = 0
+    if len(older):
+        # Solo la colonna Date: quali date vecchie esistono già
+        stored = read_segments(path, usecols=['Date'])['Date'].str.slice(0, 10)
+        replaced = int(older.isin(stored).sum())
+    inserted = len(older) - replaced
+
+    _write_segment(path, manifest, df, tail_rows=appended, unique_rows=appended + inserted)
+    return {'appended': appended, 'inserted': inserted, 'replaced': replaced}
+
+
+def _write_segment(path: Path, manifest: Dict, df: pd.DataFrame,
+                   tail_rows: Optional[int] = None, unique_rows: Optional[int] = None):
+    segment_file = f"{manifest['next_id']:06d}.csv"
+    atomic_write_csv(segments_dir(path) / segment_file, df)
+
+    segment = {
+        'file': segment_file,
+        'rows': len(df),
+        'first_date': str(df['Date'].iloc[0])[:10],
+        'last_date': str(df['Date'].iloc[-1])[:10],
+        'created_at': datetime.now().isoformat()
+    }
+    if tail_rows is not None and (tail_rows, unique_rows) != (len(df), len(df)):
+        segment['tail_rows'] = tail_rows
+        segment['unique_rows'] = unique_rows
+    manifest['segments'].append(segment)
+    manifest['next_id'] += 1
+    _save_manifest(path, manifest)
+
+
+def _is_ordered(manifest: Dict) -> bool:
+    """True se i delta seguono il base e non si sovrappongono tra loro."""
+    last_date = manifest['base'].get('last_date') or ''
+    for segment in manifest['segments']:
+        if not segment.get('first_date') or segment['first_date'] <= last_date:
+            return False
+        last_date = segment['last_date']
+    return True
+
+
+def needs_compaction(path: PathLike, max_segments: int = DEFAULT_MAX_SEGMENTS) -> bool:
+    manifest = _current_manifest(Path(path))
+    return bool(manifest) and len(manifest['segments']) >= max_segments
+
+
+def compact(path: PathLike) -> bool:
+    """
+    Unisce base e delta in un nuovo base. Il chiamante deve tenere il lock del ticker.
+
+    Ordine sicuro anche in caso di crash: nuovo base -> manifest vuoto -> rimozione
+    dei delta. Dal rename del nuovo base il vecchio manifest non corrisponde più
+    e i suoi delta, già inclusi nel base, vengono ignorati.
+    """
+    path = Path(path)
+    manifest = _current_manifest(path)
+    if not manifest or not manifest['segments']:
+        return False
+
+    old_segments = manifest['segments']
+    seg_dir = segments_dir(path)
+    if _is_ordered(manifest):
+        # Segmenti già ordinati e disgiunti: concatenazione del testo, senza parsare
+        # (i valori restano identici byte per byte)
+        with atomic_open(path, 'wb', copy_existing=True) as out:
+            for segment in old_segments:
+                with open(seg_dir / segment['file'], 'rb') as f:
+                    f.readline()  # header
+                    shutil.copyfileobj(f, out)
+    else:
+        atomic_write_csv(path, read_segments(path, float_precision='round_trip'))
+
+    base = _base_info(path)
+    _save_manifest(path, {'base': base, 'segments': [], 'next_id': manifest['next_id']})
+
+    for segment in old_segments:
+        try:
+            (segments_dir(path) / segment['file']).unlink()
+        except FileNotFoundError:
+            pass
+
+    logger.info(f"{path.name}: compattati {len(old_segments)} segmenti ({base['rows']} righe)")
+    return True
+
+
+def remove(path: PathLike):
+    """Elimina il file prezzi e i suoi segmenti."""
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    seg_dir = segments_dir(path)
+    if seg_dir.exists():
+        shutil.rmtree(seg_dir)
+
+
+# ===== LETTURA =====
+
+def _read_base(base, tail: Optional[int], base_rows: Optional[int], read_kwargs: Dict) -> pd.DataFrame:
+    if tail is not None and base_rows is not None and tail < base_rows:
+        # Salta le righe iniziali senza parsarle (l'header resta)
+        return pd.read_csv(base, skiprows=range(1, base_rows - tail + 1), **read_kwargs)
+    df = pd.read_csv(base, **read_kwargs)
+    return df.tail(tail) if tail is not None else df
+
+
+def _read_once(path: Path, tail: Optional[int], read_kwargs: Dict) -> pd.DataFrame:
+    manifest = load_manifest(path)
+    # Il base resta aperto dal controllo sul manifest alla lettura: un base
+    # riscritto nel frattempo non viene mescolato ai delta del vecchio
+    with open(path, 'rb') as base:
+        stat = os.fstat(base.fileno())
+        if manifest is not None and not _matches_base(manifest, stat):
+            manifest = None
+        return _read_from(path, base, manifest, tail, read_kwargs)
+
+
+def _read_from(path: Path, base, manifest: Optional[Dict], tail: Optional[int],
+               read_kwargs: Dict) -> pd.DataFrame:
+    segments: List[Dict] = manifest['segments'] if manifest else []
+
+    # Delta necessari, dal più recente: per le ultime N barre spesso basta la coda.
+    # Contano solo le righe oltre l'ultima data precedente (tail_rows): sono
+    # sicuramente più recenti di tutto ciò che sta nei segmenti più vecchi
+    chosen = []
+    rows = 0
+    for segment in reversed(segments):
+        chosen.append(segment)
+        rows += _tail_rows(segment)
+        if tail is not None and rows >= tail:
+            break
+    chosen.reverse()
+
+    frames = []
+    if tail is None or rows < tail:
+        remaining = None if tail is None else tail - rows
+        frames.append(_read_base(base, remaining, manifest['base']['rows'] if manifest else None, read_kwargs))
+    seg_dir = segments_dir(path)
+    frames.extend(pd.read_csv(seg_dir / segment['file'], **read_kwargs) for segment in chosen)
+
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    # Difesa da sovrapposizioni (es. compattazione interrotta): vince il segmento più recente
+    if len(frames) > 1 and not (df['Date'].is_monotonic_increasing and df['Date'].is_unique):
+        df = df.drop_duplicates('Date', keep='last').sort_values('Date', kind='stable')
+
+    if tail is not None:
+        df = df.tail(tail)
+    return df.reset_index(drop=True)
+
+
+def read_segments(path: PathLike, tail: Optional[int] = None, **read_kwargs) -> pd.DataFrame:
+    """
+    Legge un file prezzi concatenando base e delta.
+
+    Args:
+        path: file prezzi (segmento base)
+        tail: se indicato, solo le ultime `tail` righe (apre solo i segmenti necessari)
+        read_kwargs: parametri aggiuntivi per pd.read_csv (Date è sempre letta come stringa)
+
+    Returns:
+        DataFrame ordinato per data
+    """
+    path = Path(path)
+    dtype = dict(read_kwargs.pop('dtype', None) or {})
+    dtype['Date'] = str
+    read_kwargs['dtype'] = dtype
+
+    if tail is not None and tail <= 0:
+        return pd.read_csv(path, nrows=0, **read_kwargs)
+
+    for attempt in range(_READ_ATTEMPTS):
+        try:
+            return _read_once(path, tail, read_kwargs)
+        except FileNotFoundError:
+            # Un delta rimosso da una compattazione concorrente: rileggi il manifest
+            if attempt == _READ_ATTEMPTS - 1 or not path.exists():
+                raise
+
+
+def row_count(path: PathLike) -> int:
+    """Numero totale di righe (dal manifest quando possibile, senza parsare il CSV)."""
+    path = Path(path)
+    manifest = _current_manifest(path)
+    base_rows = _base_rows(path, manifest)
+    if base_rows is None:
+        base_rows = _count_rows(path)
+    return base_rows + sum(_unique_rows(segment) for segment in (manifest['segments'] if manifest else []))
+
+
+def storage_size(path: PathLike) -> int:
+    """Byte occupati da base, delta e manifest."""
+    path = Path(path)
+    size = path.stat().st_size if path.exists() else 0
+    seg_dir = segments_dir(path)
+    if seg_dir.exists():
+        size += sum(f.stat().st_size for f in seg_dir.iterdir() if f.is_file())
+    return size
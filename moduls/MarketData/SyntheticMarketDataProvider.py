@@ -0,0 +1,325 @@
+# ===== FILE: moduls/MarketData/SyntheticMarketDataProvider.py =====
+"""
+Provider di dati sintetici deterministici, usato al posto di Yahoo Finance
+per test di carico e sviluppo offline.
+
+Genera per ogni ticker uno storico OHLCV realistico e riproducibile:
+- sessioni Lun-Ven con festività di borsa e qualche chiusura straordinaria
+- gap di apertura rispetto alla chiusura precedente
+- split azionari e dividendi trimestrali
+
+Come su Yahoo Finance, Close è aggiustato solo per gli split mentre
+Adj Close include anche i dividendi, quindi i due valori differiscono.
+Gli eventi successivi alla data di riferimento (as_of) non vengono applicati.
+"""
+
+import zlib
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from moduls.MarketData.MarketDataProvider import MarketDataProvider, HISTORY_COLUMNS
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Orizzonte fisso di generazione: lo storico non dipende da as_of
+HORIZON_START = date(1980, 1, 2)
+HORIZON_END = date(2035, 12, 31)
+
+SECTORS = [
+    ('Technology', 'Software - Infrastructure'),
+    ('Technology', 'Semiconductors'),
+    ('Healthcare', 'Biotechnology'),
+    ('Financial Services', 'Banks - Regional'),
+    ('Consumer Cyclical', 'Internet Retail'),
+    ('Industrials', 'Railroads'),
+    ('Utilities', 'Utilities - Regulated Electric'),
+]
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-esimo giorno della settimana del mese (n=-1 per l'ultimo)."""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _synthetic_holidays(year: int) -> List[date]:
+    """Festività semplificate in stile mercato USA usate dal generatore."""
+    return [
+        date(year, 1, 1),
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        date(year, 7, 4),
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        date(year, 12, 25),
+    ]
+
+
+class SyntheticMarketDataProvider(MarketDataProvider):
+    """
+    Provider deterministico che non richiede accesso alla rete.
+    Lo stesso ticker con lo stesso seed produce sempre gli stessi dati.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self,
+                 seed: int = 42,
+                 as_of: Optional[Union[str, date, datetime]] = None,
+                 unknown_tickers: Optional[List[str]] = None,
+                 closure_probability: float = 0.002,
+                 gap_probability: float = 0.03,
+                 split_probability: float = 0.0004,
+                 dividend_yield: float = 0.02,
+                 cache_size: int = 256,
+                 max_workers: int = 4,
+                 requests_per_second: Optional[float] = None):
+        """
+        Parameters:
+            seed: seed globale combinato con il simbolo del ticker
+            as_of: data di riferimento, i dati successivi non esistono (default: oggi)
+            unknown_tickers: ticker da trattare come inesistenti
+            closure_probability: probabilità di chiusura straordinaria per sessione
+            gap_probability: probabilità di gap di apertura per sessione
+            split_probability: probabilità di split per sessione
+            dividend_yield: rendimento annuo da dividendi (0 per disattivarli)
+            cache_size: numero di serie complete tenute in memoria
+            max_workers: download paralleli usati da fetch_batch
+            requests_per_second: rate limit simulato (None = illimitato)
+        """
+        super().__init__(max_workers=max_workers, requests_per_second=requests_per_second)
+        self.seed = seed
+        self.as_of = self._to_date(as_of) if as_of is not None else None
+        self.unknown_tickers = {t.upper() for t in (unknown_tickers or [])}
+        self.closure_probability = closure_probability
+        self.gap_probability = gap_probability
+        self.split_probability = split_probability
+        self.dividend_yield = dividend_yield
+        self.cache_size = cache_size
+
+        self._cache: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._calendar = self._build_calendar()
+
+    # ===== API PROVIDER =====
+
+    def fetch_history(self, ticker: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Restituisce lo storico sintetico nel formato di TickerDataManager."""
+        if not self._exists(ticker):
+            logger.warning(f"Ticker sintetico inesistente: {ticker}")
+            return None
+
+        self.rate_limiter.acquire()
+        series = self._get_series(ticker)
+        as_of = self._current_as_of()
+
+        days = series['days']
+        lo = np.datetime64(start_date, 'D') if start_date else days[0]
+        hi = np.datetime64(end_date, 'D') if end_date else np.datetime64(as_of + timedelta(days=1), 'D')
+        hi = min(hi, np.datetime64(as_of + timedelta(days=1), 'D'))
+
+        start_idx = int(np.searchsorted(days, lo, side='left'))
+        end_idx = int(np.searchsorted(days, hi, side='left'))
+
+        if end_idx <= start_idx:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+        split_factor, adj_factor = self._adjustment_factors(series, as_of)
+        window = slice(start_idx, end_idx)
+
+        # Close aggiustato solo per split, Adj Close anche per dividendi
+        close = series['close'][window] / split_factor[window]
+        data = pd.DataFrame({
+            'Date': np.datetime_as_string(days[window], unit='D'),
+            'Open': series['open'][window] / split_factor[window],
+            'High': series['high'][window] / split_factor[window],
+            'Low': series['low'][window] / split_factor[window],
+            'Close': close,
+            'Adj Close': close * adj_factor[window],
+            'Volume': (series['volume'][window] * split_factor[window]).astype('int64')
+        })
+
+        logger.debug(f"Storico sintetico per {ticker}: {len(data)} record")
+        return data[HISTORY_COLUMNS]
+
+    def fetch_info(self, ticker: str) -> Optional[Dict]:
+        """Restituisce info anagrafiche sintetiche coerenti con il ticker."""
+        if not self._exists(ticker):
+            return None
+
+        rng = np.random.default_rng(self._ticker_seed(ticker, 'info'))
+        sector, industry = SECTORS[int(rng.integers(len(SECTORS)))]
+        is_italian = ticker.upper().endswith('.MI')
+
+        return {
+            'symbol': ticker,
+            'name': f"{ticker} Synthetic Corp.",
+            'sector': sector,
+            'industry': industry,
+            'currency': 'EUR' if is_italian else 'USD',
+            'exchange': 'MIL' if is_italian else 'NMS',
+            'country': 'Italy' if is_italian else 'United States'
+        }
+
+    def get_corporate_actions(self, ticker: str) -> Dict[str, List[Dict]]:
+        """Elenca split e dividendi generati fino alla data di riferimento."""
+        series = self._get_series(ticker)
+        as_of = np.datetime64(self._current_as_of(), 'D')
+        days = series['days']
+
+        splits = [
+            {'date': str(days[i]), 'ratio': float(series['split_ratio'][i])}
+            for i in np.flatnonzero(series['split_ratio'] > 1) if days[i] <= as_of
+        ]
+        dividends = [
+            {'date': str(days[i]), 'amount': round(float(series['dividend'][i]), 4)}
+            for i in np.flatnonzero(series['dividend'] > 0) if days[i] <= as_of
+        ]
+        return {'splits': splits, 'dividends': dividends}
+
+    # ===== GENERAZIONE =====
+
+    def _exists(self, ticker: str) -> bool:
+        ticker = ticker.upper()
+        return bool(ticker) and ticker not in self.unknown_tickers and 'INVALID' not in ticker
+
+    def _current_as_of(self) -> date:
+        return self.as_of or datetime.now().date()
+
+    @staticmethod
+    def _to_date(value: Union[str, date, datetime]) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(value, '%Y-%m-%d').date()
+
+    def _ticker_seed(self, ticker: str, stream: str) -> int:
+        return zlib.crc32(f"{self.seed}:{ticker.upper()}:{stream}".encode('utf-8'))
+
+    def _build_calendar(self) -> np.ndarray:
+        """Sessioni Lun-Ven dell'orizzonte, escluse le festività."""
+        days = np.arange(np.datetime64(HORIZON_START, 'D'), np.datetime64(HORIZON_END, 'D') + 1)
+        weekdays = (days.astype('int64') + 3) % 7  # 1970-01-01 era giovedì
+        holidays = np.array(
+            [np.datetime64(h, 'D') for y in range(HORIZON_START.year, HORIZON_END.year + 1)
+             for h in _synthetic_holidays(y)]
+        )
+        return days[(weekdays < 5) & ~np.isin(days, holidays)]
+
+    def _get_series(self, ticker: str) -> Dict:
+        """Serie completa per l'orizzonte, con cache LRU."""
+        key = ticker.upper()
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        series = self._generate_series(key)
+
+        with self._cache_lock:
+            self._cache[key] = series
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return series
+
+    def _generate_series(self, ticker: str) -> Dict:
+        """Genera prezzi effettivamente scambiati, split e dividendi."""
+        rng = np.random.default_rng(self._ticker_seed(ticker, 'series'))
+
+        # Data di quotazione e chiusure straordinarie
+        listing_offset = int(rng.integers(0, len(self._calendar) // 2))
+        days = self._calendar[listing_offset:]
+        n = len(days)
+        open_mask = rng.random(n) >= self.closure_probability
+        days = days[open_mask]
+        n = len(days)
+
+        # Percorso economico: moto browniano geometrico
+        drift = rng.uniform(0.0001, 0.0006)
+        volatility = rng.uniform(0.01, 0.03)
+        log_returns = drift + volatility * rng.standard_normal(n)
+        economic = rng.uniform(5, 150) * np.exp(np.cumsum(log_returns))
+
+        # Split: il prezzo scambiato si riduce del rapporto dalla data di split
+        split_ratio = np.ones(n)
+        split_draw = rng.random(n)
+        ratio_choice = rng.choice([2.0, 3.0, 4.0], size=n)
+        split_ratio[split_draw < self.split_probability] = ratio_choice[split_draw < self.split_probability]
+        split_ratio[0] = 1.0
+        traded_close = economic / np.cumprod(split_ratio)
+
+        # Open con gap occasionali, High/Low attorno al corpo della candela
+        gap_draw = rng.random(n)
+        gap_size = rng.normal(0, volatility * 4, n)
+        overnight = rng.normal(0, volatility * 0.3, n)
+        overnight[gap_draw < self.gap_probability] += gap_size[gap_draw < self.gap_probability]
+        prev_close = np.concatenate(([traded_close[0]], traded_close[:-1]))
+        prev_close = prev_close / split_ratio
+        traded_open = prev_close * np.exp(overnight)
+
+        wick_high = np.abs(rng.normal(0, volatility * 0.5, n))
+        wick_low = np.abs(rng.normal(0, volatility * 0.5, n))
+        body_high = np.maximum(traded_open, traded_close)
+        body_low = np.minimum(traded_open, traded_close)
+        traded_high = body_high * (1 + wick_high)
+        traded_low = body_low * (1 - wick_low)
+
+        base_volume = rng.uniform(2e5, 5e7)
+        volume = base_volume * rng.lognormal(0, 0.4, n) * (1 + np.abs(log_returns) * 20)
+
+        # Dividendi trimestrali (circa ogni 63 sessioni)
+        dividend = np.zeros(n)
+        if self.dividend_yield > 0 and rng.random() < 0.7:
+            first = int(rng.integers(20, 63))
+            ex_idx = np.arange(first, n, 63)
+            dividend[ex_idx] = prev_close[ex_idx] * self.dividend_yield / 4 * rng.uniform(0.8, 1.2, len(ex_idx))
+
+        return {
+            'days': days,
+            'open': np.round(traded_open, 4),
+            'high': np.round(traded_high, 4),
+            'low': np.round(traded_low, 4),
+            'close': np.round(traded_close, 4),
+            'volume': np.round(volume),
+            'split_ratio': split_ratio,
+            'dividend': dividend,
+            'prev_close': prev_close,
+        }
+
+    def _adjustment_factors(self, series: Dict, as_of: date):
+        """
+        Calcola i fattori di aggiustamento relativi a as_of.
+
+        Returns:
+            (split_factor, adj_factor): divisore split per barra e moltiplicatore
+            dividendi da applicare al Close split-adjusted
+        """
+        days = series['days']
+        known = days <= np.datetime64(as_of, 'D')
+
+        ratios = np.where(known, series['split_ratio'], 1.0)
+        # Prodotto degli split con data successiva alla barra
+        later_splits = np.cumprod(ratios[::-1])[::-1]
+        split_factor = np.concatenate((later_splits[1:], [1.0]))
+
+        div_ratio = np.where(
+            known & (series['dividend'] > 0),
+            1.0 - series['dividend'] / series['prev_close'],
+            1.0
+        )
+        later_divs = np.cumprod(div_ratio[::-1])[::-1]
+        adj_factor = np.concatenate((later_divs[1:], [1.0]))
+
+        return split_factor, adj_factor
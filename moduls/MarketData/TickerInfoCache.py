@@ -0,0 +1,247 @@
+# ===== FILE: moduls/MarketData/TickerInfoCache.py =====
+"""
+Cache persistente delle informazioni anagrafiche dei ticker.
+
+Le info (nome, settore, exchange...) cambiano raramente: vengono salvate su
+file JSON con la data di recupero e riutilizzate finché non scade il TTL.
+Una voce scaduta viene restituita subito e aggiornata in background; solo i
+ticker mai visti richiedono una chiamata sincrona alla fonte dati.
+
+Le info parziali non contano come valide:
+- quelle seminate da un'importazione CSV (nome, settore, industria) non sono
+  mai state verificate sulla fonte: il primo get le restituisce subito e le
+  completa in background (exchange, valuta, paese); i campi del CSV restano
+  sopra a quelli della fonte anche nei refresh successivi;
+- quelle degradate della fonte ('partial': True, es. il fallback di Yahoo
+  quando info non risponde) sono restituite ma riprovate in background.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+from moduls.Core.AtomicFiles import atomic_write_json
+from moduls.Core.FileLocks import file_lock
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Durata di default delle info in cache
+DEFAULT_TTL = timedelta(days=7)
+
+
+class TickerInfoCache:
+    """Cache info ticker con TTL, refresh in background e salvataggio su disco."""
+
+    def __init__(self,
+                 cache_file: Union[str, Path],
+                 fetcher: Callable[[str], Optional[Dict]],
+                 ttl: timedelta = DEFAULT_TTL,
+                 refresh_workers: int = 1,
+                 on_refresh: Optional[Callable[[str, Dict], None]] = None):
+        """
+        Parameters:
+            cache_file: file JSON in cui persistere la cache
+            fetcher: funzione ticker -> info (None se il ticker non esiste)
+            ttl: durata di validità di una voce
+            refresh_workers: thread dedicati al refresh in background
+            on_refresh: chiamata con (ticker, info) dopo ogni refresh in background riuscito
+        """
+        self.cache_file = Path(cache_file)
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.refresh_workers = max(1, refresh_workers)
+        self.on_refresh = on_refresh
+
+        self._lock = threading.RLock()
+        self._entries = self._load()
+        self._removed = set()
+        self._pending = set()
+        self._executor = None
+
+    def _read_entries(self) -> Dict[str, Dict]:
+        """Voci salvate su disco (solleva se il file è corrotto)."""
+        if self.cache_file.exists() and self.cache_file.stat().st_size > 0:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f).get('entries', {})
+        return {}
+
+    def _load(self) -> Dict[str, Dict]:
+        """Carica la cache da disco (vuota se il file manca o è corrotto)."""
+        try:
+            entries = self._read_entries()
+            if entries:
+                logger.info(f"Cache info ticker caricata: {len(entries)} voci")
+            return entries
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Cache info ticker non leggibile, riparto da vuota: {e}")
+        return {}
+
+    @staticmethod
+    def _merge_entry(current: Dict, other: Dict) -> Dict:
+        """
+        Voce più recente tra due versioni dello stesso ticker (fetched_at
+        maggiore, a parità quella corrente); i campi seminati da CSV (quelli
+        della voce corrente, se ne ha) restano sopra alle info tenute.
+        """
+        if (other.get('fetched_at') or '') <= (current.get('fetched_at') or ''):
+            return current
+        fields = current.get('seed') or other.get('seed')
+        if fields:
+            return dict(other, seed=fields, info={**other.get('info', {}), **fields})
+        return other
+
+    def _save(self):
+        """
+        Salva la cache su disco in modo atomico.
+
+        Più processi (i worker dell'app) condividono il file: sotto il lock
+        si rilegge quello su disco e si uniscono le voci recuperate dagli
+        altri processi, così un salvataggio non cancella le loro.
+        """
+        try:
+            with file_lock(self.cache_file):
+                try:
+                    on_disk = self._read_entries()
+                except (json.JSONDecodeError, OSError) as e:
+                    logger.warning(f"Cache info ticker su disco non leggibile, la sovrascrivo: {e}")
+                    on_disk = {}
+                with self._lock:
+                    for ticker, entry in on_disk.items():
+                        if ticker in self._removed:
+                            continue
+                        current = self._entries.get(ticker)
+                        self._entries[ticker] = entry if current is None else self._merge_entry(current, entry)
+                    self._removed.clear()
+                    snapshot = {'entries': dict(self._entries), 'last_saved': datetime.now().isoformat()}
+                atomic_write_json(self.cache_file, snapshot)
+        except OSError as e:
+            logger.error(f"Errore nel salvare la cache info ticker: {e}")
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        if entry.get('partial'):
+            return False
+        try:
+            fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return datetime.now() - fetched_at < self.ttl
+
+    def get(self, ticker: str) -> Optional[Dict]:
+        """
+        Ritorna le info del ticker.
+
+        Voce valida: restituita senza rete. Voce scaduta, parziale o solo
+        seminata (mai recuperata dalla fonte): restituita e aggiornata in
+        background. Voce assente: recuperata in modo sincrono.
+        """
+        with self._lock:
+            entry = self._entries.get(ticker)
+
+        if entry is not None:
+            if not self._is_fresh(entry):
+                self._schedule_refresh(ticker)
+            return entry['info']
+
+        info = self.fetcher(ticker)
+        if info is None:
+            return None
+        self.put(ticker, info)
+        with self._lock:
+            return self._entries[ticker]['info']
+
+    def put(self, ticker: str, info: Dict, source: Optional[str] = None):
+        """Inserisce o sostituisce le info di un ticker."""
+        self.put_many({ticker: info}, source=source)
+
+    def put_many(self, infos: Dict[str, Dict], source: Optional[str] = None, seed: bool = False):
+        """
+        Inserisce più voci con un solo salvataggio su disco.
+
+        Con seed=True le info sono campi noti da un'altra fonte (es. CSV) e
+        non sostituiscono una recuperata dalla fonte dati: vi vengono
+        sovrapposti, e un ticker senza voce viene completato in background
+        al primo get.
+        """
+        if not infos:
+            return
+
+        now = datetime.now().isoformat()
+        with self._lock:
+            for ticker, info in infos.items():
+                previous = self._entries.get(ticker) or {}
+                if seed:
+                    fields = {key: value for key, value in info.items() if key != 'source'}
+                    entry = dict(previous, seed=fields, source=source or info.get('source', 'seed'))
+                    entry['info'] = {**previous.get('info', {}), **fields}
+                    entry.setdefault('fetched_at', None)
+                else:
+                    fields = previous.get('seed')
+                    entry = {
+                        'info': {**info, **fields} if fields else info,
+                        'fetched_at': now,
+                        'source': source or info.get('source', 'provider')
+                    }
+                    if fields:
+                        entry['seed'] = fields
+                    if info.get('partial'):
+                        entry['partial'] = True
+                self._entries[ticker] = entry
+                self._removed.discard(ticker)
+        self._save()
+
+    def invalidate(self, ticker: str):
+        """Rimuove un ticker dalla cache."""
+        with self._lock:
+            removed = self._entries.pop(ticker, None)
+            self._removed.add(ticker)
+        if removed is not None:
+            self._save()
+
+    def _schedule_refresh(self, ticker: str):
+        with self._lock:
+            if ticker in self._pending:
+                return
+            self._pending.add(ticker)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                    thread_name_prefix='ticker-info-refresh')
+            executor = self._executor
+
+        executor.submit(self._refresh, ticker)
+
+    def _refresh(self, ticker: str):
+        """Aggiorna una voce scaduta; in caso di errore mantiene quella vecchia."""
+        try:
+            info = self.fetcher(ticker)
+            if info is not None:
+                self.put(ticker, info)
+                logger.info(f"Info {ticker} aggiornate in background")
+                if self.on_refresh is not None:
+                    with self._lock:
+                        info = self._entries[ticker]['info']
+                    self.on_refresh(ticker, info)
+        except Exception as e:
+            logger.warning(f"Refresh info fallito per {ticker}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(ticker)
+
+    def wait_for_refresh(self):
+        """Attende la fine dei refresh in background (usato da test e shutdown)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, ticker: str):
+        with self._lock:
+            return ticker in self._entries
@@ -0,0 +1,132 @@
+# ===== FILE: moduls/MarketData/TickerListImport.py =====
+"""
+Lettura in streaming delle liste di ticker caricate come CSV.
+
+Il file non viene mai letto tutto in memoria: il modulo csv legge le righe
+dallo stream dell'upload (campi tra virgolette, virgole nei nomi, BOM) e le
+restituisce a blocchi di batch_size righe. Ogni blocco viene validato in una
+volta sola contro l'insieme dei ticker già visti nel file, così un elenco di
+migliaia di simboli (es. Russell 3000) costa una passata lineare.
+"""
+
+import csv
+import io
+import logging
+import re
+from typing import Dict, Iterator, List, Set, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ('Ticker', 'Company', 'Sector', 'Industry')
+
+# Righe validate (e metadati preparati) per blocco
+DEFAULT_BATCH_SIZE = 500
+
+# Simboli Yahoo: lettere, cifre e . - ^ = (BRK-B, ^GSPC, EURUSD=X, 0700.HK)
+TICKER_PATTERN = re.compile(r'[A-Z0-9^][A-Z0-9.\-^=]{0,19}')
+
+
+def open_text_stream(file) -> io.TextIOWrapper:
+    """
+    Stream di testo UTF-8 sopra un upload binario (FileStorage di Flask o file
+    aperto in 'rb'), senza leggerlo in memoria. Il BOM iniziale viene ignorato.
+
+    Usare detach() al termine per non chiudere il file del chiamante.
+    """
+    stream = getattr(file, 'stream', file)
+    stream.seek(0)
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def read_header(reader) -> Dict[str, int]:
+    """
+    Indici delle colonne richieste dalla prima riga non vuota.
+
+    Raises:
+        ValueError: file vuoto o colonne mancanti
+    """
+    for row in reader:
+        headers = [cell.strip() for cell in row]
+        if not any(headers):
+            continue
+        missing = [col for col in REQUIRED_COLUMNS if col not in headers]
+        if missing:
+            raise ValueError(f'Colonne mancanti nel CSV: {", ".join(missing)}')
+        return {col: headers.index(col) for col in REQUIRED_COLUMNS}
+    raise ValueError('File CSV vuoto')
+
+
+def iter_row_batches(file, batch_size: int = DEFAULT_BATCH_SIZE
+                     ) -> Iterator[Tuple[Dict[str, int], List[Tuple[int, List[str]]]]]:
+    """
+    Righe di dati a blocchi, con il numero di riga del file.
+
+    Yields:
+        (indici delle colonne, [(numero riga, celle), ...])
+
+    Raises:
+        ValueError: file vuoto o colonne mancanti (alla prima iterazione)
+    """
+    text = open_text_stream(file)
+    try:
+        reader = csv.reader(text, skipinitialspace=True)
+        columns = read_header(reader)
+        batch = []
+        for cells in reader:
+            if not any(cell.strip() for cell in cells):
+                continue
+            batch.append((reader.line_num, cells))
+            if len(batch) >= batch_size:
+                yield columns, batch
+                batch = []
+        if batch:
+            yield columns, batch
+    finally:
+        text.detach()
+
+
+def validate_batch(columns: Dict[str, int], batch: List[Tuple[int, List[str]]],
+                   seen: Set[str]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Valida un blocco di righe.
+
+    Scarta righe incomplete, ticker vuoti o con caratteri non ammessi e
+    duplicati (nel blocco o nei blocchi precedenti, tracciati in `seen`).
+
+    Returns:
+        (righe valide {line, ticker, company, sector, industry},
+         errori nel formato dei dettagli dell'import {ticker, status, message})
+    """
+    width = max(columns.values()) + 1
+    rows, errors = [], []
+    for line_num, cells in batch:
+        if len(cells) < width:
+            errors.append(_row_error(line_num, f'Riga incompleta: {len(cells)} colonne invece di {width}'))
+            continue
+
+        ticker = cells[columns['Ticker']].strip().upper()
+        if not ticker:
+            errors.append(_row_error(line_num, 'Ticker vuoto'))
+            continue
+        if not TICKER_PATTERN.fullmatch(ticker):
+            errors.append(_row_error(line_num, f'Ticker non valido: {ticker}'))
+            continue
+        if ticker in seen:
+            errors.append({'ticker': ticker, 'status': 'warning',
+                           'message': f'Ticker duplicato nel CSV (riga {line_num}, saltato)'})
+            continue
+
+        seen.add(ticker)
+        rows.append({
+            'line': line_num,
+            'ticker': ticker,
+            'company': cells[columns['Company']].strip(),
+            'sector': cells[columns['Sector']].strip(),
+            'industry': cells[columns['Industry']].strip(),
+        })
+    return rows, errors
+
+
+def _row_error(line_num: int, message: str) -> Dict:
+    return {'ticker': f'Line {line_num}', 'status': 'error', 'message': message}
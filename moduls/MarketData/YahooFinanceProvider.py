@@ -0,0 +1,221 @@
+# ===== FILE: moduls/MarketData/YahooFinanceProvider.py =====
+"""
+Provider dati basato su Yahoo Finance (libreria yfinance).
+Contiene la logica di download e recupero info prima presente in TickerDataManager.
+
+Tutte le chiamate a yfinance condividono una sola sessione curl_cffi (pool di
+connessioni keep-alive); le versioni recenti di yfinance rifiutano una
+requests.Session, per questo non si usa HttpTransport con la libreria.
+
+yfinance (e curl_cffi) vengono importati alla prima richiesta: costruire il
+provider all'avvio dell'app non costa i ~0.3 s dell'import della libreria.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from moduls.MarketData.MarketDataProvider import MarketDataProvider
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class YahooFinanceProvider(MarketDataProvider):
+    """Provider che scarica dati e info da Yahoo Finance."""
+
+    name = 'yahoo'
+
+    def __init__(self, max_workers: int = 4, requests_per_second: Optional[float] = 2.0,
+                 batch_size: int = 50):
+        """
+        Parameters:
+            max_workers: thread usati da yfinance per i download multipli
+            requests_per_second: limite di richieste verso Yahoo Finance
+            batch_size: ticker per singola chiamata yf.download in fetch_batch
+        """
+        super().__init__(max_workers=max_workers, requests_per_second=requests_per_second)
+        self.batch_size = max(1, batch_size)
+        self._session = None
+        self._session_created = False
+
+    @property
+    def yf(self):
+        """Modulo yfinance, importato alla prima richiesta."""
+        import yfinance
+        return yfinance
+
+    @property
+    def session(self):
+        """Sessione condivisa, creata alla prima richiesta."""
+        if not self._session_created:
+            self._session = self._create_session()
+            self._session_created = True
+        return self._session
+
+    def _create_session(self):
+        """Sessione condivisa per yfinance, None se curl_cffi non è disponibile."""
+        try:
+            from curl_cffi import requests as curl_requests
+            return curl_requests.Session(impersonate="chrome")
+        except Exception as e:
+            logger.info(f"Sessione condivisa non disponibile, yfinance userà la propria: {e}")
+            return None
+
+    def fetch_batch(self, tickers: Iterable[str], start_date: Optional[str] = None,
+                    end_date: Optional[str] = None) -> Dict[str, Optional[pd.DataFrame]]:
+        """Scarica più ticker con una sola chiamata yf.download per blocco."""
+        tickers = list(dict.fromkeys(tickers))
+        results = {}
+
+        for i in range(0, len(tickers), self.batch_size):
+            chunk = tickers[i:i + self.batch_size]
+            self.rate_limiter.acquire()
+
+            try:
+                if start_date is None:
+                    data = self.yf.download(chunk, period="max", progress=False, auto_adjust=False,
+                                            group_by='ticker', threads=self.max_workers, session=self.session)
+                else:
+                    data = self.yf.download(chunk, start=start_date, end=end_date, progress=False, auto_adjust=False,
+                                            group_by='ticker', threads=self.max_workers, session=self.session)
+            except Exception as e:
+                logger.warning(f"Download batch fallito ({len(chunk)} ticker): {e}, provo singolarmente")
+                results.update(super().fetch_batch(chunk, start_date, end_date))
+                continue
+
+            for ticker in chunk:
+                try:
+                    ticker_data = data[ticker].dropna(how='all') if ticker in data.columns.get_level_values(0) else None
+                except Exception:
+                    ticker_data = None
+
+                if ticker_data is None or ticker_data.empty:
+                    results[ticker] = None
+                else:
+                    results[ticker] = self._normalize(ticker_data.copy())
+
+            logger.info(f"Batch Yahoo Finance: {sum(1 for t in chunk if results.get(t) is not None)}/{len(chunk)} ticker scaricati")
+
+        return results
+
+    def fetch_history(self, ticker: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Scarica lo storico con yf.download e fallback su Ticker.history."""
+        # Prova prima con yf.download (più affidabile)
+        # IMPORTANTE: auto_adjust=False per avere sia Close che Adj Close
+        self.rate_limiter.acquire()
+        try:
+            if start_date is None:
+                logger.info(f"Download completo storico per {ticker}")
+                data = self.yf.download(ticker, period="max", progress=False, auto_adjust=False, session=self.session)
+            else:
+                logger.info(f"Download incrementale per {ticker} dal {start_date}")
+                data = self.yf.download(ticker, start=start_date, end=end_date, progress=False, auto_adjust=False,
+                                        session=self.session)
+
+            if not data.empty:
+                logger.info(f"yf.download funziona per {ticker}: {len(data)} record")
+                return self._normalize(data)
+            else:
+                logger.warning(f"yf.download non ha restituito dati per {ticker}")
+
+        except Exception as e:
+            logger.warning(f"yf.download fallito per {ticker}: {e}, provo metodo Ticker...")
+
+        # Fallback al metodo Ticker
+        stock = self.yf.Ticker(ticker, session=self.session)
+
+        if start_date is None:
+            start_date = "1900-01-01"
+            logger.info(f"Download storico completo per {ticker} dal {start_date}")
+
+        if end_date is None:
+            end_date = datetime.now().strftime("%Y-%m-%d")
+
+        logger.info(f"Usando Ticker.history per {ticker}: {start_date} - {end_date}")
+
+        # auto_adjust=False per avere sia Close che Adj Close
+        data = stock.history(start=start_date, end=end_date, auto_adjust=False)
+
+        if data.empty:
+            logger.warning(f"Nessun dato trovato per {ticker}")
+            return None
+
+        data = self._normalize(data)
+        logger.info(f"Dati scaricati per {ticker}: {len(data)} record, dal {data['Date'].iloc[0]} al {data['Date'].iloc[-1]}")
+        return data
+
+    def _normalize(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Porta Date in colonna (YYYY-MM-DD) e appiattisce il MultiIndex."""
+        # Reset index per avere Date come colonna
+        data.reset_index(inplace=True)
+        data.columns.name = None
+        data['Date'] = data['Date'].dt.strftime('%Y-%m-%d')
+
+        # IMPORTANTE: Gestisci MultiIndex nelle colonne
+        return self._flatten_columns(data)
+
+    def fetch_info(self, ticker: str) -> Optional[Dict]:
+        """
+        Ottiene informazioni base su un ticker da Yahoo Finance.
+
+        Una sola richiesta (Ticker.info): un ticker inesistente restituisce
+        info vuote o quasi. La seconda richiesta parte solo se info fallisce.
+        """
+        try:
+            logger.info(f"Tentativo di ottenere info per {ticker}")
+
+            self.rate_limiter.acquire()
+            stock = self.yf.Ticker(ticker, session=self.session)
+            info = stock.info
+            logger.info(f"Info ottenute per {ticker}: {len(info)} campi")
+
+            if not info or len(info) < 5:
+                logger.warning(f"Info insufficienti per {ticker}: {info}")
+                return None
+
+            result = {
+                'symbol': ticker,
+                'name': info.get('longName') or info.get('shortName') or ticker,
+                'sector': info.get('sector', 'N/A'),
+                'industry': info.get('industry', 'N/A'),
+                'currency': info.get('currency', 'USD'),
+                'exchange': info.get('exchange', 'N/A'),
+                'country': info.get('country', 'N/A')
+            }
+
+            logger.info(f"Info estratte per {ticker}: {result['name']}")
+            return result
+
+        except Exception as e:
+            logger.error(f"Errore nel recuperare info per {ticker}: {e}")
+
+            # Metodo alternativo - solo download dati
+            try:
+                logger.info(f"Tentativo metodo alternativo per {ticker}")
+                self.rate_limiter.acquire()
+                test_download = self.yf.download(ticker, period="5d", progress=False, auto_adjust=False,
+                                                 session=self.session)
+
+                if not test_download.empty:
+                    logger.info(f"Metodo alternativo funziona per {ticker}")
+                    return {
+                        'symbol': ticker,
+                        'name': f"{ticker} (verificato)",
+                        'sector': 'N/A',
+                        'industry': 'N/A',
+                        'currency': 'USD',
+                        'exchange': 'N/A',
+                        'country': 'N/A',
+                        # Info segnaposto: la cache le restituisce ma le riprova
+                        'partial': True
+                    }
+                else:
+                    return None
+
+            except Exception as e2:
+                logger.error(f"Metodo alternativo fallito per {ticker}: {e2}")
+                return None
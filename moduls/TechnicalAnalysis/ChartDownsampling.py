@@ -0,0 +1,155 @@
+# ===== FILE: moduls/TechnicalAnalysis/ChartDownsampling.py =====
+"""
+Riduzione del numero di punti dello storico prezzi per il grafico.
+
+Con finestre lunghe (days=5000) inviare ogni candela giornaliera rende
+payload e rendering lineari nella lunghezza dello storico, mentre lo
+schermo ne mostra al più qualche migliaio. Prima della serializzazione:
+
+- vista OHLC: le barre sono aggregate in settimane o mesi (open primo,
+  high massimo, low minimo, close ultimo, volume somma), scegliendo la
+  risoluzione più fine che sta entro max_points. Massimi e minimi sono
+  conservati, quindi l'intervallo di prezzo visibile non cambia.
+- vista a linea: Largest-Triangle-Three-Buckets sul close, che mantiene
+  la forma della curva con max_points punti.
+
+Lo zoom del client richiede poi l'intervallo visibile a piena risoluzione
+(vedi TechnicalAnalysisManager.get_chart_range).
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from moduls.MarketData.CompactPriceFormat import dates_to_day_numbers
+from moduls.MarketData import Rollups
+from moduls.MarketData.Rollups import aggregate_bars, group_starts, period_keys
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Punti massimi inviati al grafico quando la richiesta non ne indica
+MAX_CHART_POINTS = 1500
+
+# Risoluzioni: barre originali, settimanali (da lunedì), mensili
+DAILY = '1D'
+WEEKLY = '1W'
+MONTHLY = '1M'
+LTTB = 'lttb'
+
+DOWNSAMPLE_MODES = ('ohlc', 'line')
+
+# Risoluzione delle barre lette per ogni timeframe (vedi Rollups)
+TIMEFRAME_RESOLUTIONS = {Rollups.DAILY: DAILY, Rollups.WEEKLY: WEEKLY, Rollups.MONTHLY: MONTHLY}
+
+
+def _day_numbers(df: pd.DataFrame) -> np.ndarray:
+    dates = df['Date'].to_numpy()
+    if pd.api.types.is_integer_dtype(dates.dtype):
+        return dates.astype(np.int64)
+    return dates_to_day_numbers(dates).astype(np.int64)
+
+
+def resample_ohlc(df: pd.DataFrame, max_points: int) -> Tuple[pd.DataFrame, str]:
+    """
+    Barre settimanali o mensili: la risoluzione più fine con al più max_points barre.
+
+    Oltre i mesi le barre mensili sono raggruppate a blocchi di N mesi.
+
+    Returns:
+        (DataFrame aggregato, risoluzione: '1D', '1W', '1M' o 'NM')
+    """
+    if len(df) <= max_points:
+        return df, DAILY
+
+    days = _day_numbers(df)
+    for resolution, timeframe in ((WEEKLY, Rollups.WEEKLY), (MONTHLY, Rollups.MONTHLY)):
+        starts = group_starts(period_keys(days, timeframe))
+        if len(starts) <= max_points:
+            return aggregate_bars(df, starts), resolution
+
+    # Blocchi di N mesi consecutivi
+    month_starts = starts
+    step = int(np.ceil(len(month_starts) / max_points))
+    return aggregate_bars(df, month_starts[::step]), f'{step}M'
+
+
+def lttb_indices(x, y, threshold: int) -> np.ndarray:
+    """
+    Indici dei punti scelti da Largest-Triangle-Three-Buckets.
+
+    Primo e ultimo punto sono sempre inclusi; ogni bucket intermedio
+    contribuisce il punto che forma il triangolo più grande con il punto
+    scelto nel bucket precedente e la media del bucket successivo.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Confini dei threshold - 2 bucket interni (primo e ultimo punto esclusi)
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_price_frame(df: pd.DataFrame, max_points: Optional[int],
+                           mode: str = 'ohlc', timeframe: str = Rollups.DAILY) -> Tuple[pd.DataFrame, str]:
+    """
+    Riduce lo storico a max_points barre (None o 0 = nessuna riduzione).
+
+    Args:
+        df: prezzi ordinati per data (Date datetime64 o giorni dal 1970-01-01)
+        max_points: punti massimi (negativo: ValueError)
+        mode: 'ohlc' (aggregazione settimanale/mensile) o 'line' (LTTB sul close)
+        timeframe: timeframe delle barre di df, risoluzione restituita se non ridotte
+
+    Returns:
+        (DataFrame ridotto, risoluzione)
+    """
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError(f"Modalità non valida: {mode}")
+    if max_points is not None and max_points < 0:
+        raise ValueError(f"max_points non valido: {max_points}")
+    if not max_points or len(df) <= max_points:
+        return df, TIMEFRAME_RESOLUTIONS[timeframe]
+
+    if mode == 'line':
+        close = df['Close'].ffill().bfill()
+        indices = lttb_indices(_day_numbers(df), close, max_points)
+        result, resolution = df.iloc[indices].reset_index(drop=True), LTTB
+    else:
+        result, resolution = resample_ohlc(df, max_points)
+
+    logger.debug(f"Storico ridotto da {len(df)} a {len(result)} punti ({resolution})")
+    return result, resolution
+
+
+def slice_date_range(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """Barre con start <= Date <= end (date YYYY-MM-DD, estremi opzionali)."""
+    days = _day_numbers(df)
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= days >= dates_to_day_numbers([start])[0]
+    if end is not None:
+        mask &= days <= dates_to_day_numbers([end])[0]
+    return df[mask].reset_index(drop=True)
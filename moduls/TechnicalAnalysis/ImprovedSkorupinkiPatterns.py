@@ -2,10 +2,24 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Optional, Tuple
 
+# Pattern: (tipo zona, direzione leg-in, direzione leg-out)
+PATTERN_LEGS = {
+    'RBD': ('Supply', 'bullish', 'bearish'),  # Rise → Base → Drop
+    'DBD': ('Supply', 'bearish', 'bearish'),  # Drop → Base → Drop
+    'DBR': ('Demand', 'bearish', 'bullish'),  # Drop → Base → Rise
+    'RBR': ('Demand', 'bullish', 'bullish'),  # Rise → Base → Rise
+}
+
+
 class ImprovedSkorupinkiPatterns:
     """
     Versione migliorata per identificare correttamente i pattern Supply/Demand
     secondo la metodologia Skorupinski autentica.
+    
+    I criteri di impulso e di base dipendono solo dalla candela e dalla
+    precedente: compute_features li calcola una volta per tutta la serie
+    (array numpy) e i metodi _find_*_pattern li leggono per indice invece di
+    rivalutarli a ogni candela analizzata.
     """
     
     def __init__(self, min_impulse_pct: float = 1.5, max_base_bars: int = 10):
@@ -20,6 +34,7 @@ class ImprovedSkorupinkiPatterns:
     def _is_strong_impulse_candle(self, candle: pd.Series, prev_candle: pd.Series, direction: str) -> bool:
         """
         Identifica se una candela rappresenta un impulso forte (leg-in o leg-out).
+        Versione per singola candela: compute_features applica gli stessi criteri a tutta la serie.
         
         Args:
             candle: candela da analizzare
@@ -67,7 +82,59 @@ class ImprovedSkorupinkiPatterns:
         
         return criteria_met >= 3
     
-    def _identify_base_zone(self, df: pd.DataFrame, start_idx: int, max_bars: int = None) -> Optional[Dict]:
+    def compute_features(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Caratteristiche di ogni candela, calcolate una volta per serie.
+        
+        Stessi criteri di _is_strong_impulse_candle e _identify_base_zone
+        (candela confrontata con la precedente); la prima candela non è mai
+        un impulso ed è sempre considerata base.
+        
+        Returns:
+            Dict con open/high/low/close, range e le maschere bullish/bearish
+            (impulso forte) e base (candela di consolidamento)
+        """
+        opens = df['Open'].to_numpy()
+        highs = df['High'].to_numpy()
+        lows = df['Low'].to_numpy()
+        closes = df['Close'].to_numpy()
+        
+        candle_range = highs - lows
+        prev_range = np.empty_like(candle_range)
+        prev_range[1:] = candle_range[:-1]
+        if len(prev_range):
+            prev_range[0] = candle_range[0]
+        avg_range = (candle_range + prev_range) / 2
+        
+        body = np.abs(closes - opens)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            body_move_pct = body / opens * 100
+            body_ratio = np.where(candle_range > 0, body / candle_range, 0)
+        
+        # Criteri comuni alle due direzioni, poi la direzione del corpo
+        shared = ((body_move_pct >= self.min_impulse_pct).astype(np.int8)
+                  + (body_ratio >= 0.6) + (candle_range >= avg_range * 0.8))
+        bullish = shared + (closes > opens) >= 3
+        bearish = shared + (closes < opens) >= 3
+        bullish[:1] = False
+        bearish[:1] = False
+        
+        base = (candle_range <= avg_range * 1.2) & ~bullish & ~bearish
+        base[:1] = True
+        
+        return {
+            'open': opens,
+            'high': highs,
+            'low': lows,
+            'close': closes,
+            'range': candle_range,
+            'bullish': bullish,
+            'bearish': bearish,
+            'base': base
+        }
+    
+    def _identify_base_zone(self, df: pd.DataFrame, start_idx: int, max_bars: int = None,
+                            features: Dict[str, np.ndarray] = None) -> Optional[Dict]:
         """
         Identifica una zona di base (consolidamento/lateralizzazione).
         
@@ -75,69 +142,43 @@ class ImprovedSkorupinkiPatterns:
             df: DataFrame con i dati OHLC
             start_idx: indice di inizio ricerca
             max_bars: massimo numero di barre da considerare
+            features: caratteristiche delle candele (vedi compute_features)
             
         Returns:
             Dict con info sulla base o None se non trovata
         """
         if max_bars is None:
             max_bars = self.max_base_bars
+        if features is None:
+            features = self.compute_features(df)
             
         end_limit = min(start_idx + max_bars, len(df))
+        if start_idx >= end_limit:
+            return None
         
-        # Raccogli candele consecutive che formano la base
-        base_candles = []
-        base_highs = []
-        base_lows = []
-        
-        for i in range(start_idx, end_limit):
-            if i >= len(df):
-                break
-                
-            candle = df.iloc[i]
-            prev_candle = df.iloc[i-1] if i > 0 else None
-            
-            # Una candela è parte della base se:
-            # 1. Ha range limitato rispetto alla media
-            # 2. Non è un impulso forte in nessuna direzione
-            candle_range = candle['High'] - candle['Low']
-            
-            if prev_candle is not None:
-                prev_range = prev_candle['High'] - prev_candle['Low']
-                avg_range = (candle_range + prev_range) / 2
-                
-                # Criteri per candela di base:
-                is_small_range = candle_range <= avg_range * 1.2
-                is_not_strong_bull = not self._is_strong_impulse_candle(candle, prev_candle, 'bullish')
-                is_not_strong_bear = not self._is_strong_impulse_candle(candle, prev_candle, 'bearish')
-                
-                if is_small_range and is_not_strong_bull and is_not_strong_bear:
-                    base_candles.append(i)
-                    base_highs.append(candle['High'])
-                    base_lows.append(candle['Low'])
-                else:
-                    # Se troviamo una candela che non è base, fermiamo la ricerca
-                    break
-            else:
-                # Prima candela, assumiamo sia base
-                base_candles.append(i)
-                base_highs.append(candle['High'])
-                base_lows.append(candle['Low'])
+        # Candele consecutive che formano la base: range limitato rispetto alla
+        # media con la precedente e nessun impulso forte in nessuna direzione.
+        # Alla prima candela che non è base la ricerca si ferma
+        is_base = features['base'][start_idx:end_limit]
+        count = len(is_base) if is_base.all() else int(np.argmin(is_base))
         
         # Valida la base: deve avere almeno 1 candela e range contenuto
-        if len(base_candles) >= 1:
-            base_high = max(base_highs)
-            base_low = min(base_lows)
+        if count >= 1:
+            base_highs = features['high'][start_idx:start_idx + count]
+            base_lows = features['low'][start_idx:start_idx + count]
+            base_high = base_highs.max()
+            base_low = base_lows.min()
             base_range = base_high - base_low
             
             # La base è valida se il range totale non è eccessivo
-            avg_individual_range = np.mean([h - l for h, l in zip(base_highs, base_lows)])
-            is_tight_range = base_range <= avg_individual_range * (len(base_candles) * 0.8)
+            avg_individual_range = np.mean(base_highs - base_lows)
+            is_tight_range = base_range <= avg_individual_range * (count * 0.8)
             
             if is_tight_range:
                 return {
                     'start_idx': start_idx,
-                    'end_idx': base_candles[-1],
-                    'candle_count': len(base_candles),
+                    'end_idx': start_idx + count - 1,
+                    'candle_count': count,
                     'high': base_high,
                     'low': base_low,
                     'range': base_range,
@@ -146,247 +187,101 @@ class ImprovedSkorupinkiPatterns:
         
         return None
     
-    def _find_rbd_pattern(self, df: pd.DataFrame, current_idx: int) -> Optional[Dict]:
+    def _find_pattern(self, df: pd.DataFrame, current_idx: int, pattern_name: str,
+                      features: Dict[str, np.ndarray] = None) -> Optional[Dict]:
+        """
+        Trova il pattern indicato (vedi PATTERN_LEGS) con leg-out sulla candela current_idx:
+        leg-in → base (fino a max_base_bars candele) → leg-out.
+        """
+        if current_idx <= 3:
+            return None
+        if features is None:
+            features = self.compute_features(df)
+        zone_type, leg_in_direction, leg_out_direction = PATTERN_LEGS[pattern_name]
+        
+        leg_out_idx = current_idx
+        base_end_idx = current_idx - 1
+        
+        # 1. Verifica LEG-OUT
+        if not features[leg_out_direction][leg_out_idx]:
+            return None
+        
+        # 2. Cerca BASE: deve finire subito prima del leg-out
+        max_base_start = max(0, base_end_idx - self.max_base_bars)
+        
+        base_found = None
+        for base_start in range(max_base_start, base_end_idx):
+            base_info = self._identify_base_zone(df, base_start, base_end_idx - base_start + 1, features)
+            if base_info and base_info['end_idx'] == base_end_idx:
+                base_found = base_info
+                break
+        
+        if not base_found:
+            return None
+        
+        # 3. Verifica LEG-IN prima della base
+        leg_in_idx = base_found['start_idx'] - 1
+        if leg_in_idx < 1 or not features[leg_in_direction][leg_in_idx]:
+            return None
+        
+        zone_low = min(base_found['low'], features['low'][leg_in_idx])
+        zone_high = max(base_found['high'], features['high'][leg_in_idx])
+        
+        return {
+            'pattern': pattern_name,
+            'type': zone_type,
+            'leg_in_idx': leg_in_idx,
+            'base_start_idx': base_found['start_idx'],
+            'base_end_idx': base_found['end_idx'],
+            'leg_out_idx': leg_out_idx,
+            'zone_low': zone_low,
+            'zone_high': zone_high,
+            'zone_center': (zone_low + zone_high) / 2,
+            'base_candle_count': base_found['candle_count'],
+            'formation_date': df['Date'].iloc[base_found['start_idx']]
+        }
+    
+    def _find_rbd_pattern(self, df: pd.DataFrame, current_idx: int,
+                          features: Dict[str, np.ndarray] = None) -> Optional[Dict]:
         """
         Trova pattern RBD: Rise (leg-in) → Base → Drop (leg-out)
         Identifica zone di SUPPLY.
         """
-        # Cerchiamo indietro dal current_idx
-        for lookback in range(3, min(15, current_idx)):
-            leg_out_idx = current_idx
-            base_end_idx = current_idx - 1
-            
-            # 1. Verifica LEG-OUT (Drop forte)
-            leg_out_candle = df.iloc[leg_out_idx]
-            leg_out_prev = df.iloc[leg_out_idx - 1]
-            
-            if not self._is_strong_impulse_candle(leg_out_candle, leg_out_prev, 'bearish'):
-                continue
-            
-            # 2. Cerca BASE prima del leg-out
-            # La base deve finire prima del leg-out
-            max_base_start = max(0, base_end_idx - self.max_base_bars)
-            
-            base_found = None
-            for base_start in range(max_base_start, base_end_idx):
-                base_info = self._identify_base_zone(df, base_start, base_end_idx - base_start + 1)
-                if base_info and base_info['end_idx'] == base_end_idx:
-                    base_found = base_info
-                    break
-            
-            if not base_found:
-                continue
-            
-            # 3. Verifica LEG-IN (Rise forte) prima della base
-            leg_in_idx = base_found['start_idx'] - 1
-            if leg_in_idx < 1:
-                continue
-                
-            leg_in_candle = df.iloc[leg_in_idx]
-            leg_in_prev = df.iloc[leg_in_idx - 1]
-            
-            if self._is_strong_impulse_candle(leg_in_candle, leg_in_prev, 'bullish'):
-                # PATTERN RBD TROVATO!
-                zone_low = min(base_found['low'], leg_in_candle['Low'])
-                zone_high = max(base_found['high'], leg_in_candle['High'])
-                
-                return {
-                    'pattern': 'RBD',
-                    'type': 'Supply',
-                    'leg_in_idx': leg_in_idx,
-                    'base_start_idx': base_found['start_idx'],
-                    'base_end_idx': base_found['end_idx'],
-                    'leg_out_idx': leg_out_idx,
-                    'zone_low': zone_low,
-                    'zone_high': zone_high,
-                    'zone_center': (zone_low + zone_high) / 2,
-                    'base_candle_count': base_found['candle_count'],
-                    'formation_date': df.iloc[base_found['start_idx']]['Date']
-                }
-        
-        return None
+        return self._find_pattern(df, current_idx, 'RBD', features)
     
-    def _find_dbd_pattern(self, df: pd.DataFrame, current_idx: int) -> Optional[Dict]:
+    def _find_dbd_pattern(self, df: pd.DataFrame, current_idx: int,
+                          features: Dict[str, np.ndarray] = None) -> Optional[Dict]:
         """
         Trova pattern DBD: Drop (leg-in) → Base → Drop (leg-out)  
         Identifica zone di SUPPLY.
         """
-        for lookback in range(3, min(15, current_idx)):
-            leg_out_idx = current_idx
-            base_end_idx = current_idx - 1
-            
-            # 1. Verifica LEG-OUT (Drop forte)
-            leg_out_candle = df.iloc[leg_out_idx]
-            leg_out_prev = df.iloc[leg_out_idx - 1]
-            
-            if not self._is_strong_impulse_candle(leg_out_candle, leg_out_prev, 'bearish'):
-                continue
-            
-            # 2. Cerca BASE
-            max_base_start = max(0, base_end_idx - self.max_base_bars)
-            
-            base_found = None
-            for base_start in range(max_base_start, base_end_idx):
-                base_info = self._identify_base_zone(df, base_start, base_end_idx - base_start + 1)
-                if base_info and base_info['end_idx'] == base_end_idx:
-                    base_found = base_info
-                    break
-            
-            if not base_found:
-                continue
-            
-            # 3. Verifica LEG-IN (Drop forte) prima della base
-            leg_in_idx = base_found['start_idx'] - 1
-            if leg_in_idx < 1:
-                continue
-                
-            leg_in_candle = df.iloc[leg_in_idx]
-            leg_in_prev = df.iloc[leg_in_idx - 1]
-            
-            if self._is_strong_impulse_candle(leg_in_candle, leg_in_prev, 'bearish'):
-                # PATTERN DBD TROVATO!
-                zone_low = min(base_found['low'], leg_in_candle['Low'])
-                zone_high = max(base_found['high'], leg_in_candle['High'])
-                
-                return {
-                    'pattern': 'DBD',
-                    'type': 'Supply',
-                    'leg_in_idx': leg_in_idx,
-                    'base_start_idx': base_found['start_idx'],
-                    'base_end_idx': base_found['end_idx'],
-                    'leg_out_idx': leg_out_idx,
-                    'zone_low': zone_low,
-                    'zone_high': zone_high,
-                    'zone_center': (zone_low + zone_high) / 2,
-                    'base_candle_count': base_found['candle_count'],
-                    'formation_date': df.iloc[base_found['start_idx']]['Date']
-                }
-        
-        return None
+        return self._find_pattern(df, current_idx, 'DBD', features)
     
-    def _find_dbr_pattern(self, df: pd.DataFrame, current_idx: int) -> Optional[Dict]:
+    def _find_dbr_pattern(self, df: pd.DataFrame, current_idx: int,
+                          features: Dict[str, np.ndarray] = None) -> Optional[Dict]:
         """
         Trova pattern DBR: Drop (leg-in) → Base → Rise (leg-out)
         Identifica zone di DEMAND.
         """
-        for lookback in range(3, min(15, current_idx)):
-            leg_out_idx = current_idx
-            base_end_idx = current_idx - 1
-            
-            # 1. Verifica LEG-OUT (Rise forte)
-            leg_out_candle = df.iloc[leg_out_idx]
-            leg_out_prev = df.iloc[leg_out_idx - 1]
-            
-            if not self._is_strong_impulse_candle(leg_out_candle, leg_out_prev, 'bullish'):
-                continue
-            
-            # 2. Cerca BASE
-            max_base_start = max(0, base_end_idx - self.max_base_bars)
-            
-            base_found = None
-            for base_start in range(max_base_start, base_end_idx):
-                base_info = self._identify_base_zone(df, base_start, base_end_idx - base_start + 1)
-                if base_info and base_info['end_idx'] == base_end_idx:
-                    base_found = base_info
-                    break
-            
-            if not base_found:
-                continue
-            
-            # 3. Verifica LEG-IN (Drop forte) prima della base
-            leg_in_idx = base_found['start_idx'] - 1
-            if leg_in_idx < 1:
-                continue
-                
-            leg_in_candle = df.iloc[leg_in_idx]
-            leg_in_prev = df.iloc[leg_in_idx - 1]
-            
-            if self._is_strong_impulse_candle(leg_in_candle, leg_in_prev, 'bearish'):
-                # PATTERN DBR TROVATO!
-                zone_low = min(base_found['low'], leg_in_candle['Low'])
-                zone_high = max(base_found['high'], leg_in_candle['High'])
-                
-                return {
-                    'pattern': 'DBR',
-                    'type': 'Demand',
-                    'leg_in_idx': leg_in_idx,
-                    'base_start_idx': base_found['start_idx'],
-                    'base_end_idx': base_found['end_idx'],
-                    'leg_out_idx': leg_out_idx,
-                    'zone_low': zone_low,
-                    'zone_high': zone_high,
-                    'zone_center': (zone_low + zone_high) / 2,
-                    'base_candle_count': base_found['candle_count'],
-                    'formation_date': df.iloc[base_found['start_idx']]['Date']
-                }
-        
-        return None
+        return self._find_pattern(df, current_idx, 'DBR', features)
     
-    def _find_rbr_pattern(self, df: pd.DataFrame, current_idx: int) -> Optional[Dict]:
+    def _find_rbr_pattern(self, df: pd.DataFrame, current_idx: int,
+                          features: Dict[str, np.ndarray] = None) -> Optional[Dict]:
         """
         Trova pattern RBR: Rise (leg-in) → Base → Rise (leg-out)
         Identifica zone di DEMAND.
         """
-        for lookback in range(3, min(15, current_idx)):
-            leg_out_idx = current_idx
-            base_end_idx = current_idx - 1
-            
-            # 1. Verifica LEG-OUT (Rise forte)
-            leg_out_candle = df.iloc[leg_out_idx]
-            leg_out_prev = df.iloc[leg_out_idx - 1]
-            
-            if not self._is_strong_impulse_candle(leg_out_candle, leg_out_prev, 'bullish'):
-                continue
-            
-            # 2. Cerca BASE
-            max_base_start = max(0, base_end_idx - self.max_base_bars)
-            
-            base_found = None
-            for base_start in range(max_base_start, base_end_idx):
-                base_info = self._identify_base_zone(df, base_start, base_end_idx - base_start + 1)
-                if base_info and base_info['end_idx'] == base_end_idx:
-                    base_found = base_info
-                    break
-            
-            if not base_found:
-                continue
-            
-            # 3. Verifica LEG-IN (Rise forte) prima della base
-            leg_in_idx = base_found['start_idx'] - 1
-            if leg_in_idx < 1:
-                continue
-                
-            leg_in_candle = df.iloc[leg_in_idx]
-            leg_in_prev = df.iloc[leg_in_idx - 1]
-            
-            if self._is_strong_impulse_candle(leg_in_candle, leg_in_prev, 'bullish'):
-                # PATTERN RBR TROVATO!
-                zone_low = min(base_found['low'], leg_in_candle['Low'])
-                zone_high = max(base_found['high'], leg_in_candle['High'])
-                
-                return {
-                    'pattern': 'RBR',
-                    'type': 'Demand',
-                    'leg_in_idx': leg_in_idx,
-                    'base_start_idx': base_found['start_idx'],
-                    'base_end_idx': base_found['end_idx'],
-                    'leg_out_idx': leg_out_idx,
-                    'zone_low': zone_low,
-                    'zone_high': zone_high,
-                    'zone_center': (zone_low + zone_high) / 2,
-                    'base_candle_count': base_found['candle_count'],
-                    'formation_date': df.iloc[base_found['start_idx']]['Date']
-                }
-        
-        return None
+        return self._find_pattern(df, current_idx, 'RBR', features)
     
-    def find_all_patterns(self, df: pd.DataFrame, max_lookback: int = 100) -> List[Dict]:
+    def find_all_patterns(self, df: pd.DataFrame, max_lookback: int = 100,
+                          features: Dict[str, np.ndarray] = None) -> List[Dict]:
         """
         Trova tutti i pattern Supply/Demand in un DataFrame.
         
         Args:
             df: DataFrame con colonne Date, Open, High, Low, Close
             max_lookback: numero massimo di barre da analizzare
+            features: caratteristiche già calcolate (vedi compute_features)
             
         Returns:
             List[Dict]: lista di pattern trovati
@@ -395,21 +290,16 @@ class ImprovedSkorupinkiPatterns:
         
         if len(df) < 5:
             return patterns
+        if features is None:
+            features = self.compute_features(df)
         
         # Analizza le ultime max_lookback barre
         start_idx = max(5, len(df) - max_lookback)
         
         for i in range(start_idx, len(df)):
             # Cerca tutti i tipi di pattern
-            pattern_methods = [
-                self._find_rbd_pattern,
-                self._find_dbd_pattern,
-                self._find_dbr_pattern,
-                self._find_rbr_pattern
-            ]
-            
-            for method in pattern_methods:
-                pattern = method(df, i)
+            for pattern_name in PATTERN_LEGS:
+                pattern = self._find_pattern(df, i, pattern_name, features)
                 if pattern:
                     patterns.append(pattern)
         
@@ -0,0 +1,245 @@
+# ===== FILE: moduls/TechnicalAnalysis/PlotlyChartBuilder.py =====
+"""
+Costruzione delle figure Plotly come dizionari semplici.
+
+fig.add_hline/add_hrect/add_trace validano ogni chiamata sull'intera figura:
+con centinaia di zone il tempo di generazione del grafico è dominato dalla
+validazione. Qui tracce, shapes e annotazioni vengono accumulate in liste di
+dict e la figura {'data', 'layout'} viene serializzata una sola volta, con
+lo stesso JSON che producevano make_subplots + add_hline/add_hrect.
+
+Le zone e i livelli lontani dall'intervallo di prezzo visibile vengono
+scartati e il numero di zone disegnate è limitato (le più forti e le più
+vicine al prezzo restano), così il grafico resta leggero anche con molte
+zone accumulate.
+
+plotly è importato solo quando serve (template e serializzazione), non
+all'import del modulo: l'avvio dell'app non ne paga il costo.
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Domini verticali di make_subplots(rows=2, row_heights=[0.7, 0.3], vertical_spacing=0.1)
+PRICE_DOMAIN = [0.37, 1.0]
+VOLUME_DOMAIN = [0.0, 0.27]
+
+# Margine attorno a [min low, max high] entro cui zone e livelli sono considerati visibili
+VISIBLE_RANGE_MARGIN = 0.1
+
+# Zone disegnate per tipo (domanda/offerta) e livelli S/R disegnati per grafico
+MAX_CHART_ZONES = 40
+MAX_CHART_LEVELS = 30
+
+INCREASING_COLOR = '#00C851'
+DECREASING_COLOR = '#FF4444'
+
+ZONE_STYLES = {
+    'Demand': {'fillcolor': 'rgba(40, 167, 69, 0.2)', 'line': 'rgba(40, 167, 69, 0.8)'},
+    'Supply': {'fillcolor': 'rgba(220, 53, 69, 0.2)', 'line': 'rgba(220, 53, 69, 0.8)'},
+}
+
+_template_cache: Dict[str, Dict] = {}
+
+
+def template_json(name: str = 'plotly_white') -> Dict:
+    """Template Plotly espanso (come in fig.to_json()), calcolato una volta."""
+    if name not in _template_cache:
+        import plotly.io as pio
+        _template_cache[name] = pio.templates[name].to_plotly_json()
+    return _template_cache[name]
+
+
+def visible_price_range(lows, highs, margin: float = VISIBLE_RANGE_MARGIN) -> Tuple[float, float]:
+    """Intervallo di prezzo visibile: [min low, max high] allargato di margin."""
+    low = float(np.nanmin(np.asarray(lows, dtype=np.float64)))
+    high = float(np.nanmax(np.asarray(highs, dtype=np.float64)))
+    pad = (high - low) * margin
+    return low - pad, high + pad
+
+
+def normalize_zones(skorupinski_data) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Zone di domanda e offerta da lista (CSV) o dizionario {demand_zones, supply_zones}.
+
+    Returns:
+        (demand, supply): liste di {'index', 'bottom', 'top', 'center', 'zone'},
+        index è la posizione della zona nel suo tipo (id stabile per la leggenda)
+    """
+    if isinstance(skorupinski_data, dict):
+        grouped = {'Demand': skorupinski_data.get('demand_zones') or [],
+                   'Supply': skorupinski_data.get('supply_zones') or []}
+    else:
+        grouped = {'Demand': [], 'Supply': []}
+        for zone in skorupinski_data or []:
+            if not isinstance(zone, dict):
+                continue
+            zone_type = zone.get('type', '').lower()
+            if 'demand' in zone_type or 'support' in zone_type:
+                grouped['Demand'].append(zone)
+            elif 'supply' in zone_type or 'resistance' in zone_type:
+                grouped['Supply'].append(zone)
+
+    normalized = {}
+    for zone_type, zones in grouped.items():
+        normalized[zone_type] = []
+        for i, zone in enumerate(zones):
+            bottom = zone.get('zone_bottom') or zone.get('bottom') or zone.get('low')
+            top = zone.get('zone_top') or zone.get('top') or zone.get('high')
+            center = zone.get('zone_center')
+            if center is None and bottom is not None and top is not None:
+                center = (bottom + top) / 2
+            if bottom is None or top is None or center is None:
+                continue
+            normalized[zone_type].append({'index': i, 'bottom': bottom, 'top': top, 'center': center, 'zone': zone})
+    return normalized['Demand'], normalized['Supply']
+
+
+def select_zones(zones: List[Dict], price_range: Tuple[float, float], current_price: float,
+                 max_zones: int = MAX_CHART_ZONES) -> List[Dict]:
+    """
+    Zone che intersecano l'intervallo visibile; oltre max_zones restano le più
+    forti e, a parità, le più vicine al prezzo corrente. L'ordine originale è mantenuto.
+    """
+    low, high = price_range
+    visible = [z for z in zones if z['top'] >= low and z['bottom'] <= high]
+    if len(visible) <= max_zones:
+        return visible
+    ranked = sorted(visible, key=lambda z: (-(z['zone'].get('strength_score') or 0),
+                                            abs(z['center'] - current_price)))
+    keep = {id(z) for z in ranked[:max_zones]}
+    return [z for z in visible if id(z) in keep]
+
+
+def select_levels(levels: Iterable[Dict], price_range: Tuple[float, float], current_price: float,
+                  max_levels: int = MAX_CHART_LEVELS) -> List[Dict]:
+    """Livelli S/R nell'intervallo visibile, al massimo max_levels (i più vicini al prezzo)."""
+    low, high = price_range
+    visible = [lv for lv in levels if lv.get('level') is not None and low <= lv['level'] <= high]
+    if len(visible) <= max_levels:
+        return visible
+    keep = {id(lv) for lv in sorted(visible, key=lambda lv: abs(lv['level'] - current_price))[:max_levels]}
+    return [lv for lv in visible if id(lv) in keep]
+
+
+class ChartFigureBuilder:
+    """Figura candlestick (+ volume) con livelli e zone, assemblata come dict."""
+
+    def __init__(self, title: str, subplot_title: str, has_volume: bool):
+        self.title = title
+        self.subplot_title = subplot_title
+        self.has_volume = has_volume
+        self.traces: List[Dict] = []
+        self.shapes: List[Dict] = []
+        self.annotations: List[Dict] = []
+
+    # ===== TRACCE =====
+
+    def add_candlestick(self, name: str, dates, opens, highs, lows, closes):
+        self.traces.append({
+            'type': 'candlestick', 'name': name,
+            'x': dates, 'open': opens, 'high': highs, 'low': lows, 'close': closes,
+            'increasing': {'line': {'color': INCREASING_COLOR}},
+            'decreasing': {'line': {'color': DECREASING_COLOR}},
+            'xaxis': 'x', 'yaxis': 'y',
+        })
+
+    def add_close_line(self, name: str, dates, closes):
+        """Linea del close (vista a linea, storico ridotto con LTTB)."""
+        self.traces.append({
+            'type': 'scatter', 'mode': 'lines', 'name': name, 'x': dates, 'y': closes,
+            'line': {'color': '#007bff', 'width': 1.5},
+            'xaxis': 'x', 'yaxis': 'y',
+        })
+
+    def add_volume(self, dates, volumes, opens, closes):
+        colors = np.where(np.asarray(closes, dtype=np.float64) >= np.asarray(opens, dtype=np.float64),
+                          INCREASING_COLOR, DECREASING_COLOR).tolist()
+        self.traces.append({
+            'type': 'bar', 'name': 'Volume', 'x': dates, 'y': volumes,
+            'marker': {'color': colors}, 'opacity': 0.7,
+            'xaxis': 'x2', 'yaxis': 'y2',
+        })
+
+    # ===== SHAPES =====
+
+    def add_level(self, y: float, color: str, label: str):
+        """Linea orizzontale tratteggiata con etichetta in alto a destra (come add_hline)."""
+        self.shapes.append({
+            'type': 'line', 'x0': 0, 'x1': 1, 'xref': 'x domain', 'y0': y, 'y1': y, 'yref': 'y',
+            'line': {'color': color, 'dash': 'dash', 'width': 2},
+        })
+        self.annotations.append({
+            'text': label, 'showarrow': False,
+            'x': 1, 'xanchor': 'right', 'xref': 'x domain',
+            'y': y, 'yanchor': 'bottom', 'yref': 'y',
+        })
+
+    def add_zone(self, bottom: float, top: float, zone_type: str, label: str, name: str):
+        """Rettangolo orizzontale con etichetta in alto a sinistra (come add_hrect)."""
+        style = ZONE_STYLES[zone_type]
+        self.shapes.append({
+            'type': 'rect', 'name': name, 'x0': 0, 'x1': 1, 'xref': 'x domain', 'y0': bottom, 'y1': top, 'yref': 'y',
+            'fillcolor': style['fillcolor'], 'line': {'color': style['line'], 'width': 1},
+        })
+        self.annotations.append({
+            'text': label, 'showarrow': False,
+            'x': 0, 'xanchor': 'left', 'xref': 'x domain',
+            'y': top, 'yanchor': 'top', 'yref': 'y',
+        })
+
+    # ===== FIGURA =====
+
+    def _subplot_titles(self) -> List[Dict]:
+        titles = [(self.subplot_title, 1.0)]
+        if self.has_volume:
+            titles.append(('Volume', VOLUME_DOMAIN[1]))
+        return [{
+            'text': text, 'showarrow': False, 'font': {'size': 16},
+            'x': 0.5, 'xanchor': 'center', 'xref': 'paper',
+            'y': y, 'yanchor': 'bottom', 'yref': 'paper',
+        } for text, y in titles]
+
+    def layout(self, template: Optional[str] = 'plotly_white') -> Dict:
+        x_title = {'text': 'Data'}
+        if self.has_volume:
+            axes = {
+                'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'matches': 'x2', 'showticklabels': False,
+                          'title': x_title, 'rangeslider': {'visible': False}},
+                'yaxis': {'anchor': 'x', 'domain': PRICE_DOMAIN, 'title': {'text': 'Prezzo ($)'}},
+                'xaxis2': {'anchor': 'y2', 'domain': [0.0, 1.0], 'rangeslider': {'visible': False}},
+                'yaxis2': {'anchor': 'x2', 'domain': VOLUME_DOMAIN},
+            }
+        else:
+            axes = {
+                'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'title': x_title, 'rangeslider': {'visible': False}},
+                'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0], 'title': {'text': 'Prezzo ($)'}},
+            }
+
+        layout = {
+            **axes,
+            'annotations': self._subplot_titles() + self.annotations,
+            'shapes': self.shapes,
+            'title': {'text': self.title},
+            'showlegend': True,
+            'legend': {'orientation': 'v', 'yanchor': 'top', 'y': 0.99, 'xanchor': 'left', 'x': 1.01},
+            'hovermode': 'x unified',
+        }
+        if template:
+            layout['template'] = template_json(template)
+        return layout
+
+    def figure(self, template: Optional[str] = 'plotly_white') -> Dict:
+        return {'data': self.traces, 'layout': self.layout(template)}
+
+    @staticmethod
+    def to_json(figure: Dict) -> str:
+        """Serializzazione unica della figura (array numpy compresi)."""
+        import plotly.utils
+        return json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder, separators=(',', ':'))
@@ -1,4 +1,5 @@
 import json
+import logging
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -6,6 +7,15 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Union
 import uuid
 
+from moduls.MarketData.Rollups import DAILY, TIMEFRAMES, read_timeframe_csv, timeframe_suffix, validate_timeframe
+from moduls.TechnicalAnalysis.ImprovedSkorupinkiPatterns import ImprovedSkorupinkiPatterns, PATTERN_LEGS
+from moduls.Core.AtomicFiles import atomic_write_csv, atomic_write_json
+from moduls.Core.FileLocks import file_lock
+from moduls.Core.PerfMetrics import metrics, timed
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
 class SkorupinkiZoneManager:
     """
     Classe dedicata al calcolo di zone Supply/Demand usando l'algoritmo Skorupinski.
@@ -22,9 +32,15 @@ class SkorupinkiZoneManager:
                  min_zone_strength: int = 1,
                  max_years_lookback: int = 5,
                  min_impulse_pct: float = 1.2,
-                 max_base_bars: int = 10):
+                 max_base_bars: int = 10,
+                 compact_prices: bool = False,
+                 timeframe: str = DAILY,
+                 price_file_suffix: str = ''):
         """
         Inizializza il manager delle zone Skorupinski.
+        Con compact_prices=True i prezzi sono caricati in float32 (vedi CompactPriceFormat);
+        timeframe sceglie le barre analizzate ('daily', 'weekly', 'monthly', vedi Rollups);
+        price_file_suffix è il suffisso dei CSV dei prezzi ('_notAdjusted' per AAPL_notAdjusted.csv).
         """
         self.input_file = input_file
         self.input_folder_prices = input_folder_prices
@@ -36,6 +52,9 @@ class SkorupinkiZoneManager:
         self.max_years_lookback = max_years_lookback
         self.min_impulse_pct = min_impulse_pct
         self.max_base_bars = max_base_bars
+        self.compact_prices = compact_prices
+        self.timeframe = validate_timeframe(timeframe)
+        self.price_file_suffix = price_file_suffix
         
         # Carica stato tickers
         self.tickers = self._load_tickers()
@@ -149,16 +168,15 @@ class SkorupinkiZoneManager:
         ticker_config = self.tickers.get(ticker, {})
         return ticker_config.get('timestamp', '')
     
-    def _load_price_data(self, ticker: str) -> pd.DataFrame:
-        """🔧 FIX: Carica i dati storici di prezzo per un ticker."""
-        file_path = self.input_folder_prices / f"{ticker}.csv"
+    def _load_price_data(self, ticker: str, timeframe: str = None) -> pd.DataFrame:
+        """🔧 FIX: Carica i dati storici di prezzo per un ticker (timeframe del manager se non indicato)."""
+        file_path = self.input_folder_prices / f"{ticker}{self.price_file_suffix}.csv"
         
         if not file_path.exists():
             raise FileNotFoundError(f"Dati prezzi non trovati per {ticker}: {file_path}")
         
-        df = pd.read_csv(file_path, parse_dates=['Date'])
-        df.sort_values('Date', inplace=True)
-        df.reset_index(drop=True, inplace=True)
+        # In modalità compatta i prezzi restano float32; le date servono come datetime per l'analisi
+        df = read_timeframe_csv(file_path, timeframe or self.timeframe, compact=self.compact_prices, day_numbers=False)
         
         # Normalizza nomi colonne
         df.columns = df.columns.str.capitalize()
@@ -227,31 +245,52 @@ class SkorupinkiZoneManager:
     def _update_ticker_timestamp(self, ticker: str, latest_date: datetime):
         """Aggiorna il timestamp per un ticker nel file JSON di stato."""
         try:
-            with open(self.input_file, 'r', encoding='utf-8') as f:
-                current_state = json.load(f)
-            
-            # Preserva formato: se era dict mantieni dict, se era string mantieni string
-            current_config = current_state.get(ticker)
-            new_timestamp = latest_date.isoformat()
-            
-            if isinstance(current_config, dict):
-                # Formato enhanced: aggiorna solo timestamp
-                current_config['timestamp'] = new_timestamp
-            else:
-                # Formato legacy: aggiorna direttamente
-                current_state[ticker] = new_timestamp
-            
-            with open(self.input_file, 'w', encoding='utf-8') as f:
-                json.dump(current_state, f, indent=2, ensure_ascii=False)
+            # Read-modify-write sotto lock: analisi parallele non si sovrascrivono i timestamp
+            with file_lock(self.input_file):
+                with open(self.input_file, 'r', encoding='utf-8') as f:
+                    current_state = json.load(f)
+                
+                # Preserva formato: se era dict mantieni dict, se era string mantieni string
+                current_config = current_state.get(ticker)
+                new_timestamp = latest_date.isoformat()
+                
+                if isinstance(current_config, dict):
+                    # Formato enhanced: aggiorna solo timestamp
+                    current_config['timestamp'] = new_timestamp
+                else:
+                    # Formato legacy: aggiorna direttamente
+                    current_state[ticker] = new_timestamp
+                
+                atomic_write_json(self.input_file, current_state, ensure_ascii=False)
             
             print(f"    📝 {ticker}: timestamp aggiornato a {latest_date.strftime('%Y-%m-%d')}")
             
         except Exception as e:
             print(f"    ⚠️ Errore nell'aggiornamento timestamp per {ticker}: {str(e)}")
     
-    def _load_existing_zones(self, ticker: str) -> pd.DataFrame:
+    def invalidate_ticker(self, ticker: str):
+        """Azzera il timestamp di un ticker: le zone verranno ricalcolate alla prossima analisi."""
+        reset = datetime(1900, 1, 1)
+        self._update_ticker_timestamp(ticker, reset)
+        self.tickers.setdefault(ticker, {'timestamp': '', 'custom_params': {}})['timestamp'] = reset.isoformat()
+    
+    def _mark_processed(self, ticker: str, df: pd.DataFrame, timeframe: str = None):
+        """Salva come timestamp l'ultima barra analizzata (solo giornaliero)."""
+        if (timeframe or self.timeframe) != DAILY:
+            return
+        latest_date = df['Date'].max()
+        if hasattr(latest_date, 'to_pydatetime'):
+            latest_date = latest_date.to_pydatetime()
+        self._update_ticker_timestamp(ticker, latest_date)
+    
+    def _output_file(self, ticker: str, timeframe: str = None) -> Path:
+        """CSV delle zone: {ticker}_SkorupinkiZones.csv, con suffisso _weekly/_monthly per gli altri timeframe."""
+        return self.output_folder / f"{ticker}_SkorupinkiZones{timeframe_suffix(timeframe or self.timeframe)}.csv"
+    
+    def _load_existing_zones(self, ticker: str, timeframe: str = None) -> pd.DataFrame:
         """Carica le zone esistenti con gestione completa colonne mancanti."""
-        file_path = self.output_folder / f"{ticker}_SkorupinkiZones.csv"
+        timeframe = timeframe or self.timeframe
+        file_path = self._output_file(ticker, timeframe)
         
         if not file_path.exists():
             return pd.DataFrame()
@@ -268,7 +307,9 @@ class SkorupinkiZoneManager:
                 'created_at': lambda: datetime.now().isoformat(),
                 'last_modified': lambda: datetime.now().isoformat(),
                 'formation_type': 'legacy',
-                'algorithm_version': '1.0'
+                'algorithm_version': '1.0',
+                'timeframe': timeframe,
+                'nested_in': ''
             }
             
             missing_columns = []
@@ -283,8 +324,8 @@ class SkorupinkiZoneManager:
             if missing_columns:
                 print(f"    🔧 {ticker}: aggiunte colonne mancanti: {missing_columns}")
                 # Salva il CSV aggiornato con le nuove colonne
-                output_file = self.output_folder / f"{ticker}_SkorupinkiZones.csv"
-                df.to_csv(output_file, index=False, date_format='%Y-%m-%d')
+                output_file = self._output_file(ticker, timeframe)
+                atomic_write_csv(output_file, df, date_format='%Y-%m-%d')
                 print(f"    💾 {ticker}: CSV aggiornato con colonne complete")
             
             print(f"    📂 {ticker}: caricate {len(df)} zone esistenti con {len(df.columns)} colonne")
@@ -294,7 +335,7 @@ class SkorupinkiZoneManager:
             print(f"    ⚠️ {ticker}: errore nel caricamento zone esistenti: {str(e)}")
             return pd.DataFrame()
     
-    def _ensure_all_columns_in_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _ensure_all_columns_in_dataframe(self, df: pd.DataFrame, timeframe: str = None) -> pd.DataFrame:
         """Assicura che il DataFrame abbia tutte le colonne necessarie."""
         expected_columns = [
             'ticker', 'date', 'pattern', 'type', 'zone_bottom', 'zone_top', 
@@ -304,7 +345,7 @@ class SkorupinkiZoneManager:
             'base_candle_count', 'compression_bars', 'formation_type',
             'algorithm_version', 'leg_in_idx', 'leg_out_idx',
             'zone_id', 'visibility', 'source', 'description', 
-            'created_at', 'last_modified'
+            'created_at', 'last_modified', 'timeframe', 'nested_in'
         ]
         
         # Aggiungi colonne mancanti con valori di default
@@ -322,6 +363,10 @@ class SkorupinkiZoneManager:
                     df[col] = datetime.now().isoformat()
                 elif col == 'virgin_zone':
                     df[col] = True
+                elif col == 'timeframe':
+                    df[col] = timeframe or self.timeframe
+                elif col == 'nested_in':
+                    df[col] = ''
                 else:
                     df[col] = 0 if col in ['index', 'test_count', 'days_ago'] else None
         
@@ -390,14 +435,32 @@ class SkorupinkiZoneManager:
         return enhanced_zone
     
     
-    def _find_skorupinski_zones(self, df: pd.DataFrame, ticker: str, custom_params: Dict[str, float] = None) -> List[Dict]:
+    def _pattern_analyzer(self) -> ImprovedSkorupinkiPatterns:
+        return ImprovedSkorupinkiPatterns(
+            min_impulse_pct=self.min_impulse_pct,
+            max_base_bars=self.max_base_bars
+        )
+    
+    @timed('zone_scan')
+    def _find_skorupinski_zones(self, df: pd.DataFrame, ticker: str, custom_params: Dict[str, float] = None,
+                                features: Dict[str, np.ndarray] = None, timeframe: str = None) -> List[Dict]:
         """
         🔧 FIX: Implementazione REALE per trovare zone Skorupinski.
         Sostituisce il placeholder vuoto.
-        """
-        from moduls.TechnicalAnalysis.ImprovedSkorupinkiPatterns import ImprovedSkorupinkiPatterns
         
-        print(f"    🎯 Analisi zone Skorupinski REALE per {ticker}")
+        Le caratteristiche delle candele (impulsi, basi, OHLC come array) sono
+        calcolate una volta per serie e condivise da tutti i pattern e i filtri;
+        chi le ha già calcolate per la serie le passa in features.
+        Le zone sono etichettate con il timeframe delle barre analizzate.
+        
+        Il dettaglio per pattern (trovato, scartato, accettato) è scritto solo
+        con il logger a livello DEBUG (ANALYSIS_DEBUG, spento in produzione):
+        nel ciclo su barre x pattern non si formattano né si stampano righe
+        che in produzione nessuno legge.
+        """
+        timeframe = timeframe or self.timeframe
+        verbose = logger.isEnabledFor(logging.DEBUG)
+        print(f"    🎯 Analisi zone Skorupinski REALE per {ticker} ({timeframe})")
         zones = []
         
         if len(df) < 6:
@@ -405,33 +468,26 @@ class SkorupinkiZoneManager:
             return zones
         
         # Inizializza l'analyzer migliorato
-        improved_analyzer = ImprovedSkorupinkiPatterns(
-            min_impulse_pct=self.min_impulse_pct,
-            max_base_bars=self.max_base_bars
-        )
+        improved_analyzer = self._pattern_analyzer()
+        if features is None:
+            features = improved_analyzer.compute_features(df)
         
         current_price = df.iloc[-1]['Close']
         current_idx = len(df) - 1
         start_idx = max(0, current_idx - self.max_lookback_bars)
         
-        print(f"    💰 Prezzo attuale: {current_price:.4f}")
-        print(f"    📊 Analisi da indice {start_idx} a {current_idx}")
+        if verbose:
+            logger.debug(f"    💰 Prezzo attuale: {current_price:.4f}")
+            logger.debug(f"    📊 Analisi da indice {start_idx} a {current_idx}")
         
-        # Cerca tutti i pattern usando l'implementazione reale
-        pattern_methods = [
-            ('RBD', improved_analyzer._find_rbd_pattern),  # Supply
-            ('DBD', improved_analyzer._find_dbd_pattern),  # Supply  
-            ('DBR', improved_analyzer._find_dbr_pattern),  # Demand
-            ('RBR', improved_analyzer._find_rbr_pattern)   # Demand
-        ]
-        
-        # Scansiona tutto il range di dati
+        # Scansiona tutto il range di dati: RBD/DBD (Supply), DBR/RBR (Demand)
         for i in range(start_idx + 6, len(df)):
-            for pattern_name, method in pattern_methods:
+            for pattern_name in PATTERN_LEGS:
                 try:
-                    pattern = method(df, i)
+                    pattern = improved_analyzer._find_pattern(df, i, pattern_name, features)
                     if pattern:
-                        print(f"    🔍 PATTERN {pattern['pattern']} ({pattern['type']}) trovato @ index {i}")
+                        if verbose:
+                            logger.debug(f"    🔍 PATTERN {pattern['pattern']} ({pattern['type']}) trovato @ index {i}")
                         
                         # Converti nel formato compatibile
                         zone = {
@@ -450,17 +506,20 @@ class SkorupinkiZoneManager:
                         
                         # Applica validazioni esistenti
                         if not self._is_zone_valid(df, zone, zone['index'], current_price):
-                            print(f"    ❌ Zona {zone['pattern']} invalidata (zona non valida)")
+                            if verbose:
+                                logger.debug(f"    ❌ Zona {zone['pattern']} invalidata (zona non valida)")
                             continue
                         
-                        pullback_info = self._has_pullback(df, zone, zone['index'])
+                        pullback_info = self._has_pullback(df, zone, zone['index'], features)
                         if not pullback_info['has_pullback']:
-                            print(f"    ❌ Zona {zone['pattern']} invalidata (pullback insufficiente)")
+                            if verbose:
+                                logger.debug(f"    ❌ Zona {zone['pattern']} invalidata (pullback insufficiente)")
                             continue
                         
-                        test_count = self._count_zone_tests(df, zone, zone['index'])
+                        test_count = self._count_zone_tests(df, zone, zone['index'], features)
                         if test_count < self.min_zone_strength:
-                            print(f"    ❌ Zona {zone['pattern']} invalidata (forza insufficiente)")
+                            if verbose:
+                                logger.debug(f"    ❌ Zona {zone['pattern']} invalidata (forza insufficiente)")
                             continue
                         
                         # Calcola metriche finali
@@ -493,19 +552,21 @@ class SkorupinkiZoneManager:
                             'leg_in_idx': zone.get('leg_in_idx'),
                             'leg_out_idx': zone.get('leg_out_idx'),
                             'base_candle_count': zone.get('base_candle_count', 1),
-                            'formation_type': 'improved_skorupinski'
+                            'formation_type': 'improved_skorupinski',
+                            'timeframe': timeframe
                         }
                         
-                        print(f"    ✅ {zone['pattern']} ({zone['type']}): "
-                            f"{zone['date']} | "
-                            f"{zone['zone_bottom']:.4f}-{zone['zone_top']:.4f} | "
-                            f"Base: {zone.get('base_candle_count', 1)} candele | "
-                            f"Score: {final_zone['strength_score']:.2f}")
+                        if verbose:
+                            logger.debug(f"    ✅ {zone['pattern']} ({zone['type']}): "
+                                f"{zone['date']} | "
+                                f"{zone['zone_bottom']:.4f}-{zone['zone_top']:.4f} | "
+                                f"Base: {zone.get('base_candle_count', 1)} candele | "
+                                f"Score: {final_zone['strength_score']:.2f}")
                         
                         zones.append(final_zone)
                         
                 except Exception as e:
-                    print(f"    ⚠️ Errore nella ricerca pattern {pattern_name}: {str(e)}")
+                    logger.warning(f"    ⚠️ Errore nella ricerca pattern {pattern_name} @ index {i}: {str(e)}")
         
         
         # APPLICARE FILTRI IN SEQUENZA:
@@ -527,6 +588,7 @@ class SkorupinkiZoneManager:
         ))
         
         print(f"    📊 Trovate {len(final_zones)} zone Skorupinski per {ticker}")
+        metrics.increment('zones_found', len(final_zones))
         return final_zones
         
 
@@ -549,8 +611,12 @@ class SkorupinkiZoneManager:
             return False  # Supply sotto il prezzo = NON VALIDA
         
         return True
-    
-    
+
+    def _is_zone_valid_corrected(self, zone, current_price):
+        """Validità di una zona già calcolata rispetto al prezzo attuale (non serve il DataFrame)"""
+        return self._is_zone_valid(None, zone, zone.get('index'), current_price)
+
+
     def _remove_overlapping_zones(self, zones, min_margin_pct=1.0):
         """Rimuove zone che si sovrappongono mantenendo la più forte"""
         zones_sorted = sorted(zones, key=lambda x: x.get('strength_score', 0), reverse=True)
@@ -559,7 +625,7 @@ class SkorupinkiZoneManager:
         for zone in zones_sorted:
             overlaps = False
             for existing_zone in valid_zones:
-                if self._zones_overlap(zone, existing_zone, min_margin_pct):
+                if self._zones_too_close(zone, existing_zone, min_margin_pct):
                     overlaps = True
                     break
             
@@ -568,7 +634,7 @@ class SkorupinkiZoneManager:
         
         return valid_zones
 
-    def _zones_overlap(self, zone1, zone2, min_margin_pct):
+    def _zones_too_close(self, zone1, zone2, min_margin_pct):
         """Verifica se due zone si sovrappongono o sono troppo vicine"""
         # Calcola margine minimo richiesto
         avg_price = (zone1['zone_center'] + zone2['zone_center']) / 2
@@ -597,59 +663,46 @@ class SkorupinkiZoneManager:
         return unique_zones    
     
 
-    def _has_pullback(self, df: pd.DataFrame, zone: Dict, zone_index: int) -> Dict:
-        """Verifica se c'è stato un pullback dalla zona."""
+    def _has_pullback(self, df: pd.DataFrame, zone: Dict, zone_index: int,
+                      features: Dict[str, np.ndarray] = None) -> Dict:
+        """Verifica se c'è stato un pullback dalla zona (nelle 19 candele successive)."""
         try:
             zone_center = zone['zone_center']
-            zone_type = zone['type']
-            
-            # Cerca pullback nelle candele successive
-            pullback_strength = 0.0
-            pullback_direction = 'none'
-            
-            for i in range(zone_index + 1, min(zone_index + 20, len(df))):
-                current_close = df.iloc[i]['Close']
-                
-                if zone_type == 'Demand':
-                    # Per zone demand, cerco movimento verso l'alto
-                    move_pct = (current_close - zone_center) / zone_center * 100
-                    if move_pct > pullback_strength:
-                        pullback_strength = move_pct
-                        pullback_direction = 'up'
-                else:  # Supply
-                    # Per zone supply, cerco movimento verso il basso  
-                    move_pct = (zone_center - current_close) / zone_center * 100
-                    if move_pct > pullback_strength:
-                        pullback_strength = move_pct
-                        pullback_direction = 'down'
-            
+            closes = features['close'] if features is not None else df['Close'].to_numpy()
+            following = closes[zone_index + 1:min(zone_index + 20, len(df))]
+            
+            if zone['type'] == 'Demand':
+                # Per zone demand, cerco movimento verso l'alto
+                moves = (following - zone_center) / zone_center * 100
+                direction = 'up'
+            else:  # Supply
+                # Per zone supply, cerco movimento verso il basso
+                moves = (zone_center - following) / zone_center * 100
+                direction = 'down'
+            
+            moves = moves[moves > 0]
+            pullback_strength = moves.max() if len(moves) else 0.0
             has_pullback = pullback_strength >= self.min_pullback_pct
             
             return {
                 'has_pullback': has_pullback,
                 'pullback_strength': pullback_strength,
-                'pullback_direction': pullback_direction
+                'pullback_direction': direction if len(moves) else 'none'
             }
         except:
             return {'has_pullback': False, 'pullback_strength': 0.0, 'pullback_direction': 'none'}
 
-    def _count_zone_tests(self, df: pd.DataFrame, zone: Dict, zone_index: int) -> int:
+    def _count_zone_tests(self, df: pd.DataFrame, zone: Dict, zone_index: int,
+                          features: Dict[str, np.ndarray] = None) -> int:
         """Conta quante volte il prezzo ha testato la zona."""
         try:
-            zone_bottom = zone['zone_bottom']
-            zone_top = zone['zone_top']
-            tests = 0
-            
-            # Conta i test nelle candele successive alla formazione
-            for i in range(zone_index + 1, len(df)):
-                candle_low = df.iloc[i]['Low']
-                candle_high = df.iloc[i]['High']
-                
-                # Verifica se il prezzo ha toccato la zona
-                if (candle_low <= zone_top and candle_high >= zone_bottom):
-                    tests += 1
+            lows = features['low'] if features is not None else df['Low'].to_numpy()
+            highs = features['high'] if features is not None else df['High'].to_numpy()
             
-            return max(1, tests)  # Almeno 1 test (la formazione stessa)
+            # Candele successive alla formazione che hanno toccato la zona
+            touched = (lows[zone_index + 1:] <= zone['zone_top']) & (highs[zone_index + 1:] >= zone['zone_bottom'])
+            
+            return max(1, int(touched.sum()))  # Almeno 1 test (la formazione stessa)
         except:
             return 1
 
@@ -794,6 +847,54 @@ class SkorupinkiZoneManager:
 
 
         
+    def _save_zones(self, ticker: str, new_zones_data: List[Dict], timeframe: str = None) -> int:
+        """
+        Unisce le nuove zone a quelle già salvate per il timeframe e scrive il CSV.
+        
+        Returns:
+            int: zone totali salvate (0 se non c'erano nuove zone da aggiungere)
+        """
+        timeframe = timeframe or self.timeframe
+        
+        # Carica zone esistenti PRIMA di unire quelle nuove
+        existing_zones = self._load_existing_zones(ticker, timeframe)
+        
+        if not new_zones_data:
+            print(f"    ⚠️ {ticker}: nessuna nuova zona trovata ({timeframe})")
+            return 0
+        
+        # Filtra nuove zone per evitare overlap con esistenti
+        if not existing_zones.empty:
+            print(f"    🔄 Filtro {len(new_zones_data)} nuove zone contro {len(existing_zones)} esistenti...")
+            new_zones_data = self._filter_new_zones_against_existing(new_zones_data, existing_zones)
+        
+        # Prepara nuove zone per il salvataggio
+        enhanced_new_zones = [self._prepare_zone_for_save(zone, 'auto') for zone in new_zones_data]
+        
+        # Combina zone esistenti e nuove
+        if not existing_zones.empty:
+            existing_zones_list = existing_zones.to_dict('records')
+            all_zones = existing_zones_list + enhanced_new_zones
+            print(f"    🔗 Combinate {len(existing_zones)} zone esistenti + {len(enhanced_new_zones)} nuove = {len(all_zones)} totali")
+        else:
+            all_zones = enhanced_new_zones
+            print(f"    ✨ Prime {len(enhanced_new_zones)} zone per {ticker}")
+        
+        # Crea DataFrame e salva
+        df_zones = pd.DataFrame(all_zones)
+        
+        # Assicura che tutte le colonne siano presenti
+        df_zones = self._ensure_all_columns_in_dataframe(df_zones, timeframe)
+        
+        # Ordina per forza decrescente
+        df_zones = df_zones.sort_values('strength_score', ascending=False)
+        
+        output_file = self._output_file(ticker, timeframe)
+        atomic_write_csv(output_file, df_zones, date_format='%Y-%m-%d')
+        
+        print(f"    ✅ {ticker}: {len(all_zones)} zone totali salvate ({timeframe})")
+        return len(all_zones)
+    
     def process_ticker(self, ticker: str) -> bool:
             """🔧 FIX: Elabora un ticker con parametri personalizzati."""
             try:
@@ -812,66 +913,87 @@ class SkorupinkiZoneManager:
                     print(f"    ⚠️ {ticker}: nessun dato nel periodo richiesto")
                     return False
                 
-                # Controlla se serve ricalcolare
-                if not self._needs_recalculation(ticker, df_filtered):
+                # Controlla se serve ricalcolare (il timestamp di stato riguarda solo il giornaliero)
+                if self.timeframe == DAILY and not self._needs_recalculation(ticker, df_filtered):
                     return True
                 
-                # Carica zone esistenti PRIMA di calcolare quelle nuove
-                existing_zones = self._load_existing_zones(ticker)
-                
-                # Trova nuove zone con parametri personalizzati
+                # Trova nuove zone con parametri personalizzati e uniscile a quelle esistenti
                 new_zones_data = self._find_skorupinski_zones(df_filtered, ticker, ticker_params)
+                self._save_zones(ticker, new_zones_data)
                 
-                if new_zones_data:
-                    # Filtra nuove zone per evitare overlap con esistenti
-                    if not existing_zones.empty:
-                        print(f"    🔄 Filtro {len(new_zones_data)} nuove zone contro {len(existing_zones)} esistenti...")
-                        new_zones_data = self._filter_new_zones_against_existing(new_zones_data, existing_zones)
-                    
-                    # Prepara nuove zone per il salvataggio
-                    enhanced_new_zones = [self._prepare_zone_for_save(zone, 'auto') for zone in new_zones_data]
-                    
-                    # Combina zone esistenti e nuove
-                    if not existing_zones.empty:
-                        existing_zones_list = existing_zones.to_dict('records')
-                        all_zones = existing_zones_list + enhanced_new_zones
-                        print(f"    🔗 Combinate {len(existing_zones)} zone esistenti + {len(enhanced_new_zones)} nuove = {len(all_zones)} totali")
-                    else:
-                        all_zones = enhanced_new_zones
-                        print(f"    ✨ Prime {len(enhanced_new_zones)} zone per {ticker}")
-                    
-                    # Crea DataFrame e salva
-                    df_zones = pd.DataFrame(all_zones)
-                    
-                    # Assicura che tutte le colonne siano presenti
-                    df_zones = self._ensure_all_columns_in_dataframe(df_zones)
-                    
-                    # Ordina per forza decrescente
-                    df_zones = df_zones.sort_values('strength_score', ascending=False)
-                    
-                    output_file = self.output_folder / f"{ticker}_SkorupinkiZones.csv"
-                    df_zones.to_csv(output_file, index=False, date_format='%Y-%m-%d')
-                    
-                    # Aggiorna timestamp nel file JSON
-                    latest_date = df_filtered['Date'].max()
-                    if hasattr(latest_date, 'to_pydatetime'):
-                        latest_date = latest_date.to_pydatetime()
-                    self._update_ticker_timestamp(ticker, latest_date)
-                    
-                    print(f"    ✅ {ticker}: {len(all_zones)} zone totali salvate")
-                    return True
-                else:
-                    print(f"    ⚠️ {ticker}: nessuna nuova zona trovata")
-                    # Anche se non ci sono nuove zone, aggiorna il timestamp
-                    latest_date = df_filtered['Date'].max()
-                    if hasattr(latest_date, 'to_pydatetime'):
-                        latest_date = latest_date.to_pydatetime()
-                    self._update_ticker_timestamp(ticker, latest_date)
-                    return True
+                # Aggiorna timestamp nel file JSON, anche se non ci sono nuove zone
+                self._mark_processed(ticker, df_filtered)
+                return True
                     
             except Exception as e:
                 print(f"    ❌ Errore per {ticker}: {str(e)}")
                 return False
+    
+    def _tag_nested_zones(self, zones_by_timeframe: Dict[str, List[Dict]]):
+        """
+        Segna in nested_in il timeframe superiore più vicino che ha una zona
+        dello stesso tipo contenente il centro della zona (es. una zona daily
+        dentro una zona weekly).
+        """
+        ordered = [tf for tf in TIMEFRAMES if tf in zones_by_timeframe]
+        for position, timeframe in enumerate(ordered):
+            higher = ordered[position + 1:]
+            for zone in zones_by_timeframe[timeframe]:
+                zone['nested_in'] = next((
+                    higher_tf for higher_tf in higher
+                    if any(other['type'] == zone['type'] and
+                           other['zone_bottom'] <= zone['zone_center'] <= other['zone_top']
+                           for other in zones_by_timeframe[higher_tf])
+                ), '')
+    
+    def process_ticker_timeframes(self, ticker: str, timeframes=TIMEFRAMES) -> bool:
+        """
+        Elabora un ticker su più timeframe in un solo passaggio.
+        
+        Per ogni timeframe la serie viene caricata e le caratteristiche delle
+        candele calcolate una sola volta; le zone trovate sono etichettate con
+        il timeframe, incrociate tra timeframe (nested_in) e salvate nei file
+        del rispettivo timeframe. Se il giornaliero è tra i timeframe e non ha
+        barre nuove il ticker viene saltato (i rollup non possono averne).
+        """
+        try:
+            print(f"  🎯 Elaborazione multi-timeframe {ticker} ({', '.join(timeframes)})...")
+            ticker_params = self._get_ticker_parameters(ticker)
+            analyzer = self._pattern_analyzer()
+            
+            series = {}
+            for timeframe in timeframes:
+                df_filtered = self._filter_data_by_timeframe(self._load_price_data(ticker, timeframe), ticker)
+                if df_filtered.empty:
+                    print(f"    ⚠️ {ticker}: nessun dato {timeframe} nel periodo richiesto")
+                    continue
+                series[timeframe] = df_filtered
+            
+            if not series:
+                return False
+            
+            all_saved = all(self._output_file(ticker, timeframe).exists() for timeframe in series)
+            if DAILY in series and all_saved and not self._needs_recalculation(ticker, series[DAILY]):
+                return True
+            
+            zones_by_timeframe = {
+                timeframe: self._find_skorupinski_zones(df, ticker, ticker_params,
+                                                        features=analyzer.compute_features(df),
+                                                        timeframe=timeframe)
+                for timeframe, df in series.items()
+            }
+            self._tag_nested_zones(zones_by_timeframe)
+            
+            for timeframe, zones in zones_by_timeframe.items():
+                self._save_zones(ticker, zones, timeframe)
+            
+            if DAILY in series:
+                self._mark_processed(ticker, series[DAILY], DAILY)
+            return True
+            
+        except Exception as e:
+            print(f"    ❌ Errore per {ticker}: {str(e)}")
+            return False
         
     def run(self) -> Dict[str, bool]:
             """Esegue il calcolo con parametri personalizzati per ticker."""
@@ -887,4 +1009,14 @@ class SkorupinkiZoneManager:
             
             print(f"🔧✅ END CALCOLO ZONE SKORUPINSKI: {successful}/{total} ticker elaborati")
             
-            return results
\ No newline at end of file
+            return results
+    
+    def run_multi_timeframe(self, timeframes=TIMEFRAMES) -> Dict[str, bool]:
+        """Calcolo zone su più timeframe (daily, weekly, monthly) in un solo job."""
+        timeframes = [validate_timeframe(timeframe) for timeframe in timeframes]
+        print(f"🔧▶️ START CALCOLO ZONE SKORUPINSKI MULTI-TIMEFRAME ({', '.join(timeframes)})")
+        
+        results = {ticker: self.process_ticker_timeframes(ticker, timeframes) for ticker in self.tickers.keys()}
+        
+        print(f"🔧✅ END CALCOLO ZONE SKORUPINSKI MULTI-TIMEFRAME: {sum(results.values())}/{len(results)} ticker elaborati")
+        return results
@@ -5,6 +5,11 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 
+from moduls.MarketData.Rollups import DAILY, read_timeframe_csv, timeframe_suffix, validate_timeframe
+from moduls.Core.AtomicFiles import atomic_write_csv, atomic_write_json
+from moduls.Core.FileLocks import file_lock
+from moduls.Core.PerfMetrics import metrics, timed
+
 class SupportResistanceManager:
     """
     Classe dedicata al calcolo di supporti e resistenze per dati storici di prezzo.
@@ -17,7 +22,10 @@ class SupportResistanceManager:
                  output_folder: Path,
                  min_distance_factor: float = 0.5,
                  touch_tolerance_factor: float = 0.1,
-                 max_years_lookback: int = 5):
+                 max_years_lookback: int = 5,
+                 compact_prices: bool = False,
+                 timeframe: str = DAILY,
+                 price_file_suffix: str = ''):
         """
         Parameters:
             input_file (Path): file JSON con stato {ticker: last_timestamp}
@@ -26,6 +34,9 @@ class SupportResistanceManager:
             min_distance_factor (float): fattore per distanza minima tra livelli (default: 0.5 * avg_range)
             touch_tolerance_factor (float): fattore per tolleranza nel conteggio tocchi (default: 0.1 * avg_range)
             max_years_lookback (int): massimo numero di anni di storico da analizzare (default: 5)
+            compact_prices (bool): carica i prezzi in float32 (vedi CompactPriceFormat)
+            timeframe (str): barre analizzate: 'daily', 'weekly' o 'monthly' (vedi Rollups)
+            price_file_suffix (str): suffisso dei CSV dei prezzi ('_notAdjusted' per AAPL_notAdjusted.csv)
         """
         self.input_file = input_file
         self.input_folder_prices = input_folder_prices
@@ -33,6 +44,9 @@ class SupportResistanceManager:
         self.min_distance_factor = min_distance_factor
         self.touch_tolerance_factor = touch_tolerance_factor
         self.max_years_lookback = max_years_lookback
+        self.compact_prices = compact_prices
+        self.timeframe = validate_timeframe(timeframe)
+        self.price_file_suffix = price_file_suffix
         
         # Carica stato tickers
         self.tickers = self._load_tickers()
@@ -71,16 +85,19 @@ class SupportResistanceManager:
         with open(self.input_file, 'r', encoding='utf-8') as f:
             return json.load(f)
     
+    def _output_file(self, ticker: str) -> Path:
+        """CSV dei livelli: {ticker}_SR.csv per il giornaliero, {ticker}_SR_weekly.csv per le settimane."""
+        return self.output_folder / f"{ticker}_SR{timeframe_suffix(self.timeframe)}.csv"
+    
     def _load_price_data(self, ticker: str) -> pd.DataFrame:
         """Carica i dati storici di prezzo per un ticker."""
-        file_path = self.input_folder_prices / f"{ticker}.csv"
+        file_path = self.input_folder_prices / f"{ticker}{self.price_file_suffix}.csv"
         
         if not file_path.exists():
             raise FileNotFoundError(f"Dati prezzi non trovati per {ticker}: {file_path}")
         
-        df = pd.read_csv(file_path, parse_dates=['Date'])
-        df.sort_values('Date', inplace=True)
-        df.reset_index(drop=True, inplace=True)
+        # In modalità compatta i prezzi restano float32; le date servono come datetime per l'analisi
+        df = read_timeframe_csv(file_path, self.timeframe, compact=self.compact_prices, day_numbers=False)
         
         # Normalizza nomi colonne
         df.columns = df.columns.str.capitalize()
@@ -176,22 +193,32 @@ class SupportResistanceManager:
             latest_date: ultima data processata
         """
         try:
-            # Ricarica il file JSON corrente
-            with open(self.input_file, 'r', encoding='utf-8') as f:
-                current_state = json.load(f)
-            
-            # Aggiorna il timestamp
-            current_state[ticker] = latest_date.isoformat()
-            
-            # Salva il file aggiornato
-            with open(self.input_file, 'w', encoding='utf-8') as f:
-                json.dump(current_state, f, indent=2, ensure_ascii=False)
+            # Read-modify-write sotto lock: analisi parallele non si sovrascrivono i timestamp
+            with file_lock(self.input_file):
+                # Ricarica il file JSON corrente
+                with open(self.input_file, 'r', encoding='utf-8') as f:
+                    current_state = json.load(f)
+                
+                # Aggiorna il timestamp
+                current_state[ticker] = latest_date.isoformat()
+                
+                # Salva il file aggiornato
+                atomic_write_json(self.input_file, current_state, ensure_ascii=False)
             
             print(f"    📝 {ticker}: timestamp aggiornato a {latest_date.strftime('%Y-%m-%d')}")
             
         except Exception as e:
             print(f"    ⚠️ Errore nell'aggiornamento timestamp per {ticker}: {str(e)}")
     
+    def invalidate_ticker(self, ticker: str):
+        """
+        Azzera il timestamp di un ticker: i livelli verranno ricalcolati alla
+        prossima analisi anche senza nuove date (es. storico riscalato dopo uno split).
+        """
+        reset = datetime(1900, 1, 1)
+        self._update_ticker_timestamp(ticker, reset)
+        self.tickers[ticker] = reset.isoformat()
+    
     def _is_support_pattern(self, df: pd.DataFrame, i: int) -> bool:
         """
         Identifica un pattern di supporto (V-shape nei minimi).
@@ -286,6 +313,7 @@ class SupportResistanceManager:
         
         return round(strength, 2)
     
+    @timed('sr_scan')
     def _find_support_resistance_levels(self, df: pd.DataFrame, ticker: str) -> List[Dict]:
         """
         Trova tutti i livelli di supporto e resistenza in un DataFrame.
@@ -354,6 +382,7 @@ class SupportResistanceManager:
         # Ordina per forza decrescente
         levels_data.sort(key=lambda x: x['strength'], reverse=True)
         print(f"    📊 Trovati {len(levels_data)} livelli S/R per {ticker}")
+        metrics.increment('sr_levels_found', len(levels_data))
         return levels_data
     
     def process_ticker(self, ticker: str) -> bool:
@@ -376,8 +405,8 @@ class SupportResistanceManager:
                 print(f"    ⚠️ {ticker}: nessun dato nel periodo richiesto")
                 return False
             
-            # Controlla se serve ricalcolare
-            if not self._needs_recalculation(ticker, df_filtered):
+            # Controlla se serve ricalcolare (il timestamp di stato riguarda solo il giornaliero)
+            if self.timeframe == DAILY and not self._needs_recalculation(ticker, df_filtered):
                 return True  # Considera come successo se non serve ricalcolare
             
             # Trova livelli S/R
@@ -386,14 +415,15 @@ class SupportResistanceManager:
             if levels_data:
                 # Crea DataFrame e salva
                 df_levels = pd.DataFrame(levels_data)
-                output_file = self.output_folder / f"{ticker}_SR.csv"
-                df_levels.to_csv(output_file, index=False, date_format='%Y-%m-%d')
+                output_file = self._output_file(ticker)
+                atomic_write_csv(output_file, df_levels, date_format='%Y-%m-%d')
                 
                 # Aggiorna timestamp nel file JSON
-                latest_date = df_filtered['Date'].max()
-                if hasattr(latest_date, 'to_pydatetime'):
-                    latest_date = latest_date.to_pydatetime()
-                self._update_ticker_timestamp(ticker, latest_date)
+                if self.timeframe == DAILY:
+                    latest_date = df_filtered['Date'].max()
+                    if hasattr(latest_date, 'to_pydatetime'):
+                        latest_date = latest_date.to_pydatetime()
+                    self._update_ticker_timestamp(ticker, latest_date)
                 
                 print(f"    ✅ {ticker}: {len(levels_data)} livelli S/R salvati")
                 return True
@@ -434,7 +464,7 @@ class SupportResistanceManager:
         Returns:
             pd.DataFrame: DataFrame con i livelli, None se file non esiste
         """
-        file_path = self.output_folder / f"{ticker}_SR.csv"
+        file_path = self._output_file(ticker)
         
         if not file_path.exists():
             return None
@@ -2,30 +2,66 @@
 """
 Manager principale per l'analisi tecnica integrato nella dashboard.
 Combina supporti/resistenze classici e zone Skorupinski con prezzi centrali.
+
+Ogni fonte dati (prezzi adjusted o notAdjusted) ha un proprio manager con
+prezzi, file di stato, risultati e lock propri: le chiamate ricevono
+use_adjusted e vengono eseguite dal manager di quella fonte (vedi
+for_source), così le due varianti si calcolano in parallelo e hanno cache
+indipendenti senza modificare lo stato condiviso tra le richieste.
 """
 
+import functools
 import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 
 # Import dei moduli esistenti (da copiare nella root del progetto)
 from moduls.TechnicalAnalysis.SupportResistanceManager import SupportResistanceManager
 from moduls.TechnicalAnalysis.SkorupinkiZoneManager import SkorupinkiZoneManager
 from moduls.TechnicalAnalysis.ImprovedSkorupinkiPatterns import ImprovedSkorupinkiPatterns
+from moduls.MarketData.CompactPriceFormat import (
+    format_dates, columnar_price_data, round_prices, COLUMNAR_DECIMALS
+)
+from moduls.MarketData import Rollups
+from moduls.MarketData.Rollups import bars_for_days, read_timeframe_csv, timeframe_suffix, validate_timeframe
+from moduls.TechnicalAnalysis.PlotlyChartBuilder import (
+    ChartFigureBuilder, MAX_CHART_LEVELS, MAX_CHART_ZONES, VISIBLE_RANGE_MARGIN, ZONE_STYLES,
+    normalize_zones, select_levels, select_zones, visible_price_range
+)
+from moduls.TechnicalAnalysis.ChartDownsampling import DAILY, downsample_price_frame, slice_date_range
+from moduls.Core.EventBus import EventBus
+from moduls.Core.DataVersions import DataVersions
+from moduls.Core.PerfMetrics import timed
 
-import plotly.graph_objects as go
-import plotly.utils
-from plotly.subplots import make_subplots
 import json
 import logging
+import threading
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Fonti dati dell'analisi
+ADJUSTED = 'adjusted'
+NOT_ADJUSTED = 'notAdjusted'
+DATA_SOURCES = (ADJUSTED, NOT_ADJUSTED)
+
+
+def data_source_name(use_adjusted: bool) -> str:
+    return ADJUSTED if use_adjusted else NOT_ADJUSTED
+
+
+def _per_source(method):
+    """Con use_adjusted la chiamata è eseguita dal manager di quella fonte dati (None = questo manager)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, use_adjusted: Optional[bool] = None, **kwargs):
+        return method(self.for_source(use_adjusted), *args, **kwargs)
+    return wrapper
+
 
 class TechnicalAnalysisManager:
     """
@@ -33,22 +69,43 @@ class TechnicalAnalysisManager:
     Combina supporti/resistenze classici e zone Skorupinski.
     """
     
-    def __init__(self, base_dir='resources'):
+    def __init__(self, base_dir='resources', compact_prices=False, versions=None,
+                 use_adjusted=True, events=None):
         """
         Inizializza il manager dell'analisi tecnica.
         
         Args:
             base_dir: directory base del progetto
+            compact_prices: se True i prezzi sono caricati in formato compatto
+                (float32, date int32, vedi CompactPriceFormat)
+            versions: DataVersions condiviso con TickerDataManager per le risposte condizionali
+            use_adjusted: fonte dati del manager (True adjusted, False notAdjusted)
+            events: EventBus condiviso con il manager dell'altra fonte dati
         """
         self.base_dir = Path(base_dir)
+        self.compact_prices = compact_prices
+        self.use_adjusted = bool(use_adjusted)
+        self.data_source = data_source_name(self.use_adjusted)
+        
+        # Notifica 'analysis_completed' {analysis, data_source, results} a fine elaborazione
+        self.events = events if events is not None else EventBus()
+        
+        # Versione dell'analisi, incrementata a ogni run
+        self.versions = versions or DataVersions()
         
         # Directory setup
         self.data_dir = self.base_dir / 'data' / 'daily'
         self.data_dir_not_adj = self.base_dir / 'data' / 'daily_notAdjusted'
         self.config_file = self.base_dir / 'config' / 'tickers.json'
         
-        # Output directories per analisi tecnica
+        # Prezzi della fonte dati (AAPL.csv adjusted, AAPL_notAdjusted.csv originali)
+        self.prices_dir = self.data_dir if self.use_adjusted else self.data_dir_not_adj
+        self.price_file_suffix = '' if self.use_adjusted else '_notAdjusted'
+        
+        # Output directories per analisi tecnica (analysis/notAdjusted/... per i prezzi originali)
         self.analysis_dir = self.base_dir / 'analysis'
+        if not self.use_adjusted:
+            self.analysis_dir = self.analysis_dir / NOT_ADJUSTED
         self.sr_output_dir = self.analysis_dir / 'support_resistance'
         self.skorupinski_output_dir = self.analysis_dir / 'skorupinski_zones'
         
@@ -59,8 +116,74 @@ class TechnicalAnalysisManager:
         # Crea directory se non esistono
         self._ensure_directories()
         
-        # Inizializza i manager specifici
-        self._initialize_managers()
+        # Manager specifici costruiti al primo utilizzo (vedi sr_manager): validazione
+        # dei file di stato e caricamento dei ticker non pesano sull'avvio dell'app
+        self._sr_manager = None
+        self._skorupinski_manager = None
+        self._managers_lock = threading.RLock()
+        self._initializing = False
+        # Il timeframe di una run vale solo per quella run (vedi _run_on_timeframe)
+        self._run_lock = threading.RLock()
+        
+        # Manager per fonte dati, condiviso con il manager dell'altra fonte (vedi for_source)
+        self._sources = {self.use_adjusted: self}
+        self._sources_lock = threading.Lock()
+    
+    def for_source(self, use_adjusted: Optional[bool] = None) -> 'TechnicalAnalysisManager':
+        """
+        Manager della fonte dati indicata (None = questo), costruito al primo
+        utilizzo. Condivide versioni ed eventi con questo manager.
+        """
+        if use_adjusted is None or bool(use_adjusted) == self.use_adjusted:
+            return self
+        manager = self._sources.get(bool(use_adjusted))
+        if manager is None:
+            with self._sources_lock:
+                manager = self._sources.get(bool(use_adjusted))
+                if manager is None:
+                    manager = TechnicalAnalysisManager(self.base_dir, self.compact_prices, self.versions,
+                                                       use_adjusted=bool(use_adjusted), events=self.events)
+                    manager._sources = self._sources
+                    manager._sources_lock = self._sources_lock
+                    self._sources[manager.use_adjusted] = manager
+        return manager
+    
+    @property
+    def sr_manager(self) -> Optional[SupportResistanceManager]:
+        """SupportResistanceManager, inizializzato al primo accesso (None senza ticker configurati)."""
+        if self._sr_manager is None:
+            self._ensure_managers()
+        return self._sr_manager
+    
+    @sr_manager.setter
+    def sr_manager(self, manager):
+        self._sr_manager = manager
+    
+    @property
+    def skorupinski_manager(self) -> Optional[SkorupinkiZoneManager]:
+        """SkorupinkiZoneManager, inizializzato al primo accesso (None senza ticker configurati)."""
+        if self._skorupinski_manager is None:
+            self._ensure_managers()
+        return self._skorupinski_manager
+    
+    @skorupinski_manager.setter
+    def skorupinski_manager(self, manager):
+        self._skorupinski_manager = manager
+    
+    def _ensure_managers(self):
+        """
+        Inizializza i manager se mancano. Senza ticker configurati restano None
+        e l'inizializzazione viene ritentata al prossimo accesso.
+        """
+        with self._managers_lock:
+            # _initialize_managers legge sr_manager: nessuna ricorsione durante l'inizializzazione
+            if self._initializing or (self._sr_manager is not None and self._skorupinski_manager is not None):
+                return
+            self._initializing = True
+            try:
+                self._initialize_managers()
+            finally:
+                self._initializing = False
     
     def _ensure_directories(self):
         """Crea tutte le directory necessarie."""
@@ -126,15 +249,19 @@ class TechnicalAnalysisManager:
             # Supporti e Resistenze Manager
             self.sr_manager = SupportResistanceManager(
                 input_file=self.sr_state_file,  # ✅ CORRETTO: input_file non state_file
-                input_folder_prices=self.data_dir,
-                output_folder=self.sr_output_dir
+                input_folder_prices=self.prices_dir,
+                output_folder=self.sr_output_dir,
+                compact_prices=self.compact_prices,
+                price_file_suffix=self.price_file_suffix
             )
             
             # Skorupinski Zone Manager  
             self.skorupinski_manager = SkorupinkiZoneManager(
                 input_file=self.skorupinski_state_file,  # ✅ CORRETTO: input_file non state_file
-                input_folder_prices=self.data_dir,
-                output_folder=self.skorupinski_output_dir
+                input_folder_prices=self.prices_dir,
+                output_folder=self.skorupinski_output_dir,
+                compact_prices=self.compact_prices,
+                price_file_suffix=self.price_file_suffix
             )
             
             # Verifica che i manager abbiano caricato i ticker correttamente
@@ -174,75 +301,151 @@ class TechnicalAnalysisManager:
         with open(self.config_file, 'r') as f:
             return json.load(f)
     
-    def set_data_source(self, use_adjusted: bool = True):
+    def _run_on_timeframe(self, manager, run, timeframe: Optional[str] = None) -> Dict[str, bool]:
         """
-        Cambia la fonte dati per l'analisi.
-        
-        Args:
-            use_adjusted: True per dati adjusted, False per notAdjusted
+        Esegue run() con il timeframe valido solo per questa chiamata, poi
+        ripristina quello del manager. Le run della stessa fonte dati sono
+        serializzate; le due fonti hanno manager e lock distinti.
         """
-        if use_adjusted:
-            input_folder = self.data_dir
-            print("📊 Impostata fonte dati: ADJUSTED (per splits e dividendi)")
-        else:
-            input_folder = self.data_dir_not_adj
-            print("📊 Impostata fonte dati: NOT ADJUSTED (prezzi originali)")
-        
-        # Aggiorna i manager
-        if self.sr_manager:
-            self.sr_manager.input_folder_prices = input_folder
-        if self.skorupinski_manager:
-            self.skorupinski_manager.input_folder_prices = input_folder
+        with self._run_lock:
+            previous = manager.timeframe
+            if timeframe is not None:
+                manager.timeframe = validate_timeframe(timeframe)
+            try:
+                return run()
+            finally:
+                manager.timeframe = previous
+    
+    def _analysis_completed(self, payload: Dict):
+        self.versions.bump_analysis(self.use_adjusted)
+        self.events.emit('analysis_completed', {**payload, 'data_source': self.data_source})
     
-    def run_support_resistance_analysis(self) -> Dict[str, bool]:
-        """Esegue l'analisi di supporti e resistenze classici."""
-        print("\n🔧 ===== ANALISI SUPPORTI E RESISTENZE CLASSICI =====")
-        if self.sr_manager:
-            return self.sr_manager.run()
+    @_per_source
+    def run_support_resistance_analysis(self, timeframe: str = Rollups.DAILY) -> Dict[str, bool]:
+        """Esegue l'analisi di supporti e resistenze classici sulle barre del timeframe."""
+        print(f"\n🔧 ===== ANALISI SUPPORTI E RESISTENZE CLASSICI ({self.data_source}) =====")
+        manager = self.sr_manager
+        if manager:
+            results = self._run_on_timeframe(manager, manager.run, timeframe)
+            self._analysis_completed({'analysis': 'support_resistance', 'timeframe': timeframe, 'results': results})
+            return results
         else:
             logger.error("SupportResistanceManager non inizializzato")
             return {}
     
-    def run_skorupinski_analysis(self) -> Dict[str, bool]:
-        """Esegue l'analisi delle zone Skorupinski."""
-        print("\n🎯 ===== ANALISI ZONE SKORUPINSKI =====")
-        if self.skorupinski_manager:
-            return self.skorupinski_manager.run()
+    @_per_source
+    def run_skorupinski_analysis(self, timeframe: str = Rollups.DAILY) -> Dict[str, bool]:
+        """Esegue l'analisi delle zone Skorupinski sulle barre del timeframe."""
+        print(f"\n🎯 ===== ANALISI ZONE SKORUPINSKI ({self.data_source}) =====")
+        manager = self.skorupinski_manager
+        if manager:
+            results = self._run_on_timeframe(manager, manager.run, timeframe)
+            self._analysis_completed({'analysis': 'skorupinski_zones', 'timeframe': timeframe, 'results': results})
+            return results
         else:
             logger.error("SkorupinkiZoneManager non inizializzato")
             return {}
     
-    def run_full_analysis(self, use_adjusted: bool = True) -> Dict[str, Dict[str, bool]]:
+    @_per_source
+    def run_skorupinski_multi_timeframe(self, timeframes=Rollups.TIMEFRAMES) -> Dict[str, bool]:
+        """
+        Zone Skorupinski su più timeframe in un solo job (vedi
+        SkorupinkiZoneManager.run_multi_timeframe): le zone di ogni timeframe
+        finiscono nel rispettivo file, etichettate con timeframe e nested_in.
+        """
+        print(f"\n🎯 ===== ANALISI ZONE SKORUPINSKI MULTI-TIMEFRAME ({self.data_source}) =====")
+        manager = self.skorupinski_manager
+        if manager:
+            results = self._run_on_timeframe(manager, lambda: manager.run_multi_timeframe(timeframes))
+            self._analysis_completed({'analysis': 'skorupinski_zones', 'timeframes': list(timeframes),
+                                      'results': results})
+            return results
+        else:
+            logger.error("SkorupinkiZoneManager non inizializzato")
+            return {}
+    
+    @_per_source
+    def run_analysis(self, analysis_type: str = 'both', timeframe: str = Rollups.DAILY,
+                     timeframes=None) -> Dict[str, Dict[str, bool]]:
+        """
+        Analisi richieste da /api/technical-analysis/run.
+        
+        Args:
+            analysis_type: 'sr', 'skorupinski' o 'both'
+            timeframe: barre analizzate ('daily', 'weekly', 'monthly')
+            timeframes: se indicato, zone Skorupinski su tutti questi timeframe in un job
+        """
+        results = {}
+        if analysis_type in ['sr', 'both']:
+            results['support_resistance'] = self.run_support_resistance_analysis(timeframe)
+        if analysis_type in ['skorupinski', 'both']:
+            if timeframes:
+                results['skorupinski_zones'] = self.run_skorupinski_multi_timeframe(timeframes)
+            else:
+                results['skorupinski_zones'] = self.run_skorupinski_analysis(timeframe)
+        return results
+    
+    def run_analysis_all_sources(self, analysis_type: str = 'both', timeframe: str = Rollups.DAILY,
+                                 timeframes=None) -> Dict[str, Dict[str, Dict[str, bool]]]:
+        """Stesse analisi di run_analysis su adjusted e notAdjusted in parallelo: {fonte: risultati}."""
+        with ThreadPoolExecutor(max_workers=len(DATA_SOURCES), thread_name_prefix='analysis') as pool:
+            futures = {data_source_name(use_adjusted): pool.submit(self.run_analysis, analysis_type, timeframe,
+                                                                   timeframes, use_adjusted=use_adjusted)
+                       for use_adjusted in (True, False)}
+            return {name: future.result() for name, future in futures.items()}
+    
+    def invalidate_ticker(self, ticker: str):
+        """
+        Forza il ricalcolo di livelli S/R e zone di un ticker alla prossima analisi,
+        su entrambe le fonti dati. Usato quando lo storico viene riscalato: un
+        dividendo cambia l'adjusted, uno split anche i prezzi originali.
+        """
+        for use_adjusted in (True, False):
+            self.for_source(use_adjusted)._invalidate_own(ticker)
+    
+    def _invalidate_own(self, ticker: str):
+        """Invalida il ticker nello stato della sola fonte dati di questo manager."""
+        for manager in (self.sr_manager, self.skorupinski_manager):
+            if manager:
+                manager.invalidate_ticker(ticker)
+        self.versions.bump_analysis(self.use_adjusted)
+        self.events.emit('analysis_invalidated', {'ticker': ticker, 'data_source': self.data_source})
+    
+    def run_full_analysis(self, use_adjusted: bool = True,
+                          timeframe: str = Rollups.DAILY) -> Dict[str, Dict[str, bool]]:
         """
         Esegue l'analisi tecnica completa.
         
         Args:
             use_adjusted: tipo di dati da utilizzare
+            timeframe: barre analizzate ('daily', 'weekly', 'monthly'); i risultati
+                dei timeframe non giornalieri vanno in file con suffisso (_SR_weekly.csv)
             
         Returns:
             Dict con risultati di entrambe le analisi
         """
         print(f"\n🚀 ===== ANALISI TECNICA COMPLETA =====")
         
-        # Imposta fonte dati
-        self.set_data_source(use_adjusted)
-        
-        # Esegui entrambe le analisi
-        sr_results = self.run_support_resistance_analysis()
-        skorupinski_results = self.run_skorupinski_analysis()
+        # Esegui entrambe le analisi sulla fonte dati richiesta
+        source = self.for_source(use_adjusted)
+        sr_results = source.run_support_resistance_analysis(timeframe)
+        skorupinski_results = source.run_skorupinski_analysis(timeframe)
         
         return {
             'support_resistance': sr_results,
             'skorupinski_zones': skorupinski_results
         }
     
-    def get_ticker_analysis_data(self, ticker: str, analysis_type: str = 'both') -> Dict:
+    @_per_source
+    def get_ticker_analysis_data(self, ticker: str, analysis_type: str = 'both',
+                                 timeframe: str = Rollups.DAILY) -> Dict:
         """
         Ottiene i dati di analisi per un ticker specifico.
         
         Args:
             ticker: simbolo del ticker
             analysis_type: 'sr', 'skorupinski', o 'both'
+            timeframe: timeframe dell'analisi ('daily', 'weekly', 'monthly')
             
         Returns:
             Dict con i dati di analisi
@@ -250,9 +453,11 @@ class TechnicalAnalysisManager:
         result = {'ticker': ticker}
         
         try:
+            suffix = timeframe_suffix(timeframe)
+            
             # Supporti e resistenze
             if analysis_type in ['sr', 'both']:
-                sr_file = self.sr_output_dir / f"{ticker}_SR.csv"
+                sr_file = self.sr_output_dir / f"{ticker}_SR{suffix}.csv"
                 if sr_file.exists():
                     sr_data = pd.read_csv(sr_file)
                     result['support_resistance'] = sr_data.to_dict('records')
@@ -261,7 +466,7 @@ class TechnicalAnalysisManager:
             
             # Zone Skorupinski
             if analysis_type in ['skorupinski', 'both']:
-                sz_file = self.skorupinski_output_dir / f"{ticker}_SkorupinkiZones.csv"
+                sz_file = self.skorupinski_output_dir / f"{ticker}_SkorupinkiZones{suffix}.csv"
                 if sz_file.exists():
                     sz_data = pd.read_csv(sz_file)
                     result['skorupinski_zones'] = sz_data.to_dict('records')
@@ -274,22 +479,26 @@ class TechnicalAnalysisManager:
             logger.error(f"Errore nel recuperare dati analisi per {ticker}: {e}")
             return result
     
-    def load_ticker_price_data(self, ticker: str, days: int = 100) -> Optional[pd.DataFrame]:
+    @_per_source
+    def load_ticker_price_data(self, ticker: str, days: int = 100,
+                               timeframe: str = Rollups.DAILY) -> Optional[pd.DataFrame]:
         """
         Carica i dati di prezzo per un ticker.
         
         Args:
             ticker: simbolo del ticker
             days: numero di giorni di storico
+            timeframe: barre giornaliere, settimanali o mensili (vedi Rollups);
+                per weekly/monthly sono lette le barre che coprono i giorni richiesti
             
         Returns:
             DataFrame con i dati di prezzo o None se non trovato
         """
         try:
-            # Prova prima con dati adjusted
-            file_path = self.data_dir / f"{ticker}.csv"
+            # Prezzi della fonte dati del manager
+            file_path = self.prices_dir / f"{ticker}{self.price_file_suffix}.csv"
             
-            if not file_path.exists():
+            if not file_path.exists() and self.use_adjusted:
                 # Fallback a dati non adjusted
                 file_path = self.data_dir_not_adj / f"{ticker}_notAdjusted.csv"
             
@@ -297,18 +506,12 @@ class TechnicalAnalysisManager:
                 logger.warning(f"File dati non trovato per {ticker}")
                 return None
             
-            # Carica i dati
-            df = pd.read_csv(file_path)
-            
-            # Converti la colonna Date
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-            # Ordina per data (più recenti alla fine)
-            df = df.sort_values('Date')
-            
-            # Prendi gli ultimi N giorni
-            if days > 0:
-                df = df.tail(days)
+            # Carica solo gli ultimi N giorni, ordinati per data (più recenti alla fine):
+            # i segmenti più vecchi non vengono letti. In modalità compatta Date è in
+            # giorni dal 1970-01-01 (int32)
+            bars = bars_for_days(days, timeframe)
+            df = read_timeframe_csv(file_path, timeframe, compact=self.compact_prices,
+                                    tail=bars if bars > 0 else None)
             
             logger.info(f"Caricati {len(df)} record per {ticker} (ultimi {days} giorni)")
             return df
@@ -317,7 +520,12 @@ class TechnicalAnalysisManager:
             logger.error(f"Errore nel caricare dati per {ticker}: {e}")
             return None
     
-    def get_ticker_chart_data(self, ticker: str, days: int = 100, include_analysis: bool = True) -> Dict:
+    @_per_source
+    @timed('chart_build')
+    def get_ticker_chart_data(self, ticker: str, days: int = 100, include_analysis: bool = True,
+                              columnar: bool = False, decimals: Optional[int] = COLUMNAR_DECIMALS,
+                              max_points: Optional[int] = None, mode: str = 'ohlc',
+                              timeframe: str = Rollups.DAILY) -> Dict:
         """
         Ottiene tutti i dati necessari per il grafico di un ticker.
         
@@ -325,23 +533,40 @@ class TechnicalAnalysisManager:
             ticker: simbolo del ticker
             days: giorni di storico
             include_analysis: se includere i dati di analisi tecnica
+            columnar: se True price_data è un dict di array paralleli con date
+                in giorni dal 1970-01-01 (vedi columnar_price_data)
+            decimals: decimali dei prezzi nel formato colonnare (None = pieni)
+            max_points: se indicato, storico ridotto a max_points barre (vedi ChartDownsampling)
+            mode: riduzione 'ohlc' (barre settimanali/mensili) o 'line' (LTTB)
+            timeframe: barre 'daily', 'weekly' o 'monthly' con l'analisi dello stesso timeframe
             
         Returns:
             Dict con price_data, support_resistance, skorupinski_zones
         """
         try:
-            result = {'ticker': ticker, 'days': days}
+            result = {'ticker': ticker, 'days': days, 'timeframe': timeframe}
             
             # Carica dati di prezzo
-            price_df = self.load_ticker_price_data(ticker, days)
+            price_df = self.load_ticker_price_data(ticker, days, timeframe)
             if price_df is None:
                 return result
             
+            result['total_points'] = len(price_df)
+            price_df, result['resolution'] = downsample_price_frame(price_df, max_points, mode, timeframe)
+            
+            if columnar:
+                result['format'] = 'columnar'
+                result['price_data'] = columnar_price_data(price_df, decimals)
+                if include_analysis:
+                    result.update(self.get_ticker_analysis_data(ticker, 'both', timeframe))
+                return result
+            
             # Converti a formato JSON serializzabile
             price_data = []
-            for _, row in price_df.iterrows():
+            dates = format_dates(price_df['Date'])
+            for date_str, (_, row) in zip(dates, price_df.iterrows()):
                 price_record = {
-                    'date': row['Date'].strftime('%Y-%m-%d'),
+                    'date': date_str,
                     'open': float(row['Open']),
                     'high': float(row['High']),
                     'low': float(row['Low']),
@@ -362,7 +587,7 @@ class TechnicalAnalysisManager:
             
             # Includi analisi tecnica se richiesta
             if include_analysis:
-                analysis_data = self.get_ticker_analysis_data(ticker, 'both')
+                analysis_data = self.get_ticker_analysis_data(ticker, 'both', timeframe)
                 result.update(analysis_data)
             
             return result
@@ -371,359 +596,103 @@ class TechnicalAnalysisManager:
             logger.error(f"Errore nel preparare dati grafico per {ticker}: {e}")
             return {'ticker': ticker, 'days': days, 'error': str(e)}
     
-    def generate_plotly_chart(self, ticker, days=100, include_analysis=True):
+    @_per_source
+    @timed('chart_build')
+    def generate_plotly_chart(self, ticker, days=100, include_analysis=True, columnar=False,
+                              max_points=None, mode='ohlc', timeframe=Rollups.DAILY):
         """
         Genera un grafico Plotly con candlestick e analisi tecnica con zone Skorupinski migliorate
+        
+        Con columnar=True le serie di prezzo non sono incluse nella figura ma
+        inviate come array paralleli in 'columns' (il browser le reinserisce,
+        vedi expandColumnarChart in technical-analysis.js) e il template Plotly
+        non viene serializzato.
+        
+        La figura è assemblata come dict (vedi PlotlyChartBuilder): livelli e
+        zone fuori dall'intervallo di prezzo visibile non vengono disegnati.
+        
+        Con max_points le finestre lunghe sono ridotte prima di costruire la
+        figura: barre settimanali/mensili (mode='ohlc') o linea del close
+        ridotta con LTTB (mode='line'). Con timeframe='weekly'/'monthly' le
+        candele sono le barre dei rollup e l'analisi quella dello stesso timeframe.
         """
         try:
             logger.info(f"Generazione grafico Plotly per {ticker}, {days} giorni")
             
-            # Ottieni dati usando il metodo esistente
-            data = self.get_ticker_chart_data(ticker, days, include_analysis)
+            # Prezzi come array paralleli a precisione piena
+            data = self.get_ticker_chart_data(ticker, days, include_analysis, columnar=True, decimals=None,
+                                              max_points=max_points, mode=mode, timeframe=timeframe)
+            prices = data.get('price_data') if data else None
             
-            if not data or 'price_data' not in data or not data['price_data']:
+            if not prices or not prices['date']:
                 raise ValueError(f"Nessun dato disponibile per {ticker}")
             
-            logger.info(f"Dati caricati per {ticker}: {len(data['price_data'])} punti prezzo")
+            logger.info(f"Dati caricati per {ticker}: {len(prices['date'])} punti prezzo")
             
-            # Crea subplot con volume opzionale
-            has_volume = 'volume' in data['price_data'][0] if data['price_data'] else False
+            has_volume = 'volume' in prices
+            dates = format_dates(np.asarray(prices['date']))
+            opens = prices['open']
+            closes = prices['close']
             
-            if has_volume:
-                fig = make_subplots(
-                    rows=2, cols=1,
-                    shared_xaxes=True,
-                    vertical_spacing=0.1,
-                    subplot_titles=(f'{ticker} - Analisi Tecnica', 'Volume'),
-                    row_heights=[0.7, 0.3]
-                )
+            # Figura assemblata come dict: nessuna validazione Plotly per ogni shape
+            builder = ChartFigureBuilder(f'{ticker} - Analisi Tecnica Completa', f'{ticker} - Analisi Tecnica', has_volume)
+            resolution = data.get('resolution', DAILY)
+            if mode == 'line':
+                builder.add_close_line(ticker, dates, closes)
             else:
-                fig = make_subplots(
-                    rows=1, cols=1,
-                    subplot_titles=(f'{ticker} - Analisi Tecnica',)
-                )
-            
-            # Prepara dati per candlestick
-            dates = [item['date'] for item in data['price_data']]
-            opens = [item['open'] for item in data['price_data']]
-            highs = [item['high'] for item in data['price_data']]
-            lows = [item['low'] for item in data['price_data']]
-            closes = [item['close'] for item in data['price_data']]
-            volumes = [item.get('volume', 0) for item in data['price_data']]
-            
-            # Candlestick chart
-            candlestick = go.Candlestick(
-                x=dates,
-                open=opens,
-                high=highs,
-                low=lows,
-                close=closes,
-                name=ticker,
-                increasing_line_color='#00C851',
-                decreasing_line_color='#FF4444'
-            )
-            fig.add_trace(candlestick, row=1, col=1)
-            
-            # Volume chart se disponibile
+                builder.add_candlestick(ticker, dates, opens, prices['high'], prices['low'], closes)
             if has_volume:
-                volume_colors = ['#00C851' if close >= open else '#FF4444' 
-                               for close, open in zip(closes, opens)]
-                
-                volume_chart = go.Bar(
-                    x=dates,
-                    y=volumes,
-                    name='Volume',
-                    marker_color=volume_colors,
-                    opacity=0.7
-                )
-                fig.add_trace(volume_chart, row=2, col=1)
+                builder.add_volume(dates, prices['volume'], opens, closes)
             
-            # Contatori per zone
-            demand_count = 0
-            supply_count = 0
+            # Solo livelli e zone nell'intervallo di prezzo visibile (con un tetto)
+            price_range = visible_price_range(prices['low'], prices['high'])
+            current_price = float(closes[-1])
             
             # ===== SUPPORTI E RESISTENZE =====
-            if include_analysis and data.get('support_resistance'):
-                logger.info("Aggiungendo supporti e resistenze")
-                for level in data['support_resistance']:
-                    level_value = level.get('level')
-                    if level_value is None:
-                        continue
-                        
-                    color = '#28a745' if level.get('type') == 'Support' else '#dc3545'
-                    
-                    if has_volume:
-                        fig.add_hline(
-                            y=level_value,
-                            line_dash="dash",
-                            line_color=color,
-                            line_width=2,
-                            annotation_text=f"{level.get('type', '').title()} ${level_value:.2f}",
-                            annotation_position="top right",
-                            row=1, col=1
-                        )
-                    else:
-                        fig.add_hline(
-                            y=level_value,
-                            line_dash="dash", 
-                            line_color=color,
-                            line_width=2,
-                            annotation_text=f"{level.get('type', '').title()} ${level_value:.2f}",
-                            annotation_position="top right"
-                        )
+            levels = data.get('support_resistance') if include_analysis else None
+            plotted_levels = select_levels(levels or [], price_range, current_price)
+            for level in plotted_levels:
+                level_value = level['level']
+                color = '#28a745' if level.get('type') == 'Support' else '#dc3545'
+                builder.add_level(level_value, color, f"{level.get('type', '').title()} ${level_value:.2f}")
             
             # ===== ZONE SKORUPINSKI CON PREZZI CENTRALI =====
             zone_legend_data = []  # Per la leggenda interattiva
+            demand_zones, supply_zones = normalize_zones(data.get('skorupinski_zones') if include_analysis else None)
+            demand_count, supply_count = len(demand_zones), len(supply_zones)
+            plotted_zones = 0
             
-            if include_analysis and data.get('skorupinski_zones'):
-                skorupinski_data = data['skorupinski_zones']
-                
-                logger.info("Aggiungendo zone Skorupinski con prezzi centrali")
-                
-                # Gestisci diversi formati di dati Skorupinski
-                if isinstance(skorupinski_data, list):
-                    # Formato: lista di zone direttamente dal CSV
-                    logger.info(f"Processando {len(skorupinski_data)} zone Skorupinski (formato lista)")
-                    
-                    demand_zones = []
-                    supply_zones = []
-                    
-                    for zone in skorupinski_data:
-                        if isinstance(zone, dict):
-                            zone_type = zone.get('type', '').lower()
-                            if 'demand' in zone_type or 'support' in zone_type:
-                                demand_zones.append(zone)
-                            elif 'supply' in zone_type or 'resistance' in zone_type:
-                                supply_zones.append(zone)
-                    
-                    # Aggiorna contatori
-                    demand_count = len(demand_zones)
-                    supply_count = len(supply_zones)
-                    
-                    # Aggiungi zone di domanda con prezzi centrali
-                    for i, zone in enumerate(demand_zones):
-                        zone_bottom = zone.get('zone_bottom') or zone.get('bottom') or zone.get('low')
-                        zone_top = zone.get('zone_top') or zone.get('top') or zone.get('high')
-                        zone_center = zone.get('zone_center')
-                        
-                        # Calcola il centro se non disponibile
-                        if zone_center is None and zone_bottom is not None and zone_top is not None:
-                            zone_center = (zone_bottom + zone_top) / 2
-                        
-                        if zone_bottom is not None and zone_top is not None and zone_center is not None:
-                            # Crea etichetta con prezzo centrale
-                            zone_label = f"Demand ${zone_center:.2f}"
-                            zone_id = f"demand_{i}"
-                            
-                            # Aggiungi dati per la leggenda
-                            zone_legend_data.append({
-                                'id': zone_id,
-                                'type': 'Demand',
-                                'center': zone_center,
-                                'label': zone_label,
-                                'visible': zone.get('visibility', True),
-                                'color': 'rgba(40, 167, 69, 0.8)',
-                                'strength': zone.get('strength_score', 0),
-                                'distance': zone.get('distance_from_current', 0)
-                            })
-                            
-                            if has_volume:
-                                fig.add_hrect(
-                                    y0=zone_bottom,
-                                    y1=zone_top,
-                                    fillcolor="rgba(40, 167, 69, 0.2)",
-                                    line_color="rgba(40, 167, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    row=1, col=1,
-                                    name=f"demand_zone_{i}"
-                                )
-                            else:
-                                fig.add_hrect(
-                                    y0=zone_bottom,
-                                    y1=zone_top,
-                                    fillcolor="rgba(40, 167, 69, 0.2)",
-                                    line_color="rgba(40, 167, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    name=f"demand_zone_{i}"
-                                )
-                    
-                    # Aggiungi zone di offerta con prezzi centrali
-                    for i, zone in enumerate(supply_zones):
-                        zone_bottom = zone.get('zone_bottom') or zone.get('bottom') or zone.get('low')
-                        zone_top = zone.get('zone_top') or zone.get('top') or zone.get('high')
-                        zone_center = zone.get('zone_center')
-                        
-                        # Calcola il centro se non disponibile
-                        if zone_center is None and zone_bottom is not None and zone_top is not None:
-                            zone_center = (zone_bottom + zone_top) / 2
-                        
-                        if zone_bottom is not None and zone_top is not None and zone_center is not None:
-                            # Crea etichetta con prezzo centrale
-                            zone_label = f"Supply ${zone_center:.2f}"
-                            zone_id = f"supply_{i}"
-                            
-                            # Aggiungi dati per la leggenda
-                            zone_legend_data.append({
-                                'id': zone_id,
-                                'type': 'Supply',
-                                'center': zone_center,
-                                'label': zone_label,
-                                'visible': zone.get('visibility', True),
-                                'color': 'rgba(220, 53, 69, 0.8)',
-                                'strength': zone.get('strength_score', 0),
-                                'distance': zone.get('distance_from_current', 0)
-                            })
-                            
-                            if has_volume:
-                                fig.add_hrect(
-                                    y0=zone_bottom,
-                                    y1=zone_top,
-                                    fillcolor="rgba(220, 53, 69, 0.2)",
-                                    line_color="rgba(220, 53, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    row=1, col=1,
-                                    name=f"supply_zone_{i}"
-                                )
-                            else:
-                                fig.add_hrect(
-                                    y0=zone_bottom,
-                                    y1=zone_top,
-                                    fillcolor="rgba(220, 53, 69, 0.2)",
-                                    line_color="rgba(220, 53, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    name=f"supply_zone_{i}"
-                                )
-                    
-                    logger.info(f"Zone aggiunte: {len(demand_zones)} demand, {len(supply_zones)} supply")
-                    
-                elif isinstance(skorupinski_data, dict):
-                    # Formato: dizionario con demand_zones e supply_zones
-                    logger.info("Processando zone Skorupinski (formato dizionario)")
+            for zone_type, zones in (('Demand', demand_zones), ('Supply', supply_zones)):
+                for item in select_zones(zones, price_range, current_price):
+                    zone = item['zone']
+                    zone_label = f"{zone_type} ${item['center']:.2f}"
+                    zone_id = f"{zone_type.lower()}_{item['index']}"
                     
-                    # Zone di domanda
-                    if skorupinski_data.get('demand_zones'):
-                        demand_count = len(skorupinski_data['demand_zones'])
-                        for i, zone in enumerate(skorupinski_data['demand_zones']):
-                            zone_center = zone.get('zone_center')
-                            if zone_center is None:
-                                zone_center = (zone['zone_bottom'] + zone['zone_top']) / 2
-                            
-                            zone_label = f"Demand ${zone_center:.2f}"
-                            zone_id = f"demand_{i}"
-                            
-                            zone_legend_data.append({
-                                'id': zone_id,
-                                'type': 'Demand',
-                                'center': zone_center,
-                                'label': zone_label,
-                                'visible': zone.get('visibility', True),
-                                'color': 'rgba(40, 167, 69, 0.8)',
-                                'strength': zone.get('strength_score', 0),
-                                'distance': zone.get('distance_from_current', 0)
-                            })
-                            
-                            if has_volume:
-                                fig.add_hrect(
-                                    y0=zone['zone_bottom'],
-                                    y1=zone['zone_top'],
-                                    fillcolor="rgba(40, 167, 69, 0.2)",
-                                    line_color="rgba(40, 167, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    row=1, col=1,
-                                    name=f"demand_zone_{i}"
-                                )
-                            else:
-                                fig.add_hrect(
-                                    y0=zone['zone_bottom'],
-                                    y1=zone['zone_top'],
-                                    fillcolor="rgba(40, 167, 69, 0.2)",
-                                    line_color="rgba(40, 167, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    name=f"demand_zone_{i}"
-                                )
-                    
-                    # Zone di offerta
-                    if skorupinski_data.get('supply_zones'):
-                        supply_count = len(skorupinski_data['supply_zones'])
-                        for i, zone in enumerate(skorupinski_data['supply_zones']):
-                            zone_center = zone.get('zone_center')
-                            if zone_center is None:
-                                zone_center = (zone['zone_bottom'] + zone['zone_top']) / 2
-                            
-                            zone_label = f"Supply ${zone_center:.2f}"
-                            zone_id = f"supply_{i}"
-                            
-                            zone_legend_data.append({
-                                'id': zone_id,
-                                'type': 'Supply',
-                                'center': zone_center,
-                                'label': zone_label,
-                                'visible': zone.get('visibility', True),
-                                'color': 'rgba(220, 53, 69, 0.8)',
-                                'strength': zone.get('strength_score', 0),
-                                'distance': zone.get('distance_from_current', 0)
-                            })
-                            
-                            if has_volume:
-                                fig.add_hrect(
-                                    y0=zone['zone_bottom'],
-                                    y1=zone['zone_top'],
-                                    fillcolor="rgba(220, 53, 69, 0.2)",
-                                    line_color="rgba(220, 53, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    row=1, col=1,
-                                    name=f"supply_zone_{i}"
-                                )
-                            else:
-                                fig.add_hrect(
-                                    y0=zone['zone_bottom'],
-                                    y1=zone['zone_top'],
-                                    fillcolor="rgba(220, 53, 69, 0.2)",
-                                    line_color="rgba(220, 53, 69, 0.8)",
-                                    line_width=1,
-                                    annotation_text=zone_label,
-                                    annotation_position="top left",
-                                    name=f"supply_zone_{i}"
-                                )
-            
-            # Configura layout
-            fig.update_layout(
-                title=f'{ticker} - Analisi Tecnica Completa',
-                xaxis_title='Data',
-                yaxis_title='Prezzo ($)',
-                template='plotly_white',
-                showlegend=True,
-                legend=dict(
-                    orientation="v",
-                    yanchor="top",
-                    y=0.99,
-                    xanchor="left",
-                    x=1.01
-                ),
-                hovermode='x unified'
-            )
+                    zone_legend_data.append({
+                        'id': zone_id,
+                        'type': zone_type,
+                        'center': item['center'],
+                        'label': zone_label,
+                        'visible': zone.get('visibility', True),
+                        'color': ZONE_STYLES[zone_type]['line'],
+                        'strength': zone.get('strength_score', 0),
+                        'distance': zone.get('distance_from_current', 0)
+                    })
+                    builder.add_zone(item['bottom'], item['top'], zone_type, zone_label,
+                                     f"{zone_type.lower()}_zone_{item['index']}")
+                    plotted_zones += 1
             
-            # Rimuovi il range selector per chart più pulito
-            fig.update_xaxes(rangeslider_visible=False)
+            if include_analysis:
+                logger.info(f"Livelli disegnati: {len(plotted_levels)}/{len(levels or [])}, "
+                            f"zone disegnate: {plotted_zones}/{demand_count + supply_count}")
             
-            # Converti in JSON
-            chart_json = fig.to_json()
+            # Converti in JSON (una sola serializzazione)
+            if columnar:
+                chart_json, columns = self._columnar_figure(builder.figure(template=None), prices, has_volume)
+            else:
+                chart_json, columns = ChartFigureBuilder.to_json(builder.figure()), None
             
-            return {
+            chart = {
                 'chart_json': chart_json,
                 'chart_config': {
                     'displayModeBar': True,
@@ -734,24 +703,190 @@ class TechnicalAnalysisManager:
                 'data_info': {
                     'ticker': ticker,
                     'days': days,
-                    'data_points': len(data['price_data']),
+                    'data_points': len(dates),
+                    'total_points': data.get('total_points', len(dates)),
+                    'resolution': resolution,
+                    'timeframe': timeframe,
                     'first_date': dates[0] if dates else None,
                     'last_date': dates[-1] if dates else None,
                     'sr_levels': len(data.get('support_resistance', [])),
                     'demand_zones': demand_count,
                     'supply_zones': supply_count,
+                    'plotted_levels': len(plotted_levels),
+                    'plotted_zones': plotted_zones,
                     'has_volume': has_volume
                 },
                 # NUOVO: Aggiungi dati delle zone per la leggenda interattiva
                 'zone_legend': zone_legend_data
             }
             
+            if columnar:
+                chart['format'] = 'columnar'
+                chart['columns'] = columns
+            
+            return chart
+            
         except Exception as e:
             logger.error(f"Errore generazione grafico Plotly per {ticker}: {e}")
             import traceback
             logger.error(f"Traceback completo: {traceback.format_exc()}")
             raise
     
+    @staticmethod
+    def _columnar_figure(figure: Dict, prices: Dict, has_volume: bool, decimals: int = COLUMNAR_DECIMALS) -> Tuple[str, Dict]:
+        """
+        Figura Plotly (dict, senza template) senza serie di prezzo + colonne di prezzo arrotondate.
+        
+        Returns:
+            (chart_json compatto, colonne date/open/high/low/close[/volume])
+        """
+        for trace in figure['data']:
+            if trace.get('type') == 'candlestick':
+                for key in ('x', 'open', 'high', 'low', 'close'):
+                    trace.pop(key, None)
+            elif trace.get('type') == 'scatter':
+                trace.pop('x', None)
+                trace.pop('y', None)
+            elif trace.get('type') == 'bar' and trace.get('name') == 'Volume':
+                trace.pop('x', None)
+                trace.pop('y', None)
+                trace.get('marker', {}).pop('color', None)
+        
+        # Il template plotly_white pesa ~8 KB: lo stile viene applicato lato client
+        figure['layout'].pop('template', None)
+        
+        columns = {'date': prices['date']}
+        for key in ('open', 'high', 'low', 'close'):
+            columns[key] = round_prices(np.asarray(prices[key], dtype=np.float64), decimals)
+        if has_volume:
+            columns['volume'] = prices['volume']
+        columns['decimals'] = decimals
+        
+        return ChartFigureBuilder.to_json(figure), columns
+
+    @_per_source
+    @timed('chart_build')
+    def get_chart_primitives(self, ticker: str, days: int = 100, include_analysis: bool = True,
+                             max_points: Optional[int] = None, mode: str = 'ohlc',
+                             timeframe: str = Rollups.DAILY) -> Dict:
+        """
+        Dati grezzi per il grafico disegnato lato client (buildChartFromPrimitives
+        in technical-analysis.js): colonne OHLCV compatte più livelli e zone come
+        primitive, senza figura Plotly.
+
+        Livelli e zone sono limitati all'intervallo di prezzo visibile dei giorni
+        richiesti ma senza tetto: il client applica lo stesso filtro e lo stesso
+        tetto di PlotlyChartBuilder sulla finestra che disegna, così una
+        richiesta con meno giorni riusa i dati già scaricati (solo a
+        risoluzione giornaliera: con max_points le colonne possono essere ridotte).
+
+        Returns:
+            Dict con columns, resolution, levels, zones, lod e data_info
+        """
+        data = self.get_ticker_chart_data(ticker, days, include_analysis, columnar=True,
+                                          max_points=max_points, mode=mode, timeframe=timeframe)
+        prices = data.get('price_data') if data else None
+
+        if not prices or not prices['date']:
+            raise ValueError(f"Nessun dato disponibile per {ticker}")
+
+        price_range = visible_price_range(prices['low'], prices['high'])
+        current_price = float(prices['close'][-1])
+
+        levels = data.get('support_resistance') if include_analysis else None
+        level_primitives = [
+            {'type': level.get('type', ''), 'level': level['level']}
+            for level in select_levels(levels or [], price_range, current_price, max_levels=len(levels or []))
+        ]
+
+        zone_primitives = []
+        demand_zones, supply_zones = normalize_zones(data.get('skorupinski_zones') if include_analysis else None)
+        for zone_type, zones in (('Demand', demand_zones), ('Supply', supply_zones)):
+            for item in select_zones(zones, price_range, current_price, max_zones=len(zones)):
+                zone = item['zone']
+                zone_primitives.append({
+                    'id': f"{zone_type.lower()}_{item['index']}",
+                    'type': zone_type,
+                    'bottom': item['bottom'],
+                    'top': item['top'],
+                    'center': item['center'],
+                    'visible': zone.get('visibility', True),
+                    'strength': zone.get('strength_score', 0),
+                    'distance': zone.get('distance_from_current', 0)
+                })
+
+        return {
+            'ticker': ticker,
+            'days': days,
+            'format': 'primitives',
+            'timeframe': timeframe,
+            'columns': prices,
+            'resolution': data.get('resolution', DAILY),
+            'levels': level_primitives,
+            'zones': zone_primitives,
+            # Parametri del filtro lato client (stessi valori del grafico generato dal server)
+            'lod': {
+                'margin': VISIBLE_RANGE_MARGIN,
+                'max_zones': MAX_CHART_ZONES,
+                'max_levels': MAX_CHART_LEVELS
+            },
+            'zone_styles': ZONE_STYLES,
+            'data_info': {
+                'ticker': ticker,
+                'days': days,
+                'data_points': len(prices['date']),
+                'total_points': data.get('total_points', len(prices['date'])),
+                'sr_levels': len(data.get('support_resistance', [])),
+                'demand_zones': len(demand_zones),
+                'supply_zones': len(supply_zones),
+                'has_volume': 'volume' in prices
+            }
+        }
+
+    @_per_source
+    @timed('chart_build')
+    def get_chart_range(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None,
+                        max_points: Optional[int] = None, mode: str = 'ohlc',
+                        timeframe: str = Rollups.DAILY) -> Dict:
+        """
+        Prezzi di un intervallo di date per lo zoom del grafico: piena
+        risoluzione, ridotti solo se l'intervallo supera ancora max_points.
+
+        Args:
+            ticker: simbolo del ticker
+            start, end: estremi inclusi (YYYY-MM-DD), opzionali
+            max_points: punti massimi (None = nessuna riduzione)
+            mode: 'ohlc' o 'line' (vedi ChartDownsampling)
+            timeframe: barre 'daily', 'weekly' o 'monthly' (vedi Rollups)
+
+        Returns:
+            Dict con columns (formato colonnare), resolution e data_info
+        """
+        price_df = self.load_ticker_price_data(ticker, days=0, timeframe=timeframe)
+        if price_df is None:
+            raise ValueError(f"Nessun dato disponibile per {ticker}")
+
+        price_df = slice_date_range(price_df, start, end)
+        total_points = len(price_df)
+        price_df, resolution = downsample_price_frame(price_df, max_points, mode, timeframe)
+        columns = columnar_price_data(price_df)
+
+        return {
+            'ticker': ticker,
+            'start': start,
+            'end': end,
+            'timeframe': timeframe,
+            'format': 'columnar',
+            'columns': columns,
+            'resolution': resolution,
+            'data_info': {
+                'ticker': ticker,
+                'data_points': len(columns['date']),
+                'total_points': total_points
+            }
+        }
+    
+    @_per_source
     def get_analysis_summary(self) -> Dict:
         """
         Ottiene un riassunto dell'analisi tecnica per tutti i ticker.
@@ -763,6 +898,7 @@ class TechnicalAnalysisManager:
         tickers = ticker_config.get('tickers', [])
         
         summary = {
+            'data_source': self.data_source,
             'total_tickers': len(tickers),
             'support_resistance': {
                 'analyzed': 0,
@@ -802,6 +938,7 @@ class TechnicalAnalysisManager:
         
         return summary
     
+    @_per_source
     def get_all_support_resistance_levels(self) -> List[Dict]:
         """
         Ottiene tutti i livelli di supporto e resistenza.
@@ -826,6 +963,7 @@ class TechnicalAnalysisManager:
         
         return all_levels
     
+    @_per_source
     def get_all_skorupinski_zones(self) -> List[Dict]:
         """
         Ottiene tutte le zone Skorupinski.
@@ -0,0 +1,120 @@
+# ===== FILE: moduls/Web/AppConfig.py =====
+"""
+Profili di configurazione dell'app: development, production, testing.
+
+Il profilo si sceglie con la variabile APP_ENV (default: development) o
+passando il nome a create_app. Alcune chiavi si possono sovrascrivere
+dall'ambiente, così lo stesso codice gira con `python app.py` in sviluppo
+e dietro gunicorn in produzione:
+
+    DATA_DIR            directory base di dati, metadati e analisi
+    SECRET_KEY          chiave delle sessioni Flask (obbligatoria in production;
+                        gunicorn.conf.py la genera se manca)
+    SHARED_STATE_FILE   database SQLite dello stato condiviso tra worker
+    COMPACT_PRICES      '1' per i prezzi in formato compatto
+    UPDATE_WORKERS      download in parallelo dello scheduler
+    UPDATE_SCHEDULE     espressione cron degli aggiornamenti automatici
+    WEB_CONCURRENCY     worker che servono l'app (impostato da gunicorn.conf.py)
+    SSE_MAX_CLIENTS     client /api/events per worker (impostato da gunicorn.conf.py)
+    ANALYSIS_DEBUG      '1' per il dettaglio per pattern delle analisi nel log
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENV = 'development'
+
+
+class BaseConfig:
+    DEBUG = False
+    TESTING = False
+    # None: va impostata dall'ambiente, uguale per tutti i worker
+    SECRET_KEY = None
+    DATA_DIR = 'resources'
+    # None: <DATA_DIR>/state/app_state.sqlite3
+    SHARED_STATE_FILE = None
+    # ETag calcolati da contatori condivisi tra i worker invece che in memoria
+    SHARED_VERSIONS = False
+    # Eventi SSE inoltrati ai client di tutti i worker tramite lo stato condiviso
+    SHARED_EVENTS = False
+    # Processi che servono l'app: con più worker ed eventi non condivisi le
+    # pagine mantengono il ricaricamento periodico anche col canale SSE attivo
+    WEB_WORKERS = 1
+    # Connessioni /api/events per worker (None = nessun limite): ognuna occupa un thread
+    SSE_MAX_CLIENTS = None
+    COMPACT_PRICES = False
+    UPDATE_WORKERS = 4
+    UPDATE_SCHEDULE = None
+    # Log DEBUG per pattern nel ciclo di ricerca delle zone: costoso, spento in produzione
+    ANALYSIS_DEBUG = False
+
+
+class DevelopmentConfig(BaseConfig):
+    DEBUG = True
+    ANALYSIS_DEBUG = True
+    SECRET_KEY = 'your-secret-key-change-this'
+
+
+class ProductionConfig(BaseConfig):
+    SHARED_VERSIONS = True
+    SHARED_EVENTS = True
+
+
+class TestingConfig(BaseConfig):
+    TESTING = True
+    SECRET_KEY = 'testing'
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+
+def _from_env() -> Dict[str, Any]:
+    """Chiavi sovrascritte dalle variabili d'ambiente."""
+    values = {}
+    for key in ('DATA_DIR', 'SECRET_KEY', 'SHARED_STATE_FILE', 'UPDATE_SCHEDULE'):
+        if os.environ.get(key):
+            values[key] = os.environ[key]
+    for key in ('COMPACT_PRICES', 'ANALYSIS_DEBUG'):
+        if key in os.environ:
+            values[key] = os.environ[key] == '1'
+    if os.environ.get('UPDATE_WORKERS'):
+        values['UPDATE_WORKERS'] = int(os.environ['UPDATE_WORKERS'])
+    if os.environ.get('WEB_CONCURRENCY'):
+        values['WEB_WORKERS'] = int(os.environ['WEB_CONCURRENCY'])
+    if os.environ.get('SSE_MAX_CLIENTS'):
+        values['SSE_MAX_CLIENTS'] = int(os.environ['SSE_MAX_CLIENTS'])
+    return values
+
+
+def load_config(name: Optional[str] = None, **overrides) -> Dict[str, Any]:
+    """
+    Configurazione del profilo indicato, con le sovrascritture dell'ambiente
+    e infine quelle passate come argomenti.
+
+    Raises:
+        ValueError: profilo sconosciuto o SECRET_KEY mancante
+    """
+    name = name or os.environ.get('APP_ENV') or DEFAULT_ENV
+    if name not in CONFIGS:
+        raise ValueError(f"Profilo di configurazione sconosciuto: {name} (ammessi: {', '.join(CONFIGS)})")
+
+    profile = CONFIGS[name]
+    config = {key: getattr(profile, key) for key in dir(profile) if key.isupper()}
+    config.update(_from_env())
+    config.update(overrides)
+    config['APP_ENV'] = name
+    if not config['SECRET_KEY']:
+        raise ValueError(f"SECRET_KEY mancante per il profilo {name}: impostala nell'ambiente "
+                         f"(con gunicorn -c gunicorn.conf.py viene generata all'avvio)")
+    if not config['SHARED_STATE_FILE']:
+        config['SHARED_STATE_FILE'] = str(Path(config['DATA_DIR']) / 'state' / 'app_state.sqlite3')
+    return config
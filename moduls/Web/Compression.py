@@ -0,0 +1,90 @@
+# ===== FILE: moduls/Web/Compression.py =====
+"""
+Compressione delle risposte HTTP (brotli se disponibile, altrimenti gzip).
+
+Si applica solo a risposte testuali sopra una soglia minima; lo stream SSE e
+i file statici (direct passthrough) restano invariati. L'ETag della risposta
+compressa riceve il suffisso della codifica (es. "abc-gzip"), perché un ETag
+forte identifica un'unica rappresentazione.
+"""
+
+import gzip
+import json
+import logging
+from typing import Any, List
+
+from flask import Flask, Response, request
+
+from moduls.Core.PerfMetrics import metrics
+
+try:
+    import brotli
+except ImportError:  # dipendenza opzionale
+    brotli = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/csv',
+    'text/css', 'application/javascript', 'text/javascript'
+}
+
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_encodings() -> List[str]:
+    """Codifiche supportate, in ordine di preferenza."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def encoded_etags(etag: str) -> List[str]:
+    """ETag delle possibili rappresentazioni compresse di una risposta."""
+    return [f"{etag}-{encoding}" for encoding in available_encodings()]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def compact_jsonify(payload: Any) -> Response:
+    """Come jsonify ma sempre senza indentazione né spazi (anche in DEBUG)."""
+    with metrics.timer('json_serialize'):
+        body = json.dumps(payload, separators=(',', ':'), default=str)
+    metrics.increment('json_bytes', len(body))
+    return Response(body, mimetype='application/json')
+
+
+def init_compression(app: Flask, min_size: int = MIN_SIZE):
+    """Registra la compressione negoziata via Accept-Encoding su tutte le risposte."""
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.direct_passthrough or response.is_streamed):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code != 200 or 'Content-Encoding' in response.headers
+                or response.content_length is None or response.content_length < min_size):
+            return response
+
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+
+        return response
+
+    logger.info(f"Compressione risposte attiva: {', '.join(available_encodings())}")
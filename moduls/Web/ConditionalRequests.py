@@ -0,0 +1,82 @@
+# ===== FILE: moduls/Web/ConditionalRequests.py =====
+"""
+Risposte condizionali per le API in sola lettura.
+
+Il decoratore calcola ETag e Last-Modified dalle versioni dei dati PRIMA di
+eseguire la view: se il client ha già la versione corrente risponde 304
+senza leggere CSV né ricalcolare il payload.
+
+Last-Modified viene dalle sole chiavi di versione: le risposte che dipendono
+anche da valori extra (data, finestra di sessione, fonte dati preferita)
+possono cambiare senza che cambi una versione, quindi per loro vale solo
+l'ETag e If-Modified-Since viene ignorato.
+"""
+
+import functools
+import logging
+from typing import Callable, Iterable, Optional, Tuple
+
+from flask import make_response, request
+
+from moduls.Core.DataVersions import DataVersions
+from moduls.Web.Compression import encoded_etags
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# (chiavi di versione, valori extra) per la richiesta corrente
+Dependencies = Tuple[Iterable[str], Optional[Iterable]]
+
+
+def _matching_etag(etag: str, last_modified) -> Optional[str]:
+    """
+    ETag della rappresentazione già in possesso del client, None se va inviata
+    (last_modified None: If-Modified-Since non è affidabile e non viene usato).
+    """
+    # If-None-Match ha la precedenza su If-Modified-Since (RFC 9110)
+    if request.if_none_match:
+        # Il client può avere la variante compressa ("etag-gzip", "etag-br")
+        for candidate in [etag, *encoded_etags(etag)]:
+            if request.if_none_match.contains(candidate):
+                return candidate
+        return None
+    if last_modified is not None and request.if_modified_since and last_modified <= request.if_modified_since:
+        return etag
+    return None
+
+
+def conditional(versions: DataVersions, dependencies: Callable[..., Dependencies]):
+    """
+    Decoratore per route GET con ETag forte derivato da DataVersions.
+
+    Args:
+        versions: store delle versioni condiviso con i manager
+        dependencies: funzione con gli stessi argomenti della view che ritorna
+            (chiavi di versione, valori extra) da cui dipende la risposta
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            keys, extra = dependencies(*args, **kwargs)
+            # L'URL completo (query compresa) distingue le varianti della stessa route
+            etag, last_modified = versions.validators(keys, [request.full_path, *(extra or [])])
+            if extra:
+                last_modified = None
+
+            matched = _matching_etag(etag, last_modified)
+            if matched:
+                response = make_response('', 304)
+                response.set_etag(matched)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Il browser conserva la risposta ma la rivalida a ogni richiesta
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,53 @@
+# ===== FILE: moduls/Web/Instrumentation.py =====
+"""
+Strumentazione delle risposte: tempo di serializzazione JSON e metriche
+esposte da /api/debug/perf (JSON, o testo Prometheus con ?format=prometheus).
+
+jsonify passa dal JSON provider dell'app: sostituirlo con TimedJSONProvider
+misura ogni risposta JSON come fase 'json_serialize' (vedi PerfMetrics)
+senza toccare le route; compact_jsonify misura la propria.
+"""
+
+import json
+import logging
+from typing import Any
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+from moduls.Core.PerfMetrics import PerfMetrics, metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider di Flask che misura tempo e byte di ogni risposta jsonify.
+    dumps non è misurato: lo usa anche il cookie di sessione.
+    """
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        with metrics.timer('json_serialize'):
+            response = super().response(*args, **kwargs)
+        metrics.increment('json_bytes', response.content_length or 0)
+        return response
+
+
+def init_instrumentation(app: Flask):
+    """Registra il JSON provider strumentato (mantiene le impostazioni del provider corrente)."""
+    provider = TimedJSONProvider(app)
+    provider.sort_keys = app.json.sort_keys
+    provider.ensure_ascii = app.json.ensure_ascii
+    provider.compact = app.json.compact
+    app.json = provider
+
+
+def perf_response(registry: PerfMetrics, output_format: str = 'json') -> Response:
+    """Metriche del processo nel formato richiesto ('json' o 'prometheus')."""
+    if output_format == 'prometheus':
+        return Response(registry.prometheus_text(), content_type=PROMETHEUS_CONTENT_TYPE)
+    # Serializzato senza passare dal provider: leggere le metriche non le modifica
+    return Response(json.dumps(registry.snapshot()), mimetype='application/json')
@@ -0,0 +1,196 @@
+# ===== FILE: moduls/Web/ServerSentEvents.py =====
+"""
+Canale Server-Sent Events per dashboard e gestione dati.
+
+Ogni client connesso a /api/events riceve una coda propria; publish()
+inserisce l'evento in tutte le code. Gli ultimi eventi sono conservati
+per i client che si riconnettono con l'header Last-Event-ID.
+
+Con più worker l'aggiornamento che genera un evento gira in un processo
+solo, mentre i client sono collegati a tutti: con uno store condiviso
+(SharedState) publish() registra l'evento nel database e un thread per
+worker, attivo finché ci sono client, legge i nuovi eventi e li inoltra.
+L'id SSE è quello del database, quindi Last-Event-ID vale su ogni worker.
+Ogni client collegato occupa un thread del worker per tutta la connessione.
+"""
+
+import json
+import logging
+import queue
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Serializza un evento nel formato text/event-stream."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, default=str)
+    lines.extend(f"data: {line}" for line in payload.splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+
+class SseBroker:
+    """Distribuisce gli eventi pubblicati a tutti i client SSE connessi."""
+
+    def __init__(self, client_queue_size: int = 100, history_size: int = 50,
+                 heartbeat_seconds: float = 15.0, store=None, poll_seconds: float = 0.5,
+                 max_clients: Optional[int] = None):
+        """
+        Parameters:
+            client_queue_size: eventi in attesa per client prima di scartare i più vecchi
+            history_size: eventi conservati per la ripresa con Last-Event-ID
+            heartbeat_seconds: intervallo dei commenti keep-alive
+            store: eventi condivisi tra processi (SharedState: publish_event,
+                   events_since, last_event_id); None = solo questo processo
+            poll_seconds: intervallo di lettura dei nuovi eventi dallo store
+            max_clients: client collegati al massimo (None = nessun limite)
+        """
+        self.client_queue_size = client_queue_size
+        self.history_size = history_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self.max_clients = max_clients
+        self._clients = set()
+        self._history = deque(maxlen=history_size)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # Con lo store: ultimo id inoltrato e thread che legge i nuovi eventi
+        self._cursor: Optional[int] = None
+        self._poller: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+
+    @property
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    @property
+    def shared(self) -> bool:
+        """True se gli eventi arrivano ai client di tutti i processi."""
+        return self.store is not None
+
+    @property
+    def has_listeners(self) -> bool:
+        """False solo se nessun client può ricevere l'evento (con lo store i client possono essere altrove)."""
+        return self.shared or self.client_count > 0
+
+    @property
+    def is_full(self) -> bool:
+        return self.max_clients is not None and self.client_count >= self.max_clients
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        """Invia un evento a tutti i client connessi (di tutti i processi con lo store)."""
+        if self.store is not None:
+            self.store.publish_event(event, data)
+            # Le notifiche del processo stesso partono senza attendere il prossimo intervallo
+            self._wake.set()
+            return
+
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            message = format_sse(event, data, event_id)
+            self._history.append((event_id, message))
+            clients = list(self._clients)
+        self._deliver(clients, message)
+
+    @staticmethod
+    def _deliver(clients, message: str):
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # Client lento: scarta il messaggio più vecchio per non bloccare il publisher
+                try:
+                    client.get_nowait()
+                    client.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> queue.Queue:
+        """Registra un nuovo client, rigiocando gli eventi persi dopo last_event_id."""
+        client = queue.Queue(maxsize=self.client_queue_size)
+        with self._lock:
+            if self.store is not None:
+                if self._cursor is None:
+                    self._cursor = self.store.last_event_id()
+                # Fino al cursore rigioca questo metodo, oltre lo inoltra il thread di lettura
+                history = [] if last_event_id is None else [
+                    (event_id, format_sse(event, data, event_id))
+                    for event_id, event, data in self.store.events_since(last_event_id, limit=self.history_size)
+                    if event_id <= self._cursor
+                ]
+            else:
+                history = self._history
+            if last_event_id is not None:
+                for event_id, message in history:
+                    if event_id > last_event_id and not client.full():
+                        client.put_nowait(message)
+            self._clients.add(client)
+            if self.store is not None and self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name='sse-poller', daemon=True)
+                self._poller.start()
+        logger.info(f"Client SSE connesso ({self.client_count} attivi)")
+        return client
+
+    def unsubscribe(self, client: queue.Queue):
+        with self._lock:
+            self._clients.discard(client)
+        logger.info(f"Client SSE disconnesso ({self.client_count} attivi)")
+
+    def _poll(self):
+        """Inoltra ai client del processo gli eventi registrati nello store; termina senza client."""
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            with self._lock:
+                if not self._clients:
+                    # Il prossimo client riparte dall'ultimo evento, non da quelli persi nel frattempo
+                    self._poller = None
+                    self._cursor = None
+                    return
+                cursor = self._cursor
+
+            try:
+                events = self.store.events_since(cursor)
+            except Exception as e:
+                logger.error(f"Errore nella lettura degli eventi condivisi: {e}")
+                continue
+
+            with self._lock:
+                clients = list(self._clients)
+                messages = []
+                for event_id, event, data in events:
+                    if self._cursor is not None and event_id > self._cursor:
+                        messages.append(format_sse(event, data, event_id))
+                        self._cursor = event_id
+            for message in messages:
+                self._deliver(clients, message)
+
+    def stream(self, last_event_id: Optional[int] = None,
+               channel: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Generatore per la risposta Flask: eventi e heartbeat finché il client resta connesso.
+        channel, se indicato, è inviato per primo come evento 'channel' (senza id).
+        """
+        client = self.subscribe(last_event_id)
+        try:
+            # Intervallo di riconnessione suggerito al browser
+            yield "retry: 5000\n\n"
+            if channel is not None:
+                yield format_sse('channel', channel)
+            while True:
+                try:
+                    yield client.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(client)
@@ -222,14 +222,16 @@ class CSVUpload {
 
         const downloadData = document.getElementById('downloadData')?.checked || false;
         const replaceExisting = document.getElementById('replaceExisting')?.checked || false;
+        const dryRun = document.getElementById('dryRun')?.checked || false;
 
-        console.log(`📤 Inizio upload: ${file.name}, download=${downloadData}, replace=${replaceExisting}`);
+        console.log(`📤 Inizio upload: ${file.name}, download=${downloadData}, replace=${replaceExisting}, dryRun=${dryRun}`);
 
         // Prepare form data
         const formData = new FormData();
         formData.append('csvFile', file);
         formData.append('downloadData', downloadData);
         formData.append('replaceExisting', replaceExisting);
+        formData.append('dryRun', dryRun);
 
         // UI elements
         const btn = document.getElementById('confirmUploadCsv');
@@ -263,7 +265,7 @@ class CSVUpload {
                 const summary = result.summary;
                 if (summary) {
                     window.UIUtils.addLogEntry(
-                        `📊 CSV importato: ${summary.total_tickers} ticker processati, ` +
+                        `📊 ${result.dry_run ? 'Anteprima CSV' : 'CSV importato'}: ${summary.total_tickers} ticker processati, ` +
                         `${summary.added_tickers} aggiunti, ${summary.updated_tickers} aggiornati, ` +
                         `${summary.skipped_tickers} saltati, ${summary.error_count} errori`,
                         'success'
@@ -277,6 +279,16 @@ class CSVUpload {
                     this.showUploadDetails(result.details);
                 }
 
+                // Anteprima: nessuna modifica salvata, il modal resta aperto per l'import vero
+                if (result.dry_run) {
+                    if (statusDiv) statusDiv.textContent = 'Anteprima completata';
+                    return;
+                }
+
+                if (result.queued_downloads) {
+                    window.UIUtils.addLogEntry(`📥 ${result.queued_downloads} download accodati in background`, 'info');
+                }
+
                 // Close modal and refresh after delay
                 setTimeout(() => {
                     const modal = bootstrap.Modal.getInstance(document.getElementById('uploadCsvModal'));
@@ -364,8 +376,10 @@ class CSVUpload {
         // Reset checkboxes
         const downloadData = document.getElementById('downloadData');
         const replaceExisting = document.getElementById('replaceExisting');
+        const dryRun = document.getElementById('dryRun');
         if (downloadData) downloadData.checked = false;
         if (replaceExisting) replaceExisting.checked = false;
+        if (dryRun) dryRun.checked = false;
 
         // Hide preview and progress
         this.hidePreview();
@@ -311,9 +311,16 @@ function showNotification(message, type = 'info') {
 function startAutoRefresh() {
     const autoRefreshInterval = 300000; // 5 minutes
     
+    // Push updates from the server when available (only on the dashboard page)
+    if (window.LiveEvents && window.LiveEvents.supported && document.getElementById('totalTickersValue')) {
+        window.LiveEvents
+            .on('stats', updateRealStatistics)
+            .on('activities', updateRealActivities);
+    }
+    
     setInterval(() => {
-        // Only refresh if page is visible
-        if (!document.hidden) {
+        // Only refresh if page is visible and the live channel is down
+        if (!document.hidden && !(window.LiveEvents && window.LiveEvents.live)) {
             console.log('Auto-refreshing dashboard data...');
             fetchLatestData();
         }
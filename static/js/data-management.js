@@ -304,7 +304,7 @@ class DataManagement {
                     this.logDownloadResults(result.results);
                 }
                 
-                setTimeout(() => location.reload(), 2000);
+                this.reloadUnlessLive(2000);
             } else {
                 window.UIUtils.addLogEntry(`❌ Errore generale: ${result.message}`, 'error');
                 window.UIUtils.showNotification('Errore durante l\'aggiornamento', 'danger');
@@ -489,7 +489,7 @@ class DataManagement {
                     window.UIUtils.addLogEntry(`📊 ${ticker}: ${result.ticker_info.name}`, 'info');
                 }
                 
-                setTimeout(() => location.reload(), 1000);
+                this.reloadUnlessLive(1000);
             } else {
                 window.UIUtils.showNotification(`⚠️ ${result.message}`, result.status === 'warning' ? 'warning' : 'danger');
             }
@@ -536,7 +536,7 @@ class DataManagement {
             const message = `✅ ${successCount} ticker aggiunti con successo${errorCount > 0 ? `, ${errorCount} errori` : ''}`;
             window.UIUtils.showNotification(message, 'success');
             window.UIUtils.addLogEntry(`🎉 Completata aggiunta multipla: ${successCount} successi, ${errorCount} errori`, 'success');
-            setTimeout(() => location.reload(), 2000);
+            this.reloadUnlessLive(2000);
         } else {
             window.UIUtils.showNotification(`❌ Nessun ticker aggiunto (${errorCount} errori)`, 'danger');
         }
@@ -554,10 +554,77 @@ class DataManagement {
         console.log('📊 Aggiornamento statistiche...');
     }
 
+    reloadUnlessLive(delay) {
+        // Con il canale SSE attivo e completo righe e contatori si aggiornano da soli
+        if (window.LiveEvents && window.LiveEvents.live) {
+            return;
+        }
+        setTimeout(() => location.reload(), delay);
+    }
+
+    applyTickerUpdate(data) {
+        const tbody = document.getElementById('tickersTableBody');
+        if (!tbody || !data.row_html) return;
+
+        const row = tbody.querySelector(`tr[data-ticker="${CSS.escape(data.ticker)}"]`);
+        const template = document.createElement('template');
+        template.innerHTML = data.row_html.trim();
+        const newRow = template.content.firstElementChild;
+
+        if (row) {
+            row.replaceWith(newRow);
+        } else {
+            tbody.appendChild(newRow);
+        }
+        this.refreshTable();
+    }
+
+    applyTickersChanged(data) {
+        const tbody = document.getElementById('tickersTableBody');
+        if (!tbody) return;
+
+        (data.removed || []).forEach(ticker => {
+            const row = tbody.querySelector(`tr[data-ticker="${CSS.escape(ticker)}"]`);
+            if (row) row.remove();
+        });
+        Object.entries(data.rows || {}).forEach(([ticker, html]) => {
+            this.applyTickerUpdate({ ticker, row_html: html });
+        });
+        this.refreshTable();
+    }
+
+    applyStats(stats) {
+        const counters = {
+            totalTickers: stats.total_tickers,
+            updatedTickers: stats.updated_tickers,
+            pendingTickers: stats.pending_tickers
+        };
+        Object.entries(counters).forEach(([id, value]) => {
+            const element = document.getElementById(id);
+            if (element && value !== undefined) {
+                element.textContent = value;
+            }
+        });
+    }
+
+    refreshTable() {
+        if (window.TickerTableInstance) {
+            window.TickerTableInstance.refresh();
+        }
+    }
+
     startAutoRefresh() {
-        // Auto-refresh ogni 5 minuti
+        // Aggiornamenti in push dal server (SSE)
+        if (window.LiveEvents && window.LiveEvents.supported) {
+            window.LiveEvents
+                .on('ticker_updated', data => this.applyTickerUpdate(data))
+                .on('tickers_changed', data => this.applyTickersChanged(data))
+                .on('stats', stats => this.applyStats(stats));
+        }
+
+        // Fallback: auto-refresh ogni 5 minuti se il canale SSE non è attivo
         setInterval(async () => {
-            if (!document.hidden && window.TickerAPI) {
+            if (!document.hidden && window.TickerAPI && !(window.LiveEvents && window.LiveEvents.live)) {
                 console.log('🔄 Auto-refresh dati...');
                 try {
                     // CORRETTO: Usa window.TickerAPI
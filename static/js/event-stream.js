@@ -0,0 +1,94 @@
+/**
+ * event-stream.js
+ * Connessione Server-Sent Events a /api/events condivisa da tutte le pagine.
+ * Il browser gestisce da solo la riconnessione (con Last-Event-ID).
+ *
+ * Le pagine rinunciano al ricaricamento periodico solo quando il canale è
+ * "live": connesso e completo (il server lo dichiara con l'evento 'channel';
+ * non lo è con più worker che non condividono gli eventi).
+ */
+
+class LiveEvents {
+    constructor(url = '/api/events') {
+        this.url = url;
+        this.source = null;
+        this.connected = false;
+        this.complete = false;
+        this.handlers = {};
+    }
+
+    get supported() {
+        return typeof window.EventSource !== 'undefined';
+    }
+
+    get live() {
+        return this.connected && this.complete;
+    }
+
+    connect() {
+        if (!this.supported || this.source) {
+            return;
+        }
+
+        this.source = new EventSource(this.url);
+        this.source.onopen = () => {
+            this.connected = true;
+            console.log('📡 LiveEvents: connesso');
+        };
+        this.source.onerror = () => {
+            // EventSource ritenta automaticamente (non dopo un 503); nel frattempo le pagine usano il fallback
+            this.connected = false;
+            console.warn('⚠️ LiveEvents: connessione persa, riconnessione in corso...');
+        };
+        this.source.addEventListener('channel', (event) => {
+            try {
+                this.complete = Boolean(JSON.parse(event.data).complete);
+            } catch (error) {
+                this.complete = false;
+            }
+            if (!this.complete) {
+                console.log('📡 LiveEvents: eventi parziali, ricaricamento periodico attivo');
+            }
+        });
+
+        Object.keys(this.handlers).forEach(type => this.attach(type));
+    }
+
+    attach(type) {
+        this.source.addEventListener(type, (event) => {
+            let data;
+            try {
+                data = JSON.parse(event.data);
+            } catch (error) {
+                console.warn(`⚠️ LiveEvents: payload non valido per ${type}`, error);
+                return;
+            }
+            this.handlers[type].forEach(handler => {
+                try {
+                    handler(data);
+                } catch (error) {
+                    console.error(`❌ LiveEvents: errore nel gestore ${type}`, error);
+                }
+            });
+        });
+    }
+
+    /**
+     * Registra un gestore per un tipo di evento (stats, activities, ticker_updated...)
+     */
+    on(type, handler) {
+        if (!this.handlers[type]) {
+            this.handlers[type] = [];
+            if (this.source) {
+                this.attach(type);
+            }
+        }
+        this.handlers[type].push(handler);
+        this.connect();
+        return this;
+    }
+}
+
+window.LiveEvents = new LiveEvents();
+
+console.log('✅ LiveEvents module caricato');
@@ -16,12 +16,28 @@ class TechnicalAnalysisManager {
         this.originalChartDimensions = null;
         this.resizeTimeout = null;
         
+        // Dati grezzi del grafico per ticker ({days, data}): un numero di giorni
+        // minore o uguale viene ritagliato lato client senza nuove richieste
+        this.chartDataCache = new Map();
+        
+        // Punti massimi per grafico: finestre più lunghe arrivano in barre
+        // settimanali/mensili ('ohlc') o come linea ridotta con LTTB ('line');
+        // lo zoom richiede l'intervallo visibile a piena risoluzione
+        this.maxChartPoints = 1500;
+        this.chartMode = 'ohlc';
+        this.rangeRefineTimeout = null;
+        
+        // Barre del grafico e dell'analisi: giornaliere o rollup settimanali/mensili
+        this.chartTimeframe = 'daily';
+        this.timeframeResolutions = { daily: '1D', weekly: '1W', monthly: '1M' };
+        
         this.init();
     }
 
     init() {
         console.log('🔧 Inizializzazione Technical Analysis Manager...');
         this.setupEventListeners();
+        this.setupLiveEvents();
         this.loadInitialData();
         // Inizializza dopo che il DOM è pronto
         document.addEventListener('DOMContentLoaded', () => {
@@ -30,6 +46,21 @@ class TechnicalAnalysisManager {
         console.log('✅ Technical Analysis Manager inizializzato');
     }
 
+    // Dati del grafico in cache invalidati quando cambiano prezzi o analisi
+    setupLiveEvents() {
+        if (!window.LiveEvents || !window.LiveEvents.supported) {
+            return;
+        }
+        window.LiveEvents
+            .on('ticker_updated', data => this.chartDataCache.delete(data.ticker))
+            .on('analysis_completed', data => {
+                // Solo le analisi della fonte dati mostrata cambiano il grafico
+                if (!data.data_source || data.data_source === this.sourceParam()) {
+                    this.chartDataCache.clear();
+                }
+            });
+    }
+
     setupEventListeners() {
         // Main action buttons
         document.getElementById('runAnalysisBtn')?.addEventListener('click', () => {
@@ -91,6 +122,15 @@ class TechnicalAnalysisManager {
             }
         });
 
+        document.getElementById('chartTimeframeSelect')?.addEventListener('change', (e) => {
+            this.chartTimeframe = e.target.value;
+            console.log(`🗓️ Timeframe cambiato: ${this.chartTimeframe}`);
+            const currentTicker = document.getElementById('chartTickerSelect')?.value;
+            if (currentTicker) {
+                this.loadChart(currentTicker);
+            }
+        });
+
         // Listener per dropdown giorni
         const daysSelect = document.getElementById('daysSelect') || document.getElementById('chartDaysSelect');
         if (daysSelect) {
@@ -1172,7 +1212,8 @@ class TechnicalAnalysisManager {
         try {
             console.log('🔄 Caricamento dati iniziali...');
             
-            // Carica il summary (gestisce i suoi errori internamente)
+            // Fonte dati scelta dall'utente, poi il summary di quella fonte
+            await this.loadDataSource();
             await this.refreshSummary();
             
             // Inizializza dropdown ticker (gestisce i suoi errori internamente)
@@ -1328,6 +1369,25 @@ class TechnicalAnalysisManager {
         return 100;
     }
 
+    // Valore del parametro ?source delle API (adjusted / notAdjusted)
+    sourceParam() {
+        return this.currentDataSource === 'adjusted' ? 'adjusted' : 'notAdjusted';
+    }
+
+    // Fonte dati salvata sul server: la stessa per tutte le pagine e tutti i worker
+    async loadDataSource() {
+        try {
+            const response = await fetch('/api/technical-analysis/set-data-source');
+            const result = await response.json();
+            if (response.ok && result.status === 'success') {
+                this.currentDataSource = result.use_adjusted ? 'adjusted' : 'notadjusted';
+                this.updateDataSourceUI(this.currentDataSource);
+            }
+        } catch (error) {
+            console.warn('⚠️ Fonte dati non disponibile, uso ADJUSTED:', error);
+        }
+    }
+
     async setDataSource(source) {
         try {
             this.showLog(`🔄 Cambio fonte dati: ${source.toUpperCase()}...`, 'info');
@@ -1346,8 +1406,10 @@ class TechnicalAnalysisManager {
 
             if (result.status === 'success') {
                 this.currentDataSource = source;
+                this.chartDataCache.clear();
                 this.updateDataSourceUI(source);
                 this.showLog(`✅ ${result.message}`, 'success');
+                await this.refreshSummary();
                 
                 // Ricarica il grafico se presente
                 const currentTicker = document.getElementById('chartTickerSelect')?.value;
@@ -1402,7 +1464,8 @@ class TechnicalAnalysisManager {
                 },
                 body: JSON.stringify({
                     analysis_type: type,
-                    use_adjusted: this.currentDataSource === 'adjusted'
+                    use_adjusted: this.currentDataSource === 'adjusted',
+                    timeframe: this.chartTimeframe
                 })
             });
 
@@ -1410,6 +1473,7 @@ class TechnicalAnalysisManager {
 
             if (result.status === 'success') {
                 this.showLog(`✅ ${result.message}`, 'success');
+                this.chartDataCache.clear();
                 
                 // Mostra risultati dettagliati
                 if (result.results) {
@@ -1459,7 +1523,7 @@ class TechnicalAnalysisManager {
         try {
             console.log('🔄 Caricamento summary...');
             
-            const response = await fetch('/api/technical-analysis/summary');
+            const response = await fetch(`/api/technical-analysis/summary?source=${this.sourceParam()}`);
             
             if (!response.ok) {
                 if (response.status === 500) {
@@ -1542,7 +1606,7 @@ class TechnicalAnalysisManager {
     }
 
     // METODO PRINCIPALE AGGIORNATO per loadChart con leggenda
-    async loadChart(ticker) {
+    async loadChart(ticker, forceReload = false) {
         this.showChartLoading(true);
         
         try {
@@ -1561,24 +1625,16 @@ class TechnicalAnalysisManager {
             
             console.log(`🔧 Stato: S&R: ${showSR}, Zone: ${showZones}, Giorni: ${selectedDays}`);
             
-            // Chiama l'API con i giorni corretti
-            const response = await fetch(`/api/technical-analysis/chart-plotly/${ticker}?days=${selectedDays}&include_analysis=true`);
-            
-            if (!response.ok) {
-                throw new Error(`Errore API: ${response.status}`);
-            }
-            
-            const data = await response.json();
-            
-            if (data.error) {
-                throw new Error(data.error);
-            }
+            // Dati grezzi (OHLCV + livelli e zone): la figura è costruita nel browser
+            const primitives = await this.fetchChartPrimitives(ticker, selectedDays, forceReload);
+            const data = this.buildChartFromPrimitives(primitives, selectedDays);
             
             // Filtra i dati in base allo stato delle checkbox
             const filteredData = this.filterChartDataByCheckboxes(data, showSR, showZones);
             
             // Renderizza con Plotly
             await this.renderPlotlyChart(filteredData);
+            this.setupRangeRefinement(data.view);
             
             // NUOVO: Crea la leggenda se ci sono dati delle zone
             if (data && data.zone_legend) {
@@ -1620,6 +1676,328 @@ class TechnicalAnalysisManager {
         }
     }
 
+    // Dati grezzi del grafico: riusa quelli già scaricati se coprono i giorni richiesti
+    async fetchChartPrimitives(ticker, days, forceReload = false) {
+        // Solo i dati giornalieri a piena risoluzione possono essere ritagliati
+        const cached = this.chartDataCache.get(ticker);
+        if (cached && !forceReload && cached.days >= days && cached.data.timeframe === this.chartTimeframe &&
+            cached.data.resolution === '1D') {
+            console.log(`♻️ Dati grafico ${ticker} riusati (${cached.days} ≥ ${days} giorni)`);
+            return cached.data;
+        }
+        
+        const params = `days=${days}&include_analysis=true&max_points=${this.maxChartPoints}` +
+            `&mode=${this.chartMode}&timeframe=${this.chartTimeframe}&source=${this.sourceParam()}`;
+        const response = await fetch(`/api/technical-analysis/chart-data/${ticker}?${params}`);
+        const data = await response.json();
+        
+        if (!response.ok || data.error) {
+            throw new Error(data.error || `Errore API: ${response.status}`);
+        }
+        
+        this.chartDataCache.set(ticker, { days, data });
+        return data;
+    }
+
+    // Figura Plotly dai dati grezzi: stessa struttura di ChartFigureBuilder
+    // (PlotlyChartBuilder.py), con lo stesso filtro di zone e livelli sull'intervallo visibile
+    buildChartFromPrimitives(primitives, days) {
+        const columns = primitives.columns;
+        const total = columns.date.length;
+        const start = Math.max(0, total - days);
+        const slice = key => columns[key].slice(start);
+        
+        const dates = this.dayNumbersToDates(slice('date'));
+        const open = slice('open');
+        const high = slice('high');
+        const low = slice('low');
+        const close = slice('close');
+        const hasVolume = Array.isArray(columns.volume);
+        const ticker = primitives.ticker;
+        
+        if (!dates.length) {
+            throw new Error(`Nessun dato disponibile per ${ticker}`);
+        }
+        
+        // Intervallo visibile: [min low, max high] allargato del margine
+        const lod = primitives.lod;
+        const minLow = Math.min(...low.filter(Number.isFinite));
+        const maxHigh = Math.max(...high.filter(Number.isFinite));
+        const pad = (maxHigh - minLow) * lod.margin;
+        const rangeLow = minLow - pad;
+        const rangeHigh = maxHigh + pad;
+        const currentPrice = close[close.length - 1];
+        
+        // Oltre il tetto restano i livelli più vicini al prezzo (ordine originale mantenuto)
+        const keepNearest = (items, limit, rank) => {
+            if (items.length <= limit) {
+                return items;
+            }
+            const keep = new Set([...items].sort(rank).slice(0, limit));
+            return items.filter(item => keep.has(item));
+        };
+        
+        const levels = keepNearest(
+            primitives.levels.filter(lv => lv.level >= rangeLow && lv.level <= rangeHigh),
+            lod.max_levels,
+            (a, b) => Math.abs(a.level - currentPrice) - Math.abs(b.level - currentPrice)
+        );
+        
+        // Zone: per tipo, le più forti e a parità le più vicine al prezzo
+        const zones = ['Demand', 'Supply'].flatMap(type => keepNearest(
+            primitives.zones.filter(z => z.type === type && z.top >= rangeLow && z.bottom <= rangeHigh),
+            lod.max_zones,
+            (a, b) => ((b.strength || 0) - (a.strength || 0)) ||
+                (Math.abs(a.center - currentPrice) - Math.abs(b.center - currentPrice))
+        ));
+        
+        const isLine = primitives.resolution === 'lttb';
+        const traces = [isLine ? {
+            type: 'scatter', mode: 'lines', name: ticker, x: dates, y: close,
+            line: { color: '#007bff', width: 1.5 },
+            xaxis: 'x', yaxis: 'y'
+        } : {
+            type: 'candlestick', name: ticker,
+            x: dates, open, high, low, close,
+            increasing: { line: { color: '#00C851' } },
+            decreasing: { line: { color: '#FF4444' } },
+            xaxis: 'x', yaxis: 'y'
+        }];
+        const volume = hasVolume ? slice('volume') : null;
+        if (hasVolume) {
+            traces.push({
+                type: 'bar', name: 'Volume', x: dates, y: volume,
+                marker: { color: close.map((c, i) => c >= open[i] ? '#00C851' : '#FF4444') },
+                opacity: 0.7,
+                xaxis: 'x2', yaxis: 'y2'
+            });
+        }
+        
+        const shapes = [];
+        const annotations = [[`${ticker} - Analisi Tecnica`, 1.0]]
+            .concat(hasVolume ? [['Volume', 0.27]] : [])
+            .map(([text, y]) => ({
+                text, showarrow: false, font: { size: 16 },
+                x: 0.5, xanchor: 'center', xref: 'paper',
+                y, yanchor: 'bottom', yref: 'paper'
+            }));
+        
+        levels.forEach(lv => {
+            const type = lv.type || '';
+            const label = `${type.charAt(0).toUpperCase()}${type.slice(1).toLowerCase()} $${lv.level.toFixed(2)}`;
+            shapes.push({
+                type: 'line', x0: 0, x1: 1, xref: 'x domain', y0: lv.level, y1: lv.level, yref: 'y',
+                line: { color: type === 'Support' ? '#28a745' : '#dc3545', dash: 'dash', width: 2 }
+            });
+            annotations.push({
+                text: label, showarrow: false,
+                x: 1, xanchor: 'right', xref: 'x domain',
+                y: lv.level, yanchor: 'bottom', yref: 'y'
+            });
+        });
+        
+        const zoneLegend = zones.map(zone => {
+            const style = primitives.zone_styles[zone.type];
+            const label = `${zone.type} $${zone.center.toFixed(2)}`;
+            shapes.push({
+                type: 'rect', name: zone.id.replace('_', '_zone_'),
+                x0: 0, x1: 1, xref: 'x domain', y0: zone.bottom, y1: zone.top, yref: 'y',
+                fillcolor: style.fillcolor, line: { color: style.line, width: 1 }
+            });
+            annotations.push({
+                text: label, showarrow: false,
+                x: 0, xanchor: 'left', xref: 'x domain',
+                y: zone.top, yanchor: 'top', yref: 'y'
+            });
+            return {
+                id: zone.id, type: zone.type, center: zone.center, label,
+                visible: zone.visible, color: style.line,
+                strength: zone.strength, distance: zone.distance
+            };
+        });
+        
+        const xTitle = { text: 'Data' };
+        const axes = hasVolume ? {
+            xaxis: { anchor: 'y', domain: [0.0, 1.0], matches: 'x2', showticklabels: false,
+                     title: xTitle, rangeslider: { visible: false } },
+            yaxis: { anchor: 'x', domain: [0.37, 1.0], title: { text: 'Prezzo ($)' } },
+            xaxis2: { anchor: 'y2', domain: [0.0, 1.0], rangeslider: { visible: false } },
+            yaxis2: { anchor: 'x2', domain: [0.0, 0.27] }
+        } : {
+            xaxis: { anchor: 'y', domain: [0.0, 1.0], title: xTitle, rangeslider: { visible: false } },
+            yaxis: { anchor: 'x', domain: [0.0, 1.0], title: { text: 'Prezzo ($)' } }
+        };
+        
+        const figure = {
+            data: traces,
+            layout: {
+                ...axes,
+                annotations,
+                shapes,
+                title: { text: `${ticker} - Analisi Tecnica Completa` },
+                showlegend: true,
+                legend: { orientation: 'v', yanchor: 'top', y: 0.99, xanchor: 'left', x: 1.01 },
+                hovermode: 'x unified'
+            }
+        };
+        
+        return {
+            chart_json: JSON.stringify(figure),
+            chart_config: {
+                displayModeBar: true,
+                displaylogo: false,
+                modeBarButtonsToRemove: ['pan2d', 'lasso2d', 'select2d'],
+                responsive: true
+            },
+            data_info: {
+                ...primitives.data_info,
+                days,
+                data_points: dates.length,
+                resolution: primitives.resolution,
+                first_date: dates[0],
+                last_date: dates[dates.length - 1],
+                plotted_levels: levels.length,
+                plotted_zones: zones.length
+            },
+            zone_legend: zoneLegend,
+            // Serie disegnate: base per lo zoom a piena risoluzione
+            view: {
+                ticker, timeframe: primitives.timeframe, resolution: primitives.resolution, isLine,
+                dates, open, high, low, close, volume
+            }
+        };
+    }
+
+    // Giorni dal 1970-01-01 -> 'YYYY-MM-DD'
+    dayNumbersToDates(days) {
+        return days.map(day => new Date(day * 86400000).toISOString().slice(0, 10));
+    }
+
+    // Zoom su un grafico ridotto: l'intervallo visibile viene richiesto a piena risoluzione
+    setupRangeRefinement(view) {
+        const chartDiv = document.getElementById('technicalChart');
+        const fullResolution = this.timeframeResolutions[view?.timeframe] || '1D';
+        if (!chartDiv || !view || view.resolution === fullResolution || typeof chartDiv.on !== 'function') {
+            return;
+        }
+        
+        chartDiv.on('plotly_relayout', (eventData) => {
+            const range = this.relayoutRange(eventData);
+            if (!range) {
+                return;
+            }
+            clearTimeout(this.rangeRefineTimeout);
+            if (range === 'reset') {
+                this.applyChartSeries(chartDiv, view, view);
+                return;
+            }
+            this.rangeRefineTimeout = setTimeout(() => this.refineChartRange(chartDiv, view, range), 250);
+        });
+    }
+
+    // Intervallo di date da un evento plotly_relayout (asse x del prezzo o del volume)
+    relayoutRange(eventData) {
+        for (const axis of ['xaxis', 'xaxis2']) {
+            if (eventData[`${axis}.autorange`]) {
+                return 'reset';
+            }
+            const range = eventData[`${axis}.range`] ||
+                (eventData[`${axis}.range[0]`] !== undefined ? [eventData[`${axis}.range[0]`], eventData[`${axis}.range[1]`]] : null);
+            if (range) {
+                return range.map(value => String(value).slice(0, 10));
+            }
+        }
+        return null;
+    }
+
+    async refineChartRange(chartDiv, view, [start, end]) {
+        try {
+            const params = `start=${start}&end=${end}&max_points=${this.maxChartPoints}` +
+                `&mode=${this.chartMode}&timeframe=${view.timeframe}&source=${this.sourceParam()}`;
+            const response = await fetch(`/api/technical-analysis/chart-range/${view.ticker}?${params}`);
+            const data = await response.json();
+            if (!response.ok || data.error) {
+                throw new Error(data.error || `Errore API: ${response.status}`);
+            }
+            
+            const columns = data.columns;
+            const fine = this.dayNumbersToDates(columns.date);
+            if (!fine.length) {
+                return;
+            }
+            
+            // Barre ridotte fuori dall'intervallo + barre a piena risoluzione dentro
+            const before = view.dates.findIndex(date => date >= fine[0]);
+            const after = view.dates.findIndex(date => date > fine[fine.length - 1]);
+            const head = before === -1 ? view.dates.length : before;
+            const tail = after === -1 ? view.dates.length : after;
+            const merge = (coarse, detail) => coarse.slice(0, head).concat(detail, coarse.slice(tail));
+            
+            this.applyChartSeries(chartDiv, view, {
+                dates: merge(view.dates, fine),
+                open: merge(view.open, columns.open),
+                high: merge(view.high, columns.high),
+                low: merge(view.low, columns.low),
+                close: merge(view.close, columns.close),
+                volume: view.volume && columns.volume ? merge(view.volume, columns.volume) : view.volume
+            });
+            console.log(`🔍 Zoom ${start} → ${end}: ${fine.length} barre (${data.resolution})`);
+        } catch (error) {
+            console.warn('⚠️ Zoom a piena risoluzione non disponibile:', error);
+        }
+    }
+
+    // Sostituisce le serie di prezzo e volume senza ridisegnare shapes e layout
+    applyChartSeries(chartDiv, view, series) {
+        const priceUpdate = view.isLine
+            ? { x: [series.dates], y: [series.close] }
+            : { x: [series.dates], open: [series.open], high: [series.high], low: [series.low], close: [series.close] };
+        Plotly.restyle(chartDiv, priceUpdate, [0]);
+        
+        if (series.volume && chartDiv.data.length > 1 && chartDiv.data[1].name === 'Volume') {
+            const colors = series.close.map((c, i) => c >= series.open[i] ? '#00C851' : '#FF4444');
+            Plotly.restyle(chartDiv, { x: [series.dates], y: [series.volume], 'marker.color': [colors] }, [1]);
+        }
+    }
+
+    // Reinserisce nella figura Plotly le serie inviate in formato colonnare
+    expandColumnarChart(data) {
+        if (!data || data.format !== 'columnar' || !data.columns) {
+            return data;
+        }
+        
+        const columns = data.columns;
+        // Date in giorni dal 1970-01-01 -> 'YYYY-MM-DD'
+        const dates = columns.date.map(day => new Date(day * 86400000).toISOString().slice(0, 10));
+        const figure = JSON.parse(data.chart_json);
+        
+        figure.data.forEach(trace => {
+            if (trace.type === 'candlestick') {
+                trace.x = dates;
+                trace.open = columns.open;
+                trace.high = columns.high;
+                trace.low = columns.low;
+                trace.close = columns.close;
+            } else if (trace.type === 'scatter' && trace.mode === 'lines' && !trace.x) {
+                // Vista a linea (storico ridotto con LTTB)
+                trace.x = dates;
+                trace.y = columns.close;
+            } else if (trace.type === 'bar' && trace.name === 'Volume' && columns.volume) {
+                trace.x = dates;
+                trace.y = columns.volume;
+                trace.marker = {
+                    ...trace.marker,
+                    color: columns.close.map((close, i) => close >= columns.open[i] ? '#00C851' : '#FF4444')
+                };
+            }
+        });
+        
+        return {
+            ...data,
+            chart_json: JSON.stringify(figure)
+        };
+    }
+
     // Funzione helper per estrarre dati delle zone dal grafico esistente
     extractZoneDataFromChart(chartDiv) {
         const zoneLegendData = [];
@@ -1661,8 +2039,8 @@ class TechnicalAnalysisManager {
             
             // Filtra i traces in base alle checkbox
             const filteredTraces = figure.data.filter(trace => {
-                // Mantieni sempre il trace principale (candlestick)
-                if (trace.type === 'candlestick') {
+                // Mantieni sempre il trace principale (candlestick o linea del close)
+                if (trace.type === 'candlestick' || (trace.type === 'scatter' && trace.mode === 'lines' && trace.xaxis === 'x')) {
                     return true;
                 }
                 
@@ -1775,7 +2153,7 @@ class TechnicalAnalysisManager {
         const tickerSelect = document.getElementById('chartTickerSelect');
         if (tickerSelect && tickerSelect.value) {
             console.log('🔄 Refresh forzato del grafico...');
-            this.loadChart(tickerSelect.value);
+            this.loadChart(tickerSelect.value, true);
         } else {
             console.log('⚠️ Nessun ticker selezionato per il refresh');
         }
@@ -2064,7 +2442,7 @@ class TechnicalAnalysisManager {
                 this.initializeEnhancedTables();
             }
             
-            const response = await fetch('/api/technical-analysis/zones');
+            const response = await fetch(`/api/technical-analysis/zones?source=${this.sourceParam()}`);
             
             if (!response.ok) {
                 if (response.status === 500) {
@@ -2101,7 +2479,7 @@ class TechnicalAnalysisManager {
                 this.initializeEnhancedTables();
             }
             
-            const response = await fetch('/api/technical-analysis/levels');
+            const response = await fetch(`/api/technical-analysis/levels?source=${this.sourceParam()}`);
             
             if (!response.ok) {
                 if (response.status === 500) {
@@ -2292,7 +2670,7 @@ class TechnicalAnalysisManager {
         try {
             this.showLog('📤 Preparazione export risultati...', 'info');
 
-            const summary = await fetch('/api/technical-analysis/summary').then(r => r.json());
+            const summary = await fetch(`/api/technical-analysis/summary?source=${this.sourceParam()}`).then(r => r.json());
             
             const exportData = {
                 timestamp: new Date().toISOString(),
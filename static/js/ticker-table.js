@@ -415,7 +415,9 @@ class TickerTable {
             if (result.status === 'success') {
                 window.UIUtils.addLogEntry(`✅ ${result.message}`, 'success');
                 window.UIUtils.showNotification(result.message, 'success');
-                setTimeout(() => location.reload(), 1000);
+                if (!(window.LiveEvents && window.LiveEvents.live)) {
+                    setTimeout(() => location.reload(), 1000);
+                }
             } else if (result.status === 'info') {
                 window.UIUtils.addLogEntry(`ℹ️ ${result.message}`, 'info');
                 window.UIUtils.showNotification(result.message, 'info');
@@ -463,7 +465,9 @@ class TickerTable {
             if (result.status === 'success') {
                 window.UIUtils.showNotification(result.message, 'success');
                 window.UIUtils.addLogEntry(`🗑️ Ticker ${ticker} rimosso`, 'info');
-                setTimeout(() => location.reload(), 1000);
+                if (!(window.LiveEvents && window.LiveEvents.live)) {
+                    setTimeout(() => location.reload(), 1000);
+                }
             } else {
                 window.UIUtils.showNotification(result.message, 'danger');
             }
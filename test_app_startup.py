@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test dell'avvio leggero dell'app: import senza librerie pesanti né manager
+costruiti, manager creati una sola volta al primo utilizzo, manager delle
+analisi inizializzati solo quando servono.
+"""
+
+import tempfile
+import threading
+import time
+
+from benchmark_app_startup import DEFERRED_MODULES, probe_startup
+from moduls.Core.LazyObject import LazyObject
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from TickerDataManager import TickerDataManager
+
+
+def test_import_is_lazy():
+    """import app in un interprete nuovo: niente plotly/yfinance/requests, manager e file"""
+    print("🚀 Test import dell'app...")
+
+    result = probe_startup(first_use=True)
+    assert result['loaded_deferred'] == [], result['loaded_deferred']
+    assert result['managers_created'] == [], result['managers_created']
+    assert result['files_created'] == [], result['files_created']
+    assert 'first_use_seconds' in result
+    print(f"✅ import in {result['import_seconds']:.3f}s, nessuna tra {', '.join(DEFERRED_MODULES)}")
+
+
+def test_lazy_object():
+    """Factory chiamata una sola volta anche con accessi concorrenti"""
+    print("🧵 Test LazyObject...")
+
+    calls = []
+
+    class Service:
+        def __init__(self):
+            calls.append(1)
+            time.sleep(0.05)
+            self.value = 42
+
+    lazy = LazyObject(Service, 'Service')
+    assert not lazy.is_created and calls == []
+
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(lazy.value)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen == [42] * 8 and calls == [1] and lazy.is_created
+
+    lazy.value = 7
+    assert lazy.get().value == 7
+    print("✅ Una sola costruzione per 8 thread")
+
+
+def test_analysis_managers_on_first_use():
+    """Manager S/R e Skorupinski costruiti al primo accesso, disponibili appena arrivano ticker"""
+    print("🔧 Test manager delle analisi al primo utilizzo...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        technical = TechnicalAnalysisManager(base_dir=tmp)
+        assert technical._sr_manager is None and technical._skorupinski_manager is None
+        assert not technical.sr_state_file.exists()
+
+        # Senza ticker configurati i manager restano None (nessun errore)
+        assert technical.sr_manager is None and technical.run_support_resistance_analysis() == {}
+
+        # Il primo ticker aggiunto rende disponibili i manager senza ricreare TechnicalAnalysisManager
+        data_manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=2, as_of='2024-06-28'))
+        assert data_manager.add_ticker('AAPL')['status'] == 'success'
+        assert data_manager.update_ticker_data('AAPL')['status'] == 'success'
+        assert technical.sr_manager is not None and technical.skorupinski_manager is not None
+        assert technical.sr_state_file.exists()
+        sr_manager = technical.sr_manager
+        assert technical.sr_manager is sr_manager
+        assert technical.run_support_resistance_analysis().get('AAPL')
+    print("✅ Manager creati al primo accesso")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test avvio leggero dell'app")
+    print("=" * 50)
+
+    tests = [
+        ("Import dell'app", test_import_is_lazy),
+        ("LazyObject", test_lazy_object),
+        ("Manager delle analisi", test_analysis_managers_on_first_use),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
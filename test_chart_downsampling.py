@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test della riduzione dello storico per il grafico: barre settimanali/mensili
+con massimi e minimi conservati, LTTB per la vista a linea, intervallo
+dello zoom a piena risoluzione.
+"""
+
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from moduls.MarketData.CompactPriceFormat import day_numbers_to_dates, format_dates
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis import PlotlyChartBuilder
+from moduls.TechnicalAnalysis.ChartDownsampling import (
+    downsample_price_frame, lttb_indices, resample_ohlc, slice_date_range
+)
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from TickerDataManager import TickerDataManager
+
+
+def _price_frame(days=5000, seed=5):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2005-01-03', periods=days)
+    close = 50 + np.cumsum(rng.normal(0, 1, days))
+    return pd.DataFrame({
+        'Date': dates,
+        'Open': close + rng.normal(0, 0.3, days),
+        'High': close + rng.uniform(0.5, 2, days),
+        'Low': close - rng.uniform(0.5, 2, days),
+        'Close': close,
+        'Adj Close': close * 0.98,
+        'Volume': rng.integers(1000, 9000, days),
+    })
+
+
+def test_ohlc_resampling():
+    """Barre settimanali e mensili uguali al resample di pandas, massimi e minimi conservati"""
+    print("📉 Test aggregazione OHLC...")
+
+    df = _price_frame()
+    weekly, resolution = resample_ohlc(df, 1500)
+    assert resolution == '1W' and len(weekly) <= 1500
+
+    # Riferimento: resample settimanale di pandas (settimane da lunedì)
+    reference = df.set_index('Date').resample('W-SUN').agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum'}
+    ).dropna()
+    assert len(weekly) == len(reference)
+    for col in ('Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume'):
+        assert np.allclose(weekly[col].to_numpy(), reference[col].to_numpy()), col
+    # Ogni barra porta la data della sua prima sessione
+    assert (weekly['Date'].dt.dayofweek == 0).all()
+
+    monthly, resolution = resample_ohlc(df, 300)
+    assert resolution == '1M' and len(monthly) == df['Date'].dt.to_period('M').nunique()
+
+    blocks, resolution = resample_ohlc(df, 60)
+    assert resolution == '4M' and len(blocks) <= 60
+
+    # Intervallo di prezzo visibile invariato: zone e livelli selezionati restano gli stessi
+    for reduced in (weekly, monthly, blocks):
+        assert PlotlyChartBuilder.visible_price_range(reduced['Low'], reduced['High']) == \
+            PlotlyChartBuilder.visible_price_range(df['Low'], df['High'])
+
+    # Entro il limite lo storico non viene toccato
+    assert downsample_price_frame(df, 5000)[0] is df and downsample_price_frame(df, None)[1] == '1D'
+    with pytest.raises(ValueError):
+        downsample_price_frame(df, 100, mode='candles')
+    with pytest.raises(ValueError):
+        downsample_price_frame(df, -5)
+    print(f"✅ {len(df)} barre -> {len(weekly)} settimanali, {len(monthly)} mensili")
+
+
+def test_lttb():
+    """LTTB: numero di punti richiesto, estremi e picchi conservati"""
+    print("📈 Test LTTB...")
+
+    x = np.arange(10000)
+    y = np.sin(x / 300.0)
+    y[4321] = 25.0  # picco isolato
+    indices = lttb_indices(x, y, 500)
+
+    assert len(indices) == 500 and indices[0] == 0 and indices[-1] == 9999
+    assert (np.diff(indices) > 0).all()
+    assert 4321 in indices
+    assert len(lttb_indices(x[:100], y[:100], 500)) == 100
+
+    df = _price_frame()
+    line, resolution = downsample_price_frame(df, 800, mode='line')
+    assert resolution == 'lttb' and len(line) == 800
+    assert line['Close'].max() == df['Close'].max() or line['Close'].min() == df['Close'].min()
+    print("✅ LTTB OK")
+
+
+def test_chart_with_max_points():
+    """days=5000: grafico ridotto e payload più leggero; lo zoom restituisce barre giornaliere"""
+    print("🔍 Test grafico ridotto e zoom...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=11, as_of='2024-06-28'))
+        assert data_manager.update_ticker_data('AAPL')['status'] == 'success'
+        technical = TechnicalAnalysisManager(base_dir=tmp)
+
+        full = technical.generate_plotly_chart('AAPL', 5000, include_analysis=False, columnar=True)
+        reduced = technical.generate_plotly_chart('AAPL', 5000, include_analysis=False, columnar=True,
+                                                  max_points=1100)
+        info = reduced['data_info']
+        assert full['data_info']['resolution'] == '1D' and full['data_info']['data_points'] == 5000
+        assert info['resolution'] == '1W' and info['data_points'] <= 1100 and info['total_points'] == 5000
+        assert len(json.dumps(reduced)) * 3 < len(json.dumps(full))
+
+        # Stessa finestra come linea LTTB
+        line = technical.get_chart_primitives('AAPL', 5000, include_analysis=False, max_points=1000, mode='line')
+        assert line['resolution'] == 'lttb' and len(line['columns']['date']) == 1000
+
+        # Zoom: l'intervallo visibile a piena risoluzione
+        zoom = technical.get_chart_range('AAPL', '2023-03-01', '2023-05-31', max_points=1000)
+        all_prices = slice_date_range(technical.load_ticker_price_data('AAPL', days=0), '2023-03-01', '2023-05-31')
+        assert zoom['resolution'] == '1D' and zoom['data_info']['total_points'] == len(all_prices)
+        assert format_dates(np.asarray(zoom['columns']['date'])) == format_dates(all_prices['Date'])
+        assert np.allclose(zoom['columns']['close'], all_prices['Close'], atol=5e-5)
+
+        # Intervallo molto ampio: di nuovo ridotto
+        wide = technical.get_chart_range('AAPL', '2000-01-01', None, max_points=300)
+        assert wide['resolution'] == '1M' and len(wide['columns']['date']) <= 300
+        assert day_numbers_to_dates(wide['columns']['date'][-1:])[0] <= pd.Timestamp('2024-06-28')
+
+        # max_points negativo: 400 da tutte le API dei grafici
+        import app as webapp
+        try:
+            client = webapp.create_app('testing', DATA_DIR=tmp).test_client()
+            for endpoint in ('chart-plotly', 'chart-data', 'chart-range'):
+                response = client.get(f'/api/technical-analysis/{endpoint}/AAPL?max_points=-5')
+                assert response.status_code == 400, (endpoint, response.status_code)
+            assert client.get('/api/technical-analysis/chart-data/AAPL?max_points=0').status_code == 200
+        finally:
+            webapp.create_app()
+    print(f"✅ {full['data_info']['data_points']} -> {info['data_points']} punti")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test riduzione storico grafico")
+    print("=" * 50)
+
+    tests = [
+        ("Aggregazione OHLC", test_ohlc_resampling),
+        ("LTTB", test_lttb),
+        ("Grafico ridotto e zoom", test_chart_with_max_points),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test del formato prezzi compatto (float32, date int32).
+Quantifica lo scostamento di livelli S/R e zone Skorupinski rispetto al formato standard.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from moduls.MarketData.CompactPriceFormat import (
+    FLOAT32_RELATIVE_ERROR, compact_price_frame, day_numbers_to_dates,
+    dates_to_day_numbers, expand_price_frame, format_dates, read_price_csv
+)
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis.SkorupinkiZoneManager import SkorupinkiZoneManager
+from moduls.TechnicalAnalysis.SupportResistanceManager import SupportResistanceManager
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from TickerDataManager import TickerDataManager
+
+TICKERS = ['AAPL', 'ISP.MI']
+
+
+def _prepare_data(tmp):
+    """Scarica dati sintetici nella struttura standard e crea i file di stato"""
+    provider = SyntheticMarketDataProvider(seed=11, as_of='2024-06-28')
+    manager = TickerDataManager(base_dir=tmp, provider=provider)
+    for ticker in TICKERS:
+        assert manager.update_ticker_data(ticker)['status'] == 'success'
+
+    analysis_dir = Path(tmp) / 'analysis'
+    analysis_dir.mkdir(parents=True, exist_ok=True)
+    with open(analysis_dir / 'sr_state.json', 'w') as f:
+        json.dump({t: "1900-01-01T00:00:00" for t in TICKERS}, f)
+    with open(analysis_dir / 'skorupinski_state.json', 'w') as f:
+        json.dump({t: {'timestamp': "1900-01-01T00:00:00", 'custom_params': {}} for t in TICKERS}, f)
+
+    return manager, analysis_dir
+
+
+def test_compact_round_trip():
+    """Conversione compatta: date esatte, prezzi entro 2^-24, volume ridotto"""
+    print("🗜️ Test round-trip formato compatto...")
+
+    data = SyntheticMarketDataProvider(seed=11, as_of='2024-06-28').fetch_history('AAPL')
+    compact = compact_price_frame(data)
+
+    assert compact['Date'].dtype == np.int32
+    assert compact['Close'].dtype == np.float32
+    assert compact['Volume'].dtype in (np.uint32, np.int64)
+    assert format_dates(compact['Date']) == list(data['Date'])
+    assert (day_numbers_to_dates(dates_to_day_numbers(data['Date'])) == pd.to_datetime(data['Date'])).all()
+
+    expanded = expand_price_frame(compact)
+    rel_error = (expanded['Close'] - data['Close']).abs() / data['Close']
+    assert rel_error.max() <= FLOAT32_RELATIVE_ERROR
+    assert (expanded['Volume'] == data['Volume']).all()
+
+    memory_ratio = compact.memory_usage(deep=True).sum() / data.memory_usage(deep=True).sum()
+    print(f"✅ {len(data)} record, errore relativo max {rel_error.max():.2e}, memoria {memory_ratio:.0%}")
+
+
+def test_compact_analysis_drift():
+    """Scostamento dei livelli S/R e delle zone Skorupinski in modalità compatta"""
+    print("📏 Test scostamento analisi compatta...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, analysis_dir = _prepare_data(tmp)
+
+        loaded = read_price_csv(manager.data_dir / 'AAPL.csv', compact=True)
+        assert loaded['Date'].dtype == np.int32 and loaded['Open'].dtype == np.float32
+
+        level_drifts = []
+        zone_drifts = []
+
+        for ticker in TICKERS:
+            levels = {}
+            zones = {}
+            for compact in (False, True):
+                sr = SupportResistanceManager(analysis_dir / 'sr_state.json', manager.data_dir,
+                                              analysis_dir / 'sr', max_years_lookback=2,
+                                              compact_prices=compact)
+                df = sr._filter_data_by_timeframe(sr._load_price_data(ticker), ticker)
+                levels[compact] = pd.DataFrame(sr._find_support_resistance_levels(df, ticker))
+
+                sk = SkorupinkiZoneManager(analysis_dir / 'skorupinski_state.json', manager.data_dir,
+                                           analysis_dir / 'sk', max_years_lookback=2,
+                                           compact_prices=compact)
+                df = sk._filter_data_by_timeframe(sk._load_price_data(ticker), ticker)
+                zones[compact] = pd.DataFrame(sk._find_skorupinski_zones(df, ticker))
+
+            # Stessi livelli (data e tipo), valori entro la precisione float32 + arrotondamento a 4 decimali
+            merged = levels[False].merge(levels[True], on=['date', 'type'], suffixes=('', '_32'))
+            assert len(merged) == len(levels[False]) == len(levels[True]), ticker
+            level_drifts.append(((merged['level_32'] - merged['level']).abs() / merged['level']).max())
+
+            if not zones[False].empty:
+                assert len(zones[False]) == len(zones[True]), ticker
+                for col in ('zone_top', 'zone_bottom'):
+                    drift = (zones[True][col].to_numpy() - zones[False][col].to_numpy()) / zones[False][col].to_numpy()
+                    zone_drifts.append(np.abs(drift).max())
+
+        max_level_drift = max(level_drifts)
+        max_zone_drift = max(zone_drifts) if zone_drifts else 0.0
+        assert max_level_drift < 1e-5, max_level_drift
+        assert max_zone_drift < 1e-5, max_zone_drift
+    print(f"✅ Scostamento massimo: livelli S/R {max_level_drift:.2e}, zone {max_zone_drift:.2e}")
+
+
+def test_columnar_chart_data():
+    """Formato colonnare del grafico: stessi valori del formato a record, payload ridotto"""
+    print("📦 Test formato colonnare grafico...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager, _ = _prepare_data(tmp)
+        technical = TechnicalAnalysisManager(base_dir=tmp)
+
+        records = technical.get_ticker_chart_data('AAPL', 1260, include_analysis=False)
+        columnar = technical.get_ticker_chart_data('AAPL', 1260, include_analysis=False, columnar=True)
+        columns = columnar['price_data']
+
+        assert columnar['format'] == 'columnar' and columns['decimals'] == 4
+        assert format_dates(np.asarray(columns['date'])) == [r['date'] for r in records['price_data']]
+        for key in ('open', 'high', 'low', 'close', 'adj_close'):
+            expected = np.array([r[key] for r in records['price_data']])
+            assert np.abs(np.array(columns[key]) - expected).max() <= 5e-5, key
+        assert columns['volume'] == [r['volume'] for r in records['price_data']]
+
+        # Plotly: stessa figura una volta reinserite le serie, senza template
+        plotly_full = technical.generate_plotly_chart('AAPL', 1260, include_analysis=False)
+        plotly_columnar = technical.generate_plotly_chart('AAPL', 1260, include_analysis=False, columnar=True)
+        figure = json.loads(plotly_columnar['chart_json'])
+        candle = next(t for t in figure['data'] if t['type'] == 'candlestick')
+        assert 'x' not in candle and 'template' not in figure['layout']
+        assert plotly_columnar['columns']['date'] == columns['date']
+        assert plotly_columnar['data_info'] == plotly_full['data_info']
+
+        full_size = len(json.dumps(records, separators=(',', ':')))
+        columnar_size = len(json.dumps(columnar, separators=(',', ':')))
+        assert columnar_size * 2 < full_size
+    print(f"✅ Formato colonnare: {full_size} -> {columnar_size} byte ({full_size / columnar_size:.1f}x senza compressione)")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test formato compatto")
+    print("=" * 50)
+
+    tests = [
+        ("Round-trip compatto", test_compact_round_trip),
+        ("Scostamento analisi", test_compact_analysis_drift),
+        ("Formato colonnare grafico", test_columnar_chart_data),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
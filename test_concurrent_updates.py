@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Stress test degli aggiornamenti concorrenti: 100 ticker, 16 worker.
+Verifica che lock per ticker e scritture atomiche mantengano integri CSV,
+metadati, configurazione e file di stato delle analisi.
+"""
+
+import json
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from moduls.Core.AtomicFiles import atomic_write_csv
+from moduls.Core.FileLocks import LockManager
+from moduls.MarketData.SegmentStore import read_segments
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis.SupportResistanceManager import SupportResistanceManager
+from TickerDataManager import TickerDataManager
+
+TICKERS = [f"T{i:03d}" for i in range(100)]
+WORKERS = 16
+
+
+def _check_integrity(manager, provider):
+    """Ogni CSV completo, senza date duplicate e coerente con i metadati"""
+    for ticker in TICKERS:
+        expected = provider.fetch_history(ticker)
+        meta = manager.load_ticker_meta(ticker)
+
+        for file_path in (manager.data_dir / f"{ticker}.csv",
+                          manager.data_dir_not_adj / f"{ticker}_notAdjusted.csv"):
+            df = read_segments(file_path)
+            assert df['Date'].is_unique and df['Date'].is_monotonic_increasing, file_path
+            assert len(df) == len(expected) == meta['total_records'], (file_path, len(df), len(expected))
+            assert df['Date'].iloc[-1] == meta['last_close_date'], file_path
+
+    leftovers = [p.name for p in Path(manager.base_dir).rglob('*.tmp')]
+    assert not leftovers, leftovers
+
+
+def test_concurrent_ticker_updates():
+    """16 worker: aggiunta, download completo e aggiornamenti incrementali duplicati di 100 ticker"""
+    print("🔒 Stress test aggiornamenti concorrenti...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(seed=9, as_of='2024-05-31')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+
+        def add_and_download(ticker):
+            assert manager.add_ticker(ticker)['status'] == 'success'
+            return manager.update_ticker_data(ticker)['status']
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            statuses = list(pool.map(add_and_download, TICKERS))
+        assert statuses == ['success'] * len(TICKERS), set(statuses)
+
+        # La configurazione contiene tutti i ticker (nessun read-modify-write perso)
+        assert sorted(manager.load_ticker_config()['tickers']) == TICKERS
+
+        # Ogni ticker aggiornato due volte in parallelo: il secondo non deve riappendere gli stessi giorni
+        provider.as_of = provider._to_date('2024-06-28')
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            statuses = [r['status'] for r in pool.map(manager.update_ticker_data, TICKERS * 2)]
+        assert statuses.count('success') == len(TICKERS), statuses
+        elapsed = time.time() - start
+
+        _check_integrity(manager, provider)
+    print(f"✅ {len(TICKERS)} ticker, {WORKERS} worker: dati integri ({elapsed:.1f}s)")
+
+
+def test_concurrent_state_updates():
+    """Timestamp di 100 ticker scritti in parallelo nello stesso file di stato"""
+    print("📝 Test file di stato concorrente...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = Path(tmp) / 'sr_state.json'
+        state_file.write_text('{}')
+        sr = SupportResistanceManager(state_file, Path(tmp), Path(tmp) / 'sr')
+
+        def touch(ticker):
+            for day in range(1, 6):
+                sr._update_ticker_timestamp(ticker, datetime(2024, 6, day))
+
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            list(pool.map(touch, TICKERS))
+
+        state = json.loads(state_file.read_text())
+        assert sorted(state) == TICKERS, len(state)
+        assert set(state.values()) == {datetime(2024, 6, 5).isoformat()}
+    print("✅ File di stato integro")
+
+
+def _append_rows(args):
+    """Processo figlio: appende righe allo stesso CSV sotto lock del ticker"""
+    base_dir, worker, rows = args
+    locks = LockManager(Path(base_dir) / 'locks')
+    target = Path(base_dir) / 'shared.csv'
+    for i in range(rows):
+        with locks.ticker('SHARED'):
+            atomic_write_csv(target, pd.DataFrame({'worker': [worker], 'row': [i]}), append=True)
+
+
+def test_interprocess_lock():
+    """4 processi appendono allo stesso CSV: nessuna riga persa"""
+    print("🧵 Test lock tra processi...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        processes, rows = 4, 50
+        with multiprocessing.get_context('spawn').Pool(processes) as pool:
+            pool.map(_append_rows, [(tmp, w, rows) for w in range(processes)])
+
+        df = pd.read_csv(Path(tmp) / 'shared.csv')
+        assert len(df) == processes * rows, len(df)
+        grouped = df.groupby('worker')['row'].apply(list)
+        assert sorted(grouped.index) == list(range(processes)), list(grouped.index)
+        assert all(grouped[w] == list(range(rows)) for w in range(processes))
+    print(f"✅ {processes} processi x {rows} append senza perdite")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio stress test concorrenza")
+    print("=" * 50)
+
+    tests = [
+        ("Aggiornamenti concorrenti", test_concurrent_ticker_updates),
+        ("File di stato", test_concurrent_state_updates),
+        ("Lock tra processi", test_interprocess_lock),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
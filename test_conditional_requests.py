@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test delle richieste condizionali: versioni dei dati, ETag e risposte 304.
+"""
+
+import gzip
+import tempfile
+
+from flask import Flask, Response, jsonify
+
+from moduls.Core.DataVersions import DataVersions
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.Web.Compression import init_compression
+from moduls.Web.ConditionalRequests import conditional
+from TickerDataManager import TickerDataManager
+
+
+def test_data_versions():
+    """Le scritture incrementano le versioni e cambiano l'ETag solo delle chiavi coinvolte"""
+    print("🔢 Test versioni dati...")
+
+    versions = DataVersions()
+    aapl_etag, _ = versions.validators([DataVersions.ticker_key('AAPL')])
+    msft_etag, _ = versions.validators([DataVersions.ticker_key('MSFT')])
+
+    assert versions.bump_ticker('aapl') == 1
+    assert versions.ticker('AAPL') == 1 and versions.get(DataVersions.PRICES) == 1
+
+    assert versions.validators([DataVersions.ticker_key('AAPL')])[0] != aapl_etag
+    assert versions.validators([DataVersions.ticker_key('MSFT')])[0] == msft_etag
+
+    # Un altro processo (o un riavvio) non produce mai gli stessi ETag
+    assert DataVersions().validators([DataVersions.ticker_key('MSFT')])[0] != msft_etag
+    print("✅ Versioni dati OK")
+
+
+def test_conditional_endpoint():
+    """304 senza eseguire la view finché i dati non cambiano, 200 dopo una scrittura"""
+    print("🏷️ Test ETag / 304...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        versions = DataVersions()
+        provider = SyntheticMarketDataProvider(seed=3, as_of='2024-06-28')
+        manager = TickerDataManager(base_dir=tmp, provider=provider, versions=versions)
+        assert manager.update_ticker_data('AAPL')['status'] == 'success'
+
+        app = Flask(__name__)
+        calls = []
+
+        @app.route('/api/ticker/<ticker>/data')
+        @conditional(versions, lambda ticker: ([DataVersions.ticker_key(ticker)], None))
+        def ticker_data(ticker):
+            calls.append(ticker)
+            return jsonify({'ticker': ticker, 'version': versions.ticker(ticker)})
+
+        # Finestra di sessione: valore extra che cambia senza nuove versioni
+        window = ['2024-06-28']
+
+        @app.route('/api/tickers/status')
+        @conditional(versions, lambda: ([DataVersions.PRICES], list(window)))
+        def ticker_status():
+            return jsonify({'window': window})
+
+        client = app.test_client()
+        first = client.get('/api/ticker/AAPL/data')
+        etag = first.headers['ETag']
+        assert first.status_code == 200 and etag.startswith('"'), etag
+        assert first.headers['Last-Modified'] and 'no-cache' in first.headers['Cache-Control']
+
+        for headers in ({'If-None-Match': etag},
+                        {'If-Modified-Since': first.headers['Last-Modified']}):
+            cached = client.get('/api/ticker/AAPL/data', headers=headers)
+            assert cached.status_code == 304 and cached.data == b''
+            assert cached.headers['ETag'] == etag
+        assert len(calls) == 1, calls
+
+        # Risposta che dipende anche da valori extra: solo ETag, If-Modified-Since ignorato
+        status = client.get('/api/tickers/status')
+        assert 'Last-Modified' not in status.headers
+        window[0] = '2024-07-01'
+        since = client.get('/api/tickers/status', headers={'If-Modified-Since': first.headers['Last-Modified']})
+        assert since.status_code == 200 and since.get_json()['window'] == ['2024-07-01']
+        assert client.get('/api/tickers/status', headers={'If-None-Match': since.headers['ETag']}).status_code == 304
+
+        # Query diversa = variante diversa
+        assert client.get('/api/ticker/AAPL/data?limit=5', headers={'If-None-Match': etag}).status_code == 200
+
+        # Una nuova scrittura invalida l'ETag
+        manager.save_ticker_meta('AAPL', manager.load_ticker_meta('AAPL'))
+        updated = client.get('/api/ticker/AAPL/data', headers={'If-None-Match': etag})
+        assert updated.status_code == 200 and updated.headers['ETag'] != etag
+        assert len(calls) == 3, calls
+    print("✅ ETag / 304 OK")
+
+
+def test_compressed_responses():
+    """gzip negoziato sopra la soglia, ETag con suffisso di codifica riconosciuto nelle revalidazioni"""
+    print("🗜️ Test compressione risposte...")
+
+    versions = DataVersions()
+    app = Flask(__name__)
+    init_compression(app)
+    payload = {'values': list(range(2000))}
+
+    @app.route('/big')
+    @conditional(versions, lambda: ([DataVersions.ANALYSIS], None))
+    def big():
+        return jsonify(payload)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        return Response(iter(['data: x\n\n'] * 200), mimetype='text/event-stream')
+
+    client = app.test_client()
+    plain = client.get('/big')
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+    revalidated = client.get('/big', headers={'Accept-Encoding': 'gzip',
+                                              'If-None-Match': compressed.headers['ETag']})
+    assert revalidated.status_code == 304 and revalidated.headers['ETag'] == compressed.headers['ETag']
+
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/stream', headers={'Accept-Encoding': 'gzip'}).headers
+    print(f"✅ Compressione: {len(plain.data)} -> {len(compressed.data)} byte")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test richieste condizionali")
+    print("=" * 50)
+
+    tests = [
+        ("Versioni dati", test_data_versions),
+        ("Endpoint condizionale", test_conditional_endpoint),
+        ("Compressione risposte", test_compressed_responses),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test degli split e dividendi negli aggiornamenti incrementali: rilevamento
+sulla barra di sovrapposizione, riscalatura dello storico e invalidazioni.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from moduls.MarketData import SegmentStore
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis.SupportResistanceManager import SupportResistanceManager
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from TickerDataManager import TickerDataManager
+from testing_support import assert_matches_full_download
+
+
+def test_split_rescales_history():
+    """Split 2:1 tra due aggiornamenti: prezzi e volumi storici riscalati senza riscaricare"""
+    print("✂️ Test split durante aggiornamento incrementale...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(seed=7, as_of='2024-08-20')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        assert manager.update_ticker_data('T002')['status'] == 'success'
+        version = manager.versions.ticker('T002')
+
+        events = []
+        manager.events.subscribe(lambda event, payload: events.append((event, payload)))
+        downloads = []
+        real_download = manager.download_ticker_data
+        manager.download_ticker_data = lambda *a, **kw: downloads.append(kw) or real_download(*a, **kw)
+
+        provider.as_of = provider._to_date('2024-08-30')
+        result = manager.update_ticker_data('T002')
+        assert result['status'] == 'success' and result['records'] > 0, result
+
+        # Un solo download, dalla finestra di sovrapposizione (ultime 5 barre salvate)
+        assert downloads == [{'start_date': '2024-08-14'}], downloads
+
+        action = result['corporate_action']
+        assert abs(action['price_factor'] - 0.5) < 1e-9, action
+        assert action['overlap'] == {'start': '2024-08-14', 'end': '2024-08-20'}
+        assert manager.load_ticker_meta('T002')['corporate_actions'] == [action]
+        assert manager.versions.ticker('T002') > version
+        assert [e for e, _ in events] == ['ticker_readjusted', 'ticker_updated']
+
+        assert_matches_full_download(tmp, manager, provider, 'T002')
+    print(f"✅ Split rilevato (fattore {action['price_factor']:.2f}), storico identico al download completo")
+
+
+def test_dividend_rescales_adjusted_only():
+    """Dividendo: cambia solo lo storico adjusted, i prezzi grezzi restano invariati"""
+    print("💵 Test dividendo durante aggiornamento incrementale...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(seed=7, as_of='2024-06-05')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        assert manager.update_ticker_data('GOOG')['status'] == 'success'
+        raw_before = SegmentStore.read_segments(manager.data_dir_not_adj / 'GOOG_notAdjusted.csv')
+
+        provider.as_of = provider._to_date('2024-06-14')
+        action = manager.update_ticker_data('GOOG')['corporate_action']
+        assert abs(action['price_factor'] - 1) < 1e-9 and action['adj_factor'] < 1, action
+
+        raw_after = SegmentStore.read_segments(manager.data_dir_not_adj / 'GOOG_notAdjusted.csv')
+        pd.testing.assert_frame_equal(raw_after.iloc[:len(raw_before)], raw_before, rtol=1e-12)
+        assert_matches_full_download(tmp, manager, provider, 'GOOG')
+
+        # Nessun evento societario: nessuna riscalatura
+        provider.as_of = provider._to_date('2024-06-18')
+        result = manager.update_ticker_data('GOOG')
+        assert result['status'] == 'success' and 'corporate_action' not in result, result
+    print(f"✅ Dividendo rilevato (fattore adjusted {action['adj_factor']:.6f})")
+
+
+def test_analysis_invalidation():
+    """Il ticker riscalato viene rielaborato alla prossima analisi"""
+    print("🔁 Test invalidazione analisi...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = Path(tmp) / 'sr_state.json'
+        state_file.write_text(json.dumps({'T002': '2024-08-30T00:00:00', 'AAPL': '2024-08-30T00:00:00'}))
+        sr = SupportResistanceManager(state_file, Path(tmp), Path(tmp) / 'sr')
+
+        df = pd.DataFrame({'Date': pd.to_datetime(['2024-08-30'])})
+        assert not sr._needs_recalculation('T002', df)
+
+        sr.invalidate_ticker('T002')
+        assert sr._needs_recalculation('T002', df)
+        assert not sr._needs_recalculation('AAPL', df)
+        assert json.loads(state_file.read_text())['T002'].startswith('1900-01-01')
+    print("✅ Invalidazione analisi OK")
+
+
+
+def test_split_invalidates_both_sources():
+    """Split: analisi di adjusted e prezzi originali da ricalcolare, versioni di entrambe incrementate"""
+    print("🔁 Test invalidazione analisi per fonte dati...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(seed=7, as_of='2024-08-20')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        assert manager.add_ticker('T002')['status'] == 'success'
+        assert manager.update_ticker_data('T002')['status'] == 'success'
+
+        technical = TechnicalAnalysisManager(base_dir=tmp, versions=manager.versions)
+        results = technical.run_analysis_all_sources('both')
+        assert all(result['support_resistance'].get('T002') for result in results.values()), results
+        raw = technical.for_source(False)
+        versions = {use_adjusted: manager.versions.get(manager.versions.analysis_key(use_adjusted))
+                    for use_adjusted in (True, False)}
+
+        invalidated = []
+        technical.events.subscribe(lambda event, payload: invalidated.append(payload['data_source'])
+                                   if event == 'analysis_invalidated' else None)
+        manager.events.subscribe(lambda event, payload: technical.invalidate_ticker(payload['ticker'])
+                                 if event == 'ticker_readjusted' else None)
+        provider.as_of = provider._to_date('2024-08-30')
+        assert manager.update_ticker_data('T002')['corporate_action']
+
+        assert sorted(invalidated) == ['adjusted', 'notAdjusted']
+        for use_adjusted in (True, False):
+            assert manager.versions.get(manager.versions.analysis_key(use_adjusted)) > versions[use_adjusted]
+        for state_file in (raw.sr_state_file, raw.skorupinski_state_file):
+            state = json.loads(state_file.read_text())['T002']
+            timestamp = state['timestamp'] if isinstance(state, dict) else state
+            assert timestamp.startswith('1900-01-01'), (state_file.name, state)
+    print("✅ Stato delle analisi azzerato su adjusted e notAdjusted")
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test split e dividendi")
+    print("=" * 50)
+
+    tests = [
+        ("Split", test_split_rescales_history),
+        ("Dividendo", test_dividend_rescales_adjusted_only),
+        ("Invalidazione analisi", test_analysis_invalidation),
+        ("Invalidazione per fonte dati", test_split_invalidates_both_sources),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Test dell'importazione CSV delle liste ticker: lettura in streaming a
+blocchi, validazione, anteprima senza scritture, salvataggio dei metadati
+in una sola transazione e download accodati in background.
+"""
+
+import io
+import json
+import os
+import tempfile
+import time
+
+from werkzeug.datastructures import FileStorage
+
+from moduls.Core.AtomicFiles import atomic_write_many_json
+from moduls.MarketData import TickerListImport
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from TickerDataManager import TickerDataManager
+
+
+def _upload(rows, bom=False):
+    content = '\n'.join(rows)
+    return io.BytesIO(content.encode('utf-8-sig' if bom else 'utf-8'))
+
+
+def test_streaming_parse():
+    """Virgolette, BOM, righe vuote, colonne in ordine diverso; righe non valide riportate per riga"""
+    print("📄 Test lettura CSV a blocchi...")
+
+    rows = [
+        'Industry,Extra,Ticker,Company,Sector',
+        'Software,x,msft,"Microsoft, Inc.",Tech',
+        '',
+        'Autos,x,TSLA,Tesla,Consumer',
+        'Banks,x,,Empty Co,Finance',
+        'Banks,x,BAD TICKER,Bad,Finance',
+        'Software,x,MSFT,Microsoft again,Tech',
+        'Insurance,x,BRK-B,Berkshire,Finance',
+        'short,row',
+    ]
+    seen = set()
+    valid, errors, batches = [], [], 0
+    for columns, batch in TickerListImport.iter_row_batches(_upload(rows, bom=True), batch_size=3):
+        batches += 1
+        batch_valid, batch_errors = TickerListImport.validate_batch(columns, batch, seen)
+        valid.extend(batch_valid)
+        errors.extend(batch_errors)
+
+    assert batches == 3
+    assert [row['ticker'] for row in valid] == ['MSFT', 'TSLA', 'BRK-B']
+    assert valid[0]['company'] == 'Microsoft, Inc.' and valid[0]['industry'] == 'Software'
+    assert [(e['ticker'], e['status']) for e in errors] == [
+        ('Line 5', 'error'), ('Line 6', 'error'), ('MSFT', 'warning'), ('Line 9', 'error')]
+
+    try:
+        list(TickerListImport.iter_row_batches(_upload(['Ticker,Company', 'AAPL,Apple'])))
+    except ValueError as e:
+        assert 'Sector' in str(e) and 'Industry' in str(e)
+    else:
+        raise AssertionError("Colonne mancanti non rilevate")
+    print(f"✅ {len(valid)} righe valide, {len(errors)} segnalate")
+
+
+def test_dry_run_and_bulk_import():
+    """Anteprima senza scritture; import con un solo salvataggio di metadati e configurazione"""
+    print("📥 Test anteprima e import in blocco...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=5, as_of='2024-06-28'))
+        assert manager.add_ticker('AAPL')['status'] == 'success'
+        assert manager.update_ticker_data('AAPL')['status'] == 'success'
+        last_close = manager.load_ticker_meta('AAPL')['last_close_date']
+
+        rows = ['Ticker,Company,Sector,Industry', 'AAPL,Apple CSV,Tech,Hardware'] + \
+            [f'R{i:04d},Company {i},Sector {i % 11},Industry {i % 7}' for i in range(3000)]
+
+        preview = manager.process_csv_upload(_upload(rows), dry_run=True, batch_size=256)
+        assert preview['status'] == 'success' and preview['dry_run']
+        assert preview['summary']['added_tickers'] == 3000 and preview['summary']['skipped_tickers'] == 1
+        assert manager.load_ticker_config()['tickers'] == ['AAPL']
+        assert len(list(manager.meta_dir.glob('*.json'))) == 1
+        assert len(manager.info_cache) == 1
+
+        # Import: nessuna scrittura per singolo ticker, una transazione di metadati
+        single_writes, bulk_writes = [], []
+        manager.save_ticker_meta = lambda ticker, meta: single_writes.append(ticker)
+        original_bulk = manager.save_ticker_meta_bulk
+        manager.save_ticker_meta_bulk = lambda metas, merge=None: bulk_writes.append(len(metas)) or original_bulk(metas, merge)
+        config_version = manager.versions.get('config')
+
+        start = time.perf_counter()
+        result = manager.process_csv_upload(_upload(rows), replace_existing=True, batch_size=256)
+        elapsed = time.perf_counter() - start
+        assert result['status'] == 'success' and not result['dry_run'], result['message']
+        assert result['summary'] == {'total_tickers': 3001, 'added_tickers': 3000, 'updated_tickers': 1,
+                                     'skipped_tickers': 0, 'error_count': 0}
+        assert single_writes == [] and bulk_writes == [3001]
+        assert manager.versions.get('config') == config_version + 1
+
+        tickers = manager.load_ticker_config()['tickers']
+        assert tickers[0] == 'AAPL' and len(tickers) == 3001 and len(set(tickers)) == 3001
+        meta = manager.load_ticker_meta('R1234')
+        assert meta['info']['name'] == 'Company 1234' and meta['csv_import']['sector'] == 'Sector 2'
+        assert not list(manager.meta_dir.glob('.*.tmp'))
+
+        # Un ticker già presente sostituito conserva lo stato dei dati scaricati
+        aapl = manager.load_ticker_meta('AAPL')
+        assert aapl['info']['name'] == 'Apple CSV' and aapl['last_close_date'] == last_close
+        assert manager.get_ticker_info('R0042')['name'] == 'Company 42'
+        manager.info_cache.wait_for_refresh()
+    print(f"✅ 3001 ticker importati in {elapsed:.2f}s")
+
+
+def test_bulk_write_rollback():
+    """Se un file della transazione non si scrive nessun file viene toccato"""
+    print("↩️ Test transazione metadati...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(f'{tmp}/A.json', 'w') as f:
+            json.dump({'v': 1}, f)
+        items = [(f'{tmp}/A.json', {'v': 2}), (f'{tmp}/B.json', {'v': object()})]
+        try:
+            atomic_write_many_json(items)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("Oggetto non serializzabile accettato")
+        with open(f'{tmp}/A.json') as f:
+            assert json.load(f) == {'v': 1}
+        assert sorted(os.listdir(tmp)) == ['A.json']
+
+        assert atomic_write_many_json([(f'{tmp}/A.json', {'v': 3}), (f'{tmp}/B.json', {'v': 4})]) == 2
+        with open(f'{tmp}/B.json') as f:
+            assert json.load(f) == {'v': 4}
+    print("✅ Nessuna scrittura parziale")
+
+
+def test_replace_keeps_concurrent_update():
+    """Un aggiornamento dati tra validazione e salvataggio non viene annullato dall'import"""
+    print("🔒 Test merge dei metadati sotto lock...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=5, as_of='2024-06-28'))
+        assert manager.add_ticker('AAPL')['status'] == 'success'
+        assert manager.update_ticker_data('AAPL')['status'] == 'success'
+
+        # Lo scheduler salva i metadati mentre l'import sta validando il file
+        original_bulk = manager.save_ticker_meta_bulk
+
+        def bulk_after_update(metas, merge=None):
+            meta = manager.load_ticker_meta('AAPL')
+            meta.update({'last_close_date': '2024-07-01', 'total_records': 99999})
+            manager.save_ticker_meta('AAPL', meta)
+            return original_bulk(metas, merge)
+
+        manager.save_ticker_meta_bulk = bulk_after_update
+        rows = ['Ticker,Company,Sector,Industry', 'AAPL,Apple CSV,Tech,Hardware', 'NEW1,New One,Tech,Software']
+        result = manager.process_csv_upload(_upload(rows), replace_existing=True)
+        assert result['summary']['updated_tickers'] == 1 and result['summary']['added_tickers'] == 1
+
+        aapl = manager.load_ticker_meta('AAPL')
+        assert aapl['last_close_date'] == '2024-07-01' and aapl['total_records'] == 99999
+        assert aapl['info']['name'] == 'Apple CSV' and aapl['info']['exchange'] == 'NMS'
+        assert aapl['csv_import']['company'] == 'Apple CSV'
+        assert manager.load_ticker_meta('NEW1')['last_close_date'] is None
+
+        # Metadati di un ticker "nuovo" creati da un altro worker dopo il controllo
+        # iniziale: il rename lo ricontrolla sotto lock e passa al merge
+        original_lock, racing = manager.locks.ticker, []
+
+        def ticker_lock(ticker):
+            if ticker == 'NEW2' and racing == [True]:
+                racing.append(False)
+                manager.save_ticker_meta('NEW2', {'ticker': 'NEW2', 'info': {'exchange': 'NMS'},
+                                                  'last_close_date': '2024-06-28', 'total_records': 42})
+            return original_lock(ticker)
+
+        def bulk_with_race(metas, merge=None):
+            racing.append(True)
+            return original_bulk(metas, merge)
+
+        manager.locks.ticker = ticker_lock
+        manager.save_ticker_meta_bulk = bulk_with_race
+        rows = ['Ticker,Company,Sector,Industry', 'NEW2,New Two,Tech,Software']
+        assert manager.process_csv_upload(_upload(rows))['summary']['added_tickers'] == 1
+        assert racing == [True, False]
+        new2 = manager.load_ticker_meta('NEW2')
+        assert new2['last_close_date'] == '2024-06-28' and new2['total_records'] == 42
+        assert new2['info']['name'] == 'New Two' and new2['info']['exchange'] == 'NMS'
+    print("✅ Stato dei dati conservato")
+
+
+def test_queued_downloads():
+    """Upload Flask con download accodati in background per i soli ticker senza dati"""
+    print("⏳ Test download accodati...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=7, as_of='2024-06-28'))
+        rows = ['Ticker,Company,Sector,Industry'] + [f'D{i},Company {i},Tech,Software' for i in range(6)]
+        upload = FileStorage(stream=_upload(rows), filename='tickers.csv')
+
+        updated = []
+        manager.events.subscribe(lambda event, payload: updated.append(payload['ticker'])
+                                 if event == 'ticker_updated' else None)
+        result = manager.process_csv_upload(upload, download_data=True)
+        assert result['status'] == 'success' and result['queued_downloads'] == 6
+        assert manager.wait_for_downloads(timeout=60)
+        assert sorted(updated) == [f'D{i}' for i in range(6)]
+        for i in range(6):
+            assert (manager.data_dir / f'D{i}.csv').exists()
+            assert manager.load_ticker_meta(f'D{i}')['last_close_date'] == '2024-06-28'
+
+        # Reimport con sostituzione: i ticker hanno già i dati, nessun nuovo download
+        again = manager.process_csv_upload(_upload(rows), download_data=True, replace_existing=True)
+        assert again['summary']['updated_tickers'] == 6 and again['queued_downloads'] == 0
+    print("✅ 6 download completati in background")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test importazione CSV")
+    print("=" * 50)
+
+    tests = [
+        ("Lettura a blocchi", test_streaming_parse),
+        ("Anteprima e import in blocco", test_dry_run_and_bulk_import),
+        ("Transazione metadati", test_bulk_write_rollback),
+        ("Merge sotto lock", test_replace_keeps_concurrent_update),
+        ("Download accodati", test_queued_downloads),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test del canale eventi: EventBus dei manager e broker Server-Sent Events,
+anche con gli eventi condivisi tra worker tramite SharedState.
+"""
+
+import queue
+import tempfile
+from pathlib import Path
+
+from moduls.Core.EventBus import EventBus
+from moduls.Core.SharedState import SharedState
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.Web.ServerSentEvents import SseBroker, format_sse
+from TickerDataManager import TickerDataManager
+
+
+def test_sse_broker():
+    """Publish, formato text/event-stream e ripresa con Last-Event-ID"""
+    print("📡 Test broker SSE...")
+
+    assert format_sse('stats', {'a': 1}, 7) == 'id: 7\nevent: stats\ndata: {"a": 1}\n\n'
+
+    broker = SseBroker(heartbeat_seconds=0.01)
+    client = broker.subscribe()
+    assert broker.client_count == 1
+
+    broker.publish('stats', {'total_tickers': 3})
+    broker.publish('activities', [])
+    first = client.get_nowait()
+    assert first.startswith('id: 1\nevent: stats\n'), first
+    assert client.get_nowait().startswith('id: 2\nevent: activities\n')
+
+    # Un client che si riconnette riceve solo gli eventi successivi a Last-Event-ID
+    resumed = broker.subscribe(last_event_id=1)
+    assert resumed.get_nowait().startswith('id: 2\n')
+    assert resumed.empty()
+
+    broker.unsubscribe(client)
+    broker.unsubscribe(resumed)
+    assert broker.client_count == 0
+
+    # Lo stream apre con retry, poi heartbeat se non ci sono eventi
+    stream = broker.stream()
+    assert next(stream) == 'retry: 5000\n\n'
+    assert next(stream) == ': keep-alive\n\n'
+    stream.close()
+    assert broker.client_count == 0
+    print("✅ Broker SSE OK")
+
+
+def test_shared_broker():
+    """Evento pubblicato da un worker ricevuto dai client di un altro, con id e ripresa condivisi"""
+    print("🔀 Test eventi condivisi tra worker...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'app_state.sqlite3'
+        # Due worker: stesso database, broker e connessioni separati
+        publisher = SseBroker(store=SharedState(db_file), poll_seconds=0.05)
+        listener = SseBroker(store=SharedState(db_file, max_events=3), poll_seconds=0.05)
+        assert publisher.has_listeners and publisher.client_count == 0
+
+        publisher.publish('stats', {'total_tickers': 1})
+        client = listener.subscribe()
+        # Un client appena collegato riceve solo gli eventi successivi
+        publisher.publish('ticker_updated', {'ticker': 'AAPL'})
+        message = client.get(timeout=5)
+        assert message.startswith('id: 2\nevent: ticker_updated\n'), message
+        assert '"ticker": "AAPL"' in message and client.empty()
+
+        # Ripresa con Last-Event-ID su un terzo worker
+        publisher.publish('activities', [])
+        assert client.get(timeout=5).startswith('id: 3\n')
+        third = SseBroker(store=SharedState(db_file))
+        resumed = third.subscribe(last_event_id=1)
+        assert [resumed.get_nowait().split('\n')[0] for _ in range(2)] == ['id: 2', 'id: 3']
+        assert resumed.empty()
+        third.unsubscribe(resumed)
+
+        # Il database conserva solo gli ultimi max_events
+        for i in range(5):
+            listener.store.publish_event('stats', {'i': i})
+        assert [event_id for event_id, _, _ in listener.store.events_since(0)] == [6, 7, 8]
+
+        # Senza client il thread di lettura termina; il prossimo client riparte dall'ultimo evento
+        listener.unsubscribe(client)
+        listener._poller.join(5)
+        assert listener._poller is None
+        again = listener.subscribe()
+        try:
+            again.get(timeout=0.2)
+            assert False, 'eventi già inviati rigiocati'
+        except queue.Empty:
+            pass
+        listener.unsubscribe(again)
+
+        limited = SseBroker(max_clients=1)
+        stream = limited.stream(channel={'complete': False})
+        assert next(stream) == 'retry: 5000\n\n'
+        assert next(stream) == 'event: channel\ndata: {"complete": false}\n\n'
+        assert limited.is_full and not SseBroker().is_full
+        stream.close()
+        assert not limited.is_full
+    print("✅ Eventi condivisi OK")
+
+
+def test_events_route():
+    """/api/events: canale completo con eventi condivisi o un solo worker, 503 oltre il limite"""
+    print("🌐 Test /api/events...")
+
+    import app as webapp
+
+    def channel(client):
+        response = client.get('/api/events', buffered=False)
+        chunks = iter(response.response)
+        assert next(chunks) == b'retry: 5000\n\n'
+        first = next(chunks)
+        response.close()
+        return first
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            app = webapp.create_app('production', DATA_DIR=tmp, SECRET_KEY='test', WEB_WORKERS=3)
+            assert b'"complete": true' in channel(app.test_client())
+
+            app = webapp.create_app('testing', DATA_DIR=tmp, WEB_WORKERS=3)
+            assert b'"complete": false' in channel(app.test_client())
+
+            app = webapp.create_app('testing', DATA_DIR=tmp, SSE_MAX_CLIENTS=0)
+            response = app.test_client().get('/api/events')
+            assert response.status_code == 503 and response.headers['Retry-After'] == '60'
+        finally:
+            webapp.create_app()
+    print("✅ Route eventi OK")
+
+
+def test_manager_events():
+    """TickerDataManager notifica aggiunta, aggiornamento e rimozione dei ticker"""
+    print("🔔 Test eventi TickerDataManager...")
+
+    bus = EventBus()
+    failing = bus.subscribe(lambda event_type, payload: 1 / 0)
+    received = []
+    bus.subscribe(lambda event_type, payload: received.append(event_type))
+    bus.emit('ping')
+    assert received == ['ping'], received
+    bus.unsubscribe(failing)
+    assert len(bus) == 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(seed=5, as_of='2024-06-28')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        events = []
+        manager.events.subscribe(lambda event_type, payload: events.append((event_type, payload)))
+
+        manager.add_ticker('AAPL')
+        manager.update_ticker_data('AAPL')
+        manager.remove_ticker('AAPL')
+
+        types = [event_type for event_type, _ in events]
+        assert types == ['tickers_changed', 'ticker_updated', 'tickers_changed'], types
+        assert events[0][1]['added'] == ['AAPL']
+        assert events[1][1]['ticker'] == 'AAPL' and events[1][1]['result']['status'] == 'success'
+        assert events[2][1]['removed'] == ['AAPL']
+    print("✅ Eventi manager OK")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test canale eventi")
+    print("=" * 50)
+
+    tests = [
+        ("Broker SSE", test_sse_broker),
+        ("Eventi condivisi", test_shared_broker),
+        ("Route eventi", test_events_route),
+        ("Eventi manager", test_manager_events),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
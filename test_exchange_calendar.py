@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test dei calendari di borsa: festività NYSE/NASDAQ e Borsa Italiana,
+chiusure anticipate, ultima sessione attesa rispetto all'orario di chiusura
+e SmartStatus basato sulla borsa del ticker.
+"""
+
+from datetime import date, datetime
+from unittest import mock
+
+import numpy as np
+
+from moduls.MarketData.ExchangeCalendar import (
+    BORSA_ITALIANA, NYSE, calendar_for, calendar_code_for, exchange_from_meta, get_calendar
+)
+from SmartStatus import SmartStatusPython
+from testing_support import utc
+
+
+def test_nyse_holidays():
+    """Festività NYSE 2024-2025 generate dalle regole, comprese quelle osservate"""
+    print("🇺🇸 Test festività NYSE...")
+
+    nyse = get_calendar(NYSE)
+    assert nyse.holidays(2024) == [
+        '2024-01-01', '2024-01-15', '2024-02-19', '2024-03-29', '2024-05-27',
+        '2024-06-19', '2024-07-04', '2024-09-02', '2024-11-28', '2024-12-25',
+    ], nyse.holidays(2024)
+
+    # Festività nel weekend: osservate venerdì/lunedì (Capodanno di sabato non viene anticipato)
+    assert '2021-12-24' in nyse.holidays(2021) and '2021-12-31' not in nyse.holidays(2021)
+    assert '2022-06-20' in nyse.holidays(2022) and '2026-07-03' in nyse.holidays(2026)
+    assert '2018-12-05' in nyse.holidays(2018) and '2025-01-09' in nyse.holidays(2025)
+
+    # Chiusure anticipate alle 13:00 ora di New York
+    assert nyse.is_early_close('2024-11-29') and nyse.is_early_close('2024-07-03')
+    assert not nyse.is_early_close('2024-11-27')
+    assert nyse.close_datetime('2024-11-29').hour == 13
+    assert nyse.close_datetime('2024-11-27').hour == 16
+
+    sessions = nyse.session_strings('2024-03-27', '2024-04-02')
+    assert sessions.tolist() == ['2024-03-27', '2024-03-28', '2024-04-01', '2024-04-02'], sessions
+    assert len(nyse.sessions('2024-01-01', '2024-12-31')) == 252
+    print("✅ Festività NYSE OK")
+
+
+def test_borsa_italiana_holidays():
+    """Borsa Italiana: Pasquetta, Ferragosto e chiusure di fine anno"""
+    print("🇮🇹 Test festività Borsa Italiana...")
+
+    mil = get_calendar(BORSA_ITALIANA)
+    assert not mil.is_session('2024-04-01') and get_calendar(NYSE).is_session('2024-04-01')
+    assert not mil.is_session('2024-08-15') and not mil.is_session('2024-12-31')
+    assert mil.is_session('2024-07-04') and mil.is_session('2024-11-28')
+    assert mil.close_datetime('2024-05-02').strftime('%H:%M') == '17:30'
+    print("✅ Festività Borsa Italiana OK")
+
+
+def test_last_expected_session():
+    """Ultima sessione attesa rispetto all'orario di chiusura locale della borsa"""
+    print("🕓 Test ultima sessione attesa...")
+
+    nyse = get_calendar(NYSE)
+    # Mercoledì 2024-07-03 chiusura anticipata alle 13:00 New York (17:00 UTC)
+    assert nyse.last_expected_session(utc(2024, 7, 3, 16, 59)) == date(2024, 7, 2)
+    assert nyse.last_expected_session(utc(2024, 7, 3, 17, 0)) == date(2024, 7, 3)
+    # 4 luglio festivo: l'ultima sessione resta il 3 per tutta la giornata
+    assert nyse.last_expected_session(utc(2024, 7, 4, 23, 0)) == date(2024, 7, 3)
+    # Lunedì dopo Good Friday prima della chiusura: giovedì 28 marzo
+    assert nyse.last_expected_session(utc(2024, 4, 1, 15, 0)) == date(2024, 3, 28)
+
+    mil = get_calendar(BORSA_ITALIANA)
+    # Borsa Italiana chiude alle 17:30 ora di Roma (15:30 UTC in estate)
+    assert mil.last_expected_session(utc(2024, 6, 3, 15, 29)) == date(2024, 5, 31)
+    assert mil.last_expected_session(utc(2024, 6, 3, 15, 30)) == date(2024, 6, 3)
+
+    after = np.array(['2024-06-28', '2024-07-02', '2024-07-05'], dtype='datetime64[D]')
+    assert nyse.count_sessions_between(after, '2024-07-05').tolist() == [4, 2, 0]
+    assert nyse.sessions_between('2024-07-05', '2024-07-01') == 0
+    print("✅ Ultima sessione attesa OK")
+
+
+def test_ticker_mapping():
+    """Borsa del ticker da info.exchange, dal suffisso o NYSE di default"""
+    print("🗺️ Test mappatura ticker → borsa...")
+
+    assert calendar_code_for('NMS', 'AAPL') == NYSE
+    assert calendar_code_for('MIL', 'ENI.MI') == BORSA_ITALIANA
+    assert calendar_code_for(None, 'ISP.MI') == BORSA_ITALIANA
+    assert calendar_code_for('XYZ', 'KO') == NYSE
+    assert calendar_for(ticker='TIT.MI') is get_calendar(BORSA_ITALIANA)
+
+    assert exchange_from_meta({'info': {'exchange': 'N/A'}}) is None
+    assert exchange_from_meta({'info': {'exchange': 'MIL'}}) == 'MIL'
+    assert exchange_from_meta(None) is None
+    print("✅ Mappatura OK")
+
+
+def test_smart_status_with_calendars():
+    """SmartStatus: stessa data, esito diverso in base alla borsa"""
+    print("🧠 Test SmartStatus per borsa...")
+
+    status = SmartStatusPython()
+    # Martedì 2 aprile 2024 sera: NYSE aperta il lunedì, Milano chiusa per Pasquetta
+    now = utc(2024, 4, 2, 22, 0)
+    us = status.calculate_smart_status('2024-03-28', 'NMS', 'AAPL', now=now)
+    it = status.calculate_smart_status('28/03/2024', 'MIL', 'ENI.MI', now=now)
+    assert us['status_text'] == '⏰ 2 giorni' and us['needs_update'], us
+    assert it['status_text'] == '⏰ 1 giorno' and it['needs_update'], it
+
+    # Dati del venerdì, lunedì mattina: aggiornato
+    assert not status.calculate_smart_status('2024-06-07', ticker='KO', now=utc(2024, 6, 10, 12, 0))['needs_update']
+    # Molto in ritardo: conteggio limitato a 10 giorni
+    assert status.calculate_smart_status('2024-01-02', now=now)['status_text'] == '❌ 10 giorni'
+    assert status.calculate_smart_status('N/A')['status_text'] == '❌ Nessun dato'
+    assert status.calculate_smart_status('ieri')['status_text'] == '⚠️ Errore data'
+
+    assert status.get_market_holidays(2024, 'MIL')[:3] == ['2024-01-01', '2024-03-29', '2024-04-01']
+    assert not status.is_market_day(datetime(2024, 11, 28)) and status.is_market_day(datetime(2024, 11, 28), 'MIL')
+    print("✅ SmartStatus per borsa OK")
+
+
+def test_smart_status_batch():
+    """Batch: stessi esiti delle chiamate singole, una valutazione per borsa, cache per sessione"""
+    print("📦 Test SmartStatus batch...")
+
+    dates = ['2024-03-28', '28/03/2024', '2024-04-01', None, 'N/A', 'ieri', '2024-04-02'] * 20
+    exchanges = ['NMS', 'MIL', None, None, 'NYQ', None, 'BIT'] * 20
+    tickers = ['AAPL', 'ENI.MI', 'ISP.MI', 'KO', 'IBM', 'X', 'TIT.MI'] * 20
+    now = utc(2024, 4, 2, 22, 0)
+
+    status = SmartStatusPython()
+    expected = [SmartStatusPython().calculate_smart_status(d, e, t, now=now)
+                for d, e, t in zip(dates, exchanges, tickers)]
+
+    with mock.patch.object(status, '_evaluate', wraps=status._evaluate) as evaluate:
+        assert status.calculate_smart_status_batch(dates, exchanges, tickers, now=now) == expected
+        assert evaluate.call_count == 2  # una per borsa, sulle sole date distinte
+
+        # Stessa finestra di sessione: tutto dalla cache
+        assert status.calculate_smart_status_batch(dates, exchanges, tickers, now=utc(2024, 4, 3, 12, 0)) == expected
+        assert evaluate.call_count == 2
+
+        # Dopo la chiusura di Milano del 3 aprile (prima di New York) cambia solo la finestra di Milano
+        later = status.calculate_smart_status_batch(dates, exchanges, tickers, now=utc(2024, 4, 3, 16, 0))
+        assert evaluate.call_count == 3
+        assert later[1]['status_text'] == '⏰ 2 giorni' and later[0] == expected[0]
+
+    # Gli esiti restituiti sono copie: modificarli non altera la cache
+    later[0]['needs_update'] = None
+    assert status.calculate_smart_status('2024-03-28', 'NMS', now=utc(2024, 4, 3, 16, 0))['needs_update'] is True
+    assert len(status.session_window()) == 2
+    print("✅ SmartStatus batch OK")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test calendari di borsa")
+    print("=" * 50)
+
+    tests = [
+        ("Festività NYSE", test_nyse_holidays),
+        ("Festività Borsa Italiana", test_borsa_italiana_holidays),
+        ("Ultima sessione attesa", test_last_expected_session),
+        ("Mappatura ticker", test_ticker_mapping),
+        ("SmartStatus per borsa", test_smart_status_with_calendars),
+        ("SmartStatus batch", test_smart_status_batch),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test della strumentazione dei percorsi caldi: timer e contatori per fase,
+percentili, formato Prometheus, endpoint /api/debug/perf e dettaglio per
+pattern delle zone Skorupinski solo a livello DEBUG.
+"""
+
+import contextlib
+import io
+import logging
+import tempfile
+
+from moduls.Core.PerfMetrics import PerfMetrics, metrics
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from TickerDataManager import TickerDataManager
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_stage_timers():
+    """Conteggi, percentili, chiamate annidate contate una volta e testo Prometheus"""
+    print("⏱️ Test timer per fase...")
+
+    registry = PerfMetrics(max_samples=100)
+    for ms in range(1, 101):
+        registry.observe('sr_scan', ms / 1000)
+
+    @registry.timed('chart_build')
+    def build(depth):
+        return build(depth - 1) if depth else 'ok'
+
+    assert build(3) == 'ok'
+    with registry.timer('save'):
+        registry.increment('zones_found', 4)
+
+    snapshot = registry.snapshot()
+    sr_scan = snapshot['stages']['sr_scan']
+    assert sr_scan['count'] == 100 and sr_scan['max_ms'] == 100.0
+    assert sr_scan['p50_ms'] == 51.0 and sr_scan['p95_ms'] == 96.0 and sr_scan['p99_ms'] == 100.0
+    assert snapshot['stages']['chart_build']['count'] == 1
+    assert snapshot['stages']['save']['count'] == 1 and snapshot['counters'] == {'zones_found': 4}
+
+    # La finestra dei percentili scorre, i contatori cumulativi no
+    for _ in range(100):
+        registry.observe('sr_scan', 0.2)
+    sr_scan = registry.snapshot()['stages']['sr_scan']
+    assert sr_scan['count'] == 200 and sr_scan['p50_ms'] == 200.0
+
+    text = registry.prometheus_text()
+    assert '# TYPE tradingwebapp_stage_duration_seconds summary' in text
+    assert 'tradingwebapp_stage_duration_seconds{stage="sr_scan",quantile="0.95"} 0.200000' in text
+    assert 'tradingwebapp_stage_duration_seconds_count{stage="sr_scan"} 200' in text
+    assert 'tradingwebapp_zones_found_total 4' in text
+
+    registry.reset()
+    assert registry.snapshot()['stages'] == {}
+    print("✅ Percentili e contatori corretti")
+
+
+def test_pipeline_stages_and_pattern_debug():
+    """Download, process, save, S/R e zone misurati; dettaglio per pattern solo a livello DEBUG"""
+    print("🔬 Test fasi della pipeline...")
+
+    zone_logger = logging.getLogger('moduls.TechnicalAnalysis.SkorupinkiZoneManager')
+    handler = _Records()
+    zone_logger.addHandler(handler)
+    previous_level = zone_logger.level
+    metrics.reset()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=6, as_of='2024-06-28'))
+            assert data_manager.add_ticker('NVDA')['status'] == 'success'
+            assert data_manager.update_ticker_data('NVDA')['status'] == 'success'
+
+            technical = TechnicalAnalysisManager(base_dir=tmp)
+            technical.run_support_resistance_analysis()
+
+            zone_logger.setLevel(logging.INFO)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                assert technical.run_skorupinski_analysis().get('NVDA')
+            assert 'PATTERN' not in output.getvalue() and handler.messages == []
+
+            # Con il livello DEBUG ricompare il dettaglio per pattern
+            zone_logger.setLevel(logging.DEBUG)
+            manager = technical.skorupinski_manager
+            df = manager._filter_data_by_timeframe(manager._load_price_data('NVDA'), 'NVDA')
+            zones = manager._find_skorupinski_zones(df, 'NVDA')
+            assert any('PATTERN' in message for message in handler.messages)
+    finally:
+        zone_logger.removeHandler(handler)
+        zone_logger.setLevel(previous_level)
+
+    snapshot = metrics.snapshot()
+    for stage in ('download', 'process', 'save', 'sr_scan', 'zone_scan'):
+        assert snapshot['stages'][stage]['count'] >= 1, stage
+    assert snapshot['stages']['zone_scan']['count'] == 2
+    assert snapshot['counters']['zones_found'] >= len(zones)
+    print(f"✅ Fasi misurate: {', '.join(snapshot['stages'])}")
+
+
+def test_perf_endpoint():
+    """/api/debug/perf in JSON e Prometheus con chart_build e json_serialize"""
+    print("🌐 Test /api/debug/perf...")
+
+    import app as webapp
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            app = webapp.create_app('production', DATA_DIR=tmp, SECRET_KEY='test')
+            assert not logging.getLogger('moduls.TechnicalAnalysis').isEnabledFor(logging.DEBUG)
+
+            data_manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=8, as_of='2024-06-28'))
+            data_manager.add_ticker('AMD')
+            data_manager.update_ticker_data('AMD')
+
+            client = app.test_client()
+            metrics.reset()
+            assert client.get('/api/technical-analysis/chart-data/AMD?days=120').status_code == 200
+            assert client.get('/api/stats').status_code == 200
+
+            response = client.get('/api/debug/perf')
+            assert response.headers['Cache-Control'] == 'no-store'
+            stages = response.get_json()['stages']
+            assert stages['chart_build']['count'] == 1 and stages['json_serialize']['count'] == 2
+            assert {'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'} <= set(stages['chart_build'])
+
+            text = client.get('/api/debug/perf?format=prometheus&reset=1')
+            assert text.content_type.startswith('text/plain')
+            assert 'stage="chart_build"' in text.get_data(as_text=True)
+            assert client.get('/api/debug/perf').get_json()['stages'] == {}
+            assert client.get('/api/debug/perf?format=xml').status_code == 400
+        finally:
+            webapp.create_app()
+    assert logging.getLogger('moduls.TechnicalAnalysis').isEnabledFor(logging.DEBUG)
+    print("✅ Endpoint metriche funzionante")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test strumentazione")
+    print("=" * 50)
+
+    tests = [
+        ("Timer per fase", test_stage_timers),
+        ("Fasi della pipeline", test_pipeline_stages_and_pattern_debug),
+        ("Endpoint /api/debug/perf", test_perf_endpoint),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test del grafico Plotly assemblato come dict: stesso JSON della costruzione
+con make_subplots/add_hline/add_hrect, zone fuori dall'intervallo visibile
+scartate e numero di zone limitato, primitive per il grafico lato client.
+"""
+
+import json
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from moduls.MarketData.CompactPriceFormat import format_dates
+from moduls.TechnicalAnalysis import PlotlyChartBuilder
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+
+
+def _chart_data(zones, levels, days=120, volume=True):
+    rng = np.random.default_rng(4)
+    close = 100 + np.cumsum(rng.normal(0, 1, days))
+    prices = {
+        'date': list(range(19700, 19700 + days)),
+        'open': (close + rng.normal(0, 0.5, days)).tolist(),
+        'high': (close + 2).tolist(),
+        'low': (close - 2).tolist(),
+        'close': close.tolist(),
+        'decimals': None,
+    }
+    if volume:
+        prices['volume'] = rng.integers(1000, 5000, days).tolist()
+    return {'ticker': 'TEST', 'days': days, 'format': 'columnar', 'price_data': prices,
+            'support_resistance': levels, 'skorupinski_zones': zones}
+
+
+def _legacy_figure(data, ticker='TEST'):
+    """Figura costruita come faceva generate_plotly_chart prima del builder"""
+    prices = data['price_data']
+    has_volume = 'volume' in prices
+    row = dict(row=1, col=1) if has_volume else {}
+    if has_volume:
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.1,
+                            subplot_titles=(f'{ticker} - Analisi Tecnica', 'Volume'), row_heights=[0.7, 0.3])
+    else:
+        fig = make_subplots(rows=1, cols=1, subplot_titles=(f'{ticker} - Analisi Tecnica',))
+    dates = format_dates(np.asarray(prices['date']))
+    fig.add_trace(go.Candlestick(x=dates, open=prices['open'], high=prices['high'], low=prices['low'],
+                                 close=prices['close'], name=ticker,
+                                 increasing_line_color='#00C851', decreasing_line_color='#FF4444'), row=1, col=1)
+    if has_volume:
+        colors = ['#00C851' if c >= o else '#FF4444' for c, o in zip(prices['close'], prices['open'])]
+        fig.add_trace(go.Bar(x=dates, y=prices['volume'], name='Volume', marker_color=colors, opacity=0.7), row=2, col=1)
+
+    for level in data['support_resistance']:
+        color = '#28a745' if level['type'] == 'Support' else '#dc3545'
+        fig.add_hline(y=level['level'], line_dash="dash", line_color=color, line_width=2,
+                      annotation_text=f"{level['type'].title()} ${level['level']:.2f}",
+                      annotation_position="top right", **row)
+    for zone_type, fill, line in (('Demand', 'rgba(40, 167, 69, 0.2)', 'rgba(40, 167, 69, 0.8)'),
+                                  ('Supply', 'rgba(220, 53, 69, 0.2)', 'rgba(220, 53, 69, 0.8)')):
+        zones = [z for z in data['skorupinski_zones'] if z['type'] == zone_type]
+        for i, zone in enumerate(zones):
+            fig.add_hrect(y0=zone['zone_bottom'], y1=zone['zone_top'], fillcolor=fill, line_color=line, line_width=1,
+                          annotation_text=f"{zone_type} ${zone['zone_center']:.2f}", annotation_position="top left",
+                          name=f"{zone_type.lower()}_zone_{i}", **row)
+
+    fig.update_layout(title=f'{ticker} - Analisi Tecnica Completa', xaxis_title='Data', yaxis_title='Prezzo ($)',
+                      template='plotly_white', showlegend=True,
+                      legend=dict(orientation="v", yanchor="top", y=0.99, xanchor="left", x=1.01),
+                      hovermode='x unified')
+    fig.update_xaxes(rangeslider_visible=False)
+    return fig
+
+
+def _zone(zone_type, bottom, strength=5.0):
+    return {'type': zone_type, 'zone_bottom': bottom, 'zone_top': bottom + 1.5,
+            'zone_center': bottom + 0.75, 'strength_score': strength}
+
+
+def test_same_json_as_plotly_api():
+    """Con poche zone visibili il JSON coincide con quello di add_hline/add_hrect"""
+    print("🧱 Test equivalenza con l'API Plotly...")
+
+    zones = [_zone('Demand', 95), _zone('Supply', 100), _zone('Demand', 90.5), _zone('Supply', 102)]
+    levels = [{'type': 'Support', 'level': 96.25}, {'type': 'Resistance', 'level': 101.5}]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TechnicalAnalysisManager(base_dir=tmp)
+        for volume in (True, False):
+            data = _chart_data(zones, levels, volume=volume)
+            # Tutte le zone nell'intervallo visibile
+            low, high = PlotlyChartBuilder.visible_price_range(data['price_data']['low'], data['price_data']['high'])
+            assert all(low <= z['zone_bottom'] and z['zone_top'] <= high for z in zones), (low, high)
+
+            with mock.patch.object(manager, 'get_ticker_chart_data', return_value=data):
+                chart = manager.generate_plotly_chart('TEST', 120)
+            assert json.loads(chart['chart_json']) == json.loads(_legacy_figure(data).to_json())
+            assert [z['id'] for z in chart['zone_legend']] == ['demand_0', 'demand_1', 'supply_0', 'supply_1']
+            assert chart['data_info']['plotted_zones'] == 4 and chart['data_info']['plotted_levels'] == 2
+    print("✅ Stesso JSON dell'API Plotly")
+
+
+def test_zones_filtered_to_visible_range():
+    """Centinaia di zone: solo quelle visibili, al massimo MAX_CHART_ZONES, le più forti"""
+    print("🔭 Test zone nell'intervallo visibile...")
+
+    rng = np.random.default_rng(9)
+    zones = [_zone('Demand' if i % 2 else 'Supply', float(b), float(s))
+             for i, (b, s) in enumerate(zip(rng.uniform(50, 200, 1000), rng.uniform(0, 10, 1000)))]
+    levels = [{'type': 'Support', 'level': float(v)} for v in rng.uniform(20, 300, 200)]
+    data = _chart_data(zones, levels)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TechnicalAnalysisManager(base_dir=tmp)
+        with mock.patch.object(manager, 'get_ticker_chart_data', return_value=data):
+            started = time.perf_counter()
+            chart = manager.generate_plotly_chart('TEST', 120)
+            builder_time = time.perf_counter() - started
+
+    figure = json.loads(chart['chart_json'])
+    rects = [s for s in figure['layout']['shapes'] if s['type'] == 'rect']
+    lines = [s for s in figure['layout']['shapes'] if s['type'] == 'line']
+    low, high = PlotlyChartBuilder.visible_price_range(data['price_data']['low'], data['price_data']['high'])
+
+    visible = [z for z in zones if z['zone_top'] >= low and z['zone_bottom'] <= high]
+    assert len(visible) > PlotlyChartBuilder.MAX_CHART_ZONES * 2
+    assert len(rects) == PlotlyChartBuilder.MAX_CHART_ZONES * 2  # tetto per tipo di zona
+    assert all(s['y1'] >= low and s['y0'] <= high for s in rects)
+    assert len(lines) <= PlotlyChartBuilder.MAX_CHART_LEVELS and all(low <= s['y0'] <= high for s in lines)
+
+    # Rimangono le zone più forti tra le visibili di ciascun tipo
+    demand_visible = [z for z in visible if z['type'] == 'Demand']
+    weakest_kept = min(z['strength'] for z in chart['zone_legend'] if z['type'] == 'Demand')
+    strongest_dropped = sorted((z['strength_score'] for z in demand_visible), reverse=True)[PlotlyChartBuilder.MAX_CHART_ZONES]
+    assert weakest_kept >= strongest_dropped
+
+    # Leggenda e shapes si corrispondono (toggle della zona lato client)
+    names = {s['name'] for s in rects}
+    assert {z['id'].replace('_', '_zone_') for z in chart['zone_legend']} == names
+    assert chart['data_info']['demand_zones'] + chart['data_info']['supply_zones'] == len(zones)
+    print(f"✅ {len(rects)}/{len(zones)} zone disegnate in {builder_time * 1000:.0f} ms")
+
+
+def _tail(data, days):
+    """Stessi dati con solo gli ultimi days giorni (richiesta con meno giorni)"""
+    prices = {key: (value[-days:] if isinstance(value, list) else value) for key, value in data['price_data'].items()}
+    return {**data, 'days': days, 'price_data': prices}
+
+
+def test_chart_primitives():
+    """Primitive per il client: stesse zone del grafico del server dopo il tetto, riusabili con meno giorni"""
+    print("🧩 Test primitive del grafico lato client...")
+
+    rng = np.random.default_rng(9)
+    zones = [_zone('Demand' if i % 2 else 'Supply', float(b), float(s))
+             for i, (b, s) in enumerate(zip(rng.uniform(50, 200, 1000), rng.uniform(0, 10, 1000)))]
+    levels = [{'type': 'Support', 'level': float(v)} for v in rng.uniform(20, 300, 200)]
+    data = _chart_data(zones, levels)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TechnicalAnalysisManager(base_dir=tmp)
+        with mock.patch.object(manager, 'get_ticker_chart_data', return_value=data):
+            primitives = manager.get_chart_primitives('TEST', 120)
+            chart = manager.generate_plotly_chart('TEST', 120)
+        with mock.patch.object(manager, 'get_ticker_chart_data', return_value=_tail(data, 30)):
+            short_chart = manager.generate_plotly_chart('TEST', 30)
+
+    # Nessuna figura: solo colonne e primitive, serializzabili in JSON
+    assert 'chart_json' not in primitives and primitives['format'] == 'primitives'
+    assert primitives['columns']['date'] == data['price_data']['date']
+    json.dumps(primitives)
+
+    # Zone e livelli nell'intervallo visibile, senza tetto
+    low, high = PlotlyChartBuilder.visible_price_range(data['price_data']['low'], data['price_data']['high'])
+    visible = [z for z in zones if z['zone_top'] >= low and z['zone_bottom'] <= high]
+    assert len(primitives['zones']) == len(visible) > PlotlyChartBuilder.MAX_CHART_ZONES * 2
+    assert all(low <= lv['level'] <= high for lv in primitives['levels'])
+    assert primitives['lod'] == {'margin': PlotlyChartBuilder.VISIBLE_RANGE_MARGIN,
+                                 'max_zones': PlotlyChartBuilder.MAX_CHART_ZONES,
+                                 'max_levels': PlotlyChartBuilder.MAX_CHART_LEVELS}
+
+    # Tetto applicato alle primitive (come fa il client) = zone del grafico del server
+    def client_selection(prices, days):
+        price_range = PlotlyChartBuilder.visible_price_range(prices['low'][-days:], prices['high'][-days:])
+        current = prices['close'][-1]
+        selected = []
+        for zone_type in ('Demand', 'Supply'):
+            items = [{'zone': {'strength_score': z['strength']}, 'id': z['id'], 'top': z['top'],
+                      'bottom': z['bottom'], 'center': z['center']}
+                     for z in primitives['zones'] if z['type'] == zone_type]
+            selected += [z['id'] for z in PlotlyChartBuilder.select_zones(items, price_range, current)]
+        return selected
+
+    assert client_selection(primitives['columns'], 120) == [z['id'] for z in chart['zone_legend']]
+    # Con meno giorni i dati già scaricati bastano: stesse zone del grafico a 30 giorni
+    assert client_selection(primitives['columns'], 30) == [z['id'] for z in short_chart['zone_legend']]
+    assert primitives['data_info']['demand_zones'] + primitives['data_info']['supply_zones'] == len(zones)
+    print(f"✅ {len(primitives['zones'])} zone visibili inviate come primitive")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test grafico Plotly")
+    print("=" * 50)
+
+    tests = [
+        ("Equivalenza API Plotly", test_same_json_as_plotly_api),
+        ("Zone visibili", test_zones_filtered_to_visible_range),
+        ("Primitive lato client", test_chart_primitives),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test delle barre settimanali e mensili: aggiornamento incrementale uguale
+alla ricostruzione completa, calcolo al volo per i ticker senza rollup,
+selezione del timeframe in grafico e analisi.
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from moduls.MarketData import Rollups, SegmentStore
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from TickerDataManager import TickerDataManager
+
+
+def _expected_rollup(daily_path, timeframe):
+    daily = SegmentStore.read_segments(daily_path, float_precision='round_trip')
+    return Rollups.rollup_frame(daily, timeframe)
+
+
+def test_rollup_frame():
+    """Settimane da lunedì e mesi di calendario, Last Date all'ultima sessione"""
+    print("🗓️ Test aggregazione settimanale/mensile...")
+
+    dates = pd.bdate_range('2024-01-24', '2024-03-08')
+    daily = pd.DataFrame({
+        'Date': dates.strftime('%Y-%m-%d'),
+        'Open': np.arange(len(dates)) + 10.0,
+        'High': np.arange(len(dates)) + 12.0,
+        'Low': np.arange(len(dates)) + 9.0,
+        'Close': np.arange(len(dates)) + 11.0,
+        'Volume': np.full(len(dates), 100),
+    })
+
+    weekly = Rollups.rollup_frame(daily, Rollups.WEEKLY)
+    assert weekly['Date'].iloc[0] == '2024-01-22' and weekly['Last Date'].iloc[0] == '2024-01-26'
+    assert (pd.to_datetime(weekly['Date']).dt.dayofweek == 0).all()
+    assert weekly['Open'].iloc[0] == 10.0 and weekly['Close'].iloc[0] == 13.0 and weekly['Volume'].iloc[0] == 300
+    assert weekly['Last Date'].iloc[-1] == '2024-03-08'
+
+    monthly = Rollups.rollup_frame(daily, Rollups.MONTHLY)
+    assert list(monthly['Date']) == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert list(monthly['Last Date']) == ['2024-01-31', '2024-02-29', '2024-03-08']
+    assert monthly['High'].iloc[1] == daily.loc[daily['Date'].str.startswith('2024-02'), 'High'].max()
+
+    assert Rollups.rollup_path('data/daily_notAdjusted/X_notAdjusted.csv', Rollups.WEEKLY) == \
+        Path('data/weekly_notAdjusted/X_notAdjusted.csv')
+    with pytest.raises(ValueError):
+        Rollups.validate_timeframe('hourly')
+    print(f"✅ {len(daily)} sessioni -> {len(weekly)} settimane, {len(monthly)} mesi")
+
+
+def test_incremental_rollups():
+    """Append giornalieri: solo il periodo in corso viene riscritto, risultato uguale alla ricostruzione"""
+    print("🔁 Test aggiornamento incrementale dei rollup...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(seed=5, as_of='2024-05-01')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        assert manager.update_ticker_data('AAPL')['status'] == 'success'
+
+        daily_files = (manager.data_dir / 'AAPL.csv', manager.data_dir_not_adj / 'AAPL_notAdjusted.csv')
+        for daily_path in daily_files:
+            for timeframe in Rollups.ROLLUP_TIMEFRAMES:
+                assert Rollups.rollup_path(daily_path, timeframe).exists()
+
+        for day in pd.bdate_range('2024-05-02', '2024-05-10').strftime('%Y-%m-%d'):
+            provider.as_of = provider._to_date(day)
+            assert manager.update_ticker_data('AAPL')['status'] == 'success'
+
+        # Ogni aggiornamento riscrive una sola barra settimanale e una mensile
+        weekly_adj = Rollups.rollup_path(daily_files[0], Rollups.WEEKLY)
+        segments = SegmentStore.load_manifest(weekly_adj)['segments']
+        assert segments and all(segment['rows'] == 1 for segment in segments)
+
+        for daily_path in daily_files:
+            for timeframe in Rollups.ROLLUP_TIMEFRAMES:
+                stored = SegmentStore.read_segments(Rollups.rollup_path(daily_path, timeframe),
+                                                    float_precision='round_trip')
+                expected = _expected_rollup(daily_path, timeframe)
+                pd.testing.assert_frame_equal(stored, expected, check_dtype=False, rtol=1e-9)
+
+        last = SegmentStore.read_segments(weekly_adj).iloc[-1]
+        assert last['Date'] == '2024-05-06' and last['Last Date'] == '2024-05-10'
+
+        # Rimozione del ticker: spariscono anche i rollup
+        manager.add_ticker('AAPL')
+        assert manager.remove_ticker('AAPL')['status'] == 'success'
+        assert not weekly_adj.exists()
+    print(f"✅ {len(segments)} aggiornamenti, barre uguali alla ricostruzione completa")
+
+
+def test_timeframe_selection():
+    """Grafico e analisi sulle barre settimanali/mensili; calcolo al volo senza file di rollup"""
+    print("📊 Test selezione timeframe...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=11, as_of='2024-06-28'))
+        assert data_manager.add_ticker('AAPL')['status'] == 'success'
+        assert data_manager.update_ticker_data('AAPL')['status'] == 'success'
+        technical = TechnicalAnalysisManager(base_dir=tmp)
+
+        weekly = technical.get_chart_primitives('AAPL', 365, include_analysis=False, timeframe='weekly')
+        assert weekly['timeframe'] == 'weekly' and weekly['resolution'] == '1W'
+        assert 70 <= len(weekly['columns']['date']) <= 80
+
+        # Senza file di rollup (ticker scaricato prima dei rollup) le barre sono calcolate al volo
+        stored = technical.load_ticker_price_data('AAPL', days=0, timeframe='monthly')
+        for daily_path in (data_manager.data_dir / 'AAPL.csv', data_manager.data_dir_not_adj / 'AAPL_notAdjusted.csv'):
+            Rollups.remove_rollups(daily_path)
+        on_the_fly = technical.load_ticker_price_data('AAPL', days=0, timeframe='monthly')
+        pd.testing.assert_frame_equal(on_the_fly, stored, check_dtype=False, rtol=1e-9)
+        assert not Rollups.rollup_path(data_manager.data_dir / 'AAPL.csv', 'monthly').exists()
+
+        # Analisi settimanale in file separati, il giornaliero non viene toccato
+        results = technical.run_full_analysis(timeframe='weekly')
+        assert results['support_resistance'].get('AAPL') and results['skorupinski_zones'].get('AAPL')
+        assert (technical.sr_output_dir / 'AAPL_SR_weekly.csv').exists()
+        assert not (technical.sr_output_dir / 'AAPL_SR.csv').exists()
+        assert technical.sr_manager.timeframe == 'daily'
+
+        chart = technical.generate_plotly_chart('AAPL', 730, timeframe='weekly')
+        assert chart['data_info']['timeframe'] == 'weekly' and chart['data_info']['sr_levels'] > 0
+        daily_chart = technical.generate_plotly_chart('AAPL', 730)
+        assert daily_chart['data_info']['sr_levels'] == 0
+
+        # Tutte le API dei grafici accettano ?timeframe, anche /chart
+        import app as webapp
+        try:
+            client = webapp.create_app('testing', DATA_DIR=tmp).test_client()
+            chart_data = client.get('/api/technical-analysis/chart/AAPL?days=730&timeframe=weekly').get_json()
+            expected = technical.get_ticker_chart_data('AAPL', 730, include_analysis=False, timeframe='weekly')
+            assert chart_data['timeframe'] == 'weekly' and chart_data['price_data'] == expected['price_data']
+            assert len(chart_data['support_resistance']) > 0
+            assert client.get('/api/technical-analysis/chart/AAPL?timeframe=hourly').status_code == 400
+        finally:
+            webapp.create_app()
+    print(f"✅ {len(weekly['columns']['date'])} barre settimanali per 365 giorni")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test barre settimanali e mensili")
+    print("=" * 50)
+
+    tests = [
+        ("Aggregazione settimanale/mensile", test_rollup_frame),
+        ("Aggiornamento incrementale", test_incremental_rollups),
+        ("Selezione timeframe", test_timeframe_selection),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Test dello storage a segmenti: append incrementali, letture delle ultime
+barre senza toccare i segmenti vecchi, compattazione e aggiornamenti del manager.
+"""
+
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from moduls.MarketData import SegmentStore
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from TickerDataManager import TickerDataManager
+
+
+def _prices(start, periods):
+    dates = pd.bdate_range(start, periods=periods).strftime('%Y-%m-%d')
+    values = [100.0 + i for i in range(periods)]
+    return pd.DataFrame({'Date': dates, 'Open': values, 'High': values, 'Low': values,
+                         'Close': values, 'Volume': [1000 + i for i in range(periods)]})
+
+
+def test_append_and_tail_reads():
+    """Ogni append crea un delta; le ultime N barre non leggono il segmento base"""
+    print("🧩 Test append e letture tail...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'AAPL.csv'
+        full = _prices('2020-01-01', 600)
+        SegmentStore.write_base(path, full.iloc[:500])
+        base_bytes = path.stat().st_size
+
+        for start in range(500, 600, 20):
+            # Ogni batch ripete l'ultima riga già salvata: viene scartata
+            assert SegmentStore.append_segment(path, full.iloc[start - 1:start + 20]) == 20
+        assert path.stat().st_size == base_bytes, "il segmento base non deve essere riscritto"
+
+        manifest = SegmentStore.load_manifest(path)
+        assert len(manifest['segments']) == 5 and manifest['base']['rows'] == 500
+        assert manifest['segments'][-1]['last_date'] == full['Date'].iloc[-1]
+        assert SegmentStore.row_count(path) == 600
+
+        pd.testing.assert_frame_equal(SegmentStore.read_segments(path), full)
+
+        opened = []
+        real_read_csv = pd.read_csv
+
+        def tracking_read_csv(file_path, *args, **kwargs):
+            # Il base arriva come file aperto
+            opened.append(Path(getattr(file_path, 'name', file_path)).name)
+            return real_read_csv(file_path, *args, **kwargs)
+
+        with mock.patch.object(SegmentStore.pd, 'read_csv', tracking_read_csv):
+            last = SegmentStore.read_segments(path, tail=30)
+            assert opened == ['000004.csv', '000005.csv'], opened
+
+            opened.clear()
+            window = SegmentStore.read_segments(path, tail=150)
+            assert opened[0] == 'AAPL.csv' and len(opened) == 6, opened
+
+        pd.testing.assert_frame_equal(last, full.tail(30).reset_index(drop=True))
+        pd.testing.assert_frame_equal(window, full.tail(150).reset_index(drop=True))
+        assert SegmentStore.read_segments(path, tail=0).empty
+    print("✅ Append e letture tail OK")
+
+
+def test_compaction():
+    """La compattazione produce lo stesso contenuto con un solo segmento"""
+    print("🗜️ Test compattazione...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'MSFT.csv'
+        full = _prices('2021-01-01', 300)
+        SegmentStore.write_base(path, full.iloc[:200])
+        for start in range(200, 300, 10):
+            SegmentStore.append_segment(path, full.iloc[start:start + 10])
+
+        assert SegmentStore.needs_compaction(path, max_segments=10)
+        assert SegmentStore.compact(path)
+        assert not SegmentStore.compact(path)
+
+        manifest = SegmentStore.load_manifest(path)
+        assert manifest['segments'] == [] and manifest['base']['rows'] == 300
+        assert sorted(p.name for p in SegmentStore.segments_dir(path).iterdir()) == ['manifest.json']
+        pd.testing.assert_frame_equal(pd.read_csv(path, dtype={'Date': str}), full)
+
+        # Delta residui di una compattazione interrotta: le date duplicate vengono scartate
+        SegmentStore.append_segment(path, _prices('2022-03-01', 5))
+        (SegmentStore.segments_dir(path) / 'stale.csv').write_text(full.tail(3).to_csv(index=False))
+        manifest = SegmentStore.load_manifest(path)
+        manifest['segments'].insert(0, {'file': 'stale.csv', 'rows': 3})
+        SegmentStore._save_manifest(path, manifest)
+        merged = SegmentStore.read_segments(path)
+        assert merged['Date'].is_unique and merged['Date'].is_monotonic_increasing and len(merged) == 305
+
+        SegmentStore.remove(path)
+        assert not path.exists() and not SegmentStore.segments_dir(path).exists()
+    print("✅ Compattazione OK")
+
+
+def test_upsert_segments():
+    """Revisioni e buchi riempiti: conteggi e letture tail restano esatti"""
+    print("🔁 Test upsert...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'KO.csv'
+        full = _prices('2023-01-02', 120)
+        stored = full.drop(index=[30, 31, 110])
+        SegmentStore.write_base(path, stored.iloc[:100])
+        SegmentStore.append_segment(path, stored.iloc[100:])
+
+        # Ultime due barre revisionate + una nuova
+        revised = pd.concat([full.iloc[118:], _prices('2023-06-19', 1)], ignore_index=True)
+        revised.loc[:1, 'Close'] += 0.5
+        assert SegmentStore.upsert_segment(path, revised) == {'appended': 1, 'inserted': 0, 'replaced': 2}
+
+        # Riparazione dei buchi: date vecchie, non devono finire in coda
+        assert SegmentStore.upsert_segment(path, full.iloc[[30, 31, 110]]) == {'appended': 0, 'inserted': 3, 'replaced': 0}
+
+        expected = pd.concat([full, _prices('2023-06-19', 1)], ignore_index=True)
+        expected.loc[118:119, 'Close'] += 0.5
+        assert SegmentStore.row_count(path) == len(expected) == 121
+        pd.testing.assert_frame_equal(SegmentStore.read_segments(path), expected)
+        for tail in (1, 3, 12, 40):
+            pd.testing.assert_frame_equal(SegmentStore.read_segments(path, tail=tail),
+                                          expected.tail(tail).reset_index(drop=True))
+
+        assert SegmentStore.compact(path)
+        pd.testing.assert_frame_equal(pd.read_csv(path, dtype={'Date': str}), expected)
+    print("✅ Upsert OK")
+
+
+def test_rewritten_base_ignores_stale_segments():
+    """Base riscritto (riscalatura) con delta non ancora rimossi: i vecchi delta non vengono più letti"""
+    print("💥 Test base riscritto prima della rimozione dei delta...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'AAPL.csv'
+        full = _prices('2020-01-01', 120)
+        SegmentStore.write_base(path, full.iloc[:100])
+        for start in range(100, 120, 10):
+            SegmentStore.append_segment(path, full.iloc[start:start + 10])
+
+        # Storico riscalato; il processo si interrompe prima di eliminare i delta
+        rescaled = full.copy()
+        rescaled[['Open', 'High', 'Low', 'Close']] *= 0.5
+        with mock.patch.object(SegmentStore.shutil, 'rmtree', side_effect=OSError('crash')):
+            try:
+                SegmentStore.write_base(path, rescaled)
+            except OSError:
+                pass
+        assert len(SegmentStore.load_manifest(path)['segments']) == 2
+
+        pd.testing.assert_frame_equal(SegmentStore.read_segments(path), rescaled)
+        pd.testing.assert_frame_equal(SegmentStore.read_segments(path, tail=15), rescaled.tail(15).reset_index(drop=True))
+        assert SegmentStore.row_count(path) == 120
+        assert not SegmentStore.needs_compaction(path, max_segments=1)
+        assert not SegmentStore.compact(path)
+
+        # Il delta successivo riparte da un manifest nuovo, senza riusare i nomi dei vecchi
+        extra = _prices('2020-06-17', 3)
+        assert SegmentStore.append_segment(path, extra) == 3
+        manifest = SegmentStore.load_manifest(path)
+        assert [segment['file'] for segment in manifest['segments']] == ['000003.csv']
+        expected = pd.concat([rescaled, extra], ignore_index=True)
+        pd.testing.assert_frame_equal(SegmentStore.read_segments(path), expected)
+        assert SegmentStore.compact(path)
+        pd.testing.assert_frame_equal(pd.read_csv(path, dtype={'Date': str}), expected)
+    print("✅ Delta obsoleti ignorati")
+
+def test_manager_incremental_segments():
+    """Aggiornamenti giornalieri del manager: delta, compattazione in background, dati identici"""
+    print("📈 Test aggiornamenti incrementali a segmenti...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(seed=5, as_of='2024-05-01')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        assert manager.update_ticker_data('AAPL')['status'] == 'success'
+        file_adj = manager.data_dir / 'AAPL.csv'
+        base_bytes = file_adj.stat().st_size
+
+        appended = 0
+        base_versions = {base_bytes}
+        for day in pd.bdate_range('2024-05-02', '2024-06-28').strftime('%Y-%m-%d'):
+            provider.as_of = provider._to_date(day)
+            result = manager.update_ticker_data('AAPL')
+            appended += result['records']
+            with manager.locks.ticker('AAPL'):
+                # Gli append non toccano il base: cambia solo con la compattazione
+                manifest = SegmentStore.load_manifest(file_adj)
+                assert manifest['base']['bytes'] == file_adj.stat().st_size
+                base_versions.add(manifest['base']['bytes'])
+        assert appended > SegmentStore.DEFAULT_MAX_SEGMENTS
+        assert len(base_versions) <= 1 + appended // SegmentStore.DEFAULT_MAX_SEGMENTS, base_versions
+
+        # La compattazione in background è partita almeno una volta
+        manager._compactor.shutdown(wait=True)
+        assert file_adj.stat().st_size > base_bytes
+        assert len(SegmentStore.load_manifest(file_adj)['segments']) < SegmentStore.DEFAULT_MAX_SEGMENTS
+
+        # Stesso contenuto di un download completo (lo storico adjusted viene
+        # riscalato ai dividendi successivi al primo download)
+        reference = TickerDataManager(base_dir=Path(tmp) / 'ref', provider=provider)
+        assert reference.update_ticker_data('AAPL')['status'] == 'success'
+        for name in ('daily/AAPL.csv', 'daily_notAdjusted/AAPL_notAdjusted.csv'):
+            stored = SegmentStore.read_segments(Path(tmp) / 'data' / name)
+            expected = pd.read_csv(Path(tmp) / 'ref' / 'data' / name, dtype={'Date': str})
+            pd.testing.assert_frame_equal(stored, expected, rtol=1e-9)
+
+        meta = manager.load_ticker_meta('AAPL')
+        assert meta['total_records'] == SegmentStore.row_count(file_adj)
+
+        manager.compact_ticker('AAPL')
+        assert SegmentStore.load_manifest(file_adj)['segments'] == []
+        status = manager.get_single_ticker_status('AAPL')
+        assert status['file_sizes']['adjusted'] != '0 KB'
+
+        assert manager.remove_ticker('AAPL')['status'] == 'error'  # non in configurazione
+        manager.add_ticker('AAPL')
+        assert manager.remove_ticker('AAPL')['status'] == 'success'
+        assert not SegmentStore.segments_dir(file_adj).exists()
+        print(f"✅ {appended} record appesi come segmenti")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test storage a segmenti")
+    print("=" * 50)
+
+    tests = [
+        ("Append e letture tail", test_append_and_tail_reads),
+        ("Compattazione", test_compaction),
+        ("Upsert", test_upsert_segments),
+        ("Base riscritto", test_rewritten_base_ignores_stale_segments),
+        ("Aggiornamenti incrementali", test_manager_incremental_segments),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
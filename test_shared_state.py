@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Test del profilo multi-worker: stato condiviso su SQLite visto allo stesso
+modo da più processi, ETag uguali tra worker, app configurata dal profilo
+e fonte dati scelta per singola richiesta.
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from moduls.Core.SharedState import SharedDataVersions, SharedState
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.MarketData.TickerInfoCache import TickerInfoCache
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from moduls.Web.AppConfig import load_config
+from TickerDataManager import TickerDataManager
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+def _in_other_process(db_file, code):
+    """Esegue `code` con `state` = SharedState(db_file) in un interprete separato (un altro worker)."""
+    script = (f"import sys; sys.path.insert(0, {str(PROJECT_DIR)!r})\n"
+              f"from moduls.Core.SharedState import SharedState\n"
+              f"state = SharedState({str(db_file)!r})\n{code}")
+    return subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                          check=True).stdout.strip()
+
+
+def test_state_shared_between_processes():
+    """Impostazioni e attività scritte da un processo visibili all'altro; feed limitato"""
+    print("🗄️ Test stato condiviso tra processi...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'state' / 'app_state.sqlite3'
+        state = SharedState(db_file, max_activities=5)
+        assert not db_file.exists()
+        assert state.get_setting('use_adjusted', True) is True
+
+        _in_other_process(db_file, "state.set_setting('use_adjusted', False)\n"
+                                   "state.add_activity('Dati AAPL aggiornati', 'success')")
+        assert state.get_setting('use_adjusted') is False
+        assert [a['action'] for a in state.recent_activities()] == ['Dati AAPL aggiornati']
+
+        for i in range(8):
+            state.add_activity(f'Evento {i}')
+        activities = state.recent_activities(limit=10)
+        assert [a['action'] for a in activities] == [f'Evento {i}' for i in range(7, 2, -1)]
+        assert activities[0]['type'] == 'info'
+        assert _in_other_process(db_file, "print(len(state.recent_activities(limit=10)))") == '5'
+
+        # Un solo proprietario vivo per compito: questo processo, non l'altro
+        assert state.claim('update_scheduler') and state.claim('update_scheduler')
+        assert _in_other_process(db_file, "print(state.claim('update_scheduler'))") == 'False'
+        assert _in_other_process(db_file, "print(state.release('update_scheduler'))") == 'False'
+        assert state.owner('update_scheduler') is not None and state.release('update_scheduler')
+        assert state.owner('update_scheduler') is None
+
+        # Lease: uno alla volta anche tra thread dello stesso processo, rilascio solo col token
+        token = state.acquire_lease('update_run')
+        assert token and state.acquire_lease('update_run') is None
+        assert not state.release_lease('update_run', 'altro') and state.lease_holder('update_run')['token'] == token
+        assert state.release_lease('update_run', token) and state.lease_holder('update_run') is None
+    print("✅ Stesso stato in entrambi i processi")
+
+
+def test_shared_versions_etag():
+    """Due worker con SharedDataVersions: stesso ETag, la scrittura di uno invalida l'altro"""
+    print("🏷️ Test versioni condivise...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'app_state.sqlite3'
+        worker_a = SharedDataVersions(SharedState(db_file))
+        worker_b = SharedDataVersions(SharedState(db_file))
+
+        keys = [SharedDataVersions.ANALYSIS, SharedDataVersions.ticker_key('aapl')]
+        etag_a, modified_a = worker_a.validators(keys, ['/api/x'])
+        etag_b, modified_b = worker_b.validators(keys, ['/api/x'])
+        assert etag_a == etag_b and modified_a == modified_b and worker_a.epoch == worker_b.epoch
+
+        assert worker_a.bump_ticker('AAPL') == 1 and worker_b.bump_ticker('AAPL') == 2
+        assert worker_a.ticker('AAPL') == 2 and worker_b.get(SharedDataVersions.PRICES) == 2
+        assert worker_b.validators(keys, ['/api/x'])[0] != etag_a
+        assert worker_a.validators(keys, ['/api/x']) == worker_b.validators(keys, ['/api/x'])
+    print("✅ ETag uguali tra worker")
+
+
+def test_config_profiles():
+    """Profili di configurazione e sovrascritture dall'ambiente"""
+    print("⚙️ Test profili di configurazione...")
+
+    development = load_config('development')
+    production = load_config('production', DATA_DIR='/srv/data', SECRET_KEY='prod')
+    assert development['DEBUG'] and not development['SHARED_VERSIONS']
+    assert not production['DEBUG'] and production['SHARED_VERSIONS']
+    assert production['SHARED_STATE_FILE'] == str(Path('/srv/data') / 'state' / 'app_state.sqlite3')
+    try:
+        load_config('staging')
+    except ValueError as e:
+        assert 'staging' in str(e)
+    else:
+        raise AssertionError("Profilo sconosciuto accettato")
+    # In produzione la chiave delle sessioni va data dall'ambiente (o da gunicorn.conf.py)
+    try:
+        load_config('production', SECRET_KEY=None)
+    except ValueError as e:
+        assert 'SECRET_KEY' in str(e)
+    else:
+        raise AssertionError("Profilo production senza SECRET_KEY accettato")
+    print("✅ Profili development/production/testing")
+
+
+def test_app_factory_and_data_source():
+    """create_app con il profilo di produzione: feed e fonte dati nello stato condiviso"""
+    print("🏭 Test app factory...")
+
+    import app as webapp
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            app = webapp.create_app('production', DATA_DIR=tmp, SECRET_KEY='test')
+            # Configurare l'app non apre lo stato condiviso: lo crea la prima richiesta che lo usa
+            assert not Path(app.config['SHARED_STATE_FILE']).exists()
+            assert not app.debug and isinstance(webapp.data_versions.get(), SharedDataVersions)
+            assert webapp.ticker_manager.base_dir == Path(tmp)
+
+            client = app.test_client()
+            assert client.get('/api/technical-analysis/set-data-source').get_json()['use_adjusted'] is True
+            response = client.post('/api/technical-analysis/set-data-source', json={'use_adjusted': False})
+            assert response.get_json()['use_adjusted'] is False
+            # Un altro worker legge la stessa preferenza dal database
+            other = SharedState(app.config['SHARED_STATE_FILE'])
+            assert other.get_setting('use_adjusted') is False
+            # Senza ?source vale la preferenza salvata; ?source sceglie la fonte della singola richiesta
+            assert client.get('/api/technical-analysis/summary').get_json()['data_source'] == 'notAdjusted'
+            adjusted = client.get('/api/technical-analysis/summary?source=adjusted')
+            assert adjusted.get_json()['data_source'] == 'adjusted'
+            assert client.get('/api/technical-analysis/summary?source=adjusted',
+                              headers={'If-None-Match': adjusted.headers['ETag']}).status_code == 304
+
+            other.add_activity('Errore download XYZ: timeout', 'warning')
+            activities = client.get('/api/activities').get_json()
+            assert activities[0] == {'action': 'Errore download XYZ: timeout', 'time': 'Adesso', 'type': 'warning'}
+        finally:
+            webapp.create_app()
+    print("✅ Stato condiviso dall'app")
+
+
+def test_data_source_per_run():
+    """Fonte dati passata alla singola chiamata: risultati, stato e versioni separati per fonte"""
+    print("📊 Test fonte dati per singola run...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=4, as_of='2024-06-28'))
+        assert data_manager.add_ticker('MSFT')['status'] == 'success'
+        assert data_manager.update_ticker_data('MSFT')['status'] == 'success'
+
+        technical = TechnicalAnalysisManager(base_dir=tmp)
+        raw = technical.for_source(False)
+        assert technical.for_source(True) is technical and technical.for_source(False) is raw
+        assert raw.versions is technical.versions and raw.for_source(True) is technical
+        assert raw.analysis_dir == Path(tmp) / 'analysis' / 'notAdjusted'
+        assert raw.sr_manager.input_folder_prices == technical.data_dir_not_adj
+
+        adjusted_key, raw_key = technical.versions.analysis_key(True), technical.versions.analysis_key(False)
+        assert technical.run_support_resistance_analysis('weekly', use_adjusted=False).get('MSFT')
+        assert raw.sr_state_file.exists() and not technical.sr_state_file.exists()
+        assert technical.versions.get(raw_key) == 1 and technical.versions.get(adjusted_key) == 0
+        assert technical.sr_manager.input_folder_prices == technical.data_dir
+
+        # Entrambe le fonti in parallelo, ognuna con i propri file e la propria versione
+        results = technical.run_analysis_all_sources('sr')
+        assert set(results) == {'adjusted', 'notAdjusted'}
+        assert all(result['support_resistance'].get('MSFT') for result in results.values())
+        assert technical.sr_state_file.exists()
+        assert technical.versions.get(raw_key) == 2 and technical.versions.get(adjusted_key) == 1
+
+        summary = technical.get_analysis_summary(use_adjusted=False)
+        assert summary['data_source'] == 'notAdjusted' and technical.get_analysis_summary()['data_source'] == 'adjusted'
+    print("✅ Fonte dati valida solo per la chiamata")
+
+
+def test_info_cache_shared_between_workers():
+    """Cache info ticker scritta da due worker: nessuno cancella le voci dell'altro"""
+    print("🗂️ Test cache info tra worker...")
+
+    provider = SyntheticMarketDataProvider(seed=4, as_of='2024-06-28')
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = Path(tmp) / 'ticker_info.json'
+        # Entrambi i worker caricano la cache vuota prima che l'altro salvi
+        first = TickerInfoCache(cache_file, provider.fetch_info)
+        second = TickerInfoCache(cache_file, provider.fetch_info)
+        first.put_many({'AAPL': {'name': 'Apple CSV'}}, source='CSV', seed=True)
+        assert first.get('MSFT')['exchange'] == 'NMS'
+        assert second.get('NVDA')['exchange'] == 'NMS'
+
+        restarted = TickerInfoCache(cache_file, provider.fetch_info)
+        assert sorted(restarted._entries) == ['AAPL', 'MSFT', 'NVDA']
+        assert restarted._entries['AAPL']['info'] == {'name': 'Apple CSV'}
+
+        # Recupero più recente in un worker: vince sulla voce seminata, i campi del CSV restano
+        second.put('AAPL', provider.fetch_info('AAPL'))
+        first.invalidate('MSFT')
+        restarted = TickerInfoCache(cache_file, provider.fetch_info)
+        assert sorted(restarted._entries) == ['AAPL', 'NVDA']
+        aapl = restarted._entries['AAPL']
+        assert aapl['fetched_at'] and aapl['info']['name'] == 'Apple CSV' and aapl['info']['exchange'] == 'NMS'
+    print("✅ Voci di entrambi i worker conservate")
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test stato condiviso tra worker")
+    print("=" * 50)
+
+    tests = [
+        ("Stato condiviso tra processi", test_state_shared_between_processes),
+        ("Versioni condivise", test_shared_versions_etag),
+        ("Profili di configurazione", test_config_profiles),
+        ("App factory", test_app_factory_and_data_source),
+        ("Fonte dati per run", test_data_source_per_run),
+        ("Cache info tra worker", test_info_cache_shared_between_workers),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test delle zone Skorupinski multi-timeframe: caratteristiche delle candele
+calcolate una volta per serie (uguali ai criteri per singola candela), un
+solo job per daily/weekly/monthly con zone etichettate per timeframe.
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.TechnicalAnalysis.ImprovedSkorupinkiPatterns import ImprovedSkorupinkiPatterns
+from moduls.TechnicalAnalysis.SkorupinkiZoneManager import SkorupinkiZoneManager
+from moduls.TechnicalAnalysis.TechnicalAnalysisManager import TechnicalAnalysisManager
+from TickerDataManager import TickerDataManager
+
+
+def test_candle_features():
+    """Impulsi e basi vettorizzati uguali ai criteri per singola candela"""
+    print("🕯️ Test caratteristiche delle candele...")
+
+    df = SyntheticMarketDataProvider(seed=3, as_of='2024-06-28').fetch_history('MSFT').tail(600).reset_index(drop=True)
+    analyzer = ImprovedSkorupinkiPatterns(min_impulse_pct=1.2, max_base_bars=10)
+    features = analyzer.compute_features(df)
+
+    for i in range(1, len(df)):
+        candle, prev = df.iloc[i], df.iloc[i - 1]
+        assert features['bullish'][i] == analyzer._is_strong_impulse_candle(candle, prev, 'bullish'), i
+        assert features['bearish'][i] == analyzer._is_strong_impulse_candle(candle, prev, 'bearish'), i
+    assert not features['bullish'][0] and not features['bearish'][0] and features['base'][0]
+    assert features['bullish'].any() and features['bearish'].any() and features['base'][1:].any()
+
+    # Stessi pattern con le caratteristiche già calcolate o ricalcolate a ogni chiamata
+    patterns = analyzer.find_all_patterns(df, 200, features=features)
+    assert patterns and patterns == analyzer.find_all_patterns(df, 200)
+    for pattern in patterns:
+        assert pattern['leg_in_idx'] < pattern['base_start_idx'] <= pattern['base_end_idx'] < pattern['leg_out_idx']
+        assert pattern['zone_low'] <= pattern['zone_center'] <= pattern['zone_high']
+    print(f"✅ {len(df)} candele, {len(patterns)} pattern")
+
+
+def test_multi_timeframe_job():
+    """Un job per daily/weekly/monthly: caratteristiche calcolate una volta per timeframe, zone etichettate"""
+    print("🧭 Test job multi-timeframe...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = TickerDataManager(base_dir=tmp, provider=SyntheticMarketDataProvider(seed=11, as_of='2024-06-28'))
+        for ticker in ('AAPL', 'MSFT', 'NVDA'):
+            assert data_manager.add_ticker(ticker)['status'] == 'success'
+            assert data_manager.update_ticker_data(ticker)['status'] == 'success'
+        technical = TechnicalAnalysisManager(base_dir=tmp)
+
+        calls = []
+        original = ImprovedSkorupinkiPatterns.compute_features
+        ImprovedSkorupinkiPatterns.compute_features = lambda self, df: calls.append(len(df)) or original(self, df)
+        try:
+            results = technical.run_skorupinski_multi_timeframe()
+            assert results == {'AAPL': True, 'MSFT': True, 'NVDA': True}
+            assert len(calls) == 9  # 3 ticker x 3 timeframe
+
+            # Nessuna barra giornaliera nuova: il secondo job non ricalcola i ticker già salvati
+            # su tutti i timeframe
+            complete = [ticker for ticker in results if all(
+                (technical.skorupinski_output_dir / f"{ticker}_SkorupinkiZones{suffix}.csv").exists()
+                for suffix in ('', '_weekly', '_monthly'))]
+            calls.clear()
+            technical.run_skorupinski_multi_timeframe()
+            assert len(calls) == 3 * (3 - len(complete))
+        finally:
+            ImprovedSkorupinkiPatterns.compute_features = original
+
+        saved = {}
+        for timeframe, suffix in (('daily', ''), ('weekly', '_weekly'), ('monthly', '_monthly')):
+            for path in technical.skorupinski_output_dir.glob(f"*_SkorupinkiZones{suffix}.csv"):
+                if suffix == '' and path.stem.count('_') > 1:
+                    continue
+                zones = pd.read_csv(path, keep_default_na=False)
+                assert (zones['timeframe'] == timeframe).all(), path.name
+                saved.setdefault(timeframe, []).append(zones)
+        assert set(saved) == {'daily', 'weekly', 'monthly'}
+
+        # nested_in indica solo timeframe superiori
+        higher = {'daily': {'', 'weekly', 'monthly'}, 'weekly': {'', 'monthly'}, 'monthly': {''}}
+        for timeframe, frames in saved.items():
+            for zones in frames:
+                assert set(zones['nested_in']) <= higher[timeframe]
+
+        # Zone del grafico settimanale dal file del timeframe
+        chart = technical.get_ticker_analysis_data('NVDA', 'skorupinski', timeframe='weekly')
+        assert all(zone['timeframe'] == 'weekly' for zone in chart['skorupinski_zones'])
+    print(f"✅ Zone salvate: { {tf: sum(len(z) for z in frames) for tf, frames in saved.items()} }")
+
+
+def test_nested_zone_tagging():
+    """Una zona dentro una zona dello stesso tipo di un timeframe superiore"""
+    print("🪆 Test zone annidate...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = Path(tmp) / 'skorupinski_state.json'
+        state_file.write_text('{}')
+        manager = SkorupinkiZoneManager(state_file, Path(tmp), Path(tmp) / 'zones')
+        zones = {
+            'daily': [{'type': 'Demand', 'zone_bottom': 99.0, 'zone_top': 101.0, 'zone_center': 100.0},
+                      {'type': 'Supply', 'zone_bottom': 99.0, 'zone_top': 101.0, 'zone_center': 100.0},
+                      {'type': 'Demand', 'zone_bottom': 119.0, 'zone_top': 121.0, 'zone_center': 120.0}],
+            'weekly': [{'type': 'Demand', 'zone_bottom': 95.0, 'zone_top': 105.0, 'zone_center': 100.0}],
+            'monthly': [{'type': 'Demand', 'zone_bottom': 90.0, 'zone_top': 125.0, 'zone_center': 107.5}],
+        }
+        manager._tag_nested_zones(zones)
+        assert [zone['nested_in'] for zone in zones['daily']] == ['weekly', '', 'monthly']
+        assert zones['weekly'][0]['nested_in'] == 'monthly' and zones['monthly'][0]['nested_in'] == ''
+    print("✅ Annidamento OK")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test zone Skorupinski multi-timeframe")
+    print("=" * 50)
+
+    tests = [
+        ("Caratteristiche candele", test_candle_features),
+        ("Job multi-timeframe", test_multi_timeframe_job),
+        ("Zone annidate", test_nested_zone_tagging),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
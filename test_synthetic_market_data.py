@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Test del provider di dati sintetici e dell'integrazione con TickerDataManager.
+Non richiede connessione internet: usa SyntheticMarketDataProvider.
+"""
+
+import io
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from moduls.MarketData.CsvDirectoryProvider import CsvDirectoryProvider
+from moduls.MarketData.SegmentStore import read_segments
+from TickerDataManager import TickerDataManager
+
+
+def test_synthetic_determinism():
+    """Stesso seed e stesso ticker producono gli stessi dati"""
+    print("🔁 Test determinismo dati sintetici...")
+
+    a = SyntheticMarketDataProvider(seed=7, as_of='2024-06-28').fetch_history('AAPL')
+    b = SyntheticMarketDataProvider(seed=7, as_of='2024-06-28').fetch_history('AAPL')
+    c = SyntheticMarketDataProvider(seed=8, as_of='2024-06-28').fetch_history('AAPL')
+
+    assert a.equals(b), "Dati diversi con lo stesso seed"
+    assert not a['Close'].equals(c['Close']), "Seed diversi producono gli stessi prezzi"
+    print(f"✅ {len(a)} record riproducibili")
+
+
+def test_synthetic_ohlc_and_calendar():
+    """OHLC coerenti, festività escluse, gap di apertura presenti"""
+    print("\n📅 Test calendario e coerenza OHLC...")
+
+    data = SyntheticMarketDataProvider(as_of='2024-12-31').fetch_history('MSFT')
+    dates = pd.to_datetime(data['Date'])
+
+    assert (data['High'] >= data[['Open', 'Close']].max(axis=1) - 1e-4).all()
+    assert (data['Low'] <= data[['Open', 'Close']].min(axis=1) + 1e-4).all()
+    assert (dates.dt.weekday < 5).all(), "Sessioni nel weekend"
+    assert not ((dates.dt.month == 12) & (dates.dt.day == 25)).any(), "Sessione a Natale"
+    assert dates.is_monotonic_increasing and dates.is_unique
+
+    gaps = (data['Open'] / data['Close'].shift(1) - 1).abs()
+    assert (gaps > 0.03).any(), "Nessun gap di apertura generato"
+    print(f"✅ {len(data)} sessioni valide, {int((gaps > 0.03).sum())} gap")
+
+
+def test_synthetic_adjustments():
+    """Adj Close diverge da Close quando ci sono dividendi"""
+    print("\n💰 Test split e dividendi...")
+
+    provider = SyntheticMarketDataProvider(as_of='2024-12-31', split_probability=0.001)
+    checked = 0
+
+    for ticker in ['AAPL', 'MSFT', 'KO', 'PEP', 'JNJ', 'XOM']:
+        actions = provider.get_corporate_actions(ticker)
+        data = provider.fetch_history(ticker)
+        if actions['dividends']:
+            ratio = data['Adj Close'] / data['Close']
+            assert ratio.iloc[0] < ratio.iloc[-1], f"{ticker}: Adj Close non aggiustato per dividendi"
+            assert abs(ratio.iloc[-1] - 1.0) < 1e-9
+            checked += 1
+
+    assert checked > 0, "Nessun ticker con dividendi"
+    print(f"✅ {checked} ticker con Adj Close diverso da Close")
+
+
+def test_synthetic_history_is_stable():
+    """Avanzando as_of le date già emesse restano le stesse"""
+    print("\n⏩ Test stabilità storico con as_of crescente...")
+
+    before = SyntheticMarketDataProvider(as_of='2023-03-31').fetch_history('NVDA')
+    after = SyntheticMarketDataProvider(as_of='2023-06-30').fetch_history('NVDA')
+
+    assert after['Date'].iloc[:len(before)].tolist() == before['Date'].tolist()
+    assert len(after) > len(before)
+    print(f"✅ {len(after) - len(before)} nuove sessioni, storico invariato")
+
+
+def test_manager_with_synthetic_provider():
+    """Download completo e incrementale senza rete"""
+    print("\n📥 Test TickerDataManager con provider sintetico...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = SyntheticMarketDataProvider(as_of='2024-05-31')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+
+        first = manager.update_ticker_data('AMD')
+        assert first['status'] == 'success', first
+        meta = manager.load_ticker_meta('AMD')
+        assert meta['info']['exchange'] == 'NMS'
+
+        provider.as_of = datetime(2024, 6, 28).date()
+        second = manager.update_ticker_data('AMD')
+        assert second['status'] == 'success' and second['records'] > 0, second
+
+        stored = read_segments(manager.data_dir / 'AMD.csv')
+        assert stored['Date'].is_unique
+        assert stored['Date'].iloc[-1] == '2024-06-28'
+        assert manager.get_ticker_info('INVALID_TICKER') is None
+        print(f"✅ {first['records']} + {second['records']} record scritti")
+
+
+def test_batch_fetch_and_csv_replay():
+    """fetch_batch parallelo e replay dei CSV salvati dal manager"""
+    print("📦 Test download batch e replay CSV...")
+
+    provider = SyntheticMarketDataProvider(seed=3, as_of='2024-06-28', max_workers=8)
+    tickers = ['AAPL', 'MSFT', 'ISP.MI', 'INVALID_X']
+    batch = provider.fetch_batch(tickers, start_date='2024-01-01')
+
+    assert set(batch) == set(tickers)
+    assert batch['INVALID_X'] is None
+    for ticker in tickers[:3]:
+        assert batch[ticker].equals(provider.fetch_history(ticker, start_date='2024-01-01'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        assert manager.update_ticker_data('AAPL')['status'] == 'success'
+
+        replay = CsvDirectoryProvider(tmp + '/data')
+        original = provider.fetch_history('AAPL')
+        replayed = replay.fetch_history('AAPL')
+        assert len(replayed) == len(original)
+        assert (replayed['Date'].values == original['Date'].values).all()
+        assert abs(replayed['Adj Close'] - original['Adj Close']).max() < 1e-4
+        assert len(replay.fetch_history('AAPL', '2024-01-01', '2024-02-01')) == len(
+            original[(original['Date'] >= '2024-01-01') & (original['Date'] < '2024-02-01')])
+        assert replay.fetch_history('MSFT') is None
+    print(f"✅ {len(tickers)} ticker in batch, {len(replayed)} record rigiocati")
+
+
+def test_ticker_info_cache():
+    """Info ticker da cache: niente lookup ripetuti, CSV e TTL rispettati"""
+    print("🗂️ Test cache info ticker...")
+
+    class CountingProvider(SyntheticMarketDataProvider):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.info_calls = 0
+
+        def fetch_info(self, ticker):
+            self.info_calls += 1
+            return super().fetch_info(ticker)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = CountingProvider(seed=5, as_of='2024-06-28')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+
+        assert manager.add_ticker('AAPL')['status'] == 'success'
+        assert manager.update_ticker_data('AAPL')['status'] == 'success'
+        assert provider.info_calls == 1, provider.info_calls
+
+        # 100 ticker da CSV: nessuna chiamata info all'import né durante il primo
+        # download; exchange e valuta della fonte arrivano in background nei metadati
+        rows = ['Ticker,Company,Sector,Industry'] + [f'T{i:03d},Company {i},Tech,Software' for i in range(100)]
+        upload = io.BytesIO('\n'.join(rows).encode('utf-8'))
+        assert manager.process_csv_upload(upload)['status'] == 'success'
+        assert provider.info_calls == 1, provider.info_calls
+        assert 'exchange' not in manager.load_ticker_meta('T042')['info']
+        assert manager.update_ticker_data('T042')['status'] == 'success'
+        assert manager.load_ticker_meta('T042')['info']['name'] == 'Company 42'
+        manager.info_cache.wait_for_refresh()
+        assert provider.info_calls == 2, provider.info_calls
+        info = manager.load_ticker_meta('T042')['info']
+        assert info['name'] == 'Company 42' and info['sector'] == 'Tech' and info['exchange'] == 'NMS'
+        assert manager.get_ticker_info('T042') == info and provider.info_calls == 2
+
+        # La cache sopravvive al riavvio
+        restarted = TickerDataManager(base_dir=tmp, provider=provider)
+        assert len(restarted.info_cache) == 101
+        assert restarted.get_ticker_info('AAPL')['exchange'] == 'NMS'
+        assert provider.info_calls == 2
+
+        # Voce scaduta: restituita subito e aggiornata in background, i campi del CSV restano
+        restarted.info_cache.ttl = timedelta(0)
+        assert restarted.get_ticker_info('T042')['name'] == 'Company 42'
+        restarted.info_cache.wait_for_refresh()
+        assert provider.info_calls == 3
+        assert restarted.info_cache._entries['T042']['info']['name'] == 'Company 42'
+
+        # Info segnaposto della fonte: restituite ma mai considerate valide
+        restarted.info_cache.ttl = timedelta(days=7)
+        restarted.info_cache.put('T001', {'symbol': 'T001', 'name': 'T001 (verificato)', 'partial': True})
+        assert restarted.get_ticker_info('T001')['name'] == 'Company 1'
+        restarted.info_cache.wait_for_refresh()
+        assert provider.info_calls == 4
+        assert restarted.get_ticker_info('T001')['exchange'] == 'NMS'
+        assert not restarted.info_cache._entries['T001'].get('partial')
+    print("✅ Info da cache, CSV completato dalla fonte in background")
+
+
+def test_process_ticker_data_vectorized():
+    """Aggiustamento vettoriale: nulli, zeri, rapporti anomali e float32"""
+    print("🧮 Test processamento vettoriale...")
+
+    provider = SyntheticMarketDataProvider(seed=9, as_of='2024-06-28')
+    raw = provider.fetch_history('AAPL', start_date='2020-01-01')
+    raw.loc[5:6, 'Close'] = np.nan
+    raw.loc[10, 'Adj Close'] = np.nan
+    raw.loc[12, 'Close'] = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        not_adj, adj = manager.process_ticker_data(raw.copy(), 'AAPL')
+
+        assert list(not_adj.columns) == ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+        assert list(adj.columns) == list(raw.columns)
+        assert not_adj['Close'].iloc[5] == raw['Close'].iloc[4]
+        assert adj['Close'].iloc[10] == raw['Adj Close'].iloc[9]
+        assert (adj['Close'] == adj['Adj Close']).all()
+        ratio = raw['Adj Close'].iloc[100] / raw['Close'].iloc[100]
+        assert abs(adj['Open'].iloc[100] - raw['Open'].iloc[100] * ratio) < 1e-9
+        assert adj['Open'].iloc[12] == raw['Open'].iloc[12] * 100  # rapporto limitato a 100
+        assert adj['Volume'].dtype == np.int64
+
+        manager32 = TickerDataManager(base_dir=tmp, provider=provider, price_dtype=np.float32)
+        not_adj32, adj32 = manager32.process_ticker_data(raw.copy(), 'AAPL')
+        assert adj32['Open'].dtype == np.float32 and not_adj32['Close'].dtype == np.float32
+        assert np.allclose(adj32['Open'], adj['Open'], rtol=1e-6)
+
+        raw.loc[3, 'Volume'] = np.nan
+        assert manager.process_ticker_data(raw, 'AAPL') == (None, None)
+    print(f"✅ {len(adj)} record aggiustati")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test dati sintetici")
+    print("=" * 50)
+
+    tests = [
+        ("Determinismo", test_synthetic_determinism),
+        ("Calendario e OHLC", test_synthetic_ohlc_and_calendar),
+        ("Split e dividendi", test_synthetic_adjustments),
+        ("Stabilità storico", test_synthetic_history_is_stable),
+        ("TickerDataManager offline", test_manager_with_synthetic_provider),
+        ("Batch e replay CSV", test_batch_fetch_and_csv_replay),
+        ("Cache info ticker", test_ticker_info_cache),
+        ("Processamento vettoriale", test_process_ticker_data_vectorized),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
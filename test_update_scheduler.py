@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Test dello scheduler degli aggiornamenti: solo i ticker con una nuova sessione
+chiusa vengono scaricati, nessuna richiesta di rete per quelli già aggiornati,
+pianificazione cron, stato e lease condivisi tra processi.
+"""
+
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from moduls.Core.SharedState import SharedState
+from moduls.MarketData.SyntheticMarketDataProvider import SyntheticMarketDataProvider
+from TickerDataManager import TickerDataManager
+from UpdateScheduler import CronSchedule, UpdateScheduler
+from testing_support import utc
+
+
+class CountingProvider(SyntheticMarketDataProvider):
+    """Provider sintetico che registra le richieste di storico e i download in blocco"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+        self.batches = []
+
+    def fetch_batch(self, tickers, start_date=None, end_date=None):
+        tickers = list(tickers)
+        self.batches.append((tickers, start_date))
+        return super().fetch_batch(tickers, start_date, end_date)
+
+    def fetch_history(self, ticker, start_date=None, end_date=None):
+        self.requests.append(ticker)
+        return super().fetch_history(ticker, start_date, end_date)
+
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+def _other_worker(db_file, code):
+    """
+    Avvia un altro interprete (un altro worker) con `state` = SharedState(db_file)
+    che esegue `code`, stampa 'ready' e resta vivo finché non si chiude il suo stdin.
+    """
+    script = (f"import sys; sys.path.insert(0, {str(PROJECT_DIR)!r})\n"
+              f"from moduls.Core.SharedState import SharedState\n"
+              f"from UpdateScheduler import UpdateScheduler\n"
+              f"state = SharedState({str(db_file)!r})\n{code}\n"
+              f"print('ready', flush=True)\nsys.stdin.read()")
+    process = subprocess.Popen([sys.executable, '-c', script], stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, text=True)
+    assert process.stdout.readline().strip() == 'ready'
+    return process
+
+
+def _stop_worker(process):
+    process.stdin.close()
+    process.wait(10)
+    process.stdout.close()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_cron_schedule():
+    """Espressioni cron: prossimo scatto, giorni feriali, passi e validazione"""
+    print("⏱️ Test pianificazione cron...")
+
+    weekdays = CronSchedule('30 22 * * 1-5')
+    # Venerdì sera dopo le 22:30 -> lunedì
+    assert weekdays.next_after(datetime(2024, 6, 14, 23, 0)) == datetime(2024, 6, 17, 22, 30)
+    assert weekdays.next_after(datetime(2024, 6, 17, 22, 29, 59)) == datetime(2024, 6, 17, 22, 30)
+
+    quarter = CronSchedule('*/15 * * * *')
+    assert quarter.next_after(datetime(2024, 6, 15, 10, 7)) == datetime(2024, 6, 15, 10, 15)
+    assert quarter.next_after(datetime(2024, 6, 15, 23, 50)) == datetime(2024, 6, 16, 0, 0)
+
+    # Giorno del mese e della settimana entrambi ristretti: basta uno dei due (come cron)
+    either = CronSchedule('0 9 1 * 0')
+    assert either.next_after(datetime(2024, 6, 3, 12, 0)) == datetime(2024, 6, 9, 9, 0)
+    assert CronSchedule('0 9 * * 7').matches(datetime(2024, 6, 9, 9, 0))
+
+    for expression in ('* * * *', '61 * * * *', '0 9 31 2-2/0 *'):
+        with pytest.raises(ValueError):
+            CronSchedule(expression)
+    with pytest.raises(ValueError):
+        CronSchedule('0 0 31 2 *').next_after(datetime(2024, 1, 1))
+    print("✅ Pianificazione cron OK")
+
+
+def test_only_due_tickers_are_downloaded():
+    """Weekend e borsa ancora aperta: nessuna richiesta; dopo la chiusura solo i ticker di quella borsa"""
+    print("🔄 Test ticker da aggiornare...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = CountingProvider(seed=3, as_of='2024-06-14')
+        manager = TickerDataManager(base_dir=tmp, provider=provider)
+        for ticker in ('AAPL', 'KO', 'ENI.MI'):
+            manager.add_ticker(ticker)
+            assert manager.update_ticker_data(ticker)['status'] == 'success'
+        manager.add_ticker('MSFT')  # mai scaricato: sempre da aggiornare
+        scheduler = UpdateScheduler(manager, max_workers=3)
+
+        # Sabato: tutto aggiornato tranne il ticker senza dati
+        provider.requests.clear()
+        due, current = scheduler.due_tickers(now=utc(2024, 6, 15, 12, 0))
+        assert due == ['MSFT'] and sorted(current) == ['AAPL', 'ENI.MI', 'KO'], (due, current)
+        run = scheduler.run(now=utc(2024, 6, 15, 12, 0))
+        assert provider.requests == ['MSFT'], provider.requests
+        assert provider.batches == [(['MSFT'], None)], provider.batches
+        assert run['summary'] == {'total_tickers': 4, 'due_tickers': 1, 'skipped_tickers': 3,
+                                  'updated_tickers': 1, 'failed_tickers': 0,
+                                  'total_new_records': run['results'][3]['records']}, run['summary']
+        assert [r['ticker'] for r in run['results']] == ['AAPL', 'KO', 'ENI.MI', 'MSFT']
+        assert run['results'][0]['skipped'] and run['results'][0]['records'] == 0
+
+        # Lunedì 17 giugno alle 16:00 UTC: Milano ha chiuso, New York no
+        provider.as_of = provider._to_date('2024-06-17')
+        provider.requests.clear()
+        due, _ = scheduler.due_tickers(now=utc(2024, 6, 17, 16, 0))
+        assert due == ['ENI.MI'], due
+        run = scheduler.run(now=utc(2024, 6, 17, 16, 0))
+        assert provider.requests == ['ENI.MI'] and run['summary']['updated_tickers'] == 1, run['summary']
+
+        # Dopo la chiusura di New York tocca ai ticker USA: un solo download in blocco
+        provider.requests.clear()
+        provider.batches.clear()
+        run = scheduler.run(now=utc(2024, 6, 17, 21, 0))
+        assert sorted(provider.requests) == ['AAPL', 'KO', 'MSFT'], provider.requests
+        assert [sorted(tickers) for tickers, _ in provider.batches] == [['AAPL', 'KO', 'MSFT']], provider.batches
+        assert run['summary']['due_tickers'] == 3 and run['summary']['failed_tickers'] == 0
+        assert manager.load_ticker_meta('AAPL')['last_close_date'] == '2024-06-17'
+
+        # Di nuovo nella stessa finestra: nessuna richiesta
+        provider.requests.clear()
+        assert scheduler.run(now=utc(2024, 6, 17, 22, 0))['summary']['due_tickers'] == 0
+        assert provider.requests == []
+
+        # force=True passa comunque tutti i ticker a update_ticker_data
+        assert scheduler.run(force=True)['summary']['due_tickers'] == 4
+        assert scheduler.last_run['trigger'] == 'manual'
+    print("✅ Solo i ticker da aggiornare vengono scaricati")
+
+
+def test_overlapping_runs_and_background_loop():
+    """Esecuzioni sovrapposte rifiutate; il thread di pianificazione si avvia e si ferma"""
+    print("🧵 Test esecuzioni sovrapposte...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TickerDataManager(base_dir=tmp, provider=CountingProvider(seed=3, as_of='2024-06-14'))
+        manager.add_ticker('AAPL')
+        scheduler = UpdateScheduler(manager, schedule='0 22 * * 1-5')
+
+        started, release = threading.Event(), threading.Event()
+
+        def slow_update(ticker, prefetched=None):
+            started.set()
+            release.wait(5)
+            return {'status': 'success', 'records': 1}
+
+        with mock.patch.object(manager, 'update_ticker_data', side_effect=slow_update):
+            worker = threading.Thread(target=scheduler.run)
+            worker.start()
+            assert started.wait(5)
+            assert scheduler.status()['in_progress']
+            assert scheduler.run()['status'] == 'info'
+            release.set()
+            worker.join(5)
+        assert scheduler.last_run['summary']['updated_tickers'] == 1
+
+        scheduler.start()
+        status = scheduler.status()
+        assert status['running'] and status['schedule'] == '0 22 * * 1-5'
+        scheduler.stop(timeout=5)
+        assert not scheduler.status()['running'] and scheduler.status()['next_run'] is None
+    print("✅ Esecuzioni sovrapposte OK")
+
+
+def test_shared_schedule_and_run_lease():
+    """start/stop/status validi da ogni worker; esecuzioni complete escluse tra processi"""
+    print("🔀 Test scheduler condiviso tra worker...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'app_state.sqlite3'
+        manager = TickerDataManager(base_dir=tmp, provider=CountingProvider(seed=3, as_of='2024-06-14'))
+        manager.add_ticker('AAPL')
+        store = SharedState(db_file)
+        scheduler = UpdateScheduler(manager, store=store, schedule='0 22 * * 1-5', poll_seconds=0.05)
+
+        # Un altro worker possiede il thread di pianificazione
+        owner = _other_worker(db_file, "scheduler = UpdateScheduler(None, store=state, schedule='0 22 * * 1-5', "
+                                       "poll_seconds=0.05)\nscheduler.start()")
+        try:
+            assert store.owner('update_scheduler') == owner.pid
+            assert _wait_for(lambda: scheduler.status()['next_run'] is not None)
+            status = scheduler.status()
+            assert status['running'] and status['schedule'] == '0 22 * * 1-5' and not scheduler.is_running
+
+            # start con una nuova espressione da questo worker: la applica il proprietario
+            scheduler.start('30 21 * * 1-5')
+            assert not scheduler.is_running and store.owner('update_scheduler') == owner.pid
+            assert _wait_for(lambda: scheduler.status()['next_run'].endswith('21:30:00'))
+
+            # stop da questo worker: il proprietario ferma il thread e libera il compito
+            scheduler.stop(timeout=5)
+            assert not scheduler.status()['running'] and scheduler.status()['next_run'] is None
+            assert _wait_for(lambda: store.owner('update_scheduler') is None)
+            # Una ripartenza del processo non riattiva una pianificazione fermata
+            scheduler.resume()
+            assert not scheduler.is_running and not scheduler.status()['running']
+        finally:
+            _stop_worker(owner)
+
+        # Senza proprietari vivi il thread parte in questo processo
+        scheduler.start()
+        assert scheduler.is_running and store.owner('update_scheduler') is not None
+        assert scheduler.status()['schedule'] == '30 21 * * 1-5'
+        scheduler.stop(timeout=5)
+        assert store.owner('update_scheduler') is None
+
+        # Un aggiornamento completo in corso in un altro worker blocca quelli di questo
+        runner = _other_worker(db_file, "assert state.acquire_lease('update_scheduler:run')")
+        try:
+            assert scheduler.status()['in_progress']
+            assert scheduler.run()['status'] == 'info'
+        finally:
+            _stop_worker(runner)
+        # Il lease di un processo terminato non blocca più
+        assert not scheduler.status()['in_progress']
+        assert scheduler.run()['status'] == 'success'
+        other = UpdateScheduler(manager, store=SharedState(db_file))
+        assert other.last_run['summary']['due_tickers'] == 1 and store.lease_holder('update_scheduler:run') is None
+    print("✅ Scheduler condiviso OK")
+
+
+def main():
+    """Esegue tutti i test"""
+    print("🚀 Avvio test scheduler aggiornamenti")
+    print("=" * 50)
+
+    tests = [
+        ("Pianificazione cron", test_cron_schedule),
+        ("Ticker da aggiornare", test_only_due_tickers_are_downloaded),
+        ("Esecuzioni sovrapposte", test_overlapping_runs_and_background_loop),
+        ("Scheduler condiviso", test_shared_schedule_and_run_lease),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test_name}: {e}")
+
+    print(f"\n🎯 Risultato: {passed}/{len(tests)} test passati")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    main()
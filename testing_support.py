@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Helper condivisi dai test: orari UTC e confronto dello storico salvato con
+un download completo.
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from moduls.MarketData import SegmentStore
+from TickerDataManager import TickerDataManager
+
+
+def utc(*args):
+    """datetime in UTC (stessi argomenti di datetime)"""
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def assert_matches_full_download(tmp, manager, provider, ticker, closures=()):
+    """
+    Lo storico aggiornato coincide con un download completo alla stessa data
+    (in <tmp>/ref), escluse le date `closures` (chiusure verificate senza barra).
+    """
+    reference = TickerDataManager(base_dir=Path(tmp) / 'ref', provider=provider)
+    assert reference.update_ticker_data(ticker)['status'] == 'success'
+
+    for stored_file, expected_file in (
+            (manager.data_dir / f"{ticker}.csv", reference.data_dir / f"{ticker}.csv"),
+            (manager.data_dir_not_adj / f"{ticker}_notAdjusted.csv",
+             reference.data_dir_not_adj / f"{ticker}_notAdjusted.csv")):
+        stored = SegmentStore.read_segments(stored_file)
+        expected = pd.read_csv(expected_file, dtype={'Date': str})
+        expected = expected[~expected['Date'].isin(closures)].reset_index(drop=True)
+        # I volumi riscalati da uno split possono diventare float
+        pd.testing.assert_frame_equal(stored.drop(columns='Volume'), expected.drop(columns='Volume'), rtol=1e-9)
+        pd.testing.assert_series_equal(stored['Volume'], expected['Volume'], check_dtype=False, rtol=1e-6)
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Punto di ingresso WSGI per il profilo di produzione.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Senza APP_ENV viene usato il profilo production (DEBUG disattivato, ETag
+da versioni condivise tra i worker); DATA_DIR, SECRET_KEY e le altre
+chiavi di moduls/Web/AppConfig.py si impostano dall'ambiente. SECRET_KEY è
+obbligatoria: gunicorn.conf.py ne genera una nel master se manca.
+"""
+
+import os
+
+os.environ.setdefault('APP_ENV', 'production')
+
+from app import app, start_background_jobs  # noqa: E402
+
+__all__ = ['app', 'start_background_jobs']